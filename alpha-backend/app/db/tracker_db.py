@@ -85,11 +85,26 @@ def init_tracker_db() -> Optional[bool]:
     _migrate_tracker_option_ad_columns(engine)
     _migrate_tracker_followup_table(engine)
     _migrate_tracker_followup_ad_table(engine)
+    _migrate_tracker_application_indexes(engine)
     _drop_tracker_location_everywhere(engine)
     _drop_unused_tracker_tables(engine)
     return True
 
 
+def _migrate_tracker_application_indexes(engine) -> None:
+    """Ensure the (candidate_id, created_at) composite index exists on pre-existing tables (best-effort)."""
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        for table in ("tracker_application", "tracker_application_ad"):
+            try:
+                conn.execute(
+                    text(f'CREATE INDEX IF NOT EXISTS ix_{table}_candidate_created ON "{table}" (candidate_id, created_at)')
+                )
+            except Exception:
+                pass
+
+
 def _drop_tracker_location_everywhere(engine) -> None:
     """Destructive cleanup (requested): remove all Tracker 'location' storage and options.
 
@@ -5,14 +5,16 @@ Readability and docstrings improved without altering behavior.
 """
 
 import os
+from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlmodel import Session, select
 
 from app.db.auth_db import get_session
 from app.models.user import User
 from app.utils.security import decode_token
+from app.utils.user_cache import get_user_cache
 
 bearer = HTTPBearer(auto_error=True)
 
@@ -25,6 +27,10 @@ def get_current_user(
     Accepts a Bearer token, decodes it, and fetches the corresponding user
     from the auth database. In development, supports a local mock user when
     `LOCAL_AUTH=true` or `NODE_ENV=development`.
+
+    Active users are cached briefly per (username, token iat) so polling
+    endpoints don't query the auth DB on every request; admin changes to a
+    user invalidate the entry (see app/utils/user_cache.py).
     """
     try:
         data = decode_token(token.credentials)
@@ -53,14 +59,33 @@ def get_current_user(
 
             return MockUser()
 
+    cache = get_user_cache()
+    # Tokens issued before iat was added fall back to exp, which is also per-token
+    token_key = data.get("iat") or data.get("exp")
+    cached = cache.get(username, token_key)
+    if cached is not None:
+        return User(**cached)
+
     user = session.exec(select(User).where(User.username == username)).first()
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Inactive or unknown user",
         )
+    cache.set(username, token_key, user.model_dump())
     return user
 
+def get_optional_username(request: Request) -> Optional[str]:
+    """Username from a valid Bearer token, or None (no DB lookup, never raises)."""
+    header = request.headers.get("Authorization") or ""
+    scheme, _, credentials = header.partition(" ")
+    if scheme.lower() != "bearer" or not credentials:
+        return None
+    try:
+        return decode_token(credentials.strip()).get("sub")
+    except Exception:
+        return None
+
 def require_user(user: User = Depends(get_current_user)) -> User:
     """Ensure a valid authenticated user is present."""
     return user
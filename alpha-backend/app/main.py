@@ -194,10 +194,22 @@ async def lifespan(app: FastAPI):
         else:
             logger.info("⏸️ Email scheduler is DISABLED (ENABLE_EMAIL_SCHEDULER!=true)")
 
+        # Host/process gauges for /metrics are sampled off the event loop
+        from app.utils.metrics import get_system_sampler
+        metrics_sampler = get_system_sampler()
+        metrics_sampler.start()
+
+        # Cross-worker invalidation for the authenticated-user cache (no-op without Redis)
+        from app.utils.user_cache import get_user_cache_listener
+        user_cache_listener = get_user_cache_listener()
+        user_cache_listener.start()
+
         logger.info("🎉 Startup complete")
         yield
         # Graceful shutdown
         logger.info("🛑 Shutting down CV Analyzer API...")
+        metrics_sampler.stop()
+        user_cache_listener.stop()
         if followup_stop is not None:
             followup_stop.set()
         if followup_task:
@@ -278,6 +290,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Rate limiting middleware (MUST be first)
@@ -318,6 +331,10 @@ async def add_security_headers(request, call_next):
     
     return response
 
+# API analytics middleware (added last so it is outermost and times the full stack)
+from app.middleware.api_analytics import APIAnalyticsMiddleware
+app.add_middleware(APIAnalyticsMiddleware)
+
 # --------------------
 # Routes
 # --------------------
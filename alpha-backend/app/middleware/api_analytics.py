@@ -1,137 +1,224 @@
 """
 API Usage Analytics Middleware
 Tracks endpoint usage, response times, and data volumes without affecting performance.
+
+Stats are keyed by route template (``GET /api/cv/{cv_id}``) rather than raw path,
+latencies go into fixed-bucket histograms, and the number of tracked endpoints is
+capped, so memory stays bounded no matter how many distinct URLs are requested.
 """
 
 import time
 import logging
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
-from typing import Dict, Any
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
-class APIAnalyticsMiddleware(BaseHTTPMiddleware):
+# Latency bucket upper bounds in seconds (Prometheus "le" values, +Inf implied)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+# Key used for requests that did not match any route (404s, probes, scanners)
+UNMATCHED_ROUTE = "__unmatched__"
+# Key used once max_endpoints distinct keys are being tracked
+OVERFLOW_ROUTE = "__other__"
+
+
+class EndpointStats:
+    """Fixed-size counters and latency histogram for one method + route template."""
+
+    __slots__ = (
+        "call_count", "error_count", "total_response_time",
+        "total_response_size", "last_called", "bucket_counts",
+    )
+
+    def __init__(self):
+        self.call_count = 0
+        self.error_count = 0
+        self.total_response_time = 0.0
+        self.total_response_size = 0
+        self.last_called = 0.0  # wall clock seconds, formatted only on read
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, response_time: float, response_size: int, status_code: int, now: float):
+        self.call_count += 1
+        self.total_response_time += response_time
+        self.total_response_size += response_size
+        self.last_called = now
+        if status_code >= 400:
+            self.error_count += 1
+        self.bucket_counts[bisect_left(LATENCY_BUCKETS, response_time)] += 1
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate the q-th quantile (0-1) in seconds from the histogram.
+        Interpolates linearly inside the bucket, like Prometheus histogram_quantile.
+        """
+        if self.call_count == 0:
+            return 0.0
+        rank = q * self.call_count
+        cumulative = 0
+        for i, count in enumerate(self.bucket_counts):
+            if count and cumulative + count >= rank:
+                if i >= len(LATENCY_BUCKETS):
+                    # Overflow bucket has no upper bound - report the last finite one
+                    return LATENCY_BUCKETS[-1]
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i]
+                return lower + (upper - lower) * ((rank - cumulative) / count)
+            cumulative += count
+        return LATENCY_BUCKETS[-1]
+
+
+class APIAnalyticsMiddleware:
     """
-    Lightweight middleware to track API usage patterns and performance.
+    Lightweight pure-ASGI middleware to track API usage patterns and performance.
     Helps identify truly unused endpoints and performance bottlenecks.
+
+    Per request it does one dict lookup, a handful of integer adds and a bisect
+    over the bucket bounds; nothing is allocated per call.
     """
-    
-    def __init__(self, app, max_records: int = 10000):
-        super().__init__(app)
-        self.max_records = max_records
-        
-        # Thread-safe counters (using defaultdict for simplicity)
-        self.endpoint_stats = defaultdict(lambda: {
-            "call_count": 0,
-            "total_response_time": 0.0,
-            "total_response_size": 0,
-            "last_called": None,
-            "error_count": 0,
-            "recent_calls": deque(maxlen=100)  # Keep last 100 calls per endpoint
-        })
-        
+
+    def __init__(self, app, max_endpoints: int = 500):
+        self.app = app
+        self.max_endpoints = max_endpoints
+        self.endpoint_stats: Dict[str, EndpointStats] = {}
+
         # Overall API stats
         self.total_requests = 0
         self.start_time = time.time()
-    
-    async def dispatch(self, request: Request, call_next):
-        """Track API calls without impacting performance"""
-        start_time = time.time()
-        endpoint_key = f"{request.method} {request.scope.get('path', request.url.path)}"
-        
-        # Call the actual endpoint
-        response = await call_next(request)
-        
-        # Calculate metrics
-        response_time = time.time() - start_time
-        response_size = int(response.headers.get("content-length", 0))
-        
-        # Update stats (async-safe)
+
+        # Starlette builds middleware lazily, so register the live instance here
+        if app is not None:
+            set_analytics_middleware(self)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
         try:
-            self._update_stats(endpoint_key, response_time, response_size, response.status_code)
-        except Exception as e:
-            # Never let analytics break the actual API
-            logger.warning(f"Analytics update failed: {e}")
-        
-        return response
-    
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            try:
+                self._update_stats(
+                    self._endpoint_key(scope),
+                    time.perf_counter() - start,
+                    response_size,
+                    status_code,
+                )
+            except Exception as e:
+                # Never let analytics break the actual API
+                logger.warning(f"Analytics update failed: {e}")
+
+    @staticmethod
+    def _endpoint_key(scope) -> str:
+        """Method + route template; the router stores the matched route in the scope."""
+        route = scope.get("route")
+        path = getattr(route, "path", None) or UNMATCHED_ROUTE
+        return f"{scope.get('method', 'GET')} {path}"
+
     def _update_stats(self, endpoint: str, response_time: float, response_size: int, status_code: int):
         """Update endpoint statistics"""
-        stats = self.endpoint_stats[endpoint]
-        
-        # Basic counters
-        stats["call_count"] += 1
-        stats["total_response_time"] += response_time
-        stats["total_response_size"] += response_size
-        stats["last_called"] = datetime.utcnow().isoformat()
-        
-        if status_code >= 400:
-            stats["error_count"] += 1
-        
-        # Recent calls for trend analysis
-        stats["recent_calls"].append({
-            "timestamp": datetime.utcnow().isoformat(),
-            "response_time": response_time,
-            "status_code": status_code,
-            "response_size": response_size
-        })
-        
-        # Global counter
+        stats = self.endpoint_stats.get(endpoint)
+        if stats is None:
+            if len(self.endpoint_stats) >= self.max_endpoints:
+                endpoint = OVERFLOW_ROUTE
+                stats = self.endpoint_stats.get(endpoint)
+            if stats is None:
+                stats = self.endpoint_stats[endpoint] = EndpointStats()
+
+        stats.observe(response_time, response_size, status_code, time.time())
         self.total_requests += 1
-    
+
+    def render_prometheus(self) -> List[str]:
+        """Render request histograms and counters in Prometheus text format."""
+        lines = [
+            "# HELP http_request_duration_seconds HTTP request latency by route template",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        # Snapshot so concurrent requests can't resize the dict mid-iteration
+        items = list(self.endpoint_stats.items())
+        for endpoint, stats in items:
+            labels = _labels_for(endpoint)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.call_count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.total_response_time}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {stats.call_count}")
+
+        lines.append("# HELP http_request_errors_total HTTP responses with status >= 400 by route template")
+        lines.append("# TYPE http_request_errors_total counter")
+        for endpoint, stats in items:
+            lines.append(f"http_request_errors_total{{{_labels_for(endpoint)}}} {stats.error_count}")
+
+        lines.append("# HELP http_response_size_bytes_total Response body bytes sent by route template")
+        lines.append("# TYPE http_response_size_bytes_total counter")
+        for endpoint, stats in items:
+            lines.append(f"http_response_size_bytes_total{{{_labels_for(endpoint)}}} {stats.total_response_size}")
+        return lines
+
     def get_analytics_summary(self) -> Dict[str, Any]:
         """Get comprehensive analytics summary"""
         now = time.time()
         uptime_hours = (now - self.start_time) / 3600
-        
+        items = list(self.endpoint_stats.items())
+
         # Calculate endpoint analytics
         endpoint_analytics = {}
-        for endpoint, stats in self.endpoint_stats.items():
-            avg_response_time = stats["total_response_time"] / max(stats["call_count"], 1)
-            avg_response_size = stats["total_response_size"] / max(stats["call_count"], 1)
-            error_rate = (stats["error_count"] / max(stats["call_count"], 1)) * 100
-            
+        for endpoint, stats in items:
+            calls = max(stats.call_count, 1)
             endpoint_analytics[endpoint] = {
-                "call_count": stats["call_count"],
-                "avg_response_time_ms": round(avg_response_time * 1000, 2),
-                "avg_response_size_kb": round(avg_response_size / 1024, 2),
-                "error_rate_percent": round(error_rate, 2),
-                "last_called": stats["last_called"],
-                "calls_per_hour": round(stats["call_count"] / max(uptime_hours, 0.1), 2)
+                "call_count": stats.call_count,
+                "avg_response_time_ms": round(stats.total_response_time / calls * 1000, 2),
+                "p50_response_time_ms": round(stats.percentile(0.50) * 1000, 2),
+                "p95_response_time_ms": round(stats.percentile(0.95) * 1000, 2),
+                "p99_response_time_ms": round(stats.percentile(0.99) * 1000, 2),
+                "avg_response_size_kb": round(stats.total_response_size / calls / 1024, 2),
+                "error_rate_percent": round(stats.error_count / calls * 100, 2),
+                "last_called": _isoformat(stats.last_called),
+                "calls_per_hour": round(stats.call_count / max(uptime_hours, 0.1), 2)
             }
-        
+
         # Identify unused endpoints (not called in last hour)
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
+        one_hour_ago = now - 3600
+        one_day_ago = now - 86400
         unused_endpoints = []
         rarely_used_endpoints = []
-        
-        for endpoint, stats in self.endpoint_stats.items():
-            if stats["last_called"]:
-                last_call = datetime.fromisoformat(stats["last_called"])
-                if last_call < one_hour_ago:
-                    if stats["call_count"] < 5:  # Very rarely used
-                        rarely_used_endpoints.append(endpoint)
-                    elif last_call < datetime.utcnow() - timedelta(days=1):
-                        unused_endpoints.append(endpoint)
-        
+
+        for endpoint, stats in items:
+            if stats.last_called and stats.last_called < one_hour_ago:
+                if stats.call_count < 5:  # Very rarely used
+                    rarely_used_endpoints.append(endpoint)
+                elif stats.last_called < one_day_ago:
+                    unused_endpoints.append(endpoint)
+
         # Top endpoints by usage
-        sorted_endpoints = sorted(
-            self.endpoint_stats.items(), 
-            key=lambda x: x[1]["call_count"], 
-            reverse=True
-        )
-        top_endpoints = [
-            {"endpoint": k, "calls": v["call_count"]} 
-            for k, v in sorted_endpoints[:10]
-        ]
-        
+        by_calls = sorted(items, key=lambda x: x[1].call_count, reverse=True)
+        top_endpoints = [{"endpoint": k, "calls": v.call_count} for k, v in by_calls[:10]]
+
         return {
             "summary": {
                 "total_requests": self.total_requests,
-                "unique_endpoints_hit": len(self.endpoint_stats),
+                "unique_endpoints_hit": len(items),
+                "max_tracked_endpoints": self.max_endpoints,
                 "uptime_hours": round(uptime_hours, 2),
                 "requests_per_hour": round(self.total_requests / max(uptime_hours, 0.1), 2)
             },
@@ -144,23 +231,19 @@ class APIAnalyticsMiddleware(BaseHTTPMiddleware):
             "performance_insights": {
                 "slowest_endpoints": [
                     {
-                        "endpoint": k, 
-                        "avg_response_time_ms": round((v["total_response_time"] / max(v["call_count"], 1)) * 1000, 2)
+                        "endpoint": k,
+                        "p95_response_time_ms": round(v.percentile(0.95) * 1000, 2)
                     }
-                    for k, v in sorted(
-                        self.endpoint_stats.items(), 
-                        key=lambda x: x[1]["total_response_time"] / max(x[1]["call_count"], 1), 
-                        reverse=True
-                    )[:5]
+                    for k, v in sorted(items, key=lambda x: x[1].percentile(0.95), reverse=True)[:5]
                 ],
                 "largest_responses": [
                     {
                         "endpoint": k,
-                        "avg_size_kb": round((v["total_response_size"] / max(v["call_count"], 1)) / 1024, 2)
+                        "avg_size_kb": round((v.total_response_size / max(v.call_count, 1)) / 1024, 2)
                     }
                     for k, v in sorted(
-                        self.endpoint_stats.items(),
-                        key=lambda x: x[1]["total_response_size"] / max(x[1]["call_count"], 1),
+                        items,
+                        key=lambda x: x[1].total_response_size / max(x[1].call_count, 1),
                         reverse=True
                     )[:5]
                 ]
@@ -168,6 +251,20 @@ class APIAnalyticsMiddleware(BaseHTTPMiddleware):
             "generated_at": datetime.utcnow().isoformat()
         }
 
+
+def _labels_for(endpoint: str) -> str:
+    """Turn an endpoint key ("GET /api/cv/{cv_id}") into Prometheus labels."""
+    method, _, route = endpoint.partition(" ")
+    if not route:
+        method, route = "", endpoint
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+def _isoformat(ts: float) -> Optional[str]:
+    return datetime.utcfromtimestamp(ts).isoformat() if ts else None
+
+
 # Global analytics instance
 _analytics_middleware = None
 
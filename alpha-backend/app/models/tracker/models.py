@@ -4,6 +4,7 @@ import uuid
 from datetime import date, datetime
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field
 
 from app.models.tracker.base import TrackerSQLModel
@@ -61,6 +62,10 @@ class TrackerCandidate(TrackerSQLModel, table=True):
 
 class TrackerApplication(TrackerSQLModel, table=True):
     __tablename__ = "tracker_application"
+    __table_args__ = (
+        # Latest application per candidate (candidate rows endpoint)
+        Index("ix_tracker_application_candidate_created", "candidate_id", "created_at"),
+    )
 
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True, index=True)
     candidate_id: str = Field(index=True, foreign_key="tracker_candidate.id")
@@ -172,6 +177,10 @@ class TrackerCandidateAD(TrackerSQLModel, table=True):
 
 class TrackerApplicationAD(TrackerSQLModel, table=True):
     __tablename__ = "tracker_application_ad"
+    __table_args__ = (
+        # Latest application per candidate (candidate rows endpoint)
+        Index("ix_tracker_application_ad_candidate_created", "candidate_id", "created_at"),
+    )
 
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True, index=True)
     candidate_id: str = Field(index=True, foreign_key="tracker_candidate_ad.id")
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from typing import List, Literal, Optional
+from pydantic import BaseModel
 from sqlmodel import Session, select
 from datetime import datetime
 from app.db.auth_db import get_session
@@ -8,6 +9,7 @@ from app.schemas.auth import UserCreate, UserRead, UserUpdate
 from app.utils.security import hash_password
 from app.deps.auth import require_admin
 from app.middleware.rate_limiter import get_rate_limiter
+from app.utils.user_cache import invalidate_cached_user
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -98,6 +100,7 @@ def update_user(user_id: str, data: UserUpdate, _: User = Depends(require_admin)
     session.add(user)
     session.commit()
     session.refresh(user)
+    invalidate_cached_user(user.username)
     return UserRead(
         id=user.id,
         username=user.username,
@@ -115,4 +118,32 @@ def delete_user(user_id: str, _: User = Depends(require_admin), session: Session
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     session.delete(user)
     session.commit()
+    invalidate_cached_user(user.username)
     return {}
+
+
+class BulkReprocessRequest(BaseModel):
+    doc_types: List[Literal["cv", "jd"]] = ["cv", "jd"]
+    ids: Optional[List[str]] = None
+
+
+@router.post("/llm/reprocess", status_code=202)
+def start_bulk_reprocess(data: BulkReprocessRequest, _: User = Depends(require_admin)):
+    """Re-standardize stored CVs/JDs through the OpenAI Batch API as a background job."""
+    from app.services.llm_batch_service import get_llm_batch_reprocessor
+
+    if data.ids and len(data.doc_types) != 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids require exactly one doc type")
+    job_id = get_llm_batch_reprocessor().start(data.doc_types, data.ids)
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/llm/reprocess/{job_id}")
+def get_bulk_reprocess(job_id: str, _: User = Depends(require_admin)):
+    from app.services.llm_batch_service import PROGRESS_KIND
+    from app.services.progress_events import get_progress_bus
+
+    state = get_progress_bus().get_state(PROGRESS_KIND, job_id)
+    if not state:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return state
@@ -18,7 +18,7 @@ import shutil
 import mimetypes
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends, status, BackgroundTasks
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, Response
 from fastapi.requests import Request
 import os
 from app.schemas.careers import (
@@ -40,7 +40,9 @@ from app.services.parsing_service import get_parsing_service
 from app.services.llm_service import get_llm_service  
 from app.services.embedding_service import get_embedding_service
 from app.utils.qdrant_utils import get_qdrant_utils, get_decompressed_content
+from app.services.document_blobs import MissingBlobError
 from app.services.s3_storage import get_s3_storage_service
+from app.services.public_job_views import PUBLIC_JOB_CACHE_CONTROL, get_public_job_cache
 from app.deps.auth import require_admin, require_user
 from app.models.user import User
 from app.routes.cv_routes import process_cv_async
@@ -146,96 +148,25 @@ async def get_recent_job_postings(limit: int = 10) -> List[JobPostingSummary]:
 
 
 @router.get("/jobs/{public_token}", response_model=PublicJobView)
-async def get_public_job(public_token: str) -> PublicJobView:
+async def get_public_job(public_token: str, request: Request) -> Response:
     """
     Public endpoint: View job posting (no authentication required)
     
     This endpoint must be accessible to anyone with the link.
     Returns structured job information for display to candidates.
+    Served from the precomputed PublicJobView (see app/services/public_job_views.py)
+    with a strong ETag and Cache-Control, so repeat views and CDNs get 304s.
     """
     try:
-        logger.info(f"📄 Public job request for token: {public_token[:8]}...")
-        
-        qdrant = get_qdrant_utils()
-        # Update this to include inactive jobs
-        job_data = qdrant.get_job_posting_by_token(public_token, include_inactive=True)
-        
-        if not job_data:
+        document = get_public_job_cache().get(public_token)
+        if document is None:
             logger.warning(f"❌ Job posting not found for token: {public_token[:8]}...")
             raise HTTPException(status_code=404, detail="Job posting not found")
         
-        # Debug logging
-        logger.info(f"🔍 Job data received: {job_data}")
-        logger.info(f"🔍 Job data keys: {list(job_data.keys()) if job_data else 'None'}")
-        if job_data and 'job_title' in job_data:
-            logger.info(f"🔍 Job title from merged data: {job_data['job_title']}")
-        
-        # The job_data from get_job_posting_by_token already contains merged data
-        # Use the merged data directly since it already contains the structured information
-        
-        # Extract data from the merged job_data
-        # Prioritize structured_info from new UI data system, fall back to legacy format
-        structured_info = job_data.get("structured_info", {})
-        
-        job_title = (
-            structured_info.get("job_title") or 
-            job_data.get("job_title") or 
-            "Position Available"
-        )
-        
-        job_location = (
-            structured_info.get("job_location") or 
-            job_data.get("location") or 
-            job_data.get("job_location") or 
-            ""
-        )
-        
-        job_summary = (
-            structured_info.get("job_summary") or 
-            job_data.get("job_summary") or 
-            job_data.get("summary") or 
-            "Job description not available"
-        )
-        
-        experience_required = job_data.get("years_of_experience", "Not specified")
-        
-        # Convert experience to string if it's a number
-        if isinstance(experience_required, (int, float)):
-            experience_required = f"{experience_required} years"
-        
-        # Get requirements and responsibilities from structured UI data or legacy format
-        # For new UI data, convert bullet-point strings to arrays
-        if structured_info.get("qualifications"):
-            # Convert bullet-point string to array
-            qualifications_text = structured_info.get("qualifications", "")
-            requirements = [line.strip().lstrip("•").strip() for line in qualifications_text.split("\n") if line.strip()]
-        else:
-            # Legacy format
-            requirements = job_data.get("skills_sentences", []) or job_data.get("skills", [])
-        
-        if structured_info.get("key_responsibilities"):
-            # Convert bullet-point string to array
-            responsibilities_text = structured_info.get("key_responsibilities", "")
-            responsibilities = [line.strip().lstrip("•").strip() for line in responsibilities_text.split("\n") if line.strip()]
-        else:
-            # Legacy format
-            responsibilities = job_data.get("responsibility_sentences", []) or job_data.get("responsibilities", [])
-        
-        public_job = PublicJobView(
-            job_id=job_data["id"],
-            job_title=job_title,
-            job_location=job_location,
-            company_name=job_data.get("company_name", "Alpha Data Recruitment"),
-            job_description=job_summary,  # Use updated summary or fall back to original
-            upload_date=job_data.get("created_date", job_data.get("upload_date", now_iso())),
-            requirements=requirements[:10],  # Limit to top 10 for display
-            responsibilities=responsibilities[:10],  # Limit to top 10 for display
-            experience_required=str(experience_required),
-            is_active=job_data.get("is_active", True)  # This will now show the actual status
-        )
-        
-        logger.info(f"✅ Returning public job: {job_title}")
-        return public_job
+        headers = {"ETag": document.etag, "Cache-Control": PUBLIC_JOB_CACHE_CONTROL}
+        if document.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=document.body, media_type="application/json", headers=headers)
         
     except HTTPException:
         raise
@@ -509,9 +440,9 @@ async def get_application_status(application_id: str) -> JSONResponse:
 
     # 2) Fallback to in-process progress tracker (legacy path)
     try:
-        from app.routes.cv_routes import _cv_upload_progress  # type: ignore
+        from app.services.progress_events import get_progress_bus
 
-        prog = _cv_upload_progress.get(application_id)
+        prog = get_progress_bus().get_state("cv_upload", application_id)
         if prog:
             return JSONResponse({"source": "in_process", **prog})
     except Exception:
@@ -649,12 +580,12 @@ async def post_job(
         filename = file.filename if has_file else f"job_posting_{job_id}.txt"
         content_type = file.content_type if has_file else "text/plain"
         
-        success_steps.append(
-            qdrant.store_document(
-                job_id, "jd", filename,
-                content_type,
-                extracted_text, now_iso()
-            )
+        # Document, structured data and embeddings: one upsert per collection
+        writes = qdrant.write_batch()
+        writes.store_document(
+            job_id, "jd", filename,
+            content_type,
+            extracted_text, now_iso()
         )
         
         # Store structured data in JD collection
@@ -662,14 +593,11 @@ async def post_job(
             **llm_result,
             "document_type": "jd"
         }
-        success_steps.append(
-            qdrant.store_structured_data(job_id, "jd", jd_structured_payload)
-        )
+        writes.store_structured_data(job_id, "jd", jd_structured_payload)
         
         # Store embeddings in JD collection
-        success_steps.append(
-            qdrant.store_embeddings_exact(job_id, "jd", embeddings_data)
-        )
+        writes.store_embeddings_exact(job_id, "jd", embeddings_data)
+        success_steps.append(writes.try_flush())
         
         # 6. Store job posting metadata for careers functionality
         success_steps.append(
@@ -790,12 +718,12 @@ Additional Information:
         success_steps = []
         
         # Store raw document in jd_documents collection (reuse existing infrastructure)
-        success_steps.append(
-            qdrant.store_document(
-                job_id, "jd", f"manual_job_{job_id}.txt",
-                "text/plain",
-                structured_text, now_iso()
-            )
+        # Document, structured data and embeddings: one upsert per collection
+        writes = qdrant.write_batch()
+        writes.store_document(
+            job_id, "jd", f"manual_job_{job_id}.txt",
+            "text/plain",
+            structured_text, now_iso()
         )
         
         # Store structured data in jd_structured collection (reuse existing infrastructure)
@@ -803,14 +731,11 @@ Additional Information:
             **llm_result,
             "document_type": "jd"
         }
-        success_steps.append(
-            qdrant.store_structured_data(job_id, "jd", jd_structured_payload)
-        )
+        writes.store_structured_data(job_id, "jd", jd_structured_payload)
         
         # Store embeddings in jd_embeddings collection (reuse existing infrastructure)
-        success_steps.append(
-            qdrant.store_embeddings_exact(job_id, "jd", embeddings_data)
-        )
+        writes.store_embeddings_exact(job_id, "jd", embeddings_data)
+        success_steps.append(writes.try_flush())
         
         # 6. Store job posting metadata for careers functionality
         success_steps.append(
@@ -1314,7 +1239,10 @@ async def extract_jd_for_ui(jd_id: str) -> dict:
             raise HTTPException(status_code=404, detail="JD not found")
         
         # Use raw content and send to LLM for auto-fill (as requested)
-        raw_content = get_decompressed_content(jd_doc)
+        try:
+            raw_content = get_decompressed_content(jd_doc)
+        except MissingBlobError:
+            raw_content = ""
         
         if not raw_content:
             raise HTTPException(status_code=400, detail="No raw content found in JD document")
@@ -16,9 +16,11 @@ from pydantic import BaseModel
 from app.services.parsing_service import get_parsing_service
 from app.services.llm_service import get_llm_service
 from app.services.embedding_service import get_embedding_service
-from app.utils.qdrant_utils import get_qdrant_utils, get_decompressed_content
+from app.utils.qdrant_utils import get_qdrant_utils, get_decompressed_content, hr_notes_lock
+from app.services.document_blobs import MissingBlobError
 from app.services.s3_storage import get_s3_storage_service
 from app.utils.cache import get_cache_service
+from app.services.progress_events import get_progress_bus
 # at top of the file
 import mimetypes
 import shutil
@@ -51,8 +53,9 @@ def _now_iso() -> str:
 # CV Upload Progress Tracking
 # ----------------------------
 
-# Global progress tracking for CV uploads (in production, use Redis)
-_cv_upload_progress = {}
+# Progress state: this worker's live dict, mirrored to Redis by the progress bus
+# so polls and event streams work from any worker.
+_cv_upload_progress = get_progress_bus().states("cv_upload")
 
 @router.get("/cv-upload-progress/{cv_id}")
 async def get_cv_upload_progress(cv_id: str):
@@ -60,7 +63,7 @@ async def get_cv_upload_progress(cv_id: str):
     Get real-time progress of CV upload processing.
     """
     try:
-        progress = _cv_upload_progress.get(cv_id, {})
+        progress = get_progress_bus().get_state("cv_upload", cv_id)
         return JSONResponse({
             "cv_id": cv_id,
             "status": progress.get("status", "not_found"),
@@ -76,11 +79,21 @@ async def get_cv_upload_progress(cv_id: str):
         logger.error(f"❌ Failed to get CV upload progress: {e}")
         raise HTTPException(status_code=500, detail=f"Progress tracking error: {str(e)}")
 
+@router.get("/cv-upload-progress/{cv_id}/stream")
+async def stream_cv_upload_progress(cv_id: str):
+    """
+    Server-sent events for a CV upload: one "progress" event per state change,
+    closing once processing completes or fails.
+    """
+    return StreamingResponse(
+        get_progress_bus().stream("cv_upload", cv_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 def update_cv_upload_progress(cv_id: str, **kwargs):
-    """Update CV upload progress."""
-    if cv_id not in _cv_upload_progress:
-        _cv_upload_progress[cv_id] = {}
-    _cv_upload_progress[cv_id].update(kwargs)
+    """Update CV upload progress (and push it to stream subscribers)."""
+    get_progress_bus().update("cv_upload", cv_id, **kwargs)
 
 # ----------------------------
 # Optimized CV Processing Functions
@@ -193,63 +206,37 @@ async def process_cv_async(cv_data: dict) -> dict:
                 "cv_filename": cv_data.get("filename")  # Preserve original filename for downloads
             })
         
-        # Create storage tasks (run in thread pool to avoid blocking)
-        async def store_document():
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                return await loop.run_in_executor(executor, qdrant.store_document,
-                    cv_id, "cv", filename, cv_data.get("file_ext", ".txt").lstrip("."),
-                    extracted_text, _now_iso(), cv_data.get("persisted_path"), cv_data.get("mime_type", "text/plain")
-                )
-        
-        async def store_structured():
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                return await loop.run_in_executor(executor, qdrant.store_structured_data,
-                    cv_id, "cv", structured_payload
-                )
-        
-        async def store_embeddings():
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                return await loop.run_in_executor(executor, qdrant.store_embeddings_exact,
-                    cv_id, "cv", doc_embeddings
-                )
-        
-        # Execute storage operations in parallel
-        await asyncio.gather(
-            store_document(),
-            store_structured(),
-            store_embeddings()
+        # Document, structured data, embeddings and (for applications) the job link
+        # are written together: one upsert per collection, collections in parallel
+        writes = qdrant.write_batch()
+        writes.store_document(
+            cv_id, "cv", filename, cv_data.get("file_ext", ".txt").lstrip("."),
+            extracted_text, _now_iso(), cv_data.get("persisted_path"), cv_data.get("mime_type", "text/plain")
         )
+        writes.store_structured_data(cv_id, "cv", structured_payload)
+        writes.store_embeddings_exact(cv_id, "cv", doc_embeddings)
         
         # Handle job application linking if this is a job application
         if cv_data.get("is_job_application", False):
-            try:
-                # Link application to job
-                application_data = {
-                    "applicant_name": cv_data.get("applicant_name"),
-                    "applicant_email": cv_data.get("applicant_email"),
-                    "applicant_phone": cv_data.get("applicant_phone"),
-                    "cover_letter": cv_data.get("cover_letter"),
-                    "expected_salary": cv_data.get("expected_salary"),
-                    "years_of_experience": cv_data.get("years_of_experience"),
-                    "experience_warning": cv_data.get("experience_warning"),
-                    "public_token": cv_data.get("public_token"),
-                    "job_title": cv_data.get("job_title", "Position"),
-                    "company_name": cv_data.get("company_name", "Alpha Data Recruitment"),
-                    "application_date": _now_iso(),
-                    "application_status": "processed"
-                }
-                
-                qdrant.link_application_to_job(
-                    cv_id, cv_data.get("job_id"), application_data, 
-                    filename, _now_iso()
-                )
-                
-                logger.info(f"✅ Job application linked for {cv_id}")
-            except Exception as e:
-                logger.error(f"❌ Failed to link job application for {cv_id}: {e}")
+            application_data = {
+                "applicant_name": cv_data.get("applicant_name"),
+                "applicant_email": cv_data.get("applicant_email"),
+                "applicant_phone": cv_data.get("applicant_phone"),
+                "cover_letter": cv_data.get("cover_letter"),
+                "expected_salary": cv_data.get("expected_salary"),
+                "years_of_experience": cv_data.get("years_of_experience"),
+                "experience_warning": cv_data.get("experience_warning"),
+                "public_token": cv_data.get("public_token"),
+                "job_title": cv_data.get("job_title", "Position"),
+                "company_name": cv_data.get("company_name", "Alpha Data Recruitment"),
+                "application_date": _now_iso(),
+                "application_status": "processed"
+            }
+            writes.link_application(cv_id, cv_data.get("job_id"), application_data, filename, _now_iso())
+        
+        await asyncio.get_event_loop().run_in_executor(None, writes.flush)
+        if cv_data.get("is_job_application", False):
+            logger.info(f"✅ Job application linked for {cv_id}")
         
         # Mark as completed
         processing_stats = {
@@ -281,6 +268,8 @@ async def process_cv_async(cv_data: dict) -> dict:
         
     except Exception as e:
         logger.error(f"❌ Async CV processing failed for {cv_data.get('cv_id', 'unknown')}: {e}")
+        if cv_data.get("cv_id"):
+            update_cv_upload_progress(cv_data["cv_id"], status="failed", current_step=f"Processing failed: {e}")
         raise e
 
 
@@ -472,8 +461,11 @@ async def upload_cv(
         
         mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
         
+        # 3a-c) one write batch: one upsert per collection instead of one request per point
+        writes = qdrant.write_batch()
+
         # 3a) Raw doc (+ file_path) — store PII-reduced text; email/phone kept in structured_cv
-        qdrant.store_document(
+        writes.store_document(
             doc_id=cv_id,
             doc_type="cv",
             filename=filename,
@@ -485,7 +477,7 @@ async def upload_cv(
         )
         
         # 3b) Structured JSON
-        qdrant.store_structured_data(
+        writes.store_structured_data(
             doc_id=cv_id,
             doc_type="cv",
             structured_data={
@@ -494,11 +486,12 @@ async def upload_cv(
         )
         
         # 3c) EXACT embeddings
-        qdrant.store_embeddings_exact(
+        writes.store_embeddings_exact(
             doc_id=cv_id,
             doc_type="cv",
             embeddings_data=doc_embeddings
         )
+        writes.flush()
         
         logger.info(f"✅ CV processed and stored: {cv_id}")
         
@@ -929,11 +922,11 @@ async def delete_cv(cv_id: str) -> JSONResponse:
         )
         emb_ids = [str(p.id) for p in emb_points]
         if emb_ids:
-            qdrant.client.delete(collection_name="cv_embeddings", points_selector=emb_ids)
+            qdrant.delete_points("cv_embeddings", emb_ids)
 
         # Delete structured + document
-        qdrant.client.delete(collection_name="cv_structured", points_selector=[cv_id])
-        qdrant.client.delete(collection_name="cv_documents", points_selector=[cv_id])
+        qdrant.delete_points("cv_structured", [cv_id])
+        qdrant.delete_points("cv_documents", [cv_id])
 
         # Invalidate CV list cache since we deleted a CV
         cache = get_cache_service()
@@ -966,7 +959,10 @@ async def reprocess_cv(cv_id: str) -> JSONResponse:
         if not doc:
             raise HTTPException(status_code=404, detail=f"CV not found: {cv_id}")
         filename = doc[0].payload.get("filename", "reprocessed_cv.txt")
-        raw_content = get_decompressed_content(doc[0].payload)
+        try:
+            raw_content = get_decompressed_content(doc[0].payload)
+        except MissingBlobError:
+            raw_content = ""
 
         if not raw_content:
             raise HTTPException(status_code=400, detail="No stored raw content to reprocess")
@@ -979,11 +975,6 @@ async def reprocess_cv(cv_id: str) -> JSONResponse:
         emb_service = get_embedding_service()
         doc_embeddings = emb_service.generate_document_embeddings(standardized)
 
-        # Replace structured
-        qdrant.store_structured_data(cv_id, "cv", {
-            "structured_info": standardized
-        })
-
         # Remove old embeddings and store new ones
         emb_points, _ = qdrant.client.scroll(
             collection_name="cv_embeddings",
@@ -994,10 +985,16 @@ async def reprocess_cv(cv_id: str) -> JSONResponse:
         )
         old_ids = [str(p.id) for p in emb_points]
         if old_ids:
-            qdrant.client.delete(collection_name="cv_embeddings", points_selector=old_ids)
+            qdrant.delete_points("cv_embeddings", old_ids)
 
         qdrant.store_embeddings_exact(cv_id, "cv", doc_embeddings)
 
+        # Replace structured after the embeddings: its new stored_at versions the match
+        # pair cache, so scores cached under it must come from the new vectors
+        qdrant.store_structured_data(cv_id, "cv", {
+            "structured_info": standardized
+        })
+
         return JSONResponse({
             "status": "success",
             "message": f"CV '{filename}' reprocessed successfully",
@@ -1198,7 +1195,7 @@ async def download_cv(cv_id: str):
     filename = payload.get("filename", f"{cv_id}.dat")
     
     # For job applications, use a more descriptive filename if available
-    if not filepath and not payload.get("raw_content"):
+    if not filepath and not payload.get("raw_content") and not payload.get("raw_content_blob"):
         # Check if this is a job application by looking at structured data
         structured_res = q.retrieve("cv_structured", ids=[cv_id], with_payload=True, with_vectors=False)
         if structured_res and structured_res[0].payload:
@@ -1257,7 +1254,10 @@ async def download_cv(cv_id: str):
         except Exception as e:
             logger.error(f"❌ Failed to download from S3: {e}")
             # Final fallback to raw_content
-            raw = get_decompressed_content(payload)
+            try:
+                raw = get_decompressed_content(payload)
+            except MissingBlobError:
+                raw = ""
             if raw:
                 logger.info(f"✅ Final fallback to raw_content for {cv_id}")
                 bytes_io = BytesIO(raw.encode("utf-8"))
@@ -1294,7 +1294,10 @@ async def download_cv(cv_id: str):
         )
 
     # Fallback: stream raw_content as a .txt download (helps older records)
-    raw = get_decompressed_content(payload)
+    try:
+        raw = get_decompressed_content(payload)
+    except MissingBlobError:
+        raw = ""
     if raw:
         # Try to preserve original filename extension if available
         fallback_filename = filename
@@ -1342,72 +1345,47 @@ async def add_or_update_note(cv_id: str, request: NoteRequest) -> JSONResponse:
         logger.info(f"📝 Adding/updating note for CV: {cv_id}")
         qdrant = get_qdrant_utils()
         
-        # Check if CV exists
-        s = qdrant.client.retrieve("cv_structured", ids=[cv_id], with_payload=True, with_vectors=False)
-        if not s:
-            raise HTTPException(status_code=404, detail=f"CV not found: {cv_id}")
-        
-        # Get current structured data
-        current_payload = s[0].payload or {}
-        structured_info = current_payload.get("structured_info", {})
-        
-        # IMPORTANT: Preserve job application metadata at root level
-        # This ensures job posting links remain intact
-        is_job_application = current_payload.get("is_job_application", False)
-        job_posting_id = current_payload.get("job_posting_id")
-        applicant_email = current_payload.get("applicant_email")
-        application_id = current_payload.get("application_id")
-        cv_filename = current_payload.get("cv_filename")
-        
-        # Add/update note
-        if "hr_notes" not in structured_info:
-            structured_info["hr_notes"] = []
-        
-        # Check if note already exists for this HR user
-        existing_note_index = None
-        for i, note in enumerate(structured_info["hr_notes"]):
-            if note.get("hr_user") == request.hr_user:
-                existing_note_index = i
-                break
-        
-        note_data = {
-            "note": request.note,
-            "hr_user": request.hr_user,
-            "created_at": _now_iso(),
-            "updated_at": _now_iso()
-        }
-        
-        if existing_note_index is not None:
-            # Update existing note
-            structured_info["hr_notes"][existing_note_index] = note_data
-            logger.info(f"✅ Updated note for CV {cv_id} by HR user {request.hr_user}")
-        else:
-            # Add new note
-            structured_info["hr_notes"].append(note_data)
-            logger.info(f"✅ Added new note for CV {cv_id} by HR user {request.hr_user}")
-        
-        # Build updated payload - PRESERVE all job application metadata
-        updated_payload = {
-            **current_payload,
-            "structured_info": structured_info
-        }
+        # hr_notes is read, edited and written back whole: serialize edits per CV so
+        # concurrent note changes (from any worker) cannot overwrite each other
+        with hr_notes_lock(cv_id):
+            # Check if CV exists
+            s = qdrant.client.retrieve("cv_structured", ids=[cv_id], with_payload=True, with_vectors=False)
+            if not s:
+                raise HTTPException(status_code=404, detail=f"CV not found: {cv_id}")
+        
+            # Notes live under structured_info.hr_notes; only that key is written below,
+            # so root-level job application metadata is never rewritten
+            structured_info = (s[0].payload or {}).get("structured_info", {})
+        
+            # Add/update note
+            if "hr_notes" not in structured_info:
+                structured_info["hr_notes"] = []
+        
+            # Check if note already exists for this HR user
+            existing_note_index = None
+            for i, note in enumerate(structured_info["hr_notes"]):
+                if note.get("hr_user") == request.hr_user:
+                    existing_note_index = i
+                    break
+        
+            note_data = {
+                "note": request.note,
+                "hr_user": request.hr_user,
+                "created_at": _now_iso(),
+                "updated_at": _now_iso()
+            }
         
-        # Explicitly preserve job application fields to ensure they're not lost
-        if is_job_application:
-            updated_payload["is_job_application"] = is_job_application
-            if job_posting_id:
-                updated_payload["job_posting_id"] = job_posting_id
-            if applicant_email:
-                updated_payload["applicant_email"] = applicant_email
-            if application_id:
-                updated_payload["application_id"] = application_id
-            if cv_filename:
-                updated_payload["cv_filename"] = cv_filename
-            
-            logger.info(f"✅ Preserved job application link: job_posting_id={job_posting_id}")
+            if existing_note_index is not None:
+                # Update existing note
+                structured_info["hr_notes"][existing_note_index] = note_data
+                logger.info(f"✅ Updated note for CV {cv_id} by HR user {request.hr_user}")
+            else:
+                # Add new note
+                structured_info["hr_notes"].append(note_data)
+                logger.info(f"✅ Added new note for CV {cv_id} by HR user {request.hr_user}")
         
-        # Store updated data
-        qdrant.store_structured_data(cv_id, "cv", updated_payload)
+            qdrant.set_payload_fields("cv_structured", cv_id, {"hr_notes": structured_info["hr_notes"]},
+                                      key="structured_info")
         
         return JSONResponse({
             "status": "success",
@@ -1463,56 +1441,28 @@ async def delete_cv_note(cv_id: str, hr_user: str) -> JSONResponse:
         logger.info(f"🗑️ Deleting note for CV: {cv_id} by HR user: {hr_user}")
         qdrant = get_qdrant_utils()
         
-        # Check if CV exists
-        s = qdrant.client.retrieve("cv_structured", ids=[cv_id], with_payload=True, with_vectors=False)
-        if not s:
-            raise HTTPException(status_code=404, detail=f"CV not found: {cv_id}")
-        
-        # Get current structured data
-        current_payload = s[0].payload or {}
-        structured_info = current_payload.get("structured_info", {})
-        
-        # IMPORTANT: Preserve job application metadata at root level
-        # This ensures job posting links remain intact
-        is_job_application = current_payload.get("is_job_application", False)
-        job_posting_id = current_payload.get("job_posting_id")
-        applicant_email = current_payload.get("applicant_email")
-        application_id = current_payload.get("application_id")
-        cv_filename = current_payload.get("cv_filename")
-        
-        # Remove note for this HR user
-        if "hr_notes" in structured_info:
-            original_count = len(structured_info["hr_notes"])
-            structured_info["hr_notes"] = [
-                note for note in structured_info["hr_notes"] 
-                if note.get("hr_user") != hr_user
-            ]
-            
-            if len(structured_info["hr_notes"]) == original_count:
-                raise HTTPException(status_code=404, detail=f"No note found for HR user: {hr_user}")
-        
-        # Build updated payload - PRESERVE all job application metadata
-        updated_payload = {
-            **current_payload,
-            "structured_info": structured_info
-        }
-        
-        # Explicitly preserve job application fields to ensure they're not lost
-        if is_job_application:
-            updated_payload["is_job_application"] = is_job_application
-            if job_posting_id:
-                updated_payload["job_posting_id"] = job_posting_id
-            if applicant_email:
-                updated_payload["applicant_email"] = applicant_email
-            if application_id:
-                updated_payload["application_id"] = application_id
-            if cv_filename:
-                updated_payload["cv_filename"] = cv_filename
+        with hr_notes_lock(cv_id):
+            # Check if CV exists
+            s = qdrant.client.retrieve("cv_structured", ids=[cv_id], with_payload=True, with_vectors=False)
+            if not s:
+                raise HTTPException(status_code=404, detail=f"CV not found: {cv_id}")
+        
+            # Only structured_info.hr_notes is written; job application metadata is left as is
+            structured_info = (s[0].payload or {}).get("structured_info", {})
+        
+            # Remove note for this HR user
+            if "hr_notes" in structured_info:
+                original_count = len(structured_info["hr_notes"])
+                structured_info["hr_notes"] = [
+                    note for note in structured_info["hr_notes"] 
+                    if note.get("hr_user") != hr_user
+                ]
             
-            logger.info(f"✅ Preserved job application link: job_posting_id={job_posting_id}")
+                if len(structured_info["hr_notes"]) == original_count:
+                    raise HTTPException(status_code=404, detail=f"No note found for HR user: {hr_user}")
         
-        # Store updated data
-        qdrant.store_structured_data(cv_id, "cv", updated_payload)
+            qdrant.set_payload_fields("cv_structured", cv_id, {"hr_notes": structured_info.get("hr_notes", [])},
+                                      key="structured_info")
         
         logger.info(f"✅ Deleted note for CV {cv_id} by HR user {hr_user}")
         
@@ -18,6 +18,7 @@ from app.services.parsing_service import get_parsing_service
 from app.services.llm_service import get_llm_service
 from app.services.embedding_service import get_embedding_service
 from app.utils.qdrant_utils import get_qdrant_utils, get_decompressed_content
+from app.services.document_blobs import MissingBlobError
 from app.services.s3_storage import get_s3_storage_service
 from app.utils.cache import get_cache_service
 
@@ -178,8 +179,11 @@ async def upload_jd(
         import mimetypes
         mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
 
+        # 4a-c) one write batch: one upsert per collection instead of one request per point
+        writes = qdrant.write_batch()
+
         # 4a) Raw doc (with S3 reference)
-        qdrant.store_document(
+        writes.store_document(
             doc_id=jd_id,
             doc_type="jd",
             filename=filename,
@@ -191,7 +195,7 @@ async def upload_jd(
         )
 
         # 4b) Structured
-        qdrant.store_structured_data(
+        writes.store_structured_data(
             doc_id=jd_id,
             doc_type="jd",
             structured_data={
@@ -200,11 +204,12 @@ async def upload_jd(
         )
 
         # 4c) EXACT embeddings
-        qdrant.store_embeddings_exact(
+        writes.store_embeddings_exact(
             doc_id=jd_id,
             doc_type="jd",
             embeddings_data=doc_embeddings
         )
+        writes.flush()
 
         logger.info(f"✅ JD processed and stored: {jd_id}")
         _invalidate_jd_list_cache()
@@ -495,11 +500,11 @@ async def delete_jd(jd_id: str) -> JSONResponse:
         )
         emb_ids = [str(p.id) for p in emb_points]
         if emb_ids:
-            qdrant.client.delete(collection_name="jd_embeddings", points_selector=emb_ids)
+            qdrant.delete_points("jd_embeddings", emb_ids)
 
         # Delete structured + documents
-        qdrant.client.delete(collection_name="jd_structured", points_selector=[jd_id])
-        qdrant.client.delete(collection_name="jd_documents", points_selector=[jd_id])
+        qdrant.delete_points("jd_structured", [jd_id])
+        qdrant.delete_points("jd_documents", [jd_id])
         _invalidate_jd_list_cache()
 
         return JSONResponse({
@@ -528,7 +533,10 @@ async def reprocess_jd(jd_id: str) -> JSONResponse:
         if not doc:
             raise HTTPException(status_code=404, detail=f"JD not found: {jd_id}")
         filename = doc[0].payload.get("filename", "reprocessed_jd.txt")
-        raw_content = get_decompressed_content(doc[0].payload)
+        try:
+            raw_content = get_decompressed_content(doc[0].payload)
+        except MissingBlobError:
+            raw_content = ""
 
         if not raw_content:
             raise HTTPException(status_code=400, detail="No stored raw content to reprocess")
@@ -541,11 +549,6 @@ async def reprocess_jd(jd_id: str) -> JSONResponse:
         emb_service = get_embedding_service()
         doc_embeddings = emb_service.generate_document_embeddings(standardized)
 
-        # Replace structured
-        qdrant.store_structured_data(jd_id, "jd", {
-            "structured_info": standardized
-        })
-
         # Remove old embeddings and store new ones
         emb_points, _ = qdrant.client.scroll(
             collection_name="jd_embeddings",
@@ -556,10 +559,18 @@ async def reprocess_jd(jd_id: str) -> JSONResponse:
         )
         old_ids = [str(p.id) for p in emb_points]
         if old_ids:
-            qdrant.client.delete(collection_name="jd_embeddings", points_selector=old_ids)
+            qdrant.delete_points("jd_embeddings", old_ids)
 
         qdrant.store_embeddings_exact(jd_id, "jd", doc_embeddings)
+
+        # Replace structured after the embeddings: its new stored_at versions the match
+        # pair cache, so scores cached under it must come from the new vectors
+        qdrant.store_structured_data(jd_id, "jd", {
+            "structured_info": standardized
+        })
+
         _invalidate_jd_list_cache()
+        qdrant.refresh_public_job_views_for_jd(jd_id)
 
         return JSONResponse({
             "status": "success",
@@ -6,21 +6,31 @@ Uses:
   - *_documents for raw files/text payloads
 """
 import asyncio
+import hashlib
+import json
 import logging
+import os
 import time
+import uuid
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from app.deps.auth import require_admin
+from app.deps.auth import get_optional_username, require_admin
+from app.middleware.rate_limiter import get_rate_limiter
 from app.models.user import User
-from app.services.matching_service import get_matching_service
+from app.services.matching_service import MatchingService, get_matching_service
 from app.services.embedding_service import get_embedding_service
 from app.services.llm_service import get_llm_service
 from app.utils.qdrant_utils import get_qdrant_utils
 from app.utils.cache import get_cache_service
+from app.utils.metrics import get_metrics_registry, MATCH_DURATION, MATCH_CANDIDATES
+from app.utils.resource_monitor import get_resource_monitor
+from app.services.progress_events import get_progress_bus, top_k_snapshot
+from app.services.match_scheduler import COMPLETED, FAILED, QUEUED, get_match_scheduler, get_persisted_match_job
+from app.services.match_score_cache import get_match_score_cache
 from app.schemas.matching import (
     MatchRequest as NewMatchRequest,
     MatchResponse,
@@ -28,6 +38,8 @@ from app.schemas.matching import (
     AssignmentItem,
     AlternativesItem,
     MatchWeights,
+    ComponentScores,
+    RerankRequest,
 )
 from app.utils.llm_enhancement import enhance_with_llm_analysis_batched
 import numpy as np
@@ -144,17 +156,56 @@ def _get_structured_jd(jd_id: str) -> Optional[Dict[str, Any]]:
 # Progress Tracking for Large Matching Operations
 # ----------------------------
 
-# Global progress tracking (in production, use Redis or database)
-_matching_progress = {}
+# Progress state: this worker's live dict, mirrored to Redis by the progress bus
+# so polls and event streams work from any worker.
+_matching_progress = get_progress_bus().states("matching")
+
+# How many of the best candidates so far are pushed after each scored chunk
+MATCH_PARTIAL_TOP_K = int(os.getenv("MATCH_PARTIAL_TOP_K", "10"))
 
 # ----------------------------
-# Matching Concurrency Control
+# Matching Scheduler
 # ----------------------------
-# Semaphore to limit concurrent matching operations (max 2 at a time)
-_matching_semaphore = asyncio.Semaphore(2)
-_matching_queue: List[str] = []  # Track queued requests (by request ID)
-_matching_active: Dict[str, float] = {}  # Track active matches (request_id -> start_time)
-_matching_lock = asyncio.Lock()  # Lock for queue operations
+# /match jobs are admitted by estimated cost and picked round-robin per user
+# (app/services/match_scheduler.py).
+MAX_CV_LIMIT = 300
+
+# Cost units per CV: stored JD embeddings vs a text JD embedded on the fly,
+# plus a fixed per-job overhead (JD resolution, LLM enhancement of the top results)
+MATCH_COST_PER_CV = float(os.getenv("MATCH_COST_PER_CV", "1.0"))
+MATCH_COST_PER_CV_TEXT_JD = float(os.getenv("MATCH_COST_PER_CV_TEXT_JD", "1.5"))
+MATCH_COST_OVERHEAD = float(os.getenv("MATCH_COST_OVERHEAD", "10"))
+
+
+def estimate_match_cost(req: NewMatchRequest) -> float:
+    """Scheduler cost of a match request; "all CVs" is costed at the CV limit."""
+    n_cvs = len(req.cv_ids) if req.cv_ids else MAX_CV_LIMIT
+    per_cv = MATCH_COST_PER_CV if req.jd_id else MATCH_COST_PER_CV_TEXT_JD
+    return MATCH_COST_OVERHEAD + n_cvs * per_cv
+
+
+def _match_user_key(request: Request) -> str:
+    """Fair-queueing identity: the token's username, else the client IP."""
+    username = get_optional_username(request)
+    if username:
+        return f"user:{username}"
+    return f"ip:{get_rate_limiter().get_client_ip(request)}"
+
+
+def _match_fingerprint(user_key: str, req: NewMatchRequest) -> str:
+    """Identical re-submits from one user map to the same job."""
+    payload = {
+        "user": user_key,
+        "jd_id": req.jd_id,
+        "jd_text": hashlib.sha256(req.jd_text.encode("utf-8")).hexdigest() if req.jd_text else None,
+        "cv_ids": sorted(req.cv_ids) if req.cv_ids else None,
+        "weights": req.weights.model_dump() if req.weights else None,
+        "top_alternatives": req.top_alternatives,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+get_metrics_registry().register_collector("match_queue", lambda: get_match_scheduler().metrics_lines())
 
 @router.get("/matching-progress/{job_id}")
 async def get_matching_progress(job_id: str):
@@ -163,7 +214,7 @@ async def get_matching_progress(job_id: str):
     Useful for monitoring large batch matching jobs.
     """
     try:
-        progress = _matching_progress.get(job_id, {})
+        progress = get_progress_bus().get_state("matching", job_id)
         return JSONResponse({
             "job_id": job_id,
             "status": progress.get("status", "not_found"),
@@ -180,11 +231,22 @@ async def get_matching_progress(job_id: str):
         logger.error(f"❌ Failed to get matching progress: {e}")
         raise HTTPException(status_code=500, detail=f"Progress tracking error: {str(e)}")
 
+@router.get("/matching-progress/{job_id}/stream")
+async def stream_matching_progress(job_id: str):
+    """
+    Server-sent events for a matching job: "progress" on every state change and
+    "partial_results" (best candidates so far) after each scored chunk.
+    The stream closes once the job completes or fails.
+    """
+    return StreamingResponse(
+        get_progress_bus().stream("matching", job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 def update_matching_progress(job_id: str, **kwargs):
-    """Update matching progress for a job"""
-    if job_id not in _matching_progress:
-        _matching_progress[job_id] = {}
-    _matching_progress[job_id].update(kwargs)
+    """Update matching progress for a job (and push it to stream subscribers)"""
+    get_progress_bus().update("matching", job_id, **kwargs)
 
 # ----------------------------
 # Optimized Parallel Processing Functions
@@ -216,29 +278,25 @@ async def process_single_candidate(candidate_data: dict, jd_structured: dict, ma
         }
         
         # Use MatchingService to get match result (run in shared thread pool to avoid blocking)
-        import asyncio
-        from concurrent.futures import ThreadPoolExecutor
-        
-        # Use a shared thread pool executor to prevent thread exhaustion
-        # Create a module-level executor if it doesn't exist
-        if not hasattr(process_single_candidate, '_executor'):
-            # Increased to 20 workers for better performance with large batches (104+ CVs)
-            process_single_candidate._executor = ThreadPoolExecutor(max_workers=20, thread_name_prefix="match_worker")
+        # The match scheduler's dedicated pool, sized to the cores
+        executor = get_match_scheduler().executor
         
         loop = asyncio.get_event_loop()
         if jd_structured.get("id") != "text_jd":
             # OPTIMIZED: Use stored embeddings for both CV and JD
             match_result = await loop.run_in_executor(
-                process_single_candidate._executor, 
+                executor, 
                 matching_service.match_by_ids,
                 cv_id,
                 jd_structured.get("id"),
-                weights
+                weights,
+                candidate_data.get("stored_at"),
+                jd_structured.get("stored_at")
             )
         else:
             # LEGACY: Generate embeddings for text JD, use stored for CV if available
             match_result = await loop.run_in_executor(
-                process_single_candidate._executor,
+                executor,
                 matching_service.match_structured_data,
                 cv_structured,
                 jd_structured,
@@ -255,10 +313,17 @@ async def process_single_candidate(candidate_data: dict, jd_structured: dict, ma
         logger.error(f"❌ Failed to process candidate {candidate_data.get('id', 'unknown')}: {e}")
         return None
 
-async def process_candidates_chunk_parallel(candidates_chunk: list, jd_structured: dict, matching_service, weights: dict) -> list:
+async def process_candidates_chunk_parallel(
+    candidates_chunk: list,
+    jd_structured: dict,
+    matching_service,
+    weights: dict,
+    component_scores: Optional[list] = None,
+) -> list:
     """
     Process a chunk of candidates in parallel using asyncio.
     This provides significant performance improvement for large batches.
+    When `component_scores` is given, each candidate's ComponentScores row is appended to it.
     """
     try:
         # Create tasks for parallel processing
@@ -328,6 +393,15 @@ async def process_candidates_chunk_parallel(candidates_chunk: list, jd_structure
                 skills_alternatives=[],  # Not provided by MatchingService
                 responsibilities_alternatives=[]  # Not provided by MatchingService
             ))
+            if component_scores is not None:
+                component_scores.append(ComponentScores(
+                    cv_id=cv_structured["id"],
+                    skills=match_result.skills_score,
+                    responsibilities=match_result.responsibilities_score,
+                    job_title=match_result.title_score,
+                    experience=match_result.experience_score,
+                    business_rule_modifier=match_result.match_details.get("business_rule_modifier", 0.0),
+                ))
         
         return resp_candidates
         
@@ -341,312 +415,401 @@ async def process_candidates_chunk_parallel(candidates_chunk: list, jd_structure
 # In special_routes.py, update the /match endpoint
 
 @router.post("/match", response_model=MatchResponse)
-async def match_candidates(req: NewMatchRequest):
+async def match_candidates(req: NewMatchRequest, request: Request):
     """
     Deterministic, explainable matching using Hungarian assignment on
     sentence-level embeddings. Delegates to MatchingService helpers.
     
-    Note: Large matching operations (>100 CVs) may take several minutes.
-    The operation has a maximum timeout of 15 minutes to prevent indefinite hangs.
-    
-    Concurrency: Maximum 2 matching operations can run simultaneously.
-    Additional requests will be queued and processed in order.
+    Requests go through the fair match scheduler: when there is capacity the
+    match runs right away and the result is returned inline. Otherwise the
+    response is queued (is_queued=True) with a job_id, queue position and an
+    ETA from measured throughput; the job keeps its place and its result is
+    fetched from GET /api/match/jobs/{job_id} - re-submitting is not needed
+    (an identical re-submit returns the same job).
     """
-    import uuid
-    request_id = str(uuid.uuid4())
+    # ========================================================================
+    # CV LIMIT CHECK: Maximum 300 CVs per request (applies even when queued)
+    # ========================================================================
+    if req.cv_ids and len(req.cv_ids) > MAX_CV_LIMIT:
+        error_message = (
+            f"Currently, our system supports matching up to {MAX_CV_LIMIT} CVs at a time. "
+            f"You selected {len(req.cv_ids)} CVs. "
+            f"Please reduce your selection to {MAX_CV_LIMIT} CVs or fewer and try again."
+        )
+        logger.warning(f"⚠️ Matching request rejected: {len(req.cv_ids)} CVs requested (max: {MAX_CV_LIMIT})")
+        raise HTTPException(
+            status_code=400,
+            detail=error_message
+        )
+    if not (req.jd_id or req.jd_text):
+        raise HTTPException(status_code=400, detail="Provide jd_id or jd_text")
+    
+    scheduler = get_match_scheduler()
+    user_key = _match_user_key(request)
+    # Progress and partial_results are keyed by the job id the client gets back
+    job_id = str(uuid.uuid4())
+    job = scheduler.submit(
+        user_key,
+        estimate_match_cost(req),
+        lambda: _run_match(req, job_id),
+        fingerprint=_match_fingerprint(user_key, req),
+        job_id=job_id,
+    )
     
+    if job.status == QUEUED:
+        position = scheduler.queue_position(job)
+        eta = int(round(scheduler.eta_seconds(job)))
+        logger.info(f"⏳ Match job {job.job_id} queued for {user_key} (position: {position}, eta: {eta}s)")
+        return MatchResponse(
+            jd_id=req.jd_id,
+            jd_job_title=None,
+            jd_years=0,
+            normalized_weights=MatchWeights(),
+            candidates=[],
+            is_queued=True,
+            queue_position=position,
+            estimated_wait_time=eta,
+            message=(
+                f"Other users are currently matching. Your request is queued at position {position}. "
+                f"Estimated time: about {max(1, eta // 60)} minutes. It keeps its place - no need to resubmit."
+            ),
+            job_id=job.job_id,
+        )
+    
+    await job.done.wait()
+    if job.status == FAILED:
+        raise HTTPException(status_code=job.error_status, detail=job.error)
+    return {**job.result, "job_id": job.job_id}
+
+
+@router.get("/match/jobs/{job_id}")
+async def get_match_job(job_id: str):
+    """
+    Status of a scheduled match: queue position and ETA while waiting, and the
+    full MatchResponse under "result" once completed.
+    """
+    scheduler = get_match_scheduler()
+    job = scheduler.get(job_id)
+    if job is None:
+        # Submitted on another worker (or before a restart)
+        record = get_persisted_match_job(job_id)
+        if not record:
+            raise HTTPException(status_code=404, detail="Match job not found")
+        return JSONResponse(record)
+    body = scheduler.snapshot(job)
+    if job.status == COMPLETED:
+        body["result"] = {**job.result, "job_id": job.job_id}
+    return JSONResponse(body)
+
+
+def rerank_match_result(result: Dict[str, Any], weights: MatchWeights) -> Dict[str, Any]:
+    """
+    Re-apply `weights` and the recorded business-rule modifiers to a finished match's
+    component scores and re-sort. No Qdrant reads and no embeddings: O(candidates).
+
+    LLM-analyzed candidates keep their LLM overall score (it does not depend on the
+    weights); their semantic_score is updated.
+    """
+    rows = {row["cv_id"]: row for row in result.get("component_scores") or []}
+    if not rows:
+        raise HTTPException(status_code=409, detail="This match has no component scores; run it again to re-rank")
+
+    Wn = normalize_weights(weights.dict())
+    candidates = []
+    for candidate in result.get("candidates", []):
+        row = rows.get(candidate["cv_id"])
+        if row is not None:
+            semantic = MatchingService.weighted_overall_score(
+                row["skills"], row["responsibilities"], row["job_title"], row["experience"],
+                Wn, row.get("business_rule_modifier", 0.0),
+            ) / 100.0
+            candidate = dict(candidate)
+            if candidate.get("has_llm_analysis"):
+                candidate["semantic_score"] = semantic
+            else:
+                candidate["overall_score"] = semantic
+        candidates.append(candidate)
+    candidates.sort(key=lambda c: c["overall_score"], reverse=True)
+    return {**result, "normalized_weights": Wn, "candidates": candidates}
+
+
+@router.post("/match/jobs/{job_id}/rerank", response_model=MatchResponse)
+async def rerank_match_job(job_id: str, body: RerankRequest):
+    """
+    Re-rank a completed match with new weights. Uses the component scores kept with
+    the job result, so a weights tweak costs milliseconds instead of a full /match run.
+    """
+    job = get_match_scheduler().get(job_id)
+    if job is not None:
+        job_status, result = job.status, job.result
+    else:
+        record = get_persisted_match_job(job_id)
+        if not record:
+            raise HTTPException(status_code=404, detail="Match job not found")
+        job_status, result = record.get("status"), record.get("result")
+    if job_status != COMPLETED or not result:
+        raise HTTPException(status_code=409, detail=f"Match job is {job_status}, not completed")
+    return {**rerank_match_result(result, body.weights), "job_id": job_id}
+
+
+async def _run_match(req: NewMatchRequest, job_id: str) -> Dict[str, Any]:
+    """
+    Run one match end to end (called by the match scheduler); returns a MatchResponse dict.
+    Progress and partial_results events are published under the scheduler's `job_id`.
+    """
     try:
-        # ========================================================================
-        # CV LIMIT CHECK: Maximum 300 CVs per request (applies even when queued)
-        # ========================================================================
-        MAX_CV_LIMIT = 300
-        
-        # Check CV limit BEFORE queue check - applies regardless of queue status
-        if req.cv_ids and len(req.cv_ids) > MAX_CV_LIMIT:
-            error_message = (
-                f"Currently, our system supports matching up to {MAX_CV_LIMIT} CVs at a time. "
-                f"You selected {len(req.cv_ids)} CVs. "
-                f"Please reduce your selection to {MAX_CV_LIMIT} CVs or fewer and try again."
+        # If no CV IDs specified (matching all), we'll check after counting
+        logger.info(f"🎯 Starting matching request: JD={req.jd_id or 'text'}, CVs={len(req.cv_ids) if req.cv_ids else 'all'}")
+
+        qdrant = get_qdrant_utils()
+        matching_service = get_matching_service()  # Get the matching service instance
+
+        # Resolve JD (id or text)
+        if not (req.jd_id or req.jd_text):
+            raise HTTPException(status_code=400, detail="Provide jd_id or jd_text")
+
+        if req.jd_id:
+            jd = qdrant.get_structured_jd(req.jd_id)
+            if not jd:
+                raise HTTPException(status_code=404, detail="JD not found")
+        else:
+            # Use LLM to standardize JD text to the same schema as DB
+            llm = get_llm_service()
+            jd_std = llm.standardize_jd(req.jd_text, "jd_input.txt")
+            jd = {
+                "id": "text_jd",
+                "job_title": jd_std.get("job_title", ""),
+                "years_of_experience": jd_std.get("experience_years", 0),
+                "skills_sentences": jd_std.get("skills", [])[:20],
+                "responsibility_sentences": (jd_std.get("responsibilities", []) or jd_std.get("responsibility_sentences", []))[:10],
+            }
+
+        # Parse JD years properly to handle string values like "3-7"
+        jd_title = jd.get("job_title") or ""
+        jd_years = safe_parse_years(jd.get("years_of_experience"))
+        jd_skills = [s for s in jd.get("skills_sentences", []) if s]
+        jd_resps = [r for r in jd.get("responsibility_sentences", []) if r]
+
+        # Candidate set - OPTIMIZED: Use batch retrieval for speed (2 Qdrant calls instead of 62)
+        candidates_meta = []
+        if req.cv_ids:
+            # If CV IDs were provided, fetch all of them in batch (much faster)
+            candidates_meta = qdrant.get_structured_cvs_batch(req.cv_ids)
+        else:
+            # If matching all CVs, fetch all but enforce 300 CV limit
+            all_cv_metas = qdrant.list_all_cvs()
+            logger.info(f"📊 Matching all CVs in database: {len(all_cv_metas)} CVs")
+
+            # Enforce 300 CV limit even when matching all
+            if len(all_cv_metas) > MAX_CV_LIMIT:
+                error_message = (
+                    f"Database contains {len(all_cv_metas)} CVs, but our system supports matching up to {MAX_CV_LIMIT} CVs at a time. "
+                    f"Please select specific CVs (up to {MAX_CV_LIMIT}) instead of matching all."
+                )
+                logger.warning(f"⚠️ Matching all CVs rejected: {len(all_cv_metas)} CVs in database (max: {MAX_CV_LIMIT})")
+                raise HTTPException(
+                    status_code=400,
+                    detail=error_message
+                )
+
+            # Fetch all CVs (within limit)
+            for meta in all_cv_metas:
+                c = qdrant.get_structured_cv(meta["id"])
+                if c:
+                    candidates_meta.append(c)
+
+        if not candidates_meta:
+            raise HTTPException(status_code=404, detail="No CVs available for matching")
+
+        # Log the number of CVs being matched
+        logger.info(f"🎯 Matching {len(candidates_meta)} CVs with JD")
+
+        # Weights
+        W = req.weights.dict() if req.weights else MatchWeights().dict()
+        Wn = normalize_weights(W)
+
+        # Prepare JD structured data for MatchingService
+        jd_structured = {
+            "id": jd.get("id", "text_jd"),
+            "job_title": jd_title,
+            "years_of_experience": jd_years,  # Use the parsed integer value
+            "skills": jd_skills,
+            "responsibilities": jd_resps,
+            "stored_at": jd.get("stored_at"),  # version for the match pair cache
+        }
+
+        # Warm the pair cache for this run in one round trip; unchanged pairs skip Qdrant entirely
+        if jd_structured["id"] != "text_jd" and jd_structured["stored_at"]:
+            pair_cache = get_match_score_cache()
+            pair_keys = [
+                pair_cache.key(jd_structured["id"], jd_structured["stored_at"], c["id"], c["stored_at"],
+                               matching_service.SCORING_VERSION)
+                for c in candidates_meta if c.get("stored_at")
+            ]
+            if pair_keys:
+                found = pair_cache.prefetch(pair_keys)
+                logger.info(f"🗂️ Match pair cache: {found}/{len(pair_keys)} pairs prefetched from Redis")
+
+        # OPTIMIZED: Process candidates in chunks with parallel processing
+        resp_candidates = []
+        component_scores = []
+        chunk_size = 50  # Process 50 CVs at a time
+        total_candidates = len(candidates_meta)
+        total_chunks = (total_candidates + chunk_size - 1) // chunk_size
+
+        # Initialize progress tracking
+        start_time = time.time()
+        update_matching_progress(job_id, 
+            status="processing",
+            total_candidates=total_candidates,
+            total_chunks=total_chunks,
+            start_time=start_time,
+            progress_percent=0,
+            processed_candidates=0,
+            current_chunk=0,
+            results_so_far=0
+        )
+
+        logger.info(f"🚀 Starting optimized matching: {total_candidates} CVs in {total_chunks} chunks of {chunk_size}")
+
+        # Process candidates in chunks
+        for chunk_start in range(0, total_candidates, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, total_candidates)
+            chunk_candidates = candidates_meta[chunk_start:chunk_end]
+            chunk_number = chunk_start // chunk_size + 1
+
+            # Update progress
+            update_matching_progress(job_id,
+                current_chunk=chunk_number,
+                progress_percent=(chunk_number / total_chunks) * 100
             )
-            logger.warning(f"⚠️ Matching request rejected: {len(req.cv_ids)} CVs requested (max: {MAX_CV_LIMIT})")
-            raise HTTPException(
-                status_code=400,
-                detail=error_message
+
+            logger.info(f"📦 Processing chunk {chunk_number}/{total_chunks}: CVs {chunk_start+1}-{chunk_end} ({len(chunk_candidates)} candidates)")
+
+            # Backpressure between chunks (cached snapshot, never blocks the loop)
+            if not await get_resource_monitor().wait_for_headroom_async(
+                matching_service.max_cpu_usage, matching_service.max_memory_usage
+            ):
+                logger.warning(f"⚠️ System under pressure, continuing chunk {chunk_number} anyway")
+
+            # Process chunk candidates in parallel
+            chunk_start_time = time.time()
+            chunk_results = await process_candidates_chunk_parallel(
+                chunk_candidates, jd_structured, matching_service, Wn, component_scores
             )
-        
-        # Check queue position before acquiring semaphore
-        async with _matching_lock:
-            active_count = len(_matching_active)
-            queue_position = len(_matching_queue)
-            total_waiting = active_count + queue_position
-            
-            if total_waiting >= 2:
-                # Add to queue
-                _matching_queue.append(request_id)
-                queue_pos = len(_matching_queue)
-                # Estimate: ~5 minutes per match for 200 CVs
-                estimated_wait = queue_pos * 300  # seconds
-                
-                logger.info(f"⏳ Matching request queued: {request_id} (position: {queue_pos}, active: {active_count})")
-                
-                # Return queued status immediately
-                return MatchResponse(
-                    jd_id=req.jd_id,
-                    jd_job_title=None,
-                    jd_years=0,
-                    normalized_weights=MatchWeights(),
-                    candidates=[],
-                    is_queued=True,
-                    queue_position=queue_pos,
-                    estimated_wait_time=estimated_wait,
-                    message=f"Other users are currently matching. Your request is queued at position {queue_pos}. Estimated wait time: {estimated_wait // 60} minutes."
-                )
-        
-        # Acquire semaphore (wait if 2 matches already running)
-        logger.info(f"🎯 Matching request starting: {request_id} (waiting for semaphore...)")
-        async with _matching_semaphore:
-            # Remove from queue if it was there, mark as active
-            async with _matching_lock:
-                if request_id in _matching_queue:
-                    _matching_queue.remove(request_id)
-                _matching_active[request_id] = time.time()
-                queue_position = len(_matching_queue)
-            
-            logger.info(f"✅ Matching request acquired semaphore: {request_id} (queue: {queue_position} waiting)")
-            
+            chunk_time = time.time() - chunk_start_time
+
+            resp_candidates.extend(chunk_results)
+
+            # Memory cleanup between chunks
+            import gc
+            gc.collect()
+
+            # Update progress
+            processed_so_far = len(resp_candidates)
+            progress_percent = (chunk_number / total_chunks) * 100
+            update_matching_progress(job_id,
+                processed_candidates=processed_so_far,
+                results_so_far=processed_so_far,
+                progress_percent=progress_percent
+            )
+            get_progress_bus().emit("matching", job_id, "partial_results", {
+                "job_id": job_id,
+                "processed_candidates": processed_so_far,
+                "total_candidates": total_candidates,
+                "top_candidates": top_k_snapshot(resp_candidates, MATCH_PARTIAL_TOP_K),
+            })
+
+            logger.info(f"✅ Chunk {chunk_number}/{total_chunks} completed in {chunk_time:.2f}s: {len(chunk_results)} results, total: {len(resp_candidates)} ({progress_percent:.1f}%)")
+
+        MATCH_CANDIDATES.inc(len(resp_candidates), outcome="scored")
+        MATCH_CANDIDATES.inc(total_candidates - len(resp_candidates), outcome="failed")
+
+        total_time = time.time() - start_time
+
+        # Sort candidates by overall score (semantic)
+        resp_candidates.sort(key=lambda x: x.overall_score, reverse=True)
+
+        # ENHANCED: LLM Analysis for Top Candidates
+        # Adaptive: Analyze top min(50, total) candidates
+        if req.jd_id and len(resp_candidates) > 0:
+            logger.info(f"🤖 Starting LLM enhancement for top candidates...")
             try:
-                # ========================================================================
-                # MATCHING TIMEOUT
-                # ========================================================================
-                MATCHING_TIMEOUT = 900  # 15 minutes maximum for matching operation
-                
-                # If no CV IDs specified (matching all), we'll check after counting
-                logger.info(f"🎯 Starting matching request: JD={req.jd_id or 'text'}, CVs={len(req.cv_ids) if req.cv_ids else 'all'}")
-                
-                qdrant = get_qdrant_utils()
-                matching_service = get_matching_service()  # Get the matching service instance
-                
-                # Resolve JD (id or text)
-                if not (req.jd_id or req.jd_text):
-                    raise HTTPException(status_code=400, detail="Provide jd_id or jd_text")
-                
-                if req.jd_id:
-                    jd = qdrant.get_structured_jd(req.jd_id)
-                    if not jd:
-                        raise HTTPException(status_code=404, detail="JD not found")
-                else:
-                    # Use LLM to standardize JD text to the same schema as DB
-                    llm = get_llm_service()
-                    jd_std = llm.standardize_jd(req.jd_text, "jd_input.txt")
-                    jd = {
-                        "id": "text_jd",
-                        "job_title": jd_std.get("job_title", ""),
-                        "years_of_experience": jd_std.get("experience_years", 0),
-                        "skills_sentences": jd_std.get("skills", [])[:20],
-                        "responsibility_sentences": (jd_std.get("responsibilities", []) or jd_std.get("responsibility_sentences", []))[:10],
-                    }
-                
-                # Parse JD years properly to handle string values like "3-7"
-                jd_title = jd.get("job_title") or ""
-                jd_years = safe_parse_years(jd.get("years_of_experience"))
-                jd_skills = [s for s in jd.get("skills_sentences", []) if s]
-                jd_resps = [r for r in jd.get("responsibility_sentences", []) if r]
-                
-                # Candidate set - OPTIMIZED: Use batch retrieval for speed (2 Qdrant calls instead of 62)
-                candidates_meta = []
-                if req.cv_ids:
-                    # If CV IDs were provided, fetch all of them in batch (much faster)
-                    candidates_meta = qdrant.get_structured_cvs_batch(req.cv_ids)
-                else:
-                    # If matching all CVs, fetch all but enforce 300 CV limit
-                    all_cv_metas = qdrant.list_all_cvs()
-                    logger.info(f"📊 Matching all CVs in database: {len(all_cv_metas)} CVs")
-                    
-                    # Enforce 300 CV limit even when matching all
-                    if len(all_cv_metas) > MAX_CV_LIMIT:
-                        error_message = (
-                            f"Database contains {len(all_cv_metas)} CVs, but our system supports matching up to {MAX_CV_LIMIT} CVs at a time. "
-                            f"Please select specific CVs (up to {MAX_CV_LIMIT}) instead of matching all."
-                        )
-                        logger.warning(f"⚠️ Matching all CVs rejected: {len(all_cv_metas)} CVs in database (max: {MAX_CV_LIMIT})")
-                        raise HTTPException(
-                            status_code=400,
-                            detail=error_message
-                        )
-                    
-                    # Fetch all CVs (within limit)
-                    for meta in all_cv_metas:
-                        c = qdrant.get_structured_cv(meta["id"])
-                        if c:
-                            candidates_meta.append(c)
-                
-                if not candidates_meta:
-                    raise HTTPException(status_code=404, detail="No CVs available for matching")
-                
-                # Log the number of CVs being matched
-                logger.info(f"🎯 Matching {len(candidates_meta)} CVs with JD")
-                
-                # Weights
-                W = req.weights.dict() if req.weights else MatchWeights().dict()
-                Wn = normalize_weights(W)
-                
-                # Prepare JD structured data for MatchingService
-                jd_structured = {
-                    "id": jd.get("id", "text_jd"),
-                    "job_title": jd_title,
-                    "years_of_experience": jd_years,  # Use the parsed integer value
-                    "skills": jd_skills,
-                    "responsibilities": jd_resps
-                }
-                
-                # OPTIMIZED: Process candidates in chunks with parallel processing
-                resp_candidates = []
-                chunk_size = 50  # Process 50 CVs at a time
-                total_candidates = len(candidates_meta)
-                total_chunks = (total_candidates + chunk_size - 1) // chunk_size
-                
-                # Initialize progress tracking
-                job_id = jd_structured.get("id", "text_jd")
-                start_time = time.time()
-                update_matching_progress(job_id, 
-                    status="processing",
-                    total_candidates=total_candidates,
-                    total_chunks=total_chunks,
-                    start_time=start_time,
-                    progress_percent=0,
-                    processed_candidates=0,
-                    current_chunk=0,
-                    results_so_far=0
-                )
-                
-                logger.info(f"🚀 Starting optimized matching: {total_candidates} CVs in {total_chunks} chunks of {chunk_size}")
-                
-                # Process candidates in chunks
-                for chunk_start in range(0, total_candidates, chunk_size):
-                    chunk_end = min(chunk_start + chunk_size, total_candidates)
-                    chunk_candidates = candidates_meta[chunk_start:chunk_end]
-                    chunk_number = chunk_start // chunk_size + 1
-                    
-                    # Update progress
-                    update_matching_progress(job_id,
-                        current_chunk=chunk_number,
-                        progress_percent=(chunk_number / total_chunks) * 100
-                    )
-                    
-                    logger.info(f"📦 Processing chunk {chunk_number}/{total_chunks}: CVs {chunk_start+1}-{chunk_end} ({len(chunk_candidates)} candidates)")
-                    
-                    # Process chunk candidates in parallel
-                    chunk_start_time = time.time()
-                    chunk_results = await process_candidates_chunk_parallel(
-                        chunk_candidates, jd_structured, matching_service, Wn
-                    )
-                    chunk_time = time.time() - chunk_start_time
-                    
-                    resp_candidates.extend(chunk_results)
-                    
-                    # Memory cleanup between chunks
-                    import gc
-                    gc.collect()
-                    
-                    # Update progress
-                    processed_so_far = len(resp_candidates)
-                    progress_percent = (chunk_number / total_chunks) * 100
-                    update_matching_progress(job_id,
-                        processed_candidates=processed_so_far,
-                        results_so_far=processed_so_far,
-                        progress_percent=progress_percent
-                    )
-                    
-                    logger.info(f"✅ Chunk {chunk_number}/{total_chunks} completed in {chunk_time:.2f}s: {len(chunk_results)} results, total: {len(resp_candidates)} ({progress_percent:.1f}%)")
-                
-                # Mark as completed
-                total_time = time.time() - start_time
-                update_matching_progress(job_id,
-                    status="completed",
-                    progress_percent=100,
-                    estimated_completion=time.time()
-                )
-                
-                # Sort candidates by overall score (semantic)
-                resp_candidates.sort(key=lambda x: x.overall_score, reverse=True)
-                
-                # ENHANCED: LLM Analysis for Top Candidates
-                # Adaptive: Analyze top min(50, total) candidates
-                if req.jd_id and len(resp_candidates) > 0:
-                    logger.info(f"🤖 Starting LLM enhancement for top candidates...")
-                    try:
-                        # Convert CandidateBreakdown to dict for enhancement
-                        candidates_dict = []
-                        for candidate in resp_candidates:
-                            candidates_dict.append({
-                                "cv_id": candidate.cv_id,
-                                "cv_name": candidate.cv_name,
-                                "overall_score": candidate.overall_score,
-                                "skills_score": candidate.skills_score,
-                                "responsibilities_score": candidate.responsibilities_score,
-                                "job_title_score": candidate.job_title_score,
-                                "years_score": candidate.years_score,
-                            })
-                        
-                        # Enhance with LLM analysis (adaptive top-K)
-                        enhanced_dict = await enhance_with_llm_analysis_batched(
-                            semantic_results=candidates_dict,
-                            jd_id=req.jd_id,
-                            batch_size=10
-                        )
-                        
-                        # Merge LLM analysis back into CandidateBreakdown objects
-                        for i, candidate in enumerate(resp_candidates):
-                            enhanced_data = enhanced_dict[i]
-                            
-                            # Add LLM fields to candidate (extend Pydantic model dynamically)
-                            candidate.has_llm_analysis = enhanced_data.get("has_llm_analysis", False)
-                            
-                            if candidate.has_llm_analysis:
-                                candidate.llm_analysis = enhanced_data.get("llm_analysis", {})
-                                candidate.semantic_score = candidate.overall_score
-                                
-                                # Update overall score with LLM score if available
-                                if "llm_score" in enhanced_data:
-                                    candidate.overall_score = enhanced_data["llm_score"]
-                        
-                        # Re-sort by updated scores (LLM scores may change ranking within top 50)
-                        resp_candidates.sort(key=lambda x: x.overall_score, reverse=True)
-                        
-                        llm_analyzed_count = sum(1 for c in resp_candidates if getattr(c, 'has_llm_analysis', False))
-                        logger.info(f"✅ LLM enhancement complete: {llm_analyzed_count} candidates analyzed")
-                        
-                    except Exception as e:
-                        logger.error(f"❌ LLM enhancement failed: {e} - continuing with semantic scores only")
-                
-                return MatchResponse(
+                # Convert CandidateBreakdown to dict for enhancement
+                candidates_dict = []
+                for candidate in resp_candidates:
+                    candidates_dict.append({
+                        "cv_id": candidate.cv_id,
+                        "cv_name": candidate.cv_name,
+                        "overall_score": candidate.overall_score,
+                        "skills_score": candidate.skills_score,
+                        "responsibilities_score": candidate.responsibilities_score,
+                        "job_title_score": candidate.job_title_score,
+                        "years_score": candidate.years_score,
+                    })
+
+                # Enhance with LLM analysis (adaptive top-K)
+                enhanced_dict = await enhance_with_llm_analysis_batched(
+                    semantic_results=candidates_dict,
                     jd_id=req.jd_id,
-                    jd_job_title=jd_title,
-                    jd_years=jd_years,  # Use the parsed integer value
-                    normalized_weights=MatchWeights(**Wn),
-                    candidates=resp_candidates,
-                    is_queued=False,
-                    queue_position=None,
-                    estimated_wait_time=None,
-                    message=None
+                    batch_size=10
                 )
-            finally:
-                # Remove from active matches
-                async with _matching_lock:
-                    if request_id in _matching_active:
-                        del _matching_active[request_id]
-                    logger.info(f"Matching request completed: {request_id}")
-    except HTTPException:
+
+                # Merge LLM analysis back into CandidateBreakdown objects
+                for i, candidate in enumerate(resp_candidates):
+                    enhanced_data = enhanced_dict[i]
+
+                    # Add LLM fields to candidate (extend Pydantic model dynamically)
+                    candidate.has_llm_analysis = enhanced_data.get("has_llm_analysis", False)
+
+                    if candidate.has_llm_analysis:
+                        candidate.llm_analysis = enhanced_data.get("llm_analysis", {})
+                        candidate.semantic_score = candidate.overall_score
+
+                        # Update overall score with LLM score if available
+                        if "llm_score" in enhanced_data:
+                            candidate.overall_score = enhanced_data["llm_score"]
+
+                # Re-sort by updated scores (LLM scores may change ranking within top 50)
+                resp_candidates.sort(key=lambda x: x.overall_score, reverse=True)
+
+                llm_analyzed_count = sum(1 for c in resp_candidates if getattr(c, 'has_llm_analysis', False))
+                logger.info(f"✅ LLM enhancement complete: {llm_analyzed_count} candidates analyzed")
+
+            except Exception as e:
+                logger.error(f"❌ LLM enhancement failed: {e} - continuing with semantic scores only")
+
+        MATCH_DURATION.observe(time.time() - start_time, source="jd_id" if req.jd_id else "jd_text")
+        response = MatchResponse(
+            jd_id=req.jd_id,
+            jd_job_title=jd_title,
+            jd_years=jd_years,  # Use the parsed integer value
+            normalized_weights=MatchWeights(**Wn),
+            candidates=resp_candidates,
+            is_queued=False,
+            queue_position=None,
+            estimated_wait_time=None,
+            message=None,
+            component_scores=component_scores,
+        ).model_dump(mode="json")
+
+        # Mark as completed once the result exists (LLM enhancement included); the
+        # stream closes on this event
+        update_matching_progress(job_id,
+            status="completed",
+            progress_percent=100,
+            estimated_completion=time.time()
+        )
+        return response
+    except HTTPException as e:
+        update_matching_progress(job_id, status="failed", error=e.detail)
         raise
     except Exception as e:
         logger.error(f"❌ Matching failed: {e}")
-        # Clean up on error
-        async with _matching_lock:
-            if request_id in _matching_queue:
-                _matching_queue.remove(request_id)
-            if request_id in _matching_active:
-                del _matching_active[request_id]
+        update_matching_progress(job_id, status="failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"Matching error: {str(e)}")
+
+
 async def match_text(request: TextMatchRequest) -> JSONResponse:
     """
     Match CV text against JD text using LLM standardization and embedding generation.
@@ -854,92 +1017,59 @@ async def match_text(request: TextMatchRequest) -> JSONResponse:
 # ----------------------------
 # Metrics endpoint for Prometheus
 # ----------------------------
-@router.get("/metrics")
-async def get_metrics() -> str:
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
     """
     Prometheus metrics endpoint for monitoring.
-    Returns metrics in Prometheus format.
+    Returns metrics in Prometheus text format.
+
+    Only formats values already held in memory: system gauges and Qdrant health
+    are refreshed by the background sampler, so a scrape never blocks the loop.
     """
     try:
-        import time
-        import psutil
-        import os
-        
-        # Basic system metrics
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        # Application metrics
-        qdrant_health = get_qdrant_utils().health_check()
-        cache_stats = get_cache_service().get_stats()
-        
-        # Build Prometheus format metrics
-        metrics = []
-        
-        # System metrics
-        metrics.append(f"# HELP system_cpu_percent CPU usage percentage")
-        metrics.append(f"# TYPE system_cpu_percent gauge")
-        metrics.append(f"system_cpu_percent {cpu_percent}")
-        
-        metrics.append(f"# HELP system_memory_used_bytes Memory used in bytes")
-        metrics.append(f"# TYPE system_memory_used_bytes gauge")
-        metrics.append(f"system_memory_used_bytes {memory.used}")
+        lines = [get_metrics_registry().render()]
         
-        metrics.append(f"# HELP system_memory_available_bytes Memory available in bytes")
-        metrics.append(f"# TYPE system_memory_available_bytes gauge")
-        metrics.append(f"system_memory_available_bytes {memory.available}")
+        # Cache metrics (local counters only - no Redis INFO round-trip).
+        # cache_*_total/cache_size_current keep their original unlabelled meaning
+        # (the app-level CacheService); Redis-layer counters are separate series.
+        stats = get_cache_service().stats()
+        hits, misses = stats["hits"], stats["misses"]
+        redis_hits, redis_misses = stats["redis"].get("hits", 0), stats["redis"].get("misses", 0)
+        lines.append("\n".join([
+            "# HELP cache_hits_total Total cache hits",
+            "# TYPE cache_hits_total counter",
+            f"cache_hits_total {hits}",
+            "# HELP cache_misses_total Total cache misses",
+            "# TYPE cache_misses_total counter",
+            f"cache_misses_total {misses}",
+            "# HELP cache_size_current Current cache size",
+            "# TYPE cache_size_current gauge",
+            f"cache_size_current {stats['size']}",
+            "# HELP redis_cache_hits_total Redis cache hits",
+            "# TYPE redis_cache_hits_total counter",
+            f"redis_cache_hits_total {redis_hits}",
+            "# HELP redis_cache_misses_total Redis cache misses",
+            "# TYPE redis_cache_misses_total counter",
+            f"redis_cache_misses_total {redis_misses}",
+            "# HELP cache_hit_ratio Cache hit ratio since start",
+            "# TYPE cache_hit_ratio gauge",
+            f'cache_hit_ratio{{layer="app"}} {hits / max(1, hits + misses)}',
+            f'cache_hit_ratio{{layer="redis"}} {redis_hits / max(1, redis_hits + redis_misses)}',
+        ]))
         
-        metrics.append(f"# HELP system_disk_used_bytes Disk used in bytes")
-        metrics.append(f"# TYPE system_disk_used_bytes gauge")
-        metrics.append(f"system_disk_used_bytes {disk.used}")
+        # Request analytics (per route template latency histograms)
+        from app.middleware.api_analytics import get_analytics_middleware
+        lines.append("\n".join(get_analytics_middleware().render_prometheus()))
         
-        # Application health metrics
-        qdrant_status = 1 if qdrant_health.get("status") == "healthy" else 0
-        metrics.append(f"# HELP qdrant_health_status Qdrant health status (1=healthy, 0=unhealthy)")
-        metrics.append(f"# TYPE qdrant_health_status gauge")
-        metrics.append(f"qdrant_health_status {qdrant_status}")
-        
-        # Cache metrics
-        if isinstance(cache_stats, dict):
-            cache_hits = cache_stats.get("hits", 0)
-            cache_misses = cache_stats.get("misses", 0)
-            cache_size = cache_stats.get("size", 0)
-            
-            metrics.append(f"# HELP cache_hits_total Total cache hits")
-            metrics.append(f"# TYPE cache_hits_total counter")
-            metrics.append(f"cache_hits_total {cache_hits}")
-            
-            metrics.append(f"# HELP cache_misses_total Total cache misses")
-            metrics.append(f"# TYPE cache_misses_total counter")
-            metrics.append(f"cache_misses_total {cache_misses}")
-            
-            metrics.append(f"# HELP cache_size_current Current cache size")
-            metrics.append(f"# TYPE cache_size_current gauge")
-            metrics.append(f"cache_size_current {cache_size}")
-        
-        # Process metrics
-        process = psutil.Process()
-        metrics.append(f"# HELP process_memory_used_bytes Process memory used in bytes")
-        metrics.append(f"# TYPE process_memory_used_bytes gauge")
-        metrics.append(f"process_memory_used_bytes {process.memory_info().rss}")
-        
-        metrics.append(f"# HELP process_cpu_percent Process CPU usage percentage")
-        metrics.append(f"# TYPE process_cpu_percent gauge")
-        metrics.append(f"process_cpu_percent {process.cpu_percent()}")
-        
-        # Environment info
-        environment = os.getenv("ENVIRONMENT", "development")
-        metrics.append(f"# HELP application_environment Application environment")
-        metrics.append(f"# TYPE application_environment gauge")
-        metrics.append(f"application_environment{{env=\"{environment}\"}} 1")
-        
-        return "\n".join(metrics)
+        return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
         
     except Exception as e:
         logger.error(f"❌ Metrics collection failed: {e}")
         # Return basic error metric
-        return f"# HELP metrics_error_total Total metrics collection errors\n# TYPE metrics_error_total counter\nmetrics_error_total 1"
+        return PlainTextResponse(
+            "# HELP metrics_error_total Total metrics collection errors\n# TYPE metrics_error_total counter\nmetrics_error_total 1\n",
+            media_type="text/plain; version=0.0.4",
+        )
 
 # ----------------------------
 # Health & system stats
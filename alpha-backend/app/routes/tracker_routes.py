@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+import base64
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, or_
+from sqlalchemy import select as sa_select
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, select
 
 from app.core.config import settings
-from app.db.tracker_db import get_tracker_session
+from app.db.tracker_db import get_tracker_engine, get_tracker_session
 from app.deps.auth import require_roles
 from app.models.tracker.models import (
     TrackerApplication,
@@ -45,6 +50,11 @@ from app.schemas.tracker import (
 from app.utils.redis_cache import get_redis_cache
 from app.core.config import is_followup_email_reminder_enabled
 from app.services.followup_reminder_service import render_followup_email_html, send_followup_reminder_email
+from app.services.tracker_import_service import (
+    SelectionsImportError,
+    import_selections,
+    parse_selections_workbook,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -224,6 +234,7 @@ def bootstrap_abudhabi_from_existing_tables(
 @router.post("/admin/import/selections-xlsx", status_code=200)
 async def import_selections_xlsx(
     team: str = Query(..., description="dubai|abudhabi"),
+    dry_run: bool = Query(default=False, description="Validate and preview without writing"),
     file: UploadFile = File(...),
     session: Session = Depends(tracker_session),
     user: User = AllowedTrackerAdminUser,
@@ -233,108 +244,45 @@ async def import_selections_xlsx(
 
     - Imports into the selected team's tables (Dubai or Abu Dhabi).
     - Does not touch Manager Settings/options; you can manage those manually.
+    - All rows are written in one transaction; `dry_run=true` returns the counts,
+      per-row errors/warnings and a preview without writing anything.
     """
-    from datetime import date
-    from io import BytesIO
-
-    from openpyxl import load_workbook
-
     team_norm = _norm_team(team)
     if team_norm not in {"dubai", "dxb", "abudhabi", "abudabi", "abudh"}:
         raise HTTPException(status_code=400, detail="Invalid team; use dubai|abudhabi")
     team_resolved = "abudhabi" if team_norm in {"abudhabi", "abudabi", "abudh"} else "dubai"
 
     models = _tracker_models(team_resolved)
-    Candidate = models["Candidate"]
-    Application = models["Application"]
 
     raw = await file.read()
     if not raw:
         raise HTTPException(status_code=400, detail="Empty file")
 
+    # Parsing and the bulk insert are CPU/DB bound; keep them off the event loop.
     try:
-        wb = load_workbook(filename=BytesIO(raw), data_only=True)
-        ws = wb.active
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid Excel file")
-
-    # Expect the same header as export_candidates_xlsx
-    header_row = [str(c.value).strip() if c.value is not None else "" for c in next(ws.iter_rows(min_row=1, max_row=1))]
-    header_map = {h.lower(): i for i, h in enumerate(header_row)}
-    required = ["candidate name"]
-    for r in required:
-        if r not in header_map:
-            raise HTTPException(status_code=400, detail=f"Missing required column: {r}")
-
-    def _cell(row, name: str) -> str:
-        idx = header_map.get(name.lower())
-        if idx is None:
-            return ""
-        v = row[idx].value
-        return (str(v).strip() if v is not None else "")
-
-    def _parse_date(v: str | None) -> date | None:
-        if not v:
-            return None
-        try:
-            # If openpyxl already gave us a python date/datetime, keep it.
-            if hasattr(v, "year") and hasattr(v, "month") and hasattr(v, "day"):
-                return date(int(v.year), int(v.month), int(v.day))  # type: ignore[arg-type]
-            s = str(v).strip()
-            if not s:
-                return None
-            return date.fromisoformat(s[:10])
-        except Exception:
-            return None
-
-    inserted_candidates = 0
-    inserted_applications = 0
-    skipped = 0
-
-    for row in ws.iter_rows(min_row=2):
-        name = _cell(row, "Candidate Name")
-        if not name:
-            skipped += 1
-            continue
-
-        cand = session.exec(
-            select(Candidate).where(Candidate.name == name).where(Candidate.is_deleted == False)  # noqa: E712
-        ).first()
-        if not cand:
-            cand = Candidate(name=name)
-            session.add(cand)
-            session.commit()
-            session.refresh(cand)
-            inserted_candidates += 1
-
-        applied_date = _parse_date(_cell(row, "Date"))
-        app = Application(
-            candidate_id=cand.id,
-            job_opening_id=None,
-            applied_date=applied_date,
-            position=_cell(row, "Position") or None,
-            client=_cell(row, "Client") or None,
-            status=_cell(row, "Status") or "MRF Pending",
-            recruiter=_cell(row, "Recruiter") or None,
-            account_manager=_cell(row, "Account Manager") or None,
-            recruitment_manager=_cell(row, "Recruitment Manager") or None,
-            comment=_cell(row, "Comment") or None,
+        parsed = await run_in_threadpool(parse_selections_workbook, raw)
+    except SelectionsImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        result = await run_in_threadpool(
+            import_selections,
+            session,
+            models["Candidate"],
+            models["Application"],
+            parsed,
             created_by_username=getattr(user, "username", None),
             created_by_role=getattr(user, "role", None),
             created_by_team_location=("Abu Dhabi" if team_resolved == "abudhabi" else "Dubai"),
+            dry_run=dry_run,
         )
-        session.add(app)
-        session.commit()
-        inserted_applications += 1
+    except Exception as e:
+        logger.error(f"❌ Tracker import failed, nothing written: {e}")
+        raise HTTPException(status_code=500, detail="Import failed; no rows were written")
 
-    _tracker_cache_bust()
-    return {
-        "success": True,
-        "team": team_resolved,
-        "inserted_candidates": inserted_candidates,
-        "inserted_applications": inserted_applications,
-        "skipped_rows": skipped,
-    }
+    if not dry_run:
+        _tracker_cache_bust()
+    return {"success": True, "team": team_resolved, **result}
 
 
 @router.post("/admin/clear-team", status_code=200)
@@ -983,59 +931,127 @@ def list_applications(
     ]
 
 
+def _encode_row_cursor(created_at: datetime, candidate_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{candidate_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_row_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        ts, candidate_id = raw.split("|", 1)
+        return datetime.fromisoformat(ts), candidate_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _visible_team_locations(session: Session, Application, user: User) -> Optional[list[str]]:
+    """
+    Row-level access safety:
+    Even though we split tables by team, older deployments may have mixed-location rows
+    in the Dubai tables from before the split. For non-admin/EVP users, enforce a strict
+    filter by the immutable creator team location.
+
+    Returns None for unrestricted users, otherwise the raw stored location spellings whose
+    normalized form matches the user's team (resolved from the small DISTINCT set, so the
+    actual filter is an indexed IN list).
+    """
+    if user.role in {"admin", "evp"}:
+        return None
+    team_loc = _norm_team(getattr(user, "team_location", None) or "")
+    if not team_loc:
+        return []
+    stored = session.exec(select(Application.created_by_team_location).distinct()).all()
+    return [loc for loc in stored if loc and _norm_team(loc) == team_loc]
+
+
+def _latest_application_rows(
+    session: Session,
+    Candidate,
+    Application,
+    locations: Optional[list[str]],
+    limit: Optional[int],
+    after: Optional[tuple[datetime, str]],
+):
+    """
+    (candidate, latest visible application) pairs in one query.
+
+    ROW_NUMBER() over (candidate_id, created_at DESC) picks the latest application per
+    candidate (served by the composite index); candidates are ordered newest first with
+    id as tie-breaker so (created_at, id) works as a keyset cursor.
+    """
+    rn = (
+        func.row_number()
+        .over(
+            partition_by=Application.candidate_id,
+            order_by=(Application.created_at.desc(), Application.id.desc()),
+        )
+        .label("rn")
+    )
+    ranked_q = sa_select(Application, rn)
+    if locations is not None:
+        ranked_q = ranked_q.where(Application.created_by_team_location.in_(locations))
+    ranked = ranked_q.subquery("ranked_application")
+    latest = aliased(Application, ranked)
+
+    on_latest = and_(latest.candidate_id == Candidate.id, ranked.c.rn == 1)
+    q = sa_select(Candidate, latest).where(Candidate.is_deleted == False)  # noqa: E712
+    # For restricted users, hide candidates with no visible application in their team.
+    q = q.join(latest, on_latest) if locations is not None else q.outerjoin(latest, on_latest)
+    if after is not None:
+        after_created_at, after_id = after
+        q = q.where(
+            or_(
+                Candidate.created_at < after_created_at,
+                and_(Candidate.created_at == after_created_at, Candidate.id < after_id),
+            )
+        )
+    q = q.order_by(Candidate.created_at.desc(), Candidate.id.desc())
+    if limit is not None:
+        q = q.limit(limit)
+    return session.exec(q).all()
+
+
 @router.get("/candidate-rows", response_model=List[TrackerCandidateRowRead])
 def list_candidate_rows(
+    response: Response,
     team: Optional[str] = Query(default=None),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor from the previous page"),
     session: Session = Depends(tracker_session),
     user: User = AllowedTrackerReadUser,
 ):
-    """Convenience endpoint for UI: returns candidate + latest application in one call."""
+    """
+    Convenience endpoint for UI: returns candidate + latest application in one call.
+
+    Without `limit` every row is returned (previous behaviour). With `limit`, rows are
+    paged by keyset; pass the `X-Next-Cursor` response header back as `cursor`.
+    """
     team_resolved = _resolve_tracker_team(user, team)
-    cache_hit = _tracker_cache_get(
-        team_resolved,
-        "candidate_rows",
+    cache_parts = (
         f"role={user.role}",
         f"team_location={_norm_team(getattr(user, 'team_location', None) or '')}",
+        f"limit={limit or ''}",
+        f"cursor={cursor or ''}",
     )
+    cache_hit = _tracker_cache_get(team_resolved, "candidate_rows", *cache_parts)
     if cache_hit is not None:
-        return cache_hit
+        if cache_hit.get("next_cursor"):
+            response.headers["X-Next-Cursor"] = cache_hit["next_cursor"]
+        return cache_hit["rows"]
+    after = _decode_row_cursor(cursor) if cursor else None
     models = _tracker_models(team_resolved)
     Candidate = models["Candidate"]
     Application = models["Application"]
-    candidates = session.exec(
-        select(Candidate).where(Candidate.is_deleted == False).order_by(Candidate.created_at.desc())  # noqa: E712
-    ).all()
-    apps = session.exec(select(Application).order_by(Application.created_at.desc())).all()
-
-    # Row-level access safety:
-    # Even though we split tables by team, older deployments may have mixed-location rows
-    # in the Dubai tables from before the split. For non-admin/EVP users, enforce a strict
-    # filter by the immutable creator team location (fallback: editable location only if needed).
-    if user.role not in {"admin", "evp"}:
-        team_loc = _norm_team(getattr(user, "team_location", None) or "")
-        if team_loc:
-            apps = [
-                a
-                for a in apps
-                if _norm_team(
-                    (getattr(a, "created_by_team_location", None) or "")
-                )
-                == team_loc
-            ]
-        else:
-            apps = []
-
-    latest_app_by_cand: dict[str, Application] = {}
-    for a in apps:
-        if a.candidate_id not in latest_app_by_cand:
-            latest_app_by_cand[a.candidate_id] = a
+
+    locations = _visible_team_locations(session, Application, user)
+    if locations == []:
+        rows = []
+    else:
+        rows = _latest_application_rows(session, Candidate, Application, locations, limit, after)
 
     out: list[TrackerCandidateRowRead] = []
-    for c in candidates:
-        a = latest_app_by_cand.get(c.id)
-        # For restricted users, hide candidates with no visible application in their team.
-        if user.role not in {"admin", "evp"} and not a:
-            continue
+    for c, a in rows:
         out.append(
             TrackerCandidateRowRead(
                 candidate=TrackerCandidateRead(
@@ -1069,14 +1085,20 @@ def list_candidate_rows(
                 ),
             )
         )
-    # Keep TTL short because this is the heaviest endpoint.
+
+    next_cursor = None
+    if limit is not None and len(rows) == limit:
+        last = rows[-1][0]
+        next_cursor = _encode_row_cursor(last.created_at, last.id)
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    # Keep TTL short; writes bust the whole tracker namespace anyway.
     _tracker_cache_set(
         team_resolved,
         "candidate_rows",
-        [o.model_dump() for o in out],
+        {"rows": [o.model_dump() for o in out], "next_cursor": next_cursor},
         30,
-        f"role={user.role}",
-        f"team_location={_norm_team(getattr(user, 'team_location', None) or '')}",
+        *cache_parts,
     )
     return out
 
@@ -1472,27 +1494,100 @@ def delete_followup(
     return None
 
 
-@router.get("/export/job-openings.xlsx")
-def export_job_openings_xlsx(
-    team: Optional[str] = Query(default=None),
-    session: Session = Depends(tracker_session),
-    user: User = AllowedTrackerReadUser,
-):
-    from io import BytesIO
-    from openpyxl import Workbook
+# ---------- Exports ----------
+# Rows are pulled with yield_per (server-side cursor on Postgres) and written straight into
+# a write-only workbook spooled to a temp file, so memory stays flat regardless of row count.
+# XLSX is a zip and can only be sent once complete; the CSV variants stream from the first row.
 
-    team_resolved = _resolve_tracker_team(user, team)
-    JobOpening = _tracker_models(team_resolved)["JobOpening"]
-    rows = session.exec(
+_EXPORT_FETCH_ROWS = 500
+_EXPORT_STREAM_CHUNK_BYTES = 64 * 1024
+_XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _iso(v) -> str:
+    return v.isoformat() if v else ""
+
+
+def _job_opening_export_rows(session: Session, models) -> Iterator[list]:
+    JobOpening = models["JobOpening"]
+    q = (
         select(JobOpening)
         .where(JobOpening.is_deleted == False)  # noqa: E712
         .order_by(JobOpening.created_at.desc())
-    ).all()
+        .execution_options(yield_per=_EXPORT_FETCH_ROWS)
+    )
+    for i, r in enumerate(session.exec(q), start=1):
+        yield [
+            i,
+            r.title or "",
+            getattr(r, "client", None) or "",
+            r.hiring_manager or "",
+            getattr(r, "recruitment_manager", None) or "",
+            r.department or "",
+            _iso(getattr(r, "req_date", None)),
+            _iso(getattr(r, "submission_date", None)),
+            getattr(r, "cvs_submitted_count", None) if getattr(r, "cvs_submitted_count", None) is not None else "",
+            r.status or "",
+            getattr(r, "comments", None) or "",
+        ]
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Requirement Status"
-    ws.append(
+
+def _candidate_export_rows(session: Session, models) -> Iterator[list]:
+    Candidate = models["Candidate"]
+    Application = models["Application"]
+    q = (
+        select(Application, Candidate.name)
+        .join(Candidate, Candidate.id == Application.candidate_id)
+        .where(Candidate.is_deleted == False)  # noqa: E712
+        .order_by(Application.created_at.desc())
+        .execution_options(yield_per=_EXPORT_FETCH_ROWS)
+    )
+    for a, candidate_name in session.exec(q):
+        yield [
+            _iso(a.applied_date),
+            candidate_name,
+            a.position or "",
+            a.client or "",
+            a.status or "",
+            a.recruiter or "",
+            a.account_manager or "",
+            getattr(a, "recruitment_manager", None) or "",
+            a.comment or "",
+        ]
+
+
+def _followup_export_rows(session: Session, models) -> Iterator[list]:
+    FollowUp = models["FollowUp"]
+    q = (
+        select(FollowUp)
+        .where(FollowUp.is_deleted == False)  # noqa: E712
+        .order_by(FollowUp.next_follow_up_date.asc(), FollowUp.created_at.desc())
+        .execution_options(yield_per=_EXPORT_FETCH_ROWS)
+    )
+    for r in session.exec(q):
+        yield [
+            r.client_name or "",
+            r.position or "",
+            r.recruiter_name or "",
+            r.account_manager or "",
+            getattr(r, "recruitment_manager", None) or "",
+            _iso(r.cv_submitted_date),
+            r.current_stage or "",
+            _iso(r.last_follow_up_date),
+            _iso(r.next_follow_up_date),
+            _iso(getattr(r, "reminder_last_sent_at", None)),
+            _iso(r.interview_date),
+            r.client_feedback or "",
+            r.interview_feedback or "",
+            r.remarks or "",
+        ]
+
+
+# dataset -> (sheet title, file name, header, row generator)
+_EXPORTS = {
+    "job-openings": (
+        "Requirement Status",
+        "job_openings",
         [
             "S.no",
             "Role",
@@ -1505,49 +1600,12 @@ def export_job_openings_xlsx(
             "No of CVs Submitted",
             "Status",
             "Comments",
-        ]
-    )
-    for i, r in enumerate(rows, start=1):
-        ws.append(
-            [
-                i,
-                r.title or "",
-                getattr(r, "client", None) or "",
-                r.hiring_manager or "",
-                getattr(r, "recruitment_manager", None) or "",
-                r.department or "",
-                r.req_date.isoformat() if getattr(r, "req_date", None) else "",
-                getattr(r, "submission_date", None).isoformat() if getattr(r, "submission_date", None) else "",
-                getattr(r, "cvs_submitted_count", None) if getattr(r, "cvs_submitted_count", None) is not None else "",
-                r.status or "",
-                getattr(r, "comments", None) or "",
-            ]
-        )
-
-    buf = BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    headers = {"Content-Disposition": 'attachment; filename="job_openings.xlsx"'}
-    return StreamingResponse(
-        buf,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers=headers,
-    )
-
-
-@router.get("/export/candidates.xlsx")
-def export_candidates_xlsx(
-    team: Optional[str] = Query(default=None),
-    session: Session = Depends(tracker_session),
-    user: User = AllowedTrackerReadUser,
-):
-    from io import BytesIO
-    from openpyxl import Workbook
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Candidates"
-    ws.append(
+        ],
+        _job_opening_export_rows,
+    ),
+    "candidates": (
+        "Candidates",
+        "candidates",
         [
             "Date",
             "Candidate Name",
@@ -1558,69 +1616,12 @@ def export_candidates_xlsx(
             "Account Manager",
             "Recruitment Manager",
             "Comment",
-        ]
-    )
-
-    team_resolved = _resolve_tracker_team(user, team)
-    models = _tracker_models(team_resolved)
-    Candidate = models["Candidate"]
-    Application = models["Application"]
-    candidates_by_id = {
-        c.id: c
-        for c in session.exec(select(Candidate).where(Candidate.is_deleted == False)).all()  # noqa: E712
-    }
-    apps = session.exec(select(Application).order_by(Application.created_at.desc())).all()
-
-    for a in apps:
-        cand = candidates_by_id.get(a.candidate_id)
-        if not cand:
-            continue
-        ws.append(
-            [
-                a.applied_date.isoformat() if a.applied_date else "",
-                cand.name,
-                a.position or "",
-                a.client or "",
-                a.status or "",
-                a.recruiter or "",
-                a.account_manager or "",
-                getattr(a, "recruitment_manager", None) or "",
-                a.comment or "",
-            ]
-        )
-
-    buf = BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    headers = {"Content-Disposition": 'attachment; filename="candidates.xlsx"'}
-    return StreamingResponse(
-        buf,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers=headers,
-    )
-
-
-@router.get("/export/follow-ups.xlsx")
-def export_followups_xlsx(
-    team: Optional[str] = Query(default=None),
-    session: Session = Depends(tracker_session),
-    user: User = AllowedTrackerReadUser,
-):
-    from io import BytesIO
-    from openpyxl import Workbook
-
-    team_resolved = _resolve_tracker_team(user, team)
-    FollowUp = _tracker_models(team_resolved)["FollowUp"]
-    rows = session.exec(
-        select(FollowUp)
-        .where(FollowUp.is_deleted == False)  # noqa: E712
-        .order_by(FollowUp.next_follow_up_date.asc(), FollowUp.created_at.desc())
-    ).all()
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Follow-ups"
-    ws.append(
+        ],
+        _candidate_export_rows,
+    ),
+    "follow-ups": (
+        "Follow-ups",
+        "follow_ups",
         [
             "Client Name",
             "Position",
@@ -1636,35 +1637,112 @@ def export_followups_xlsx(
             "Client Feedback",
             "Interview Feedback",
             "Remarks",
-        ]
-    )
-    for r in rows:
-        ws.append(
-            [
-                r.client_name or "",
-                r.position or "",
-                r.recruiter_name or "",
-                r.account_manager or "",
-                getattr(r, "recruitment_manager", None) or "",
-                r.cv_submitted_date.isoformat() if r.cv_submitted_date else "",
-                r.current_stage or "",
-                r.last_follow_up_date.isoformat() if r.last_follow_up_date else "",
-                r.next_follow_up_date.isoformat() if r.next_follow_up_date else "",
-                r.reminder_last_sent_at.isoformat() if getattr(r, "reminder_last_sent_at", None) else "",
-                r.interview_date.isoformat() if r.interview_date else "",
-                r.client_feedback or "",
-                r.interview_feedback or "",
-                r.remarks or "",
-            ]
-        )
+        ],
+        _followup_export_rows,
+    ),
+}
+
 
-    buf = BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    headers = {"Content-Disposition": 'attachment; filename="follow_ups.xlsx"'}
+def _iter_file(fh, chunk_size: int = _EXPORT_STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    try:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fh.close()
+
+
+def _xlsx_export_response(dataset: str, session: Session, team_resolved: str) -> StreamingResponse:
+    """Write the dataset into a write-only workbook on a temp file, then stream the file."""
+    import tempfile
+
+    from openpyxl import Workbook
+
+    title, filename, header, rows = _EXPORTS[dataset]
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    ws.append(header)
+    for row in rows(session, _tracker_models(team_resolved)):
+        ws.append(row)
+
+    fh = tempfile.TemporaryFile()
+    try:
+        wb.save(fh)
+        fh.seek(0)
+    except Exception:
+        fh.close()
+        raise
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.xlsx"'}
+    return StreamingResponse(_iter_file(fh), media_type=_XLSX_MEDIA_TYPE, headers=headers)
+
+
+def _csv_export_stream(dataset: str, team_resolved: str) -> Iterator[bytes]:
+    """
+    Stream CSV as rows come off the cursor. Uses its own session because the response
+    body is produced after the request's dependencies have been torn down.
+    """
+    import csv
+    from io import StringIO
+
+    _, _, header, rows = _EXPORTS[dataset]
+    buf = StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")  # BOM so Excel opens the UTF-8 file correctly
+    writer.writerow(header)
+    with Session(get_tracker_engine()) as session:
+        for row in rows(session, _tracker_models(team_resolved)):
+            writer.writerow(row)
+            if buf.tell() >= _EXPORT_STREAM_CHUNK_BYTES:
+                yield buf.getvalue().encode("utf-8")
+                buf.seek(0)
+                buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+@router.get("/export/job-openings.xlsx")
+def export_job_openings_xlsx(
+    team: Optional[str] = Query(default=None),
+    session: Session = Depends(tracker_session),
+    user: User = AllowedTrackerReadUser,
+):
+    return _xlsx_export_response("job-openings", session, _resolve_tracker_team(user, team))
+
+
+@router.get("/export/candidates.xlsx")
+def export_candidates_xlsx(
+    team: Optional[str] = Query(default=None),
+    session: Session = Depends(tracker_session),
+    user: User = AllowedTrackerReadUser,
+):
+    return _xlsx_export_response("candidates", session, _resolve_tracker_team(user, team))
+
+
+@router.get("/export/follow-ups.xlsx")
+def export_followups_xlsx(
+    team: Optional[str] = Query(default=None),
+    session: Session = Depends(tracker_session),
+    user: User = AllowedTrackerReadUser,
+):
+    return _xlsx_export_response("follow-ups", session, _resolve_tracker_team(user, team))
+
+
+@router.get("/export/{dataset}.csv")
+def export_csv(
+    dataset: str,
+    team: Optional[str] = Query(default=None),
+    user: User = AllowedTrackerReadUser,
+):
+    """Same columns as the XLSX exports, streamed row by row (job-openings | candidates | follow-ups)."""
+    _require_tracker_enabled()
+    if dataset not in _EXPORTS:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    team_resolved = _resolve_tracker_team(user, team)
+    filename = _EXPORTS[dataset][1]
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.csv"'}
     return StreamingResponse(
-        buf,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        _csv_export_stream(dataset, team_resolved),
+        media_type="text/csv; charset=utf-8",
         headers=headers,
     )
-
@@ -53,6 +53,15 @@ class CandidateBreakdown(BaseModel):
     unmatched_jd_skills: List[str] = []
     unmatched_jd_responsibilities: List[str] = []
 
+class ComponentScores(BaseModel):
+    """Weight-independent scores of one candidate (percent), for server-side re-ranking."""
+    cv_id: str
+    skills: float
+    responsibilities: float
+    job_title: float
+    experience: float
+    business_rule_modifier: float = 0.0
+
 class MatchResponse(BaseModel):
     jd_id: Optional[str] = None
     jd_job_title: Optional[str] = None
@@ -63,4 +72,11 @@ class MatchResponse(BaseModel):
     is_queued: bool = False
     queue_position: Optional[int] = None
     estimated_wait_time: Optional[int] = None  # seconds
-    message: Optional[str] = None
\ No newline at end of file
+    message: Optional[str] = None
+    # Match scheduler job (GET /api/match/jobs/{job_id})
+    job_id: Optional[str] = None
+    # Component scores per candidate; POST /api/match/jobs/{job_id}/rerank re-applies new weights to them
+    component_scores: List[ComponentScores] = []
+
+class RerankRequest(BaseModel):
+    weights: MatchWeights
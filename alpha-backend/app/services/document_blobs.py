@@ -0,0 +1,134 @@
+"""
+Raw document bodies as content-addressed blobs.
+
+cv_documents / jd_documents points used to carry the whole compressed raw text, so
+every scroll of those collections without a tight projection (list_documents,
+GET /cvs, notes/all, list_cvs_by_category) moved every body over the wire, and
+Qdrant kept them all in payload storage. New documents store the body in the
+storage service's blob area instead, keyed by content_hash, and the point keeps:
+
+    raw_content_blob        blob key ("<content_hash>.<codec>")
+    raw_content_codec       codec of the blob bytes (see app/utils/content_codec.py)
+    raw_content_compressed  True
+
+Blobs hold the compressed bytes without base64. Identical documents share a blob;
+blobs are immutable, so the key never points at different content. Reads go
+through a small in-process LRU of decoded text (DOCUMENT_BLOB_CACHE_MB).
+
+DOCUMENT_BLOBS=off keeps bodies inline in the payload; so does a failed blob write.
+A point whose blob is gone raises MissingBlobError on read; callers skip that document.
+Existing inline documents are moved by migration v5 (app/utils/qdrant_migrations.py).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.utils.content_codec import content_fields, get_codec, get_default_codec
+from app.utils.singleton import lazy_singleton
+
+logger = logging.getLogger(__name__)
+
+
+class MissingBlobError(LookupError):
+    """A document references a raw content blob that the storage service does not have."""
+
+    def __init__(self, key: str):
+        super().__init__(f"Raw content blob not found: {key}")
+        self.key = key
+
+
+def content_hash(text: str) -> str:
+    """content_hash as stored on document payloads."""
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+class DocumentBlobStore:
+    """Writes raw document bodies as blobs and reads them back through an LRU."""
+
+    def __init__(self, storage=None, max_cache_bytes: int = 64 * 1024 * 1024):
+        self._storage = storage
+        self.max_cache_bytes = max_cache_bytes
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            from app.services.s3_storage import get_s3_storage_service
+
+            self._storage = get_s3_storage_service()
+        return self._storage
+
+    @staticmethod
+    def blob_key(digest: str, codec_name: str) -> str:
+        return f"{digest}.{codec_name.replace(':', '-')}"
+
+    # ---------- write ----------
+
+    def put(self, text: str, digest: Optional[str] = None) -> Dict[str, Any]:
+        """Store `text` and return the payload fields referencing it."""
+        codec = get_default_codec()
+        key = self.blob_key(digest or content_hash(text), codec.name)
+        self.storage.put_blob(key, codec.compress(text.encode("utf-8")))
+        self.stats["writes"] += 1
+        self._remember(key, text)
+        return {"raw_content_blob": key, "raw_content_codec": codec.name, "raw_content_compressed": True}
+
+    def raw_content_fields(self, text: str, digest: Optional[str] = None) -> Dict[str, Any]:
+        """Payload fields for a new document: a blob reference, or the inline body if blobs are off or failing."""
+        if text and os.getenv("DOCUMENT_BLOBS", "on").lower() not in ("off", "false", "0"):
+            try:
+                return self.put(text, digest)
+            except Exception as e:
+                logger.warning(f"⚠️ Blob write failed, storing raw content inline: {e}")
+        return content_fields(text)
+
+    # ---------- read ----------
+
+    def _remember(self, key: str, text: str) -> None:
+        size = len(text)
+        if size > self.max_cache_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return
+            self._cache[key] = text
+            self._cache_bytes += size
+            while self._cache_bytes > self.max_cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def get(self, key: str, codec_name: str) -> str:
+        """Decoded text of blob `key`; raises MissingBlobError if the blob is gone."""
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return text
+        self.stats["misses"] += 1
+        try:
+            data = self.storage.get_blob(key)
+        except FileNotFoundError:
+            raise MissingBlobError(key) from None
+        text = get_codec(codec_name).decompress(data).decode("utf-8")
+        self._remember(key, text)
+        return text
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+
+@lazy_singleton
+def get_document_blob_store() -> DocumentBlobStore:
+    """Get the global document blob store."""
+    return DocumentBlobStore(max_cache_bytes=int(float(os.getenv("DOCUMENT_BLOB_CACHE_MB", "64")) * 1024 * 1024))
@@ -167,8 +167,12 @@ class EmailCVProcessor:
                 # Generate CV ID
                 cv_id = str(uuid.uuid4())
                 
+                # Document, structured data, embeddings and the application link are
+                # gathered and written together (one upsert per collection)
+                writes = self.qdrant.write_batch()
+                
                 # Store raw CV document
-                self.qdrant.store_document(
+                writes.store_document(
                     cv_id, "cv", cv_s3_path,
                     cv_attachment['content_type'],
                     cv_raw_text, 
@@ -190,10 +194,10 @@ class EmailCVProcessor:
                     "job_posting_id": processed_email.job_posting_id
                 })
                 
-                self.qdrant.store_structured_data(cv_id, "cv", cv_structured_payload)
+                writes.store_structured_data(cv_id, "cv", cv_structured_payload)
                 
                 # Store CV embeddings
-                self.qdrant.store_embeddings_exact(cv_id, "cv", cv_embeddings)
+                writes.store_embeddings_exact(cv_id, "cv", cv_embeddings)
                 
                 # Note: We do NOT perform automatic matching here
                 # HR will manually match CVs from the careers page
@@ -225,13 +229,14 @@ class EmailCVProcessor:
                 }
                 
                 # Link application to job posting
-                self.qdrant.link_application_to_job(
+                writes.link_application(
                     cv_id, 
                     processed_email.job_posting_id, 
                     application_metadata, 
                     cv_s3_path, 
                     datetime.utcnow().isoformat()
                 )
+                writes.flush()
                 
                 # Confirmation emails removed.
                 
@@ -0,0 +1,148 @@
+"""
+Email subject counter allocation.
+
+Job postings get an email subject id like "SE-2025-007": one counter per
+(abbreviation, year). Counters are allocated atomically instead of scanning the
+job postings on every post, with an UPDATE ... RETURNING on a counter row in the
+auth database (Postgres in production), which row-locks for the duration of the
+transaction.
+
+The row is the only source of truth. An earlier version also allocated through
+Redis INCR, which handed out ids twice after a Redis -> database -> Redis
+failover, since neither counter saw the ids the other had issued. Allocation is
+once per job posting, so a Redis fast path buys nothing.
+
+A row is seeded once, when first needed, from the highest id already present on
+the postings and from that legacy Redis counter if it is still there, so no
+existing or previously allocated subject is reissued.
+"""
+
+import logging
+from typing import Callable, Optional
+
+from app.utils.singleton import lazy_singleton
+
+logger = logging.getLogger(__name__)
+
+# Redis key of the counter before it moved to the database (read once when seeding)
+COUNTER_NAMESPACE = "email_subject_counter"
+COUNTER_TABLE = "email_subject_counter"
+
+_CREATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {COUNTER_TABLE} (
+    abbreviation VARCHAR(16) NOT NULL,
+    year INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (abbreviation, year)
+)
+"""
+
+
+def highest_subject_counter(qdrant, abbreviation: str, year: int) -> int:
+    """Highest NNN among existing ABBR-YEAR-NNN subject ids (0 if none); scans postings, ids only."""
+    from qdrant_client.http.models import FieldCondition, Filter, MatchValue
+
+    pattern = f"{abbreviation}-{year}-"
+    highest = 0
+    offset = None
+    while True:
+        points, offset = qdrant.client.scroll(
+            collection_name="job_postings_structured",
+            scroll_filter=Filter(must=[FieldCondition(key="data_type", match=MatchValue(value="ui_display"))]),
+            limit=1000,
+            offset=offset,
+            with_payload=["email_subject_id"],
+            with_vectors=False,
+        )
+        for point in points:
+            subject_id = (point.payload or {}).get("email_subject_id")
+            if subject_id and subject_id.startswith(pattern):
+                try:
+                    highest = max(highest, int(subject_id.rsplit("-", 1)[-1]))
+                except ValueError:
+                    logger.warning(f"⚠️ Could not parse counter from {subject_id}")
+        if offset is None:
+            return highest
+
+
+class EmailSubjectCounter:
+    """Atomic per-(abbreviation, year) counters."""
+
+    def __init__(self, engine=None, seed: Optional[Callable[[str, int], int]] = None):
+        self._engine = engine
+        self._seed_fn = seed
+        self._table_ready = False
+
+    # ---------- seeding ----------
+
+    def _seed(self, abbreviation: str, year: int) -> int:
+        """Highest id already issued: on the postings, or by the legacy Redis counter."""
+        if self._seed_fn is not None:
+            highest = self._seed_fn(abbreviation, year)
+        else:
+            from app.utils.qdrant_utils import get_qdrant_utils
+
+            highest = highest_subject_counter(get_qdrant_utils(), abbreviation, year)
+
+        from app.utils.redis_cache import get_connected_redis_cache
+
+        cache = get_connected_redis_cache()
+        if cache is not None:
+            try:
+                legacy = cache.redis_client.get(cache.namespaced_key(COUNTER_NAMESPACE, f"{abbreviation}:{year}"))
+                if legacy is not None:
+                    highest = max(highest, int(legacy))
+            except Exception as e:
+                logger.warning(f"⚠️ Could not read legacy Redis email subject counter: {e}")
+        return highest
+
+    # ---------- SQL ----------
+
+    def _get_engine(self):
+        if self._engine is None:
+            from app.db.auth_db import engine
+
+            self._engine = engine
+        return self._engine
+
+    def next(self, abbreviation: str, year: int) -> int:
+        """Allocate the next counter for (abbreviation, year); never returns the same value twice."""
+        from sqlalchemy import text
+        from sqlalchemy.exc import IntegrityError
+
+        abbreviation = abbreviation.upper()
+        engine = self._get_engine()
+        if not self._table_ready:
+            with engine.begin() as conn:
+                conn.execute(text(_CREATE_TABLE_SQL))
+            self._table_ready = True
+
+        params = {"abbreviation": abbreviation, "year": year}
+        for _ in range(2):
+            try:
+                with engine.begin() as conn:
+                    row = conn.execute(
+                        text(f"UPDATE {COUNTER_TABLE} SET value = value + 1 "
+                             "WHERE abbreviation = :abbreviation AND year = :year RETURNING value"),
+                        params,
+                    ).first()
+                    if row is not None:
+                        return int(row[0])
+                    value = self._seed(abbreviation, year) + 1
+                    conn.execute(
+                        text(f"INSERT INTO {COUNTER_TABLE} (abbreviation, year, value) "
+                             "VALUES (:abbreviation, :year, :value)"),
+                        {**params, "value": value},
+                    )
+                    logger.info(f"📧 Seeded email subject counter {abbreviation}-{year} at {value - 1}")
+                    return value
+            except IntegrityError:
+                # Another worker created the row first; its UPDATE path now applies
+                continue
+        raise RuntimeError(f"Could not allocate email subject counter for {abbreviation}-{year}")
+
+
+@lazy_singleton
+def get_email_subject_counter() -> EmailSubjectCounter:
+    """Get the global email subject counter."""
+    return EmailSubjectCounter()
@@ -7,6 +7,8 @@ import numpy as np
 import torch
 from sentence_transformers import SentenceTransformer
 
+from app.utils.metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_LATENCY
+
 logger = logging.getLogger(__name__)
 
 # Global shared model instance (Singleton pattern)
@@ -14,6 +16,24 @@ _shared_model = None
 _model_lock = threading.Lock()
 _model_device = None
 
+# Bumped when the stored vector format changes so stale Redis entries are never read back
+EMBEDDING_CACHE_PREFIX = "embedding:l2f32"
+
+
+def l2_normalize(vectors) -> np.ndarray:
+    """
+    Return `vectors` (one vector or a 2-D matrix of row vectors) as contiguous float32
+    with unit L2 norm. Zero vectors stay zero. Embeddings are normalized once here, at
+    generation time, so every similarity downstream is a plain dot product.
+    """
+    arr = np.asarray(vectors, dtype=np.float32)
+    if arr.size == 0:
+        return np.ascontiguousarray(arr)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(arr / norms)
+
+
 class EmbeddingService:
     """
     Consolidated service for all embedding operations.
@@ -143,6 +163,7 @@ class EmbeddingService:
             - responsibility_vectors: [10 vectors - one per responsibility]
             - experience_vector: [1 vector for experience]
             - job_title_vector: [1 vector for job title]
+            - normalized: True (all vectors are L2-normalized float32)
         """
         try:
             logger.info(f"🔢 Generating EXACTLY 32 vectors per document")
@@ -206,6 +227,8 @@ class EmbeddingService:
             job_title_vector = self.generate_single_embedding(job_title)
             embeddings["job_title_vector"] = [job_title_vector.tolist()]
             embeddings["job_title"] = job_title
+            # Every vector above came from generate_single_embedding: unit-length float32
+            embeddings["normalized"] = True
             
             # Verify we have exactly 32 vectors
             total_vectors = len(embeddings["skill_vectors"]) + len(embeddings["responsibility_vectors"]) + len(embeddings["experience_vector"]) + len(embeddings["job_title_vector"])
@@ -229,7 +252,7 @@ class EmbeddingService:
             text: Text to embed
             
         Returns:
-            Numpy array representing the embedding vector
+            Unit-length float32 numpy array representing the embedding vector
         """
         if not text or not text.strip():
             raise ValueError("Empty text provided for embedding")
@@ -240,10 +263,10 @@ class EmbeddingService:
         # Check Redis cache first
         if self.redis_cache:
             try:
-                cached_embedding = self.redis_cache.get(f"embedding:{hash(clean_text)}", "embeddings")
+                cached_embedding = self.redis_cache.get(f"{EMBEDDING_CACHE_PREFIX}:{hash(clean_text)}", "embeddings")
                 if cached_embedding is not None:
                     logger.debug("Using Redis cached embedding")
-                    return np.array(cached_embedding, dtype=np.float32)
+                    return np.asarray(cached_embedding, dtype=np.float32)
             except Exception as e:
                 logger.warning(f"Redis cache read failed: {e}")
         
@@ -257,15 +280,18 @@ class EmbeddingService:
             start_time = time.time()
             
             embedding = self.model.encode(clean_text, convert_to_tensor=False)
+            EMBEDDING_LATENCY.observe(time.time() - start_time, kind="single")
+            EMBEDDING_BATCH_SIZE.observe(1, kind="single")
             
             # Convert to numpy if needed
             if isinstance(embedding, torch.Tensor):
                 embedding = embedding.cpu().numpy()
+            embedding = l2_normalize(embedding)
             
             # Cache in Redis (1 hour TTL)
             if self.redis_cache:
                 try:
-                    self.redis_cache.set(f"embedding:{hash(clean_text)}", embedding.tolist(), 3600, "embeddings")
+                    self.redis_cache.set(f"{EMBEDDING_CACHE_PREFIX}:{hash(clean_text)}", embedding.tolist(), 3600, "embeddings")
                 except Exception as e:
                     logger.warning(f"Redis cache write failed: {e}")
             
@@ -313,10 +339,13 @@ class EmbeddingService:
         try:
             # Batch processing for performance (larger batch size with shared model)
             embeddings = self.model.encode(clean_skills, convert_to_tensor=False, batch_size=64, show_progress_bar=False)
+            EMBEDDING_LATENCY.observe(time.time() - start_time, kind="skills")
+            EMBEDDING_BATCH_SIZE.observe(len(clean_skills), kind="skills")
             
             # Convert to numpy if needed
             if isinstance(embeddings, torch.Tensor):
                 embeddings = embeddings.cpu().numpy()
+            embeddings = l2_normalize(embeddings)
             
             # Create result dictionary
             skill_embeddings = {}
@@ -370,10 +399,13 @@ class EmbeddingService:
         try:
             # Batch processing for performance
             embeddings = self.model.encode(clean_responsibilities, convert_to_tensor=False, batch_size=64, show_progress_bar=False)
+            EMBEDDING_LATENCY.observe(time.time() - start_time, kind="responsibilities")
+            EMBEDDING_BATCH_SIZE.observe(len(clean_responsibilities), kind="responsibilities")
             
             # Convert to numpy if needed
             if isinstance(embeddings, torch.Tensor):
                 embeddings = embeddings.cpu().numpy()
+            embeddings = l2_normalize(embeddings)
             
             # Create result dictionary
             responsibility_embeddings = {}
@@ -395,7 +427,7 @@ class EmbeddingService:
             # Fallback to individual processing
             return self._generate_individual_responsibility_embeddings(responsibilities)
     
-    def calculate_cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
+    def calculate_cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray, normalized: bool = False) -> float:
         """
         Calculate cosine similarity between two vectors.
         Uses GPU acceleration when available, falls back to CPU.
@@ -403,11 +435,15 @@ class EmbeddingService:
         Args:
             vec1: First vector
             vec2: Second vector
+            normalized: Both vectors are already unit length (cosine is the dot product)
             
         Returns:
             Cosine similarity score (0-1)
         """
         try:
+            if normalized:
+                # A single 768-d dot product is cheaper on CPU than a device round trip
+                return self._calculate_cosine_similarity_cpu(vec1, vec2, normalized=True)
             # Use GPU if available, fallback to CPU
             if self.device == "cuda" and torch.cuda.is_available():
                 return self._calculate_cosine_similarity_gpu(vec1, vec2)
@@ -418,11 +454,14 @@ class EmbeddingService:
             logger.error(f"❌ Similarity calculation failed: {str(e)}")
             return 0.0
     
-    def _calculate_cosine_similarity_cpu(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
+    def _calculate_cosine_similarity_cpu(self, vec1: np.ndarray, vec2: np.ndarray, normalized: bool = False) -> float:
         """
         CPU-based cosine similarity calculation (original implementation).
         """
         try:
+            if normalized:
+                return max(0.0, min(1.0, float(np.dot(vec1, vec2))))
+            
             # Normalize vectors
             norm1 = np.linalg.norm(vec1)
             norm2 = np.linalg.norm(vec2)
@@ -461,7 +500,8 @@ class EmbeddingService:
             logger.warning(f"⚠️ GPU similarity calculation failed, falling back to CPU: {str(e)}")
             return self._calculate_cosine_similarity_cpu(vec1, vec2)
     
-    def calculate_batch_cosine_similarity_gpu(self, matrix_a: np.ndarray, matrix_b: np.ndarray) -> np.ndarray:
+    def calculate_batch_cosine_similarity_gpu(self, matrix_a: np.ndarray, matrix_b: np.ndarray,
+                                              normalized: bool = False) -> np.ndarray:
         """
         GPU-accelerated batch cosine similarity calculation with bulletproof safety.
         Calculates similarity between all pairs of vectors in two matrices.
@@ -469,6 +509,7 @@ class EmbeddingService:
         Args:
             matrix_a: First matrix of vectors (n_a x dim)
             matrix_b: Second matrix of vectors (n_b x dim)
+            normalized: Rows are already unit length, so the normalize step is skipped
             
         Returns:
             Similarity matrix (n_a x n_b)
@@ -478,12 +519,12 @@ class EmbeddingService:
             max_matrix_size = 50  # Limit to 50x50 to prevent memory issues
             if matrix_a.shape[0] > max_matrix_size or matrix_b.shape[0] > max_matrix_size:
                 logger.warning(f"⚠️ Matrix too large ({matrix_a.shape[0]}x{matrix_b.shape[0]}), using CPU fallback")
-                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b)
+                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b, normalized)
             
             # SAFETY CHECK 2: GPU availability
             if self.device != "cuda" or not torch.cuda.is_available():
                 logger.debug("🖥️ GPU not available, using CPU for batch similarity")
-                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b)
+                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b, normalized)
             
             # SAFETY CHECK 3: GPU memory check
             try:
@@ -491,10 +532,10 @@ class EmbeddingService:
                 required_memory = matrix_a.nbytes + matrix_b.nbytes + (matrix_a.shape[0] * matrix_b.shape[0] * 4)
                 if required_memory > gpu_memory_free * 0.8:
                     logger.warning(f"⚠️ Insufficient GPU memory, using CPU fallback")
-                    return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b)
+                    return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b, normalized)
             except Exception as mem_e:
                 logger.warning(f"⚠️ GPU memory check failed: {mem_e}, using CPU fallback")
-                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b)
+                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b, normalized)
             
             # Log GPU batch processing
             logger.info(f"🚀 GPU batch similarity: {matrix_a.shape[0]}x{matrix_b.shape[0]} vectors")
@@ -508,15 +549,18 @@ class EmbeddingService:
                 tensor_b = torch.from_numpy(matrix_b).float().cuda()
             except Exception as tensor_e:
                 logger.warning(f"⚠️ Failed to create GPU tensors: {tensor_e}, using CPU fallback")
-                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b)
+                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b, normalized)
             
             # Normalize vectors with error handling
             try:
-                tensor_a_norm = torch.nn.functional.normalize(tensor_a, p=2, dim=1)
-                tensor_b_norm = torch.nn.functional.normalize(tensor_b, p=2, dim=1)
+                if normalized:
+                    tensor_a_norm, tensor_b_norm = tensor_a, tensor_b
+                else:
+                    tensor_a_norm = torch.nn.functional.normalize(tensor_a, p=2, dim=1)
+                    tensor_b_norm = torch.nn.functional.normalize(tensor_b, p=2, dim=1)
             except Exception as norm_e:
                 logger.warning(f"⚠️ Failed to normalize tensors: {norm_e}, using CPU fallback")
-                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b)
+                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b, normalized)
             
             # Calculate cosine similarity matrix on GPU with error handling
             try:
@@ -524,7 +568,7 @@ class EmbeddingService:
                 similarity_matrix = torch.clamp(similarity_matrix, 0.0, 1.0)
             except Exception as calc_e:
                 logger.warning(f"⚠️ Failed GPU calculation: {calc_e}, using CPU fallback")
-                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b)
+                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b, normalized)
             
             # Convert back to numpy with error handling
             try:
@@ -537,11 +581,11 @@ class EmbeddingService:
                 return result
             except Exception as convert_e:
                 logger.warning(f"⚠️ Failed to convert GPU result to numpy: {convert_e}, using CPU fallback")
-                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b)
+                return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b, normalized)
             
         except Exception as e:
             logger.warning(f"⚠️ GPU batch similarity calculation failed: {str(e)}, using CPU fallback")
-            return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b)
+            return self._calculate_batch_cosine_similarity_cpu(matrix_a, matrix_b, normalized)
     
     def hungarian_algorithm_gpu_exact(self, cost_matrix: np.ndarray) -> tuple:
         """
@@ -648,11 +692,15 @@ class EmbeddingService:
             raise
     
     
-    def _calculate_batch_cosine_similarity_cpu(self, matrix_a: np.ndarray, matrix_b: np.ndarray) -> np.ndarray:
+    def _calculate_batch_cosine_similarity_cpu(self, matrix_a: np.ndarray, matrix_b: np.ndarray,
+                                               normalized: bool = False) -> np.ndarray:
         """
         CPU-based batch cosine similarity calculation (fallback).
         """
         try:
+            if normalized:
+                return np.clip(np.dot(matrix_a, matrix_b.T), 0.0, 1.0)
+            
             # Normalize vectors
             norm_a = np.linalg.norm(matrix_a, axis=1, keepdims=True)
             norm_b = np.linalg.norm(matrix_b, axis=1, keepdims=True)
@@ -456,6 +456,25 @@ class EnterpriseJobQueue:
             }
         }
     
+    def prometheus_lines(self) -> List[str]:
+        """Queue depth and worker gauges for the /metrics scrape."""
+        lines = [
+            "# HELP application_queue_depth Application jobs waiting, by priority",
+            "# TYPE application_queue_depth gauge",
+        ]
+        for priority, queue in self.queues.items():
+            lines.append(f'application_queue_depth{{priority="{priority.name}"}} {queue.qsize()}')
+        lines += [
+            "# HELP application_queue_active_workers Workers currently processing a job",
+            "# TYPE application_queue_active_workers gauge",
+            f"application_queue_active_workers {self.metrics.active_workers}",
+            "# HELP application_queue_jobs_total Application jobs by final outcome",
+            "# TYPE application_queue_jobs_total counter",
+            f'application_queue_jobs_total{{outcome="completed"}} {self.metrics.completed_jobs}',
+            f'application_queue_jobs_total{{outcome="failed"}} {self.metrics.failed_jobs}',
+        ]
+        return lines
+    
     async def graceful_shutdown(self):
         """Gracefully shutdown the job queue"""
         logger.info("🛑 Starting graceful shutdown of job queue...")
@@ -484,6 +503,9 @@ async def get_enterprise_job_queue() -> EnterpriseJobQueue:
         
         job_queue_instance = EnterpriseJobQueue(min_workers=min_workers, max_workers=max_workers)
         
+        from app.utils.metrics import get_metrics_registry
+        get_metrics_registry().register_collector("application_queue", job_queue_instance.prometheus_lines)
+        
         logger.info(f"🚀 Enterprise Job Queue created - Workers: {min_workers}-{max_workers}")
     
     return job_queue_instance
@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
+from dataclasses import dataclass, field
 from datetime import date, datetime, time
 from typing import Optional
 
@@ -15,6 +16,9 @@ from app.services.followup_reminder_service import render_followup_email_html, s
 
 logger = logging.getLogger(__name__)
 
+# Reminder emails in flight at once during a run (Graph sendMail calls).
+FOLLOWUP_REMINDER_SEND_CONCURRENCY = max(1, int(os.getenv("FOLLOWUP_REMINDER_SEND_CONCURRENCY", "4")))
+
 
 def _norm_team(team: str) -> str:
     return "".join(ch for ch in (team or "").strip().lower() if ch.isalnum())
@@ -24,17 +28,6 @@ def _option_model(team: str):
     return TrackerOptionAD if _norm_team(team) == "abudhabi" else TrackerOption
 
 
-def _get_option_value(session: Session, *, team: str, kind: str) -> str:
-    Opt = _option_model(team)
-    r = session.exec(
-        select(Opt)
-        .where(Opt.kind == kind)
-        .where(Opt.is_deleted == False)  # noqa: E712
-        .order_by(Opt.updated_at.desc())
-    ).first()
-    return (r.value if r else "").strip()
-
-
 def _set_option_value(session: Session, *, team: str, kind: str, value: str) -> None:
     Opt = _option_model(team)
     existing = session.exec(
@@ -55,30 +48,64 @@ def _set_option_value(session: Session, *, team: str, kind: str, value: str) ->
     session.commit()
 
 
-def _lookup_person_email(session: Session, *, team: str, kind: str, name: Optional[str]) -> tuple[Optional[str], bool]:
+@dataclass
+class _TeamOptions:
     """
-    Look up email for a named person from tracker_option[_ad].
+    All live option rows for one team, loaded with a single query.
 
-    Returns: (email, enabled)
-    - enabled defaults True when missing for backwards compatibility.
+    - value(kind): latest value for a setting kind (e.g. followup_email_to).
+    - person_email(kind, name): (email, enabled) for a named person; enabled defaults
+      True when missing for backwards compatibility. Latest updated row wins.
     """
-    if not name or not str(name).strip():
-        return None, True
-    is_ad = _norm_team(team) == "abudhabi"
-    Opt = TrackerOptionAD if is_ad else TrackerOption
-    nm = str(name).strip()
-    row = session.exec(
+
+    values: dict[str, str] = field(default_factory=dict)
+    people: dict[tuple[str, str], tuple[Optional[str], bool]] = field(default_factory=dict)
+
+    def value(self, kind: str) -> str:
+        return self.values.get(kind, "")
+
+    def person_email(self, kind: str, name: Optional[str]) -> tuple[Optional[str], bool]:
+        if not name or not str(name).strip():
+            return None, True
+        return self.people.get((kind, str(name).strip()), (None, True))
+
+
+def _load_team_options(session: Session, *, team: str) -> _TeamOptions:
+    Opt = _option_model(team)
+    rows = session.exec(
         select(Opt)
-        .where(Opt.kind == kind)
-        .where(Opt.value == nm)
         .where(Opt.is_deleted == False)  # noqa: E712
         .order_by(Opt.updated_at.desc())
-    ).first()
-    if not row:
-        return None, True
-    email = (getattr(row, "email", None) or "").strip() or None
-    enabled = bool(getattr(row, "email_enabled", True))
-    return email, enabled
+    ).all()
+    opts = _TeamOptions()
+    for row in rows:
+        kind = row.kind
+        value = row.value or ""
+        opts.values.setdefault(kind, value.strip())
+        email = (getattr(row, "email", None) or "").strip() or None
+        opts.people.setdefault((kind, value), (email, bool(getattr(row, "email_enabled", True))))
+    return opts
+
+
+def _split_emails(v: str | None) -> list[str]:
+    parts = []
+    for raw in str(v or "").replace(";", ",").split(","):
+        e = raw.strip()
+        if e:
+            parts.append(e)
+    out: list[str] = []
+    seen = set()
+    for e in parts:
+        k = e.lower()
+        if k in seen:
+            continue
+        seen.add(k)
+        out.append(e)
+    return out
+
+
+def _join_emails(items: list[str]) -> str:
+    return ", ".join([e.strip() for e in items if str(e or "").strip()])
 
 
 def _due_query(FollowUpModel, today: date):
@@ -148,11 +175,33 @@ def _should_skip_as_duplicate(last_sent_at: Optional[datetime], scheduled_local:
         return False
 
 
+async def _send_reminders(jobs: list[dict]) -> list[bool]:
+    """Send reminder emails with at most FOLLOWUP_REMINDER_SEND_CONCURRENCY in flight."""
+    semaphore = asyncio.Semaphore(FOLLOWUP_REMINDER_SEND_CONCURRENCY)
+
+    async def _send(job: dict) -> bool:
+        async with semaphore:
+            try:
+                return await send_followup_reminder_email(
+                    to_emails=job["to"],
+                    cc_emails=job["cc"],
+                    subject=job["subject"],
+                    body_html=job["html"],
+                )
+            except Exception as e:
+                logger.error(f"❌ Follow-up reminder send failed ({job['row'].id}): {e}")
+                return False
+
+    return await asyncio.gather(*(_send(job) for job in jobs))
+
+
 async def _run_followup_reminders_for_team(session: Session, *, team: str, tz_name: str) -> dict:
     if not is_followup_email_reminder_enabled():
         return {"enabled": False, "team": team, "sent": 0, "skipped": 0}
 
-    hhmm = _get_option_value(session, team=team, kind="followup_reminder_send_time") or "09:00"
+    # One query for every option/person lookup this run needs.
+    options = _load_team_options(session, team=team)
+    hhmm = options.value("followup_reminder_send_time") or "09:00"
     FollowUpModel = TrackerFollowUpAD if _norm_team(team) == "abudhabi" else TrackerFollowUp
 
     # Compute "today" in local TZ (UAE by default) to match business expectation.
@@ -170,8 +219,12 @@ async def _run_followup_reminders_for_team(session: Session, *, team: str, tz_na
     if now_local < scheduled_local:
         return {"enabled": True, "team": team, "sent": 0, "skipped": 0}
 
-    sent = 0
+    # To: Manager Settings. CC: default CC + selected people (Recruiter/AM/RM).
+    to_final = options.value("followup_email_to")
+    base_cc = _split_emails(options.value("followup_email_cc"))
+
     skipped = 0
+    jobs: list[dict] = []
     rows = session.exec(_due_query(FollowUpModel, today_local)).all()
     for r in rows:
         # Only send reminders if the current stage is "Feedback Pending".
@@ -186,52 +239,20 @@ async def _run_followup_reminders_for_team(session: Session, *, team: str, tz_na
             skipped += 1
             continue
 
-        def _opt(kind: str) -> str:
-            return (_get_option_value(session, team=team, kind=kind) or "").strip()
-
-        def _split_emails(v: str | None) -> list[str]:
-            parts = []
-            for raw in str(v or "").replace(";", ",").split(","):
-                e = raw.strip()
-                if e:
-                    parts.append(e)
-            out: list[str] = []
-            seen = set()
-            for e in parts:
-                k = e.lower()
-                if k in seen:
-                    continue
-                seen.add(k)
-                out.append(e)
-            return out
-
-        def _join_emails(items: list[str]) -> str:
-            return ", ".join([e.strip() for e in items if str(e or "").strip()])
-
         # Respect Account Manager reminder ON/OFF (skip if OFF).
-        _am_email_for_toggle, to_enabled = _lookup_person_email(
-            session,
-            team=team,
-            kind="account_manager",
-            name=getattr(r, "account_manager", None),
-        )
+        am_email, to_enabled = options.person_email("account_manager", getattr(r, "account_manager", None))
         if not to_enabled:
             skipped += 1
             continue
 
-        # To: Manager Settings. CC: default CC + selected people (Recruiter/AM/RM).
-        to_final = _opt("followup_email_to")
         if not to_final:
             skipped += 1
             continue
 
-        base_cc = _split_emails(_opt("followup_email_cc"))
-        rec_email, _rec_enabled = _lookup_person_email(session, team=team, kind="recruiter", name=getattr(r, "recruiter_name", None))
-        am_email, _am_enabled2 = _lookup_person_email(session, team=team, kind="account_manager", name=getattr(r, "account_manager", None))
-        rm_email, _rm_enabled = _lookup_person_email(session, team=team, kind="recruitment_manager", name=getattr(r, "recruitment_manager", None))
+        rec_email, _rec_enabled = options.person_email("recruiter", getattr(r, "recruiter_name", None))
+        rm_email, _rm_enabled = options.person_email("recruitment_manager", getattr(r, "recruitment_manager", None))
         cc_items = base_cc + _split_emails(rec_email) + _split_emails(am_email) + _split_emails(rm_email)
-        cc_final_joined = _join_emails(cc_items)
-        cc_final = cc_final_joined or None
+        cc_final = _join_emails(cc_items) or None
 
         payload = {
             "client_name": r.client_name,
@@ -247,22 +268,30 @@ async def _run_followup_reminders_for_team(session: Session, *, team: str, tz_na
             "interview_feedback": r.interview_feedback,
             "remarks": r.remarks,
         }
-        subject = f"Follow-up Reminder: {r.client_name}" + (f" – {r.position}" if r.position else "")
-        html = render_followup_email_html(payload)
-
-        ok = await send_followup_reminder_email(
-            to_emails=to_final,
-            cc_emails=cc_final,
-            subject=subject,
-            body_html=html,
+        jobs.append(
+            {
+                "row": r,
+                "to": to_final,
+                "cc": cc_final,
+                "subject": f"Follow-up Reminder: {r.client_name}" + (f" – {r.position}" if r.position else ""),
+                "html": render_followup_email_html(payload),
+            }
         )
+
+    results = await _send_reminders(jobs) if jobs else []
+
+    # Record every successful send in one commit.
+    sent = 0
+    sent_at = datetime.utcnow()
+    for job, ok in zip(jobs, results):
         if ok:
-            r.reminder_last_sent_at = datetime.utcnow()
-            session.add(r)
-            session.commit()
+            job["row"].reminder_last_sent_at = sent_at
+            session.add(job["row"])
             sent += 1
         else:
             skipped += 1
+    if sent:
+        session.commit()
 
     return {"enabled": True, "team": team, "sent": sent, "skipped": skipped}
 
@@ -294,8 +323,9 @@ async def followup_reminder_loop(stop_event: asyncio.Event):
             with Session(engine) as session:
                 # Evaluate each team independently so Dubai/Abu Dhabi can have different times.
                 for team in ("dubai", "abudhabi"):
-                    hhmm = _get_option_value(session, team=team, kind="followup_reminder_send_time") or "09:00"
-                    last_run_raw = _get_option_value(session, team=team, kind="followup_reminder_last_run_at")
+                    options = _load_team_options(session, team=team)
+                    hhmm = options.value("followup_reminder_send_time") or "09:00"
+                    last_run_raw = options.value("followup_reminder_last_run_at")
                     last_run_at = _parse_dt(last_run_raw)
 
                     try:
@@ -199,17 +199,14 @@ class ApplicationJobQueue:
             qdrant = get_qdrant_utils()
             application_id = application_data["application_id"]
             
-            # Store in CV collections
-            success_steps = []
-            
-            # Store document
-            success_steps.append(
-                qdrant.store_document(
-                    application_id, "cv", cv_filename,
-                    application_data.get("content_type", "application/octet-stream"),
-                    extracted_text, datetime.utcnow().isoformat(),
-                    file_path=application_data.get("file_path")
-                )
+            # Store in CV collections: document, structured data, embeddings and the
+            # job link go out together as one upsert per collection
+            writes = qdrant.write_batch()
+            writes.store_document(
+                application_id, "cv", cv_filename,
+                application_data.get("content_type", "application/octet-stream"),
+                extracted_text, datetime.utcnow().isoformat(),
+                file_path=application_data.get("file_path")
             )
             
             # Store structured data
@@ -218,37 +215,33 @@ class ApplicationJobQueue:
                 "document_id": application_id,
                 "document_type": "cv"
             }
-            success_steps.append(
-                qdrant.store_structured_data(application_id, "cv", cv_structured_payload)
-            )
+            writes.store_structured_data(application_id, "cv", cv_structured_payload)
             
             # Store embeddings
-            success_steps.append(
-                qdrant.store_embeddings_exact(application_id, "cv", embeddings_data)
-            )
+            writes.store_embeddings_exact(application_id, "cv", embeddings_data)
             
             # Link to job
             if application_data.get("job_data"):
-                success_steps.append(
-                    qdrant.link_application_to_job(
-                        application_id, 
-                        application_data["job_data"]["id"],
-                        {
-                            "applicant_name": application_data["applicant_name"],
-                            "applicant_email": application_data["applicant_email"],
-                            "applicant_phone": application_data.get("applicant_phone"),
-                            "cover_letter": application_data.get("cover_letter"),
-                            "public_token": application_data["job_data"].get("public_token"),
-                            "job_title": application_data["job_data"].get("job_title", "Position"),
-                            "company_name": application_data["job_data"].get("company_name", "Company")
-                        },
-                        cv_filename,
-                        datetime.utcnow().isoformat()
-                    )
+                writes.link_application(
+                    application_id, 
+                    application_data["job_data"]["id"],
+                    {
+                        "applicant_name": application_data["applicant_name"],
+                        "applicant_email": application_data["applicant_email"],
+                        "applicant_phone": application_data.get("applicant_phone"),
+                        "cover_letter": application_data.get("cover_letter"),
+                        "public_token": application_data["job_data"].get("public_token"),
+                        "job_title": application_data["job_data"].get("job_title", "Position"),
+                        "company_name": application_data["job_data"].get("company_name", "Company")
+                    },
+                    cv_filename,
+                    datetime.utcnow().isoformat()
                 )
             
-            if not all(success_steps):
-                raise Exception("Failed to store application data")
+            try:
+                writes.flush()
+            except Exception as write_error:
+                raise Exception(f"Failed to store application data: {write_error}")
             
             return {
                 "application_id": application_id,
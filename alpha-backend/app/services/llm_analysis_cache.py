@@ -0,0 +1,43 @@
+"""
+Per-candidate LLM analysis cache.
+
+Bulk candidate analysis (LLMMatchingService.analyze_cv_jd_fit_bulk) is the most
+expensive step of a match run, and re-running a match for the same JD mostly
+re-analyzes CVs that were already analyzed. Normalized analyses are cached per
+
+    (jd content hash, cv content hash, BULK_ANALYSIS_VERSION, model)
+
+so a re-run only sends new or changed candidates to the LLM. Keys are content
+hashes rather than document ids, so re-uploading an identical CV or JD still hits.
+Fallback analyses (LLM failed) are never cached.
+
+Entries live in a TwoTierCache (app/utils/redis_cache.py) under the Redis
+namespace "llm_analyses"; lookups for a whole run cost one MGET.
+"""
+
+import os
+
+from app.utils.redis_cache import TwoTierCache
+from app.utils.singleton import lazy_singleton
+
+LLM_ANALYSIS_NAMESPACE = "llm_analyses"
+
+
+class LLMAnalysisCache(TwoTierCache):
+    """Normalized analyses per (JD content, CV content, prompt version, model)."""
+
+    def __init__(self, max_local_entries: int = 5000, ttl_seconds: int = 30 * 24 * 3600):
+        super().__init__(LLM_ANALYSIS_NAMESPACE, max_local_entries=max_local_entries, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def key(jd_hash: str, cv_hash: str, version: str, model: str) -> str:
+        return f"{jd_hash}:{cv_hash}:v{version}:{model}"
+
+
+@lazy_singleton
+def get_llm_analysis_cache() -> LLMAnalysisCache:
+    """Get the global LLM analysis cache."""
+    return LLMAnalysisCache(
+        max_local_entries=int(os.getenv("LLM_ANALYSIS_CACHE_MAX_ENTRIES", "5000")),
+        ttl_seconds=int(os.getenv("LLM_ANALYSIS_CACHE_TTL_SECONDS", str(30 * 24 * 3600))),
+    )
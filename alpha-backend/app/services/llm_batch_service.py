@@ -0,0 +1,410 @@
+"""
+Bulk CV/JD standardization through the OpenAI Batch API.
+
+Reprocessing one document at a time (POST /api/cv/{id}/reprocess) means one
+synchronous chat completion per CV, and a prompt or model change invalidates every
+cache key at once. For backfills the corpus goes through the Batch API instead:
+
+  1. each document becomes one JSONL request line with exactly the body
+     LLMService would send (custom_id "<kind>:<doc_id>"); documents whose cache key
+     is already on disk skip the request
+  2. request files of up to LLM_BATCH_MAX_REQUESTS lines are uploaded and submitted
+     to /v1/chat/completions with a 24h completion window
+  3. batches are polled until they finish; each output line is validated with
+     _validate_cv_response / _validate_jd_response and cached like a live call
+  4. results are written back: fresh embeddings in batches through QdrantWriteBatch,
+     then structured_info replaced per document on *_structured with a new stored_at
+     (hr_notes and application fields are kept)
+
+Jobs run on a background thread and report through the progress bus
+(kind "llm_batch"). OPENAI_BATCH_BASE_URL points the client elsewhere, e.g. at the
+mock server used by the tests.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from app.utils.metrics import LLM_TOKENS
+from app.utils.singleton import lazy_singleton
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KIND = "llm_batch"
+TERMINAL_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+@dataclass
+class BatchDocument:
+    """One document to standardize."""
+    doc_id: str
+    kind: str  # "cv" or "jd"
+    raw_text: str
+    filename: str = ""
+
+    @property
+    def custom_id(self) -> str:
+        return f"{self.kind}:{self.doc_id}"
+
+
+class OpenAIBatchClient:
+    """Minimal Files + Batches API client."""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, timeout: float = 60.0):
+        self.base_url = (base_url or os.getenv("OPENAI_BATCH_BASE_URL", "https://api.openai.com/v1")).rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_key or os.getenv('OPENAI_API_KEY', '')}"})
+
+    def _check(self, response: requests.Response) -> requests.Response:
+        if response.status_code >= 400:
+            raise RuntimeError(f"Batch API error: {response.status_code} - {response.text}")
+        return response
+
+    def upload(self, lines: List[Dict[str, Any]]) -> str:
+        """Upload request lines as a JSONL file; returns the file id."""
+        body = "\n".join(json.dumps(line, ensure_ascii=False) for line in lines).encode("utf-8")
+        response = self.session.post(
+            f"{self.base_url}/files",
+            data={"purpose": "batch"},
+            files={"file": ("requests.jsonl", body, "application/jsonl")},
+            timeout=self.timeout,
+        )
+        return self._check(response).json()["id"]
+
+    def create(self, input_file_id: str, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        response = self.session.post(
+            f"{self.base_url}/batches",
+            json={
+                "input_file_id": input_file_id,
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h",
+                "metadata": metadata or {},
+            },
+            timeout=self.timeout,
+        )
+        return self._check(response).json()
+
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        return self._check(self.session.get(f"{self.base_url}/batches/{batch_id}", timeout=self.timeout)).json()
+
+    def content(self, file_id: str) -> str:
+        response = self.session.get(f"{self.base_url}/files/{file_id}/content", timeout=self.timeout)
+        return self._check(response).text
+
+    def wait(self, batch_id: str, poll_interval: float = 30.0, max_wait: float = 26 * 3600) -> Dict[str, Any]:
+        """Poll until the batch reaches a terminal status."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            batch = self.retrieve(batch_id)
+            if batch.get("status") in TERMINAL_BATCH_STATUSES:
+                return batch
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Batch {batch_id} still {batch.get('status')} after {max_wait:.0f}s")
+            time.sleep(poll_interval)
+
+
+class LLMBatchReprocessor:
+    """Builds, submits and applies Batch API standardization runs."""
+
+    def __init__(
+        self,
+        llm=None,
+        client: Optional[OpenAIBatchClient] = None,
+        qdrant=None,
+        embedding_service=None,
+        max_requests_per_batch: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        write_batch_size: int = 64,
+    ):
+        if llm is None:
+            from app.services.llm_service import get_llm_service
+
+            llm = get_llm_service()
+        self.llm = llm
+        self.client = client or OpenAIBatchClient(api_key=llm.api_key)
+        self._qdrant = qdrant
+        self._embedding_service = embedding_service
+        self.max_requests_per_batch = max_requests_per_batch or int(os.getenv("LLM_BATCH_MAX_REQUESTS", "5000"))
+        self.poll_interval = poll_interval if poll_interval is not None else float(
+            os.getenv("LLM_BATCH_POLL_SECONDS", "30"))
+        self.write_batch_size = write_batch_size
+
+    @property
+    def qdrant(self):
+        if self._qdrant is None:
+            from app.utils.qdrant_utils import get_qdrant_utils
+
+            self._qdrant = get_qdrant_utils()
+        return self._qdrant
+
+    @property
+    def embedding_service(self):
+        if self._embedding_service is None:
+            from app.services.embedding_service import get_embedding_service
+
+            self._embedding_service = get_embedding_service()
+        return self._embedding_service
+
+    # ---------- requests ----------
+
+    def _schema(self, kind: str) -> Optional[Dict[str, Any]]:
+        from app.services.llm_service import CV_JSON_SCHEMA, JD_JSON_SCHEMA, STRICT_SCHEMA_ENABLED
+
+        if not STRICT_SCHEMA_ENABLED:
+            return None
+        return CV_JSON_SCHEMA if kind == "cv" else JD_JSON_SCHEMA
+
+    def build_requests(
+        self, docs: Iterable[BatchDocument]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Tuple[BatchDocument, str, str]], Dict[str, Dict[str, Any]]]:
+        """
+        (request lines, custom_id -> (doc, normalized text, cache key), custom_id -> cached result).
+        Documents already in the LLM cache are answered from it.
+        """
+        lines: List[Dict[str, Any]] = []
+        prepared: Dict[str, Tuple[BatchDocument, str, str]] = {}
+        cached: Dict[str, Dict[str, Any]] = {}
+        for doc in docs:
+            norm = self.llm._prepare_text(doc.kind, doc.raw_text)
+            cache_key = self.llm._hash_key(doc.kind, norm)
+            hit = self.llm._cache_get(cache_key)
+            if hit is not None:
+                cached[doc.custom_id] = hit
+                continue
+            messages = self.llm._build_cv_prompt(norm) if doc.kind == "cv" else self.llm._build_jd_prompt(norm)
+            prepared[doc.custom_id] = (doc, norm, cache_key)
+            lines.append({
+                "custom_id": doc.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self.llm._request_body(messages, json_schema=self._schema(doc.kind)),
+            })
+        return lines, prepared, cached
+
+    # ---------- results ----------
+
+    def parse_output(
+        self, text: str, prepared: Dict[str, Tuple[BatchDocument, str, str]], batch_id: str
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """Validate Batch API output lines; returns (custom_id -> standardized, custom_id -> error)."""
+        results: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        for raw in text.splitlines():
+            if not raw.strip():
+                continue
+            line = json.loads(raw)
+            custom_id = line.get("custom_id")
+            if custom_id not in prepared:
+                continue
+            doc, norm, cache_key = prepared[custom_id]
+            try:
+                response = line.get("response") or {}
+                if line.get("error") or response.get("status_code") != 200:
+                    raise ValueError(line.get("error") or f"status {response.get('status_code')}")
+                body = response.get("body") or {}
+                content = body.get("choices", [{}])[0].get("message", {}).get("content", "")
+                if not content or not content.strip():
+                    raise ValueError("Empty response")
+                usage = body.get("usage") or {}
+                model = body.get("model", self.llm.default_model)
+                LLM_TOKENS.inc(usage.get("prompt_tokens", 0), model=model, type="prompt")
+                LLM_TOKENS.inc(usage.get("completion_tokens", 0), model=model, type="completion")
+
+                data = self.llm._parse_json_response(content)
+                if doc.kind == "cv":
+                    normalized = self.llm._validate_cv_response(data, source_text=norm)
+                else:
+                    normalized = self.llm._validate_jd_response(data, source_text=norm)
+                normalized["processing_metadata"] = {
+                    "filename": doc.filename,
+                    "processing_time": None,
+                    "model_used": model,
+                    "system_fingerprint": body.get("system_fingerprint"),
+                    "text_length": len(norm),
+                    "cache_key": cache_key,
+                    "batch_id": batch_id,
+                }
+                self.llm._cache_put(cache_key, normalized)
+                results[custom_id] = normalized
+            except Exception as e:
+                errors[custom_id] = str(e)
+        return results, errors
+
+    def apply(self, docs: Dict[str, BatchDocument], results: Dict[str, Dict[str, Any]]) -> int:
+        """Write standardized data and embeddings back to Qdrant in batches; returns documents written."""
+        written = 0
+        items = list(results.items())
+        for start in range(0, len(items), self.write_batch_size):
+            chunk = items[start:start + self.write_batch_size]
+            writes = self.qdrant.write_batch()
+            patches: Dict[str, Dict[str, Dict[str, Any]]] = {"cv": {}, "jd": {}}
+            for custom_id, standardized in chunk:
+                doc = docs[custom_id]
+                patches[doc.kind][doc.doc_id] = standardized
+                writes.store_embeddings_exact(
+                    doc.doc_id, doc.kind, self.embedding_service.generate_document_embeddings(standardized)
+                )
+            # embeddings first: the new stored_at must not be scored against old vectors
+            writes.flush()
+            for kind, by_id in patches.items():
+                if by_id:
+                    self._write_structured(kind, by_id)
+            written += len(chunk)
+        return written
+
+    def _write_structured(self, kind: str, by_id: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Replace structured_info on existing *_structured points, keeping their HR notes, and
+        stamp a fresh stored_at so the match pair cache drops scores for the old version.
+        Root-level fields (job application metadata) are not touched. Points that do not
+        exist yet are written whole. Public pages of postings built from a JD are rebuilt.
+        """
+        from app.utils.qdrant_utils import hr_notes_lock
+
+        collection = f"{kind}_structured"
+        for doc_id, standardized in by_id.items():
+            # notes are carried over from a read: hold the document's notes lock (one at a
+            # time) from that read until the patch lands
+            with hr_notes_lock(doc_id):
+                points = self.qdrant.client.retrieve(
+                    collection, ids=[doc_id], with_payload=["structured_info.hr_notes"], with_vectors=False
+                )
+                if not points:
+                    self.qdrant.store_structured_data(doc_id, kind, {"structured_info": standardized})
+                else:
+                    info = dict(standardized)
+                    notes = ((points[0].payload or {}).get("structured_info") or {}).get("hr_notes")
+                    if notes:
+                        info["hr_notes"] = notes
+                    self.qdrant.set_payload_fields(
+                        collection, doc_id, {"structured_info": info, "stored_at": datetime.utcnow().isoformat()}
+                    )
+            if kind == "jd":
+                # careers pages merge jd_structured into the posting
+                self.qdrant.refresh_public_job_views_for_jd(doc_id)
+
+    # ---------- run ----------
+
+    def run(self, docs: List[BatchDocument], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Standardize `docs` through the Batch API and write the results back."""
+        from app.services.progress_events import get_progress_bus
+
+        job_id = job_id or str(uuid.uuid4())
+        bus = get_progress_bus()
+        by_custom_id = {doc.custom_id: doc for doc in docs}
+        summary: Dict[str, Any] = {
+            "job_id": job_id, "documents": len(docs), "cached": 0, "submitted": 0,
+            "standardized": 0, "written": 0, "failed": {}, "batch_ids": [],
+        }
+        started = time.monotonic()
+        bus.update(PROGRESS_KIND, job_id, status="building", **{k: v for k, v in summary.items() if k != "failed"})
+
+        lines, prepared, results = self.build_requests(docs)
+        summary["cached"] = len(results)
+        summary["submitted"] = len(lines)
+        logger.info(f"📦 LLM batch {job_id}: {len(docs)} documents, {len(results)} cached, {len(lines)} to submit")
+
+        for start in range(0, len(lines), self.max_requests_per_batch):
+            chunk = lines[start:start + self.max_requests_per_batch]
+            try:
+                file_id = self.client.upload(chunk)
+                batch = self.client.create(file_id, metadata={"job_id": job_id})
+                summary["batch_ids"].append(batch["id"])
+                bus.update(PROGRESS_KIND, job_id, status="waiting", batch_ids=summary["batch_ids"])
+                logger.info(f"🚀 Submitted batch {batch['id']} ({len(chunk)} requests)")
+                batch = self.client.wait(batch["id"], poll_interval=self.poll_interval)
+                if batch.get("status") != "completed" or not batch.get("output_file_id"):
+                    raise RuntimeError(f"batch {batch['id']} ended {batch.get('status')}")
+                standardized, errors = self.parse_output(
+                    self.client.content(batch["output_file_id"]), prepared, batch["id"]
+                )
+                if batch.get("error_file_id"):
+                    _, failed_lines = self.parse_output(
+                        self.client.content(batch["error_file_id"]), prepared, batch["id"]
+                    )
+                    errors.update(failed_lines)
+                missing = {line["custom_id"] for line in chunk} - set(standardized) - set(errors)
+                errors.update({custom_id: "no result" for custom_id in missing})
+            except Exception as e:
+                logger.error(f"❌ LLM batch {job_id} chunk failed: {e}")
+                standardized, errors = {}, {line["custom_id"]: str(e) for line in chunk}
+            results.update(standardized)
+            summary["failed"].update(errors)
+            summary["standardized"] = len(results) - summary["cached"]
+            bus.update(PROGRESS_KIND, job_id, status="writing", standardized=summary["standardized"],
+                       failed=len(summary["failed"]))
+
+        summary["written"] = self.apply(by_custom_id, results)
+        summary["seconds"] = round(time.monotonic() - started, 1)
+        status = "completed" if not summary["failed"] else "completed_with_errors"
+        bus.update(PROGRESS_KIND, job_id, status=status, written=summary["written"],
+                   failed=len(summary["failed"]), seconds=summary["seconds"])
+        logger.info(
+            f"✅ LLM batch {job_id}: {summary['written']} written, {len(summary['failed'])} failed "
+            f"in {summary['seconds']}s"
+        )
+        return summary
+
+    def load_documents(self, kinds: Iterable[str], ids: Optional[List[str]] = None) -> List[BatchDocument]:
+        """Stored documents of the given kinds (optionally only `ids`) with their raw text."""
+        from app.services.document_blobs import MissingBlobError
+        from app.utils.qdrant_utils import get_decompressed_content
+
+        fields = ["filename", "raw_content", "raw_content_compressed", "raw_content_codec", "raw_content_blob"]
+        docs: List[BatchDocument] = []
+        for kind in kinds:
+            collection = f"{kind}_documents"
+            if ids:
+                points = self.qdrant.client.retrieve(collection, ids=ids, with_payload=fields)
+            else:
+                points, offset = [], None
+                while True:
+                    page, offset = self.qdrant.client.scroll(
+                        collection_name=collection, limit=256, offset=offset, with_payload=fields, with_vectors=False
+                    )
+                    points.extend(page)
+                    if offset is None:
+                        break
+            for point in points:
+                payload = point.payload or {}
+                try:
+                    text = get_decompressed_content(payload)
+                except MissingBlobError as e:
+                    logger.warning(f"⚠️ Skipping {kind} {point.id}: {e}")
+                    continue
+                if text:
+                    docs.append(BatchDocument(str(point.id), kind, text, payload.get("filename", "")))
+        return docs
+
+    def start(self, kinds: Iterable[str], ids: Optional[List[str]] = None) -> str:
+        """Run a reprocessing job on a background thread; returns its job id."""
+        from app.services.progress_events import get_progress_bus
+
+        job_id = str(uuid.uuid4())
+        kinds = list(kinds)
+        get_progress_bus().update(PROGRESS_KIND, job_id, status="queued", kinds=kinds)
+
+        def _run():
+            try:
+                self.run(self.load_documents(kinds, ids), job_id=job_id)
+            except Exception as e:
+                logger.error(f"❌ LLM batch job {job_id} failed: {e}")
+                get_progress_bus().update(PROGRESS_KIND, job_id, status="failed", error=str(e))
+
+        threading.Thread(target=_run, name=f"llm-batch-{job_id[:8]}", daemon=True).start()
+        return job_id
+
+
+@lazy_singleton
+def get_llm_batch_reprocessor() -> LLMBatchReprocessor:
+    """Get the global Batch API reprocessor."""
+    return LLMBatchReprocessor()
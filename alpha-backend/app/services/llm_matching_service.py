@@ -3,17 +3,65 @@ LLM-based Contextual Matching Service
 
 Provides deep, contextual analysis of CV-JD fit using GPT-4.1-mini.
 Analyzes what skills match, what's missing, and provides detailed summaries.
-Supports single CV-JD analysis and bulk (all candidates in one request).
+Supports single CV-JD analysis and bulk analysis of many candidates against one JD.
+
+Bulk analysis packs candidates into shards under a token budget
+(LLM_BULK_MAX_INPUT_TOKENS, LLM_BULK_MAX_CANDIDATES), runs the shards concurrently
+(LLM_BULK_CONCURRENCY), retries candidates of a failed or short shard one by one,
+and caches each analysis per (JD content, CV content) so re-runs only analyze new
+candidates (see app/services/llm_analysis_cache.py).
 """
 
 import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 
 from app.services.llm_service import get_llm_service
 
 logger = logging.getLogger(__name__)
 
+# Bump when the bulk prompt or normalization changes so cached analyses are not reused
+BULK_ANALYSIS_VERSION = "2"
+
+# Rough output size of one analysis, and prompt overhead outside JD/CV text
+BULK_OUTPUT_TOKENS_PER_CANDIDATE = 400
+BULK_PROMPT_OVERHEAD_TOKENS = 600
+BULK_CANDIDATE_OVERHEAD_TOKENS = 30
+
+
+def estimate_tokens(text: str) -> int:
+    """Token estimate for English prose (~4 characters per token); no tokenizer dependency."""
+    return (len(text or "") + 3) // 4
+
+
+def plan_bulk_shards(
+    jd_tokens: int,
+    cv_tokens: List[int],
+    max_input_tokens: int,
+    max_candidates: int,
+) -> List[List[int]]:
+    """
+    Pack candidate indices, in order, into shards whose prompt (JD + CVs + overhead)
+    stays under `max_input_tokens` and that hold at most `max_candidates` CVs.
+    A CV that does not fit with any other gets a shard of its own.
+    """
+    shards: List[List[int]] = []
+    current: List[int] = []
+    used = jd_tokens + BULK_PROMPT_OVERHEAD_TOKENS
+    for i, tokens in enumerate(cv_tokens):
+        cost = tokens + BULK_CANDIDATE_OVERHEAD_TOKENS
+        if current and (used + cost > max_input_tokens or len(current) >= max_candidates):
+            shards.append(current)
+            current = []
+            used = jd_tokens + BULK_PROMPT_OVERHEAD_TOKENS
+        current.append(i)
+        used += cost
+    if current:
+        shards.append(current)
+    return shards
+
 class LLMMatchingService:
     """
     LLM-powered contextual matching for detailed CV-JD analysis.
@@ -58,6 +106,7 @@ class LLMMatchingService:
         """
         try:
             # Fetch RAW extracted text from documents instead of structured data
+            from app.services.document_blobs import MissingBlobError
             from app.utils.qdrant_utils import get_qdrant_utils, get_decompressed_content
             
             qdrant = get_qdrant_utils()
@@ -73,13 +122,19 @@ class LLMMatchingService:
             
             if cv_doc_points and len(cv_doc_points) > 0:
                 cv_payload = cv_doc_points[0].payload
-                cv_raw_text = get_decompressed_content(cv_payload)
-                logger.info(f"📄 Retrieved CV raw text: {len(cv_raw_text)} characters")
+                try:
+                    cv_raw_text = get_decompressed_content(cv_payload)
+                    logger.info(f"📄 Retrieved CV raw text: {len(cv_raw_text)} characters")
+                except MissingBlobError as e:
+                    logger.warning(f"⚠️ {e}")
             
             if jd_doc_points and len(jd_doc_points) > 0:
                 jd_payload = jd_doc_points[0].payload
-                jd_raw_text = get_decompressed_content(jd_payload)
-                logger.info(f"📄 Retrieved JD raw text: {len(jd_raw_text)} characters")
+                try:
+                    jd_raw_text = get_decompressed_content(jd_payload)
+                    logger.info(f"📄 Retrieved JD raw text: {len(jd_raw_text)} characters")
+                except MissingBlobError as e:
+                    logger.warning(f"⚠️ {e}")
             
             if not cv_raw_text or not jd_raw_text:
                 logger.warning("⚠️ Could not retrieve raw text, falling back to semantic score")
@@ -236,31 +291,107 @@ Format your response as valid JSON:
         candidates: List[Dict],
     ) -> List[dict]:
         """
-        Analyze all candidates against the same JD in one LLM call (GPT-4.1-mini).
-        Each candidate dict must have: cv_id, cv_raw_text, semantic_score (0-100).
+        Analyze many candidates against the same JD (GPT-4.1-mini).
+        Each candidate dict must have: cv_id, cv_raw_text, semantic_score (0-100),
+        and may carry content_hash (the CV document's payload field).
+
+        Cached analyses are reused; the rest are packed into shards under the token
+        budget and analyzed concurrently. Candidates of a failed or short shard are
+        retried individually; only those that still fail get a fallback analysis.
 
         Returns a list of analysis dicts in the same order as candidates.
-        On failure or parse error, returns fallback analyses per candidate.
         """
         if not candidates:
             return []
+        from app.services.document_blobs import content_hash
+        from app.services.llm_analysis_cache import get_llm_analysis_cache
+
+        n = len(candidates)
+        cache = get_llm_analysis_cache()
+        jd_hash = content_hash(jd_raw_text or "")
+        keys = [
+            cache.key(jd_hash, c.get("content_hash") or content_hash(c.get("cv_raw_text") or ""),
+                      BULK_ANALYSIS_VERSION, self.model)
+            for c in candidates
+        ]
+        cached = cache.get_many(keys)
+        results: List[Optional[dict]] = [cached.get(key) for key in keys]
+        pending = [i for i in range(n) if results[i] is None]
+        if not pending:
+            logger.info(f"✅ Bulk LLM analysis: all {n} candidates served from cache")
+            return results
+
+        max_input_tokens = int(os.getenv("LLM_BULK_MAX_INPUT_TOKENS", "48000"))
+        max_candidates = int(os.getenv("LLM_BULK_MAX_CANDIDATES", "8"))
+        concurrency = int(os.getenv("LLM_BULK_CONCURRENCY", "4"))
+
+        # A single CV may use whatever the JD leaves of the budget; longer CVs are cut
+        jd_tokens = estimate_tokens(jd_raw_text)
+        cv_budget = max(2000, max_input_tokens - jd_tokens - BULK_PROMPT_OVERHEAD_TOKENS - BULK_CANDIDATE_OVERHEAD_TOKENS)
+        work = []
+        for i in pending:
+            c = dict(candidates[i])
+            raw = (c.get("cv_raw_text") or "").strip()
+            if estimate_tokens(raw) > cv_budget:
+                logger.warning(f"⚠️ CV {c.get('cv_id')} exceeds the bulk token budget; truncating to ~{cv_budget} tokens")
+                raw = raw[: cv_budget * 4]
+            c["cv_raw_text"] = raw
+            work.append(c)
+
+        shards = plan_bulk_shards(jd_tokens, [estimate_tokens(c["cv_raw_text"]) for c in work],
+                                  max_input_tokens, max_candidates)
+        logger.info(f"📏 Bulk LLM analysis: {n} candidates, {len(cached)} cached, "
+                    f"{len(work)} in {len(shards)} shard(s) (≤{max_candidates} CVs, ≤{max_input_tokens} tokens each)")
+
+        def run(shard: List[int]) -> List[Optional[dict]]:
+            return self._analyze_bulk_shard(jd_raw_text, [work[j] for j in shard])
+
+        retry: List[int] = []
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(shards))), thread_name_prefix="llm_shard") as pool:
+            for shard, analyses in zip(shards, pool.map(run, shards)):
+                for j, analysis in zip(shard, analyses):
+                    if analysis is None:
+                        retry.append(j)
+                    else:
+                        results[pending[j]] = analysis
+                        cache.set(keys[pending[j]], analysis)
+
+            if retry:
+                logger.warning(f"⚠️ Retrying {len(retry)} candidate(s) individually")
+                for j, analyses in zip(retry, pool.map(run, [[j] for j in retry])):
+                    if analyses[0] is not None:
+                        results[pending[j]] = analyses[0]
+                        cache.set(keys[pending[j]], analyses[0])
+
+        failed = 0
+        for i, c in enumerate(candidates):
+            if results[i] is None:
+                failed += 1
+                results[i] = self._fallback_analysis(float(c.get("semantic_score", 0)))
+        if failed:
+            logger.error(f"❌ Bulk LLM analysis failed for {failed}/{n} candidates; using semantic fallback")
+        logger.info(f"✅ Bulk LLM analysis completed for {n - failed}/{n} candidates")
+        return results
+
+    def _analyze_bulk_shard(self, jd_raw_text: str, candidates: List[Dict]) -> List[Optional[dict]]:
+        """
+        One request for a shard. Returns one normalized analysis per candidate, with
+        None where the response has no usable analysis (every entry on failure).
+        """
         n = len(candidates)
         try:
             prompt = self._build_bulk_analysis_prompt(jd_raw_text, candidates)
-            logger.info(f"📏 Bulk LLM prompt length: {len(prompt)} characters for {n} candidates")
             messages = [
                 {"role": "system", "content": "You are an expert technical recruiter. Respond with valid JSON only: a single object with key 'analyses' containing an array of analysis objects, one per candidate, in the exact same order as the candidates (1 to N). No other text."},
                 {"role": "user", "content": prompt}
             ]
-            # Output: N analyses × ~300 tokens each; allow enough for 50
-            max_tokens_bulk = min(32000, 400 * n + 2000)
-            # 5 min timeout for bulk (50 CVs): large input + 50 analyses take time
+            # Output: N analyses × ~300 tokens each, plus headroom; time scales with both
             response = self.llm_service._call_openai_api(
                 messages=messages,
                 model=self.model,
-                max_tokens=max_tokens_bulk,
+                max_tokens=min(32000, BULK_OUTPUT_TOKENS_PER_CANDIDATE * n + 1000),
                 json_schema=None,
-                timeout=300,
+                timeout=min(300, 60 + 20 * n),
             )
             if not response or not response.success:
                 raise Exception(response.error_message if response else "Empty response")
@@ -271,20 +402,33 @@ Format your response as valid JSON:
                 analyses = data
             else:
                 raise ValueError("Expected JSON object with 'analyses' key or array")
-            if len(analyses) != n:
-                logger.warning(f"⚠️ Bulk LLM returned {len(analyses)} analyses, expected {n}; padding with fallbacks")
-            result = []
-            for i, c in enumerate(candidates):
-                sem = float(c.get("semantic_score", 0))
-                if i < len(analyses) and isinstance(analyses[i], dict):
-                    result.append(self._normalize_analysis(analyses[i]))
-                else:
-                    result.append(self._fallback_analysis(sem))
-            logger.info(f"✅ Bulk LLM analysis completed for {len(result)} candidates")
-            return result
-        except (json.JSONDecodeError, ValueError, Exception) as e:
-            logger.error(f"❌ Bulk LLM analysis failed: {e}")
-            return [self._fallback_analysis(float(c.get("semantic_score", 0))) for c in candidates]
+            if not isinstance(analyses, list):
+                raise ValueError("'analyses' is not an array")
+        except Exception as e:
+            logger.error(f"❌ Bulk LLM shard of {n} failed: {e}")
+            return [None] * n
+
+        # Place analyses by their candidate number; positional only if the count is right
+        numbered = [a.get("candidate") for a in analyses if isinstance(a, dict)]
+        if len(numbered) == len(analyses) and all(isinstance(k, int) and 1 <= k <= n for k in numbered) \
+                and len(set(numbered)) == len(numbered):
+            by_position: List[Optional[dict]] = [None] * n
+            for a in analyses:
+                by_position[a["candidate"] - 1] = a
+        elif len(analyses) == n:
+            by_position = list(analyses)
+        else:
+            logger.warning(f"⚠️ Bulk LLM shard returned {len(analyses)} unnumbered analyses, expected {n}")
+            return [None] * n
+
+        result: List[Optional[dict]] = []
+        for a in by_position:
+            try:
+                result.append(self._normalize_analysis(a) if isinstance(a, dict) else None)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"⚠️ Malformed analysis in bulk shard: {e}")
+                result.append(None)
+        return result
 
     def _build_bulk_analysis_prompt(self, jd_raw_text: str, candidates: List[Dict]) -> str:
         """Build one prompt: JD + full CV text for each candidate."""
@@ -294,10 +438,11 @@ Format your response as valid JSON:
         cv_blocks = []
         for i, c in enumerate(candidates, 1):
             raw = (c.get("cv_raw_text") or "").strip()
-            sem = c.get("semantic_score", 0)
             cv_id = c.get("cv_id", "")
+            # No semantic score here: it depends on the match weights, and analyses are
+            # cached per (JD content, CV content) regardless of weights
             cv_blocks.append(f"""
---- CANDIDATE {i} (id={cv_id}, semantic_score={sem:.1f}%) ---
+--- CANDIDATE {i} (id={cv_id}) ---
 {raw}
 """)
         candidates_block = "\n".join(cv_blocks)
@@ -309,16 +454,17 @@ Format your response as valid JSON:
 {candidates_block}
 
 **TASK**: For each candidate (1 to {len(candidates)}), provide:
-1. llm_score (0-100): refined match score
-2. match_level: one of Strong/Good/Average/Low
-3. key_matches: 3-5 bullet points (why they match)
-4. gaps: 3-5 bullet points (what's missing or concerning)
-5. summary: short paragraph (2-4 sentences) overall fit
-6. red_flags: array of strings (optional)
+1. candidate: the candidate number (1 to {len(candidates)})
+2. llm_score (0-100): refined match score
+3. match_level: one of Strong/Good/Average/Low
+4. key_matches: 3-5 bullet points (why they match)
+5. gaps: 3-5 bullet points (what's missing or concerning)
+6. summary: short paragraph (2-4 sentences) overall fit
+7. red_flags: array of strings (optional)
 
 Output a JSON object with one key "analyses" whose value is an array of exactly {len(candidates)} objects, in the same order as the candidates (index 0 = Candidate 1, etc.). Example:
 {{ "analyses": [
-  {{ "llm_score": 85.5, "match_level": "Strong", "key_matches": ["..."], "gaps": ["..."], "summary": "...", "red_flags": [] }},
+  {{ "candidate": 1, "llm_score": 85.5, "match_level": "Strong", "key_matches": ["..."], "gaps": ["..."], "summary": "...", "red_flags": [] }},
   ...
 ] }}"""
         return prompt
@@ -23,6 +23,8 @@ from typing import Any, Dict, List, Optional
 
 import requests
 
+from app.utils.metrics import LLM_LATENCY, LLM_TOKENS, LLM_RETRIES
+
 logger = logging.getLogger(__name__)
 
 # =========================
@@ -268,10 +270,7 @@ class LLMService:
         """
         try:
             # Normalize + guard size
-            norm = self._normalize_text(raw_text)
-            if len(norm) > 50000:
-                logger.warning(f"⚠️ Large CV detected ({len(norm):,}); truncating to 50k")
-                norm = norm[:50000] + "\n\n[TRUNCATED FOR PROCESSING]"
+            norm = self._prepare_text("cv", raw_text)
 
             cache_key = self._hash_key("cv", norm)
             cached = self._cache_get(cache_key)
@@ -311,10 +310,7 @@ class LLMService:
         Caches by (model+seed+prompt+normalized-text) to return identical results for identical content.
         """
         try:
-            norm = self._normalize_text(raw_text)
-            if len(norm) > 30000:
-                logger.warning(f"⚠️ Large JD detected ({len(norm):,}); truncating to 30k")
-                norm = norm[:30000] + "\n\n[TRUNCATED FOR PROCESSING]"
+            norm = self._prepare_text("jd", raw_text)
 
             cache_key = self._hash_key("jd", norm)
             cached = self._cache_get(cache_key)
@@ -350,27 +346,23 @@ class LLMService:
 
     # ------------- OpenAI call -------------
 
-    def _call_openai_api(
+    def _request_body(
         self,
         messages: List[Dict[str, str]],
         *,
         model: Optional[str] = None,
         max_tokens: int = 1500,
         json_schema: Optional[Dict[str, Any]] = None,
-        timeout: Optional[int] = None,
-    ) -> LLMResponse:
-        if not model:
-            model = self.default_model
-        request_timeout = timeout if timeout is not None else 60
-
+    ) -> Dict[str, Any]:
+        """Chat Completions request body (also used for Batch API request lines)."""
         # response_format: JSON object (or JSON Schema strict)
         if json_schema:
             response_format = {"type": "json_schema", "json_schema": json_schema}
         else:
             response_format = {"type": "json_object"}
 
-        body = {
-            "model": model,
+        return {
+            "model": model or self.default_model,
             "messages": messages,
             "max_tokens": max_tokens,
             "temperature": 0.0,
@@ -382,9 +374,28 @@ class LLMService:
             "response_format": response_format
         }
 
+    def _call_openai_api(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 1500,
+        json_schema: Optional[Dict[str, Any]] = None,
+        timeout: Optional[int] = None,
+    ) -> LLMResponse:
+        if not model:
+            model = self.default_model
+        request_timeout = timeout if timeout is not None else 60
+
+        body = self._request_body(messages, model=model, max_tokens=max_tokens, json_schema=json_schema)
+
         start = time.time()
         last_err: Optional[str] = None
 
+        def _done(resp: LLMResponse) -> LLMResponse:
+            LLM_LATENCY.observe(resp.processing_time, model=model, outcome="success" if resp.success else "error")
+            return resp
+
         for attempt in range(self.max_retries):
             try:
                 logger.info(f"🤖 OpenAI API call (attempt {attempt + 1}/{self.max_retries}) - Model: {model}, timeout={request_timeout}s")
@@ -397,14 +408,18 @@ class LLMService:
                     if not content or not content.strip():
                         raise Exception("Empty response from OpenAI")
 
+                    usage = payload.get("usage") or {}
+                    LLM_TOKENS.inc(usage.get("prompt_tokens", 0), model=model, type="prompt")
+                    LLM_TOKENS.inc(usage.get("completion_tokens", 0), model=model, type="completion")
+
                     data = self._parse_json_response(content)
-                    return LLMResponse(
+                    return _done(LLMResponse(
                         success=True,
                         data=data,
                         processing_time=time.time() - start,
                         model_used=model,
                         system_fingerprint=sys_fp
-                    )
+                    ))
 
                 # Retryable HTTP statuses
                 if r.status_code in (429, 502, 503, 504):
@@ -412,29 +427,32 @@ class LLMService:
                     if attempt < self.max_retries - 1:
                         delay = self.base_delay * (2 ** attempt)
                         logger.warning(f"⏳ {last_err}, retrying in {delay}s...")
+                        LLM_RETRIES.inc(reason=f"http_{r.status_code}")
                         time.sleep(delay)
                         continue
                 # Non-retryable
-                return LLMResponse(False, {}, time.time() - start, model, f"API error: {r.status_code} - {r.text}")
+                return _done(LLMResponse(False, {}, time.time() - start, model, f"API error: {r.status_code} - {r.text}"))
 
             except requests.exceptions.Timeout:
                 last_err = "Timeout"
                 if attempt < self.max_retries - 1:
                     delay = self.base_delay * (2 ** attempt)
                     logger.warning(f"⏳ Timeout, retrying in {delay}s...")
+                    LLM_RETRIES.inc(reason="timeout")
                     time.sleep(delay)
                     continue
-                return LLMResponse(False, {}, time.time() - start, model, "Timeout")
+                return _done(LLMResponse(False, {}, time.time() - start, model, "Timeout"))
             except Exception as e:
                 last_err = str(e)
                 if attempt < self.max_retries - 1:
                     delay = self.base_delay * (2 ** attempt)
                     logger.warning(f"⏳ Error: {e}, retrying in {delay}s...")
+                    LLM_RETRIES.inc(reason="error")
                     time.sleep(delay)
                     continue
-                return LLMResponse(False, {}, time.time() - start, model, last_err)
+                return _done(LLMResponse(False, {}, time.time() - start, model, last_err))
 
-        return LLMResponse(False, {}, time.time() - start, model, last_err or "All retries failed")
+        return _done(LLMResponse(False, {}, time.time() - start, model, last_err or "All retries failed"))
 
     # ------------- Prompt builders -------------
 
@@ -547,6 +565,15 @@ class LLMService:
 
     # ------------- Normalization & cache -------------
 
+    def _prepare_text(self, kind: str, raw_text: str) -> str:
+        """Normalized source text, truncated to the per-kind size guard (50k CV, 30k JD)."""
+        norm = self._normalize_text(raw_text)
+        limit = 50000 if kind == "cv" else 30000
+        if len(norm) > limit:
+            logger.warning(f"⚠️ Large {kind.upper()} detected ({len(norm):,}); truncating to {limit // 1000}k")
+            norm = norm[:limit] + "\n\n[TRUNCATED FOR PROCESSING]"
+        return norm
+
     def _normalize_text(self, s: str) -> str:
         s = unicodedata.normalize("NFKC", s)
         s = s.replace("\r\n", "\n").replace("\r", "\n")
@@ -0,0 +1,324 @@
+"""
+Fair scheduler for /match.
+
+Every match request becomes a MatchJob with a stable job id whose result stays
+fetchable by that id, so a queued caller no longer has to re-submit.
+
+- Admission is by estimated cost, not a fixed slot count: jobs run while the
+  running cost fits in `capacity`, so several small matches can share the box
+  with one large one. Cost grows with CV count and is higher for text JDs, whose
+  embeddings are computed on the fly instead of read from Qdrant.
+- Queued jobs are picked round-robin across users (one FIFO per user), so one
+  recruiter's burst cannot starve everyone else. A large job at the front may be
+  bypassed by smaller ones that fit only a bounded number of times.
+- CPU work runs on a dedicated thread pool sized to the cores.
+- ETAs come from a moving average of measured seconds per cost unit.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MATCH_JOB_NAMESPACE = "match_jobs"
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+@dataclass
+class MatchJob:
+    job_id: str
+    user_key: str
+    cost: float
+    run: Callable[[], Awaitable[Any]]
+    fingerprint: Optional[str] = None
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    completed_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    error_status: int = 500
+    bypassed: int = 0
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+
+class MatchScheduler:
+    """Cost-budgeted, per-user round-robin job scheduler (one per process)."""
+
+    def __init__(
+        self,
+        capacity: float = 600.0,
+        worker_threads: Optional[int] = None,
+        seconds_per_unit: float = 1.0,
+        result_ttl_seconds: float = 3600.0,
+        resubmit_reuse_seconds: float = 120.0,
+        max_bypass: int = 4,
+    ):
+        self.capacity = capacity
+        self.worker_threads = worker_threads or os.cpu_count() or 4
+        self.executor = ThreadPoolExecutor(max_workers=self.worker_threads, thread_name_prefix="match_worker")
+        self.seconds_per_unit = seconds_per_unit
+        self.result_ttl_seconds = result_ttl_seconds
+        self.resubmit_reuse_seconds = resubmit_reuse_seconds
+        self.max_bypass = max_bypass
+
+        self._jobs: Dict[str, MatchJob] = {}
+        self._by_fingerprint: Dict[str, str] = {}
+        # user -> FIFO of queued jobs; iteration order is the round-robin order
+        self._queues: "OrderedDict[str, Deque[MatchJob]]" = OrderedDict()
+        self._running: Dict[str, MatchJob] = {}
+        self._running_cost = 0.0
+        self._tasks: set = set()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "reused": 0}
+
+    # ----- Submission -----
+
+    def submit(
+        self,
+        user_key: str,
+        cost: float,
+        run: Callable[[], Awaitable[Any]],
+        fingerprint: Optional[str] = None,
+        job_id: Optional[str] = None,
+    ) -> MatchJob:
+        """
+        Queue a job (or return the caller's identical in-flight/just-finished job)
+        and start whatever now fits. `job_id` lets the caller hand the id to `run`
+        (e.g. to key progress events) before the job exists.
+        """
+        self._prune()
+        if fingerprint:
+            existing = self._jobs.get(self._by_fingerprint.get(fingerprint, ""))
+            if existing is not None and (
+                not existing.finished
+                or (existing.status == COMPLETED
+                    and time.time() - (existing.completed_at or 0) < self.resubmit_reuse_seconds)
+            ):
+                self.stats["reused"] += 1
+                return existing
+
+        job = MatchJob(job_id=job_id or str(uuid.uuid4()), user_key=user_key, cost=max(1.0, cost), run=run, fingerprint=fingerprint)
+        self._jobs[job.job_id] = job
+        if fingerprint:
+            self._by_fingerprint[fingerprint] = job.job_id
+        self._queues.setdefault(user_key, deque()).append(job)
+        self.stats["submitted"] += 1
+        self._dispatch()
+        self._persist(job)
+        logger.info(f"📥 Match job {job.job_id} queued for {user_key} (cost {job.cost:.0f}, status {job.status})")
+        return job
+
+    def get(self, job_id: str) -> Optional[MatchJob]:
+        return self._jobs.get(job_id)
+
+    # ----- Dispatch -----
+
+    def _fits(self, job: MatchJob) -> bool:
+        # An oversized job still runs when nothing else is running
+        return not self._running or self._running_cost + job.cost <= self.capacity
+
+    def _dispatch(self) -> None:
+        while self._queues:
+            users = list(self._queues)
+            front = self._queues[users[0]][0]
+            chosen_user = None
+            if self._fits(front):
+                chosen_user = users[0]
+            elif front.bypassed < self.max_bypass:
+                # Backfill with the next user's job that fits, a bounded number of times
+                for user in users[1:]:
+                    if self._fits(self._queues[user][0]):
+                        chosen_user = user
+                        front.bypassed += 1
+                        break
+            if chosen_user is None:
+                return
+
+            queue = self._queues.pop(chosen_user)
+            job = queue.popleft()
+            if queue:
+                self._queues[chosen_user] = queue  # back of the round-robin order
+            self._start(job)
+
+    def _start(self, job: MatchJob) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        self._running[job.job_id] = job
+        self._running_cost += job.cost
+        task = asyncio.get_running_loop().create_task(self._execute(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job: MatchJob) -> None:
+        self._persist(job)
+        try:
+            job.result = await job.run()
+            job.status = COMPLETED
+            self.stats["completed"] += 1
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(getattr(e, "detail", None) or e)
+            job.error_status = int(getattr(e, "status_code", 500) or 500)
+            self.stats["failed"] += 1
+            logger.error(f"❌ Match job {job.job_id} failed: {job.error}")
+        finally:
+            job.completed_at = time.time()
+            self._running.pop(job.job_id, None)
+            self._running_cost = max(0.0, self._running_cost - job.cost)
+            if job.status == COMPLETED:
+                self._observe(job)
+            job.run = None  # drop the request closure; the result is kept
+            job.done.set()
+            self._persist(job)
+            self._dispatch()
+
+    def _observe(self, job: MatchJob) -> None:
+        """Fold the measured seconds per cost unit into the moving average."""
+        sample = (job.completed_at - job.started_at) / job.cost
+        self.seconds_per_unit = 0.8 * self.seconds_per_unit + 0.2 * sample
+
+    # ----- Status / ETA -----
+
+    def _fair_order(self) -> List[MatchJob]:
+        """Queued jobs in the order round-robin dispatch would take them."""
+        order: List[MatchJob] = []
+        queues = [list(q) for q in self._queues.values()]
+        depth = 0
+        while True:
+            row = [q[depth] for q in queues if depth < len(q)]
+            if not row:
+                return order
+            order.extend(row)
+            depth += 1
+
+    def eta_seconds(self, job: MatchJob) -> float:
+        """Rough seconds until `job` finishes, from measured throughput."""
+        now = time.time()
+        if job.finished:
+            return 0.0
+        own = job.cost * self.seconds_per_unit
+        if job.status == RUNNING:
+            return max(0.0, own - (now - job.started_at))
+        running_left = sum(
+            max(0.0, j.cost * self.seconds_per_unit - (now - j.started_at)) for j in self._running.values()
+        )
+        ahead = 0.0
+        for queued in self._fair_order():
+            if queued is job:
+                break
+            ahead += queued.cost * self.seconds_per_unit
+        parallel = max(1, len(self._running))
+        return (running_left + ahead) / parallel + own
+
+    def queue_position(self, job: MatchJob) -> Optional[int]:
+        if job.status != QUEUED:
+            return None
+        for i, queued in enumerate(self._fair_order(), start=1):
+            if queued is job:
+                return i
+        return None
+
+    def snapshot(self, job: MatchJob) -> Dict[str, Any]:
+        return {
+            "job_id": job.job_id,
+            "status": job.status,
+            "queue_position": self.queue_position(job),
+            "eta_seconds": int(round(self.eta_seconds(job))),
+            "cost": job.cost,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "completed_at": job.completed_at,
+            "error": job.error,
+        }
+
+    def metrics_lines(self) -> List[str]:
+        """Scrape-time gauges for /metrics (in-memory reads only)."""
+        queued = sum(len(q) for q in self._queues.values())
+        return [
+            "# HELP match_queue_depth Matching requests waiting for capacity",
+            "# TYPE match_queue_depth gauge",
+            f"match_queue_depth {queued}",
+            "# HELP match_active_requests Matching requests currently running",
+            "# TYPE match_active_requests gauge",
+            f"match_active_requests {len(self._running)}",
+            "# HELP match_running_cost Estimated cost units of running matches",
+            "# TYPE match_running_cost gauge",
+            f"match_running_cost {self._running_cost}",
+            "# HELP match_capacity Cost units the scheduler admits concurrently",
+            "# TYPE match_capacity gauge",
+            f"match_capacity {self.capacity}",
+            "# HELP match_seconds_per_unit Measured seconds per cost unit (moving average)",
+            "# TYPE match_seconds_per_unit gauge",
+            f"match_seconds_per_unit {self.seconds_per_unit:.4f}",
+        ]
+
+    # ----- Housekeeping -----
+
+    def _persist(self, job: MatchJob) -> None:
+        """Mirror status (and the final result) to the shared cache for other workers."""
+        try:
+            from app.utils.redis_cache import get_redis_cache
+
+            record = self.snapshot(job)
+            if job.status == COMPLETED:
+                record["result"] = job.result
+            get_redis_cache().set(job.job_id, record, int(self.result_ttl_seconds), MATCH_JOB_NAMESPACE)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not persist match job {job.job_id}: {e}")
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.result_ttl_seconds
+        for job_id in [j.job_id for j in self._jobs.values() if j.finished and (j.completed_at or 0) < cutoff]:
+            job = self._jobs.pop(job_id)
+            if job.fingerprint and self._by_fingerprint.get(job.fingerprint) == job_id:
+                del self._by_fingerprint[job.fingerprint]
+
+
+def get_persisted_match_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Job record written by any worker, for lookups that miss the local scheduler."""
+    try:
+        from app.utils.redis_cache import get_redis_cache
+
+        return get_redis_cache().get(job_id, MATCH_JOB_NAMESPACE)
+    except Exception:
+        return None
+
+
+_match_scheduler: Optional[MatchScheduler] = None
+_match_scheduler_lock = threading.Lock()
+
+
+def get_match_scheduler() -> MatchScheduler:
+    """Get the global match scheduler."""
+    global _match_scheduler
+    if _match_scheduler is None:
+        with _match_scheduler_lock:
+            if _match_scheduler is None:
+                _match_scheduler = MatchScheduler(
+                    capacity=float(os.getenv("MATCH_SCHEDULER_CAPACITY", "600")),
+                    worker_threads=int(os.getenv("MATCH_WORKER_THREADS", "0")) or None,
+                    seconds_per_unit=float(os.getenv("MATCH_SECONDS_PER_UNIT", "1.0")),
+                    result_ttl_seconds=float(os.getenv("MATCH_RESULT_TTL_SECONDS", "3600")),
+                    resubmit_reuse_seconds=float(os.getenv("MATCH_RESUBMIT_REUSE_SECONDS", "120")),
+                )
+                logger.info(
+                    f"🧮 Match scheduler ready (capacity {_match_scheduler.capacity:.0f} units, "
+                    f"{_match_scheduler.worker_threads} worker threads)"
+                )
+    return _match_scheduler
@@ -0,0 +1,70 @@
+"""
+Pair-level match score cache.
+
+Almost all of match_by_ids is weight-independent: four Qdrant reads, the
+skills/responsibilities assignments, title similarity, experience fit and the
+title business rule. Those component scores are cached per pair, keyed by
+
+    (jd_id, jd stored_at, cv_id, cv stored_at, SCORING_VERSION)
+
+so re-running a match only recomputes pairs whose JD or CV was re-stored since
+(store_structured_data stamps a fresh stored_at) and a weights-only change
+re-combines cached components instead of recomputing them. Weights are applied
+on top of the cached components rather than being part of the key.
+
+Entries live in a TwoTierCache (app/utils/redis_cache.py) under the Redis
+namespace "match_pairs", so every worker shares them.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from app.utils.redis_cache import TwoTierCache
+from app.utils.singleton import lazy_singleton
+
+logger = logging.getLogger(__name__)
+
+MATCH_PAIR_NAMESPACE = "match_pairs"
+
+
+def _jsonable(value: Any) -> Any:
+    """Round-trip through JSON so numpy scalars become plain numbers (as Redis would return them)."""
+    return json.loads(json.dumps(value, default=lambda o: o.item() if hasattr(o, "item") else str(o)))
+
+
+class MatchScoreCache(TwoTierCache):
+    """Component scores per (JD version, CV version, scoring version)."""
+
+    def __init__(self, max_local_entries: int = 20000, ttl_seconds: int = 7 * 24 * 3600):
+        super().__init__(MATCH_PAIR_NAMESPACE, max_local_entries=max_local_entries, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def key(jd_id: str, jd_version: str, cv_id: str, cv_version: str, scoring_version: str) -> str:
+        return f"{jd_id}:{jd_version}:{cv_id}:{cv_version}:v{scoring_version}"
+
+    def set(self, key: str, components: Dict[str, Any]) -> Dict[str, Any]:
+        """Store JSON-safe components; returns the stored copy."""
+        components = _jsonable(components)
+        super().set(key, components)
+        return components
+
+    def prefetch(self, keys: Iterable[str]) -> int:
+        """
+        Warm the local LRU for a whole match run with one MGET, so per-pair lookups
+        in the worker threads don't each pay a Redis round trip. Returns the number
+        found in Redis.
+        """
+        before = self.stats["redis_hits"]
+        self.get_many(keys)
+        return self.stats["redis_hits"] - before
+
+
+@lazy_singleton
+def get_match_score_cache() -> MatchScoreCache:
+    """Get the global match pair cache."""
+    return MatchScoreCache(
+        max_local_entries=int(os.getenv("MATCH_PAIR_CACHE_MAX_ENTRIES", "20000")),
+        ttl_seconds=int(os.getenv("MATCH_PAIR_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    )
@@ -4,17 +4,24 @@ Uses EXACT 32-vector storage in {cv,jd}_embeddings and structured JSON in
 {cv,jd}_structured. Edits here improve readability only.
 """
 import logging
+import os
+import re
 import time
 import gc
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import torch
 from scipy.optimize import linear_sum_assignment
 
-from app.services.embedding_service import get_embedding_service
+from app.services.embedding_service import get_embedding_service, l2_normalize
 from app.utils.qdrant_utils import get_qdrant_utils
+from app.utils.qdrant_migrations import legacy_reads_enabled
+from app.services.match_score_cache import get_match_score_cache
+from app.utils.metrics import MATCH_PAIR_DURATION
+from app.utils.resource_monitor import get_resource_monitor
 logger = logging.getLogger(__name__)
 
 # ----------------------------
@@ -44,6 +51,30 @@ def hungarian_mean(sim_matrix: np.ndarray) -> Tuple[float, List[Tuple[int, int,
     score = float(np.mean([p[2] for p in pairs])) if pairs else 0.0
     return score, pairs
 
+# all-mpnet-base-v2 output size, used for zero vectors when a stored vector is missing
+EMBEDDING_DIM = 768
+
+
+def cosine_similarity_matrix(A, B, normalized: bool = False) -> np.ndarray:
+    """
+    CPU similarity engine: row-normalize both sides as float32 and take one BLAS
+    matmul. Zero vectors score 0; values are clipped to [0, 1] like the GPU path.
+    With normalized=True the rows are already unit length and only the matmul runs.
+    """
+    a = np.asarray(A, dtype=np.float32)
+    b = np.asarray(B, dtype=np.float32)
+    if a.size == 0 or b.size == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    if normalized:
+        return np.clip(a @ b.T, 0.0, 1.0)
+    
+    norm_a = np.linalg.norm(a, axis=1, keepdims=True)
+    norm_b = np.linalg.norm(b, axis=1, keepdims=True)
+    a = a / np.where(norm_a == 0, 1, norm_a)
+    b = b / np.where(norm_b == 0, 1, norm_b)
+    
+    return np.clip(a @ b.T, 0.0, 1.0)
+
 def safe_parse_years(years_value) -> int:
     """Safely parse years of experience, handling string values like 'Not specified' or '5-8'."""
     if not years_value:
@@ -66,6 +97,51 @@ def safe_parse_years(years_value) -> int:
             return 0
     return 0
 
+# ----------------------------
+# Title keyword index
+# ----------------------------
+TITLE_FEATURE_CACHE_SIZE = int(os.getenv("TITLE_FEATURE_CACHE_SIZE", "8192"))
+TITLE_PAIR_CACHE_SIZE = int(os.getenv("TITLE_PAIR_CACHE_SIZE", "65536"))
+
+
+class TitleKeywordIndex:
+    """
+    DOMAIN_KEYWORDS, ROLE_TYPES and SENIORITY_LEVELS compiled into one regex, with
+    an LRU of extracted (domains, role type, seniority) per lowercased title.
+
+    Matching keeps the original substring semantics: a zero-width lookahead tries
+    the keywords longest-first at every position, and each hit also counts every
+    keyword contained in it (anything starting at that position is a prefix of
+    the longest hit), so the found set equals `{k for k in keywords if k in title}`.
+    Table order still decides the first role / seniority level, as before.
+    """
+
+    def __init__(self, domain_keywords: Dict[str, List[str]], role_types: Dict[str, List[str]],
+                 seniority_levels: Dict[str, List[str]], cache_size: int = TITLE_FEATURE_CACHE_SIZE):
+        keywords = {k for table in (domain_keywords, role_types, seniority_levels)
+                    for words in table.values() for k in words if k}
+        alternation = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+        self._pattern = re.compile(f"(?=({alternation}))")
+        self._contained = {k: frozenset(o for o in keywords if o in k) for k in keywords}
+        self._domains = [(name, frozenset(words)) for name, words in domain_keywords.items()]
+        self._roles = [(name, frozenset(words)) for name, words in role_types.items()]
+        # An empty seniority keyword never counts (mid is the fallback anyway)
+        self._seniority = [(name, frozenset(w for w in words if w)) for name, words in seniority_levels.items()]
+        self.features = lru_cache(maxsize=cache_size)(self._features)
+
+    def keywords_in(self, title_lower: str) -> frozenset:
+        found = {""}  # `"" in title` always holds
+        for m in self._pattern.finditer(title_lower):
+            found |= self._contained[m.group(1)]
+        return frozenset(found)
+
+    def _features(self, title_lower: str) -> Tuple[Tuple[str, ...], str, str]:
+        found = self.keywords_in(title_lower)
+        domains = tuple(name for name, words in self._domains if words & found)
+        role = next((name for name, words in self._roles if words & found), "general")
+        seniority = next((name for name, words in self._seniority if words & found), "mid")
+        return domains, role, seniority
+
 # ----------------------------
 # Response models
 # ----------------------------
@@ -149,89 +225,91 @@ class MatchingService:
         self.embedding_service = get_embedding_service()
         self.qdrant = get_qdrant_utils()
         
-        # SAFETY: System resource monitoring
+        # Similarity engine, resolved once: SIMILARITY_ENGINE=auto|cpu|gpu
+        engine = os.getenv("SIMILARITY_ENGINE", "auto").lower()
+        gpu_ready = getattr(self.embedding_service, "device", "cpu") == "cuda" and torch.cuda.is_available()
+        self.use_gpu = gpu_ready if engine == "auto" else (engine == "gpu" and gpu_ready)
+        self.similarity_engine = "gpu" if self.use_gpu else "cpu"
+        
+        # Title similarity: keyword tables compiled once, features cached per title,
+        # scores memoized per (JD title, CV title)
+        self.title_index = TitleKeywordIndex(self.DOMAIN_KEYWORDS, self.ROLE_TYPES, self.SENIORITY_LEVELS)
+        self._title_pair_similarity = lru_cache(maxsize=TITLE_PAIR_CACHE_SIZE)(self._title_similarity_uncached)
+        
+        # SAFETY: System resource monitoring (sampled by a background thread)
+        self.resource_monitor = get_resource_monitor()
         self.max_cpu_usage = 85.0  # Maximum CPU usage before throttling
         self.max_memory_usage = 90.0  # Maximum memory usage before throttling
+        self.backpressure_max_wait = 5.0  # Seconds to wait for headroom before giving up
         
-        # Memory management
-        self.memory_cleanup_threshold = 100  # Clean up every 100 operations
+        # Memory management - cleanup runs at batch boundaries, not per pair
+        self.memory_cleanup_percent = 80.0  # Skip non-forced cleanup below this memory/GPU usage
         self.operation_count = 0
         
         logger.info("🎯 MatchingService initialized (uses *_structured & *_embeddings)")
-        logger.info("🛡️ Safety limits: CPU < 85%, Memory < 90%, GPU memory checks enabled")
-        logger.info("🧹 Memory cleanup enabled with automatic garbage collection")
+        logger.info(f"🧮 Similarity engine: {self.similarity_engine}")
+        logger.info("🛡️ Safety limits: CPU < 85%, Memory < 90% (background-sampled)")
+        logger.info("🧹 Memory cleanup at batch boundaries when memory pressure is high")
 
     def _check_system_resources(self) -> bool:
         """
         Check if system resources are within safe limits.
         Returns True if safe to proceed, False if should throttle.
+        Reads the monitor's cached snapshot, so it is cheap enough to call per CV.
         """
-        try:
-            import psutil
-            
-            # Check CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            if cpu_percent > self.max_cpu_usage:
-                logger.warning(f"⚠️ High CPU usage detected: {cpu_percent}% > {self.max_cpu_usage}%")
-                return False
-            
-            # Check memory usage
-            memory = psutil.virtual_memory()
-            if memory.percent > self.max_memory_usage:
-                logger.warning(f"⚠️ High memory usage detected: {memory.percent}% > {self.max_memory_usage}%")
-                return False
-            
+        snapshot = self.resource_monitor.snapshot
+        if snapshot.cpu_percent > self.max_cpu_usage:
+            logger.warning(f"⚠️ High CPU usage detected: {snapshot.cpu_percent}% > {self.max_cpu_usage}%")
+            return False
+        if snapshot.memory_percent > self.max_memory_usage:
+            logger.warning(f"⚠️ High memory usage detected: {snapshot.memory_percent}% > {self.max_memory_usage}%")
+            return False
+        return True
+
+    def _wait_for_headroom(self) -> bool:
+        """
+        Backpressure: when the snapshot shows pressure, wait briefly for it to clear.
+        Returns False if resources are still exceeded after backpressure_max_wait.
+        """
+        if self._check_system_resources():
             return True
-            
-        except Exception as e:
-            logger.warning(f"⚠️ System resource check failed: {e}, proceeding with caution")
-            return True  # Proceed if check fails
+        return self.resource_monitor.wait_for_headroom(
+            self.max_cpu_usage, self.max_memory_usage, max_wait=self.backpressure_max_wait
+        )
 
     def _cleanup_memory(self, force: bool = False) -> None:
         """
-        Comprehensive memory cleanup for both CPU and GPU memory.
-        Called automatically after operations or when memory usage is high.
+        Release Python garbage and cached GPU memory.
+        Called at batch boundaries only; unless forced it is skipped while the
+        resource snapshot shows headroom.
         """
         try:
-            # Increment operation counter
             self.operation_count += 1
             
-            # Check if cleanup is needed
-            if not force and self.operation_count % self.memory_cleanup_threshold != 0:
+            snapshot = self.resource_monitor.snapshot
+            if not force and max(snapshot.memory_percent, snapshot.gpu_memory_percent) < self.memory_cleanup_percent:
                 return
             
-            logger.debug(f"🧹 Performing memory cleanup (operation #{self.operation_count})")
+            logger.debug(f"🧹 Performing memory cleanup (batch #{self.operation_count})")
             
-            # Clean up GPU memory if available
+            # Clean up GPU memory if available (empty_cache does not need a device sync)
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
-                torch.cuda.synchronize()
                 logger.debug("🧹 GPU memory cache cleared")
             
             # Force Python garbage collection
             collected = gc.collect()
             if collected > 0:
                 logger.debug(f"🧹 Python garbage collection freed {collected} objects")
-            
-            # Log memory usage after cleanup
-            try:
-                import psutil
-                memory = psutil.virtual_memory()
-                logger.debug(f"🧹 Memory after cleanup: {memory.percent:.1f}% ({memory.used/1024**3:.1f}GB/{memory.total/1024**3:.1f}GB)")
-            except Exception:
-                pass
                 
         except Exception as e:
             logger.warning(f"⚠️ Memory cleanup failed: {e}")
 
     def _log_memory_usage(self, context: str = "") -> None:
         """Log current memory usage for monitoring"""
-        try:
-            import psutil
-            memory = psutil.virtual_memory()
-            logger.info(f"📊 Memory usage {context}: {memory.percent:.1f}% ({memory.used/1024**3:.1f}GB/{memory.total/1024**3:.1f}GB)")
-        except Exception as e:
-            logger.debug(f"Memory logging failed: {e}")
+        snapshot = self.resource_monitor.snapshot
+        logger.debug(f"📊 Memory usage {context}: {snapshot.memory_percent:.1f}% "
+                     f"({snapshot.memory_available_bytes/1024**3:.1f}GB available)")
 
     # ---------- Universal Dynamic Job Title Similarity Methods ----------
     
@@ -239,45 +317,19 @@ class MatchingService:
         """Extract all relevant domains from job title"""
         if not title:
             return []
-        
-        title_lower = title.lower()
-        found_domains = []
-        
-        for domain, keywords in self.DOMAIN_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in title_lower:
-                    found_domains.append(domain)
-                    break
-        
-        return found_domains
+        return list(self.title_index.features(title.lower())[0])
 
     def extract_role_type(self, title):
         """Extract core role type from title"""
         if not title:
             return 'unknown'
-        
-        title_lower = title.lower()
-        
-        for role_type, synonyms in self.ROLE_TYPES.items():
-            for synonym in synonyms:
-                if synonym in title_lower:
-                    return role_type
-        
-        return 'general'
+        return self.title_index.features(title.lower())[1]
 
     def extract_seniority_level(self, title):
         """Extract seniority level from title"""
         if not title:
             return 'mid'
-        
-        title_lower = title.lower()
-        
-        for level, keywords in self.SENIORITY_LEVELS.items():
-            for keyword in keywords:
-                if keyword and keyword in title_lower:
-                    return level
-        
-        return 'mid'
+        return self.title_index.features(title.lower())[2]
 
     def calculate_domain_similarity(self, jd_domains, cv_domains):
         """Calculate similarity based on shared domains"""
@@ -376,13 +428,14 @@ class MatchingService:
         if jd_clean == cv_clean:
             return 1.0
         
+        # Keywords never start or end with whitespace, so the stripped titles give the
+        # same features; many CVs share a title, so the pair score is memoized on them
+        return self._title_pair_similarity(jd_clean, cv_clean)
+
+    def _title_similarity_uncached(self, jd_clean: str, cv_clean: str) -> float:
         # Extract components
-        jd_domains = self.extract_domains_from_title(jd_title)
-        cv_domains = self.extract_domains_from_title(cv_title)
-        jd_role = self.extract_role_type(jd_title)
-        cv_role = self.extract_role_type(cv_title)
-        jd_seniority = self.extract_seniority_level(jd_title)
-        cv_seniority = self.extract_seniority_level(cv_title)
+        jd_domains, jd_role, jd_seniority = self.title_index.features(jd_clean)
+        cv_domains, cv_role, cv_seniority = self.title_index.features(cv_clean)
         
         # Calculate component similarities
         domain_sim = self.calculate_domain_similarity(jd_domains, cv_domains)
@@ -553,8 +606,6 @@ class MatchingService:
             )
             match_details = self._build_details(cv_std, jd_std, skills_analysis, responsibilities_analysis, title_sim, exp_score_pct)
             
-            # Clean up memory after matching
-            self._cleanup_memory()
             self._log_memory_usage("after matching")
             
             return MatchResult(
@@ -568,10 +619,47 @@ class MatchingService:
             logger.error(f"❌ Matching failed: {e}")
             raise Exception(f"CV-JD matching failed: {e}")
 
-    def match_by_ids(self, cv_id: str, jd_id: str, weights: dict = None) -> MatchResult:
+    # Bump when component scoring changes so cached pair scores are not reused
+    SCORING_VERSION = "1"
+
+    @classmethod
+    def weighted_overall_score(
+        cls,
+        skills_pct: float,
+        resp_pct: float,
+        title_pct: float,
+        exp_pct: float,
+        weights: dict,
+        business_rule_modifier: float,
+    ) -> float:
+        """
+        Overall score (0-100) from the four component percentages: the weighted base
+        score scaled by the business-rule modifier. `weights` must already be normalized.
+        """
+        base_score = (
+            skills_pct * weights.get("skills", cls.SCORING_WEIGHTS["skills"]) +
+            resp_pct * weights.get("responsibilities", cls.SCORING_WEIGHTS["responsibilities"]) +
+            title_pct * weights.get("job_title", cls.SCORING_WEIGHTS["job_title"]) +
+            exp_pct * weights.get("experience", cls.SCORING_WEIGHTS["experience"])
+        )
+        # Business rule modifier is a relative percentage (-0.20 to +0.30), apply it as a percentage of base score
+        return max(0.0, min(100.0, base_score * (1.0 + business_rule_modifier)))
+
+    def match_by_ids(
+        self,
+        cv_id: str,
+        jd_id: str,
+        weights: dict = None,
+        cv_version: Optional[str] = None,
+        jd_version: Optional[str] = None,
+    ) -> MatchResult:
         """
         Match CV against JD using stored embeddings from Qdrant (OPTIMIZED).
         This is the preferred method as it uses pre-computed embeddings.
+
+        With both versions (the structured payloads' stored_at) the weight-independent
+        component scores come from the pair cache when that exact JD/CV pair was
+        scored before; weights are always applied fresh on top.
         """
         try:
             logger.info("---------- MATCHING START (using stored embeddings) ----------")
@@ -589,122 +677,155 @@ class MatchingService:
                 else:
                     weights = self.SCORING_WEIGHTS
             
-            # Retrieve stored embeddings from Qdrant
-            cv_embeddings = self.qdrant.retrieve_embeddings(cv_id, "cv")
-            jd_embeddings = self.qdrant.retrieve_embeddings(jd_id, "jd")
-            
-            # Fallback: if embeddings not found, get structured data and generate them
-            if not cv_embeddings:
-                logger.warning(f"⚠️ CV embeddings not found for {cv_id}, falling back to generation")
-                cv_structured = self.qdrant.get_structured_cv(cv_id)
-                if not cv_structured:
-                    raise ValueError(f"CV {cv_id} not found in database")
-                cv_embeddings = self._generate_embeddings_from_structured(cv_structured, "cv")
-            
-            if not jd_embeddings:
-                logger.warning(f"⚠️ JD embeddings not found for {jd_id}, falling back to generation")
-                jd_structured = self.qdrant.get_structured_jd(jd_id)
-                if not jd_structured:
-                    raise ValueError(f"JD {jd_id} not found in database")
-                jd_embeddings = self._generate_embeddings_from_structured(jd_structured, "jd")
-            
-            # Get structured data for text content (needed for similarity calculations)
-            cv_structured = self.qdrant.get_structured_cv(cv_id)
-            jd_structured = self.qdrant.get_structured_jd(jd_id)
-            
-            if not cv_structured or not jd_structured:
-                raise ValueError("Structured data not found for CV or JD")
-            
-            # Parse years properly to handle string values like "3-7"
-            jd_years = safe_parse_years(jd_structured.get("years_of_experience", 0))
-            cv_years = safe_parse_years(cv_structured.get("years_of_experience", 0))
-            
-            # Convert stored embeddings to the format expected by similarity functions
-            cv_emb = self._convert_stored_embeddings_to_format(cv_embeddings, cv_structured)
-            jd_emb = self._convert_stored_embeddings_to_format(jd_embeddings, jd_structured)
-            
-            # Calculate similarities
-            skills_analysis = self._skills_similarity(
-                jd_emb["skills"], cv_emb["skills"],
-                jd_structured.get("skills_sentences", []),
-                cv_structured.get("skills_sentences", [])
-            )
-            responsibilities_analysis = self._responsibilities_similarity(
-                jd_emb["responsibilities"], cv_emb["responsibilities"],
-                jd_structured.get("responsibility_sentences", []),
-                cv_structured.get("responsibility_sentences", [])
-            )
-            
-            # ---- Enhanced title similarity using semantic mappings ----
-            cv_title = cv_structured.get("job_title", "") or ""
-            jd_title = jd_structured.get("job_title", "") or ""
-            title_sim = self.get_enhanced_title_similarity(jd_title, cv_title)
-            
-            # Calculate experience match (use same method as legacy)
-            meets, exp_score_pct = self._experience_match(
-                str(jd_years),  # Convert to string for the experience_match method
-                str(cv_years)   # Convert to string for the experience_match method
-            )
-            
-            # ---- Calculate base scores (same as legacy method) ----
-            skills_pct = skills_analysis["skill_match_percentage"]
-            resp_pct = responsibilities_analysis["responsibility_match_percentage"]
-            title_pct = title_sim * 100.0
-            
-            # ---- Apply enhanced weighted scoring (same as legacy method) ----
-            base_score = (
-                skills_pct * weights.get("skills", self.SCORING_WEIGHTS["skills"]) +
-                resp_pct * weights.get("responsibilities", self.SCORING_WEIGHTS["responsibilities"]) +
-                title_pct * weights.get("job_title", self.SCORING_WEIGHTS["job_title"]) +
-                exp_score_pct * weights.get("experience", self.SCORING_WEIGHTS["experience"])
-            )
-            
-            # ---- Apply business rules and bonuses (same as legacy method) ----
-            business_rule_modifier = self.apply_business_rules(cv_title, jd_title, title_sim)
-            # Business rule modifier is a relative percentage (-0.20 to +0.30), apply it as a percentage of base score
-            overall_score = base_score * (1.0 + business_rule_modifier)
-            
-            # Ensure score stays within bounds
-            overall_score = max(0.0, min(100.0, overall_score))
-            
-            # Build explanation
-            explanation = self._build_explanation(
-                skills_analysis["skill_match_percentage"], skills_analysis,
-                responsibilities_analysis["responsibility_match_percentage"], responsibilities_analysis,
-                title_sim, meets  # Use the meets boolean from _experience_match
-            )
-            
-            # Build match details
-            match_details = {
-                "skills_analysis": skills_analysis,
-                "responsibilities_analysis": responsibilities_analysis,
-                "title_similarity": title_sim,
-                "experience_score": exp_score_pct,
-                "weights_used": weights,
-                "cv_years": cv_years,
-                "jd_years": jd_years
-            }
-            
-            processing_time = time.time() - t0
-            logger.info(f"✅ MATCHING COMPLETED in {processing_time:.3f}s - Overall Score: {overall_score:.3f}")
-            
-            return MatchResult(
-                cv_id=cv_id,
-                jd_id=jd_id,
-                overall_score=overall_score,
-                skills_score=skills_pct,
-                responsibilities_score=resp_pct,
-                title_score=title_pct,
-                experience_score=exp_score_pct,
-                explanation=explanation,
-                match_details=match_details,
-                processing_time=processing_time
+            cache_key = None
+            components = None
+            if cv_version and jd_version:
+                cache = get_match_score_cache()
+                cache_key = cache.key(jd_id, jd_version, cv_id, cv_version, self.SCORING_VERSION)
+                components = cache.get(cache_key)
+            cached = components is not None
+            
+            if components is None:
+                components = self._component_scores_by_ids(cv_id, jd_id)
+                if cache_key:
+                    components = get_match_score_cache().set(cache_key, components)
+            
+            result = self._combine_components(cv_id, jd_id, components, weights)
+            result.processing_time = time.time() - t0
+            MATCH_PAIR_DURATION.observe(result.processing_time, method="by_ids_cached" if cached else "by_ids")
+            logger.info(
+                f"✅ MATCHING COMPLETED in {result.processing_time:.3f}s{' (cached components)' if cached else ''}"
+                f" - Overall Score: {result.overall_score:.3f}"
             )
+            return result
             
         except Exception as e:
             logger.error(f"❌ Matching failed: {str(e)}")
             raise Exception(f"Matching failed: {str(e)}")
 
+    def _component_scores_by_ids(self, cv_id: str, jd_id: str) -> Dict[str, Any]:
+        """Weight-independent scores for one stored CV/JD pair (what the pair cache stores)."""
+        # Retrieve stored embeddings from Qdrant
+        cv_embeddings = self.qdrant.retrieve_embeddings(cv_id, "cv")
+        jd_embeddings = self.qdrant.retrieve_embeddings(jd_id, "jd")
+        
+        # Fallback: if embeddings not found, get structured data and generate them
+        if not cv_embeddings:
+            logger.warning(f"⚠️ CV embeddings not found for {cv_id}, falling back to generation")
+            cv_structured = self.qdrant.get_structured_cv(cv_id)
+            if not cv_structured:
+                raise ValueError(f"CV {cv_id} not found in database")
+            cv_embeddings = self._generate_embeddings_from_structured(cv_structured, "cv")
+        
+        if not jd_embeddings:
+            logger.warning(f"⚠️ JD embeddings not found for {jd_id}, falling back to generation")
+            jd_structured = self.qdrant.get_structured_jd(jd_id)
+            if not jd_structured:
+                raise ValueError(f"JD {jd_id} not found in database")
+            jd_embeddings = self._generate_embeddings_from_structured(jd_structured, "jd")
+        
+        # Get structured data for text content (needed for similarity calculations)
+        cv_structured = self.qdrant.get_structured_cv(cv_id)
+        jd_structured = self.qdrant.get_structured_jd(jd_id)
+        
+        if not cv_structured or not jd_structured:
+            raise ValueError("Structured data not found for CV or JD")
+        
+        # Parse years properly to handle string values like "3-7"
+        jd_years = safe_parse_years(jd_structured.get("years_of_experience", 0))
+        cv_years = safe_parse_years(cv_structured.get("years_of_experience", 0))
+        
+        # Convert stored embeddings to the format expected by similarity functions
+        cv_emb = self._convert_stored_embeddings_to_format(cv_embeddings, cv_structured)
+        jd_emb = self._convert_stored_embeddings_to_format(jd_embeddings, jd_structured)
+        
+        # Calculate similarities
+        # Both sides are unit-length float32, so similarities are plain dot products
+        skills_analysis = self._skills_similarity(
+            jd_emb["skills"], cv_emb["skills"],
+            jd_structured.get("skills_sentences", []),
+            cv_structured.get("skills_sentences", []),
+            normalized=True
+        )
+        responsibilities_analysis = self._responsibilities_similarity(
+            jd_emb["responsibilities"], cv_emb["responsibilities"],
+            jd_structured.get("responsibility_sentences", []),
+            cv_structured.get("responsibility_sentences", []),
+            normalized=True
+        )
+        
+        # ---- Enhanced title similarity using semantic mappings ----
+        cv_title = cv_structured.get("job_title", "") or ""
+        jd_title = jd_structured.get("job_title", "") or ""
+        title_sim = self.get_enhanced_title_similarity(jd_title, cv_title)
+        
+        # Calculate experience match (use same method as legacy)
+        meets, exp_score_pct = self._experience_match(
+            str(jd_years),  # Convert to string for the experience_match method
+            str(cv_years)   # Convert to string for the experience_match method
+        )
+        
+        return {
+            "skills_analysis": skills_analysis,
+            "responsibilities_analysis": responsibilities_analysis,
+            "title_similarity": title_sim,
+            "experience_score": exp_score_pct,
+            "experience_meets": meets,
+            # Business rule modifier depends on the titles only
+            "business_rule_modifier": self.apply_business_rules(cv_title, jd_title, title_sim),
+            "cv_years": cv_years,
+            "jd_years": jd_years,
+        }
+
+    def _combine_components(self, cv_id: str, jd_id: str, components: Dict[str, Any], weights: dict) -> MatchResult:
+        """Apply (normalized) weights and the business rule to component scores."""
+        skills_analysis = components["skills_analysis"]
+        responsibilities_analysis = components["responsibilities_analysis"]
+        title_sim = components["title_similarity"]
+        exp_score_pct = components["experience_score"]
+        
+        # ---- Calculate base scores (same as legacy method) ----
+        skills_pct = skills_analysis["skill_match_percentage"]
+        resp_pct = responsibilities_analysis["responsibility_match_percentage"]
+        title_pct = title_sim * 100.0
+        
+        # ---- Apply enhanced weighted scoring and business rules (same as legacy method) ----
+        overall_score = self.weighted_overall_score(
+            skills_pct, resp_pct, title_pct, exp_score_pct, weights, components["business_rule_modifier"]
+        )
+        
+        # Build explanation
+        explanation = self._build_explanation(
+            skills_analysis["skill_match_percentage"], skills_analysis,
+            responsibilities_analysis["responsibility_match_percentage"], responsibilities_analysis,
+            title_sim, components["experience_meets"]  # Use the meets boolean from _experience_match
+        )
+        
+        # Build match details
+        match_details = {
+            "skills_analysis": skills_analysis,
+            "responsibilities_analysis": responsibilities_analysis,
+            "title_similarity": title_sim,
+            "experience_score": exp_score_pct,
+            "weights_used": weights,
+            "business_rule_modifier": components["business_rule_modifier"],
+            "cv_years": components["cv_years"],
+            "jd_years": components["jd_years"]
+        }
+        
+        return MatchResult(
+            cv_id=cv_id,
+            jd_id=jd_id,
+            overall_score=overall_score,
+            skills_score=skills_pct,
+            responsibilities_score=resp_pct,
+            title_score=title_pct,
+            experience_score=exp_score_pct,
+            explanation=explanation,
+            match_details=match_details,
+            processing_time=0.0
+        )
+
     def match_structured_data(self, cv_structured: dict, jd_structured: dict, weights: dict = None) -> MatchResult:
         """
         Match CV against JD using structured data directly (LEGACY METHOD).
@@ -792,7 +913,9 @@ class MatchingService:
             match_details = self._build_details(
                 cv_structured, jd_structured, skills_analysis, responsibilities_analysis, title_sim, exp_score_pct
             )
+            match_details["business_rule_modifier"] = business_rule_modifier
             
+            MATCH_PAIR_DURATION.observe(time.time() - t0, method="structured")
             return MatchResult(
                 cv_id=cv_structured.get("id", "unknown"),
                 jd_id=jd_structured.get("id", "unknown"),
@@ -833,21 +956,20 @@ class MatchingService:
                         logger.warning(f"⚠️ Bulk matching timeout approaching ({elapsed_time:.1f}s), stopping after {processed_count} CVs, returning partial results")
                         break
                     
-                    # SAFETY CHECK: Monitor system resources every 10 CVs
-                    if processed_count > 0 and processed_count % 10 == 0:
-                        if not self._check_system_resources():
-                            logger.warning(f"⚠️ System resources exceeded, stopping bulk matching after {processed_count} CVs")
-                            break
+                    # SAFETY CHECK: O(1) snapshot read per CV, with backpressure under load
+                    if not self._wait_for_headroom():
+                        logger.warning(f"⚠️ System resources exceeded, stopping bulk matching after {processed_count} CVs")
+                        break
                     
                     # Process individual match with error handling
                     result = self.match_cv_against_jd(cid, jd_id)
                     results.append(result)
                     processed_count += 1
                     
-                    # Log progress for large batches
-                    if len(cv_ids) > 50 and processed_count % 10 == 0:
-                        logger.info(f"📊 Bulk matching progress: {processed_count}/{len(cv_ids)} CVs processed")
-                        # Clean up memory every 10 matches
+                    # Batch boundary every 10 matches
+                    if processed_count % 10 == 0:
+                        if len(cv_ids) > 50:
+                            logger.info(f"📊 Bulk matching progress: {processed_count}/{len(cv_ids)} CVs processed")
                         self._cleanup_memory()
                         
                 except Exception as e:
@@ -973,12 +1095,16 @@ class MatchingService:
         try:
             results = []
             for cv_id in cv_ids:
+                if not self._wait_for_headroom():
+                    logger.warning(f"⚠️ System resources exceeded, stopping batch after {len(results)} CVs")
+                    break
                 try:
                     result = self.match_cv_against_jd(cv_id, jd_id)
                     results.append(result)
                 except Exception as e:
                     logger.warning(f"⚠️ Failed to match CV {cv_id}: {e}")
                     continue
+            self._cleanup_memory()
             return results
         except Exception as e:
             logger.error(f"❌ Batch processing failed: {e}")
@@ -1022,7 +1148,9 @@ class MatchingService:
             except Exception as e:
                 logger.debug(f"Optimized retrieval failed for {doc_id}, trying legacy method: {e}")
             
-            # Fallback to legacy method for backward compatibility
+            # Fallback to legacy method until the embeddings migration has been applied
+            if not legacy_reads_enabled(self.qdrant.client, f"{doc_type}_embeddings"):
+                return {}
             logger.info(f"🔄 FALLBACK: Using legacy retrieval for {doc_id}")
             points, _ = self.qdrant.client.scroll(
                 collection_name=f"{doc_type}_embeddings",
@@ -1068,14 +1196,16 @@ class MatchingService:
         Returns sentence->vector maps for skills/responsibilities + single vectors for title/experience.
         Prefers stored {doc_type}_embeddings; if absent, generates and stores exactly 32 vectors.
         """
-        # Try to reconstruct maps from stored embeddings first
-        points, _ = self.qdrant.client.scroll(
-            collection_name=f"{doc_type}_embeddings",
-            scroll_filter={"must": [{"key": "document_id", "match": {"value": doc_id}}]},
-            limit=2000,
-            with_payload=True,
-            with_vectors=True
-        )
+        # Try to reconstruct maps from legacy stored embeddings first (none left once migrated)
+        points = []
+        if legacy_reads_enabled(self.qdrant.client, f"{doc_type}_embeddings"):
+            points, _ = self.qdrant.client.scroll(
+                collection_name=f"{doc_type}_embeddings",
+                scroll_filter={"must": [{"key": "document_id", "match": {"value": doc_id}}]},
+                limit=2000,
+                with_payload=True,
+                with_vectors=True
+            )
         if points:
             skills_map: Dict[str, np.ndarray] = {}
             resp_map: Dict[str, np.ndarray] = {}
@@ -1117,47 +1247,52 @@ class MatchingService:
     def _convert_stored_embeddings_to_format(self, stored_embeddings: dict, structured_data: dict) -> dict:
         """
         Convert stored embeddings from Qdrant format to the format expected by similarity functions.
+        Each vector group becomes one contiguous float32 matrix built straight from the payload
+        lists; the maps hold row views into it. Vectors written before the "normalized" flag
+        existed are normalized here, so the result is always unit-length.
         """
+        normalized = bool(stored_embeddings.get("normalized"))
+        
         # Build skills map from stored vectors and structured data
         skills_map = {}
         # Use the correct field names from get_structured_cv/get_structured_jd
         skills = structured_data.get("skills_sentences", [])[:20]  # Ensure exactly 20
-        skill_vectors = stored_embeddings.get("skill_vectors", [])
+        skill_matrix = self._stored_matrix(stored_embeddings.get("skill_vectors"), normalized)
         
         for i, skill in enumerate(skills):
             # Skip empty skills to avoid false matches
             if not skill or not skill.strip():
                 continue
-            if i < len(skill_vectors) and skill_vectors[i] is not None:
-                skills_map[skill] = np.array(skill_vectors[i])
+            if i < len(skill_matrix):
+                skills_map[skill] = skill_matrix[i]
             else:
                 # Fallback for missing vectors
-                skills_map[skill] = np.zeros(768)  # Default embedding dimension for all-mpnet-base-v2
+                skills_map[skill] = np.zeros(EMBEDDING_DIM, dtype=np.float32)
         
         # Build responsibilities map from stored vectors and structured data
         resp_map = {}
         # Use the correct field names from get_structured_cv/get_structured_jd
         responsibilities = structured_data.get("responsibility_sentences", [])[:10]  # Ensure exactly 10
-        resp_vectors = stored_embeddings.get("responsibility_vectors", [])
+        resp_matrix = self._stored_matrix(stored_embeddings.get("responsibility_vectors"), normalized)
         
         for i, resp in enumerate(responsibilities):
             # Skip empty responsibilities to avoid false matches
             if not resp or not resp.strip():
                 continue
-            if i < len(resp_vectors) and resp_vectors[i] is not None:
-                resp_map[resp] = np.array(resp_vectors[i])
+            if i < len(resp_matrix):
+                resp_map[resp] = resp_matrix[i]
             else:
                 # Fallback for missing vectors
-                resp_map[resp] = np.zeros(768)  # Default embedding dimension for all-mpnet-base-v2
+                resp_map[resp] = np.zeros(EMBEDDING_DIM, dtype=np.float32)
         
         # Get title and experience vectors
         title_vec = None
         if stored_embeddings.get("job_title_vector") and len(stored_embeddings["job_title_vector"]) > 0:
-            title_vec = np.array(stored_embeddings["job_title_vector"][0])
+            title_vec = self._stored_matrix(stored_embeddings["job_title_vector"][:1], normalized)[0]
         
         exp_vec = None
         if stored_embeddings.get("experience_vector") and len(stored_embeddings["experience_vector"]) > 0:
-            exp_vec = np.array(stored_embeddings["experience_vector"][0])
+            exp_vec = self._stored_matrix(stored_embeddings["experience_vector"][:1], normalized)[0]
         
         return {
             "skills": skills_map,
@@ -1166,6 +1301,20 @@ class MatchingService:
             "experience": exp_vec
         }
 
+    @staticmethod
+    def _stored_matrix(vectors: Optional[List[List[float]]], normalized: bool) -> np.ndarray:
+        """
+        One (n x dim) float32 matrix from payload vector lists. Missing (None) vectors
+        become zero rows so indices keep lining up with the sentences.
+        """
+        if not vectors:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        if any(v is None for v in vectors):
+            zero = [0.0] * EMBEDDING_DIM
+            vectors = [zero if v is None else v for v in vectors]
+        matrix = np.asarray(vectors, dtype=np.float32)
+        return matrix if normalized else l2_normalize(matrix)
+
     def _generate_embeddings_from_structured(self, structured_data: dict, doc_type: str) -> dict:
         """
         Generate embeddings from structured data without storing to database (LEGACY METHOD).
@@ -1225,390 +1374,123 @@ class MatchingService:
         return ids
 
     # ---------- Similarity helpers ----------
+    def _similarity_matrix(self, A, B, force_cpu: bool = False, normalized: bool = False) -> np.ndarray:
+        """
+        Cosine similarity matrix (len(A) x len(B)), clipped to [0, 1].
+        The engine is chosen once at init; the CPU engine has no per-call device checks.
+        normalized=True means both sides are unit-length, so it is a plain dot product.
+        """
+        if self.use_gpu and not force_cpu:
+            a = np.asarray(A, dtype=np.float32)
+            b = np.asarray(B, dtype=np.float32)
+            return self.embedding_service.calculate_batch_cosine_similarity_gpu(a, b, normalized=normalized)
+        return cosine_similarity_matrix(A, B, normalized=normalized)
+
     def _avg_best_similarity(self, A: List[List[float]], B: List[List[float]]) -> float:
         """
         For each vector in A, take the best cosine similarity against all vectors in B; then average.
-        Uses GPU acceleration when available.
+        One matrix product on either engine.
         """
         if not A or not B:
             return 0.0
-        
-        # Enforce GPU-only path
-        if self.embedding_service.device == "cuda" and torch.cuda.is_available():
-            return self._avg_best_similarity_gpu(A, B)
-        raise RuntimeError("CUDA GPU not available for avg_best_similarity (GPU-only mode)")
-    
-    def _avg_best_similarity_gpu(self, A: List[List[float]], B: List[List[float]]) -> float:
-        """
-        GPU-accelerated average best similarity calculation with memory cleanup.
-        """
         try:
-            # Convert to numpy matrices
-            matrix_a = np.array(A)
-            matrix_b = np.array(B)
-            
-            # Calculate similarity matrix on GPU
-            similarity_matrix = self.embedding_service.calculate_batch_cosine_similarity_gpu(matrix_a, matrix_b)
-            
-            # Find best similarity for each vector in A
-            best_similarities = np.max(similarity_matrix, axis=1)
-            
-            # Calculate result
-            result = float(np.mean(best_similarities))
-            
-            # Clean up large matrices immediately
-            del matrix_a, matrix_b, similarity_matrix, best_similarities
-            
-            # Trigger memory cleanup
-            self._cleanup_memory()
-            
-            return result
-            
+            similarity_matrix = self._similarity_matrix(A, B)
         except Exception as e:
-            # Clean up on error
-            self._cleanup_memory(force=True)
-            logger.warning(f"⚠️ GPU avg best similarity calculation failed (GPU-only mode): {str(e)}")
-            raise
-    
-    def _avg_best_similarity_cpu(self, A: List[List[float]], B: List[List[float]]) -> float:
-        """
-        CPU-based average best similarity calculation (original implementation).
-        """
-        sims = []
-        for va in A:
-            va_np = np.array(va)
-            best = 0.0
-            for vb in B:
-                vb_np = np.array(vb)
-                num = float(np.dot(va_np, vb_np))
-                den = float(np.linalg.norm(va_np) * np.linalg.norm(vb_np)) or 1.0
-                sim = max(0.0, min(1.0, num / den))
-                if sim > best:
-                    best = sim
-            sims.append(best)
-        return float(np.mean(sims)) if sims else 0.0
+            logger.warning(f"⚠️ GPU avg best similarity failed, using CPU engine: {str(e)}")
+            similarity_matrix = self._similarity_matrix(A, B, force_cpu=True)
+        return float(np.mean(np.max(similarity_matrix, axis=1)))
 
     def _cos_sim_list(self, v1: List[float], v2: List[float]) -> float:
         """
         Calculate cosine similarity between two vectors.
         Uses GPU acceleration when available.
         """
-        # Enforce GPU-only path
         # Convert to numpy arrays
         vec1 = np.array(v1)
         vec2 = np.array(v2)
         return self.embedding_service.calculate_cosine_similarity(vec1, vec2)
 
-    def _skills_similarity(self, jd_emb: Dict[str, np.ndarray], cv_emb: Dict[str, np.ndarray],
-                           jd_skills: List[str], cv_skills: List[str]) -> Dict[str, Any]:
-        if not jd_emb or not cv_emb:
-            return {"skill_match_percentage": 0.0, "matched_skills": 0, "total_jd_skills": len(jd_skills), 
-                    "matches": [], "unmatched_jd_skills": jd_skills}
-        
-        # Use GPU-accelerated batch similarity calculation
-        return self._skills_similarity_gpu_batch(jd_emb, cv_emb, jd_skills, cv_skills)
-    
-    def _skills_similarity_gpu_batch(self, jd_emb: Dict[str, np.ndarray], cv_emb: Dict[str, np.ndarray],
-                                     jd_skills: List[str], cv_skills: List[str]) -> Dict[str, Any]:
+    def _assign_items(self, jd_emb: Dict[str, np.ndarray], cv_emb: Dict[str, np.ndarray],
+                      jd_items: List[str], cv_items: List[str], category: str,
+                      jd_key: str, cv_key: str, normalized: bool = False) -> Tuple[List[Dict[str, Any]], List[str]]:
         """
-        GPU-accelerated skills similarity calculation using GPU Hungarian algorithm.
+        Optimal one-to-one assignment of JD items to CV items (Hungarian on the
+        similarity matrix). Returns (matches above the category minimum, unmatched JD items).
         """
+        jd_mapping = [item for item in jd_items if jd_emb.get(item) is not None]
+        cv_mapping = [item for item in cv_items if cv_emb.get(item) is not None]
+        if not jd_mapping or not cv_mapping:
+            return [], list(jd_items)
+        
+        jd_vectors = [jd_emb[item] for item in jd_mapping]
+        cv_vectors = [cv_emb[item] for item in cv_mapping]
         try:
-            # SAFETY CHECK: Limit batch size to prevent GPU memory issues
-            max_batch_size = 30  # Conservative limit for skills matching
-            if len(jd_skills) > max_batch_size or len(cv_skills) > max_batch_size:
-                logger.warning(f"⚠️ Skills batch too large ({len(jd_skills)}x{len(cv_skills)}), using CPU fallback")
-                return self._skills_similarity_cpu_fallback(jd_emb, cv_emb, jd_skills, cv_skills)
-            
-            logger.info(f"🚀 GPU-Hungarian skills similarity: {len(jd_skills)} JD skills vs {len(cv_skills)} CV skills")
-            # Prepare matrices for batch processing
-            jd_vectors = []
-            cv_vectors = []
-            jd_skill_mapping = []
-            cv_skill_mapping = []
-            
-            # Build JD vectors matrix with mapping
-            for jd_s in jd_skills:
-                v1 = jd_emb.get(jd_s)
-                if v1 is not None:
-                    jd_vectors.append(v1)
-                    jd_skill_mapping.append(jd_s)
-            
-            # Build CV vectors matrix with mapping
-            for cv_s in cv_skills:
-                v2 = cv_emb.get(cv_s)
-                if v2 is not None:
-                    cv_vectors.append(v2)
-                    cv_skill_mapping.append(cv_s)
-            
-            if not jd_vectors or not cv_vectors:
-                return {"skill_match_percentage": 0.0, "matched_skills": 0, "total_jd_skills": len(jd_skills), 
-                        "matches": [], "unmatched_jd_skills": jd_skills}
-            
-            # Convert to numpy matrices
-            jd_matrix = np.array(jd_vectors)
-            cv_matrix = np.array(cv_vectors)
-            
-            # Calculate similarity matrix on GPU
-            similarity_matrix = self.embedding_service.calculate_batch_cosine_similarity_gpu(jd_matrix, cv_matrix)
-            
-            # Use GPU Hungarian algorithm for optimal matching (same as CPU version)
-            avg_score, pairs = hungarian_mean(similarity_matrix)
-            
-            # Clean up large matrices immediately
-            del jd_matrix, cv_matrix, similarity_matrix
-            
-            # Build detailed matches using Hungarian results
-            matches = []
-            matched_jd_indices = set()
-            matched_cv_indices = set()
-            
-            for jd_idx, cv_idx, sim_score in pairs:
-                if jd_idx < len(jd_skill_mapping) and cv_idx < len(cv_skill_mapping):
-                    jd_s = jd_skill_mapping[jd_idx]
-                    cv_s = cv_skill_mapping[cv_idx]
-                    
-                    # Only include matches above threshold
-                    if sim_score >= self.embedding_service.SIMILARITY_THRESHOLDS["skills"]["minimum"]:
-                        matches.append({
-                            "jd_skill": jd_s, 
-                            "cv_skill": cv_s, 
-                            "similarity": float(sim_score), 
-                            "quality": self.embedding_service.get_match_quality(sim_score, "skills"),
-                            "jd_index": jd_idx,
-                            "cv_index": cv_idx
-                        })
-                        matched_jd_indices.add(jd_idx)
-                        matched_cv_indices.add(cv_idx)
-            
-            # Find unmatched JD skills
-            unmatched_jd_skills = []
-            for i, skill in enumerate(jd_skill_mapping):
-                if i not in matched_jd_indices:
-                    unmatched_jd_skills.append(skill)
-            
-            # Calculate match percentage (same logic as CPU version)
-            match_percentage = (len(matches) / len(jd_skills)) * 100.0 if jd_skills else 0.0
-            
-            # Trigger memory cleanup
-            self._cleanup_memory()
-            
-            return {
-                "skill_match_percentage": match_percentage, 
-                "matched_skills": len(matches), 
-                "total_jd_skills": len(jd_skills), 
-                "matches": matches, 
-                "unmatched_jd_skills": unmatched_jd_skills
-            }
-            
+            similarity_matrix = self._similarity_matrix(jd_vectors, cv_vectors, normalized=normalized)
         except Exception as e:
-            # Clean up on error
-            self._cleanup_memory(force=True)
-            logger.warning(f"⚠️ GPU-Hungarian skills similarity failed: {str(e)}")
-            # Fallback to CPU version
-            return self._skills_similarity_cpu_fallback(jd_emb, cv_emb, jd_skills, cv_skills)
-    
-    def _skills_similarity_cpu_fallback(self, jd_emb: Dict[str, np.ndarray], cv_emb: Dict[str, np.ndarray],
-                                        jd_skills: List[str], cv_skills: List[str]) -> Dict[str, Any]:
-        """
-        CPU fallback for skills similarity calculation (original implementation).
-        """
-        matches, matched = [], 0
-        for idx, jd_s in enumerate(jd_skills):
-            v1 = jd_emb.get(jd_s)
-            if v1 is None:
-                continue
-            
-            best_item, best_sim = None, 0.0
-            best_idx = -1
-            
-            for cv_idx, cv_s in enumerate(cv_skills):
-                v2 = cv_emb.get(cv_s)
-                if v2 is None:
-                    continue
-                    
-                sim = self.embedding_service.calculate_cosine_similarity(v1, v2)
-                if sim > best_sim:
-                    best_sim, best_item, best_idx = sim, cv_s, cv_idx
-            
-            if best_item and best_sim >= self.embedding_service.SIMILARITY_THRESHOLDS["skills"]["minimum"]:
-                matched += 1
+            logger.warning(f"⚠️ GPU {category} similarity failed, using CPU engine: {str(e)}")
+            similarity_matrix = self._similarity_matrix(jd_vectors, cv_vectors, force_cpu=True, normalized=normalized)
+        
+        _, pairs = hungarian_mean(similarity_matrix)
+        
+        minimum = self.embedding_service.SIMILARITY_THRESHOLDS[category]["minimum"]
+        matches = []
+        matched_jd_indices = set()
+        for jd_idx, cv_idx, sim_score in pairs:
+            # Only include matches above threshold
+            if sim_score >= minimum:
                 matches.append({
-                    "jd_skill": jd_s, 
-                    "cv_skill": best_item, 
-                    "similarity": best_sim, 
-                    "quality": self.embedding_service.get_match_quality(best_sim, "skills"),
-                    "jd_index": idx,
-                    "cv_index": best_idx
+                    jd_key: jd_mapping[jd_idx],
+                    cv_key: cv_mapping[cv_idx],
+                    "similarity": float(sim_score),
+                    "quality": self.embedding_service.get_match_quality(sim_score, category),
+                    "jd_index": jd_idx,
+                    "cv_index": cv_idx
                 })
+                matched_jd_indices.add(jd_idx)
         
-        total = len(jd_skills) or 1
-        pct = matched / total * 100.0
-        unmatched = [s for s in jd_skills if s not in [m["jd_skill"] for m in matches]]
+        unmatched = [item for i, item in enumerate(jd_mapping) if i not in matched_jd_indices]
+        return matches, unmatched
+
+    def _skills_similarity(self, jd_emb: Dict[str, np.ndarray], cv_emb: Dict[str, np.ndarray],
+                           jd_skills: List[str], cv_skills: List[str], normalized: bool = False) -> Dict[str, Any]:
+        if not jd_emb or not cv_emb:
+            return {"skill_match_percentage": 0.0, "matched_skills": 0, "total_jd_skills": len(jd_skills), 
+                    "matches": [], "unmatched_jd_skills": jd_skills}
+        
+        logger.debug(f"🚀 Hungarian skills similarity ({self.similarity_engine}): {len(jd_skills)} JD skills vs {len(cv_skills)} CV skills")
+        matches, unmatched_jd_skills = self._assign_items(
+            jd_emb, cv_emb, jd_skills, cv_skills, "skills", "jd_skill", "cv_skill", normalized=normalized
+        )
+        match_percentage = (len(matches) / len(jd_skills)) * 100.0 if jd_skills else 0.0
         
         return {
-            "skill_match_percentage": pct, 
-            "matched_skills": matched, 
+            "skill_match_percentage": match_percentage, 
+            "matched_skills": len(matches), 
             "total_jd_skills": len(jd_skills), 
             "matches": matches, 
-            "unmatched_jd_skills": unmatched
+            "unmatched_jd_skills": unmatched_jd_skills
         }
 
     def _responsibilities_similarity(self, jd_emb: Dict[str, np.ndarray], cv_emb: Dict[str, np.ndarray],
-                                     jd_resps: List[str], cv_resps: List[str]) -> Dict[str, Any]:
+                                     jd_resps: List[str], cv_resps: List[str], normalized: bool = False) -> Dict[str, Any]:
         if not jd_emb or not cv_emb:
             return {"responsibility_match_percentage": 0.0, "matched_responsibilities": 0, 
                     "total_jd_responsibilities": len(jd_resps), "matches": [], 
                     "unmatched_jd_responsibilities": jd_resps}
         
-        # Use GPU-accelerated batch similarity calculation
-        return self._responsibilities_similarity_gpu_batch(jd_emb, cv_emb, jd_resps, cv_resps)
-    
-    def _responsibilities_similarity_gpu_batch(self, jd_emb: Dict[str, np.ndarray], cv_emb: Dict[str, np.ndarray],
-                                               jd_resps: List[str], cv_resps: List[str]) -> Dict[str, Any]:
-        """
-        GPU-accelerated responsibilities similarity calculation using GPU Hungarian algorithm.
-        """
-        try:
-            # SAFETY CHECK: Limit batch size to prevent GPU memory issues
-            max_batch_size = 20  # Conservative limit for responsibilities matching
-            if len(jd_resps) > max_batch_size or len(cv_resps) > max_batch_size:
-                logger.warning(f"⚠️ Responsibilities batch too large ({len(jd_resps)}x{len(cv_resps)}), using CPU fallback")
-                return self._responsibilities_similarity_cpu_fallback(jd_emb, cv_emb, jd_resps, cv_resps)
-            
-            logger.info(f"🚀 GPU-Hungarian responsibilities similarity: {len(jd_resps)} JD resp vs {len(cv_resps)} CV resp")
-            # Prepare matrices for batch processing
-            jd_vectors = []
-            cv_vectors = []
-            jd_resp_mapping = []
-            cv_resp_mapping = []
-            
-            # Build JD vectors matrix with mapping
-            for jd_r in jd_resps:
-                v1 = jd_emb.get(jd_r)
-                if v1 is not None:
-                    jd_vectors.append(v1)
-                    jd_resp_mapping.append(jd_r)
-            
-            # Build CV vectors matrix with mapping
-            for cv_r in cv_resps:
-                v2 = cv_emb.get(cv_r)
-                if v2 is not None:
-                    cv_vectors.append(v2)
-                    cv_resp_mapping.append(cv_r)
-            
-            if not jd_vectors or not cv_vectors:
-                return {"responsibility_match_percentage": 0.0, "matched_responsibilities": 0, 
-                        "total_jd_responsibilities": len(jd_resps), "matches": [], 
-                        "unmatched_jd_responsibilities": jd_resps}
-            
-            # Convert to numpy matrices
-            jd_matrix = np.array(jd_vectors)
-            cv_matrix = np.array(cv_vectors)
-            
-            # Calculate similarity matrix on GPU
-            similarity_matrix = self.embedding_service.calculate_batch_cosine_similarity_gpu(jd_matrix, cv_matrix)
-            
-            # Use GPU Hungarian algorithm for optimal matching (same as CPU version)
-            avg_score, pairs = hungarian_mean(similarity_matrix)
-            
-            # Clean up large matrices immediately
-            del jd_matrix, cv_matrix, similarity_matrix
-            
-            # Build detailed matches using Hungarian results
-            matches = []
-            matched_jd_indices = set()
-            matched_cv_indices = set()
-            
-            for jd_idx, cv_idx, sim_score in pairs:
-                if jd_idx < len(jd_resp_mapping) and cv_idx < len(cv_resp_mapping):
-                    jd_r = jd_resp_mapping[jd_idx]
-                    cv_r = cv_resp_mapping[cv_idx]
-                    
-                    # Only include matches above threshold
-                    if sim_score >= self.embedding_service.SIMILARITY_THRESHOLDS["responsibilities"]["minimum"]:
-                        matches.append({
-                            "jd_responsibility": jd_r, 
-                            "cv_responsibility": cv_r, 
-                            "similarity": float(sim_score), 
-                            "quality": self.embedding_service.get_match_quality(sim_score, "responsibilities"),
-                            "jd_index": jd_idx,
-                            "cv_index": cv_idx
-                        })
-                        matched_jd_indices.add(jd_idx)
-                        matched_cv_indices.add(cv_idx)
-            
-            # Find unmatched JD responsibilities
-            unmatched_jd_responsibilities = []
-            for i, resp in enumerate(jd_resp_mapping):
-                if i not in matched_jd_indices:
-                    unmatched_jd_responsibilities.append(resp)
-            
-            # Calculate match percentage (same logic as CPU version)
-            match_percentage = (len(matches) / len(jd_resps)) * 100.0 if jd_resps else 0.0
-            
-            # Trigger memory cleanup
-            self._cleanup_memory()
-            
-            return {
-                "responsibility_match_percentage": match_percentage, 
-                "matched_responsibilities": len(matches), 
-                "total_jd_responsibilities": len(jd_resps), 
-                "matches": matches, 
-                "unmatched_jd_responsibilities": unmatched_jd_responsibilities
-            }
-            
-        except Exception as e:
-            # Clean up on error
-            self._cleanup_memory(force=True)
-            logger.warning(f"⚠️ GPU-Hungarian responsibilities similarity failed: {str(e)}")
-            # Fallback to CPU version
-            return self._responsibilities_similarity_cpu_fallback(jd_emb, cv_emb, jd_resps, cv_resps)
-    
-    def _responsibilities_similarity_cpu_fallback(self, jd_emb: Dict[str, np.ndarray], cv_emb: Dict[str, np.ndarray],
-                                                  jd_resps: List[str], cv_resps: List[str]) -> Dict[str, Any]:
-        """
-        CPU fallback for responsibilities similarity calculation (original implementation).
-        """
-        matches, matched = [], 0
-        for idx, jd_r in enumerate(jd_resps):
-            v1 = jd_emb.get(jd_r)
-            if v1 is None:
-                continue
-                
-            best_item, best_sim = None, 0.0
-            best_idx = -1
-            
-            for cv_idx, cv_r in enumerate(cv_resps):
-                v2 = cv_emb.get(cv_r)
-                if v2 is None:
-                    continue
-                    
-                sim = self.embedding_service.calculate_cosine_similarity(v1, v2)
-                if sim > best_sim:
-                    best_sim, best_item, best_idx = sim, cv_r, cv_idx
-            
-            if best_item and best_sim >= self.embedding_service.SIMILARITY_THRESHOLDS["responsibilities"]["minimum"]:
-                matched += 1
-                matches.append({
-                    "jd_responsibility": jd_r, 
-                    "cv_responsibility": best_item, 
-                    "similarity": best_sim, 
-                    "quality": self.embedding_service.get_match_quality(best_sim, "responsibilities"),
-                    "jd_index": idx,
-                    "cv_index": best_idx
-                })
-        
-        total = len(jd_resps) or 1
-        pct = matched / total * 100.0
-        unmatched = [r for r in jd_resps if r not in [m["jd_responsibility"] for m in matches]]
+        logger.debug(f"🚀 Hungarian responsibilities similarity ({self.similarity_engine}): {len(jd_resps)} JD resp vs {len(cv_resps)} CV resp")
+        matches, unmatched_jd_responsibilities = self._assign_items(
+            jd_emb, cv_emb, jd_resps, cv_resps, "responsibilities", "jd_responsibility", "cv_responsibility",
+            normalized=normalized
+        )
+        match_percentage = (len(matches) / len(jd_resps)) * 100.0 if jd_resps else 0.0
         
         return {
-            "responsibility_match_percentage": pct, 
-            "matched_responsibilities": matched, 
+            "responsibility_match_percentage": match_percentage, 
+            "matched_responsibilities": len(matches), 
             "total_jd_responsibilities": len(jd_resps), 
             "matches": matches, 
-            "unmatched_jd_responsibilities": unmatched
+            "unmatched_jd_responsibilities": unmatched_jd_responsibilities
         }
 
     def _experience_match(self, jd_exp: str, cv_exp: str) -> Tuple[bool, float]:
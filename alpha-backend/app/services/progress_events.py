@@ -0,0 +1,249 @@
+"""
+Shared progress channel for CV uploads and matching runs.
+
+Every update_*_progress() call lands here: the merged state is written to Redis
+(so a poll that hits another uvicorn worker still finds it) and the update is
+published on a per-job pub/sub channel. Server-sent-event endpoints subscribe to
+that channel, so any worker can push events for any job.
+
+Without Redis everything degrades to in-process state and in-process fan-out,
+which is what the polling endpoints always had.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.utils.redis_cache import get_connected_redis_cache
+from app.utils.singleton import lazy_singleton
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_STATE_TTL_SECONDS = int(os.getenv("PROGRESS_STATE_TTL_SECONDS", "3600"))
+PROGRESS_STREAM_HEARTBEAT_SECONDS = float(os.getenv("PROGRESS_STREAM_HEARTBEAT_SECONDS", "15"))
+PROGRESS_STREAM_MAX_SECONDS = float(os.getenv("PROGRESS_STREAM_MAX_SECONDS", "1800"))
+
+TERMINAL_STATUSES = {"completed", "failed", "error"}
+
+# First item from ProgressBus.subscribe(): the subscription is live
+SUBSCRIBED: Dict[str, Any] = {"event": "subscribed"}
+
+
+def _state_key(kind: str, key: str) -> str:
+    return f"progress:state:{kind}:{key}"
+
+
+def _channel(kind: str, key: str) -> str:
+    return f"progress:events:{kind}:{key}"
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> bytes:
+    """One server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+
+
+class ProgressBus:
+    """
+    Latest-state store plus event fan-out, keyed by (kind, key) - e.g. ("cv_upload", cv_id)
+    or ("matching", job_id). Events are {"event": name, "data": {...}} dicts.
+    """
+
+    def __init__(self):
+        self._local_state: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._local_subscribers: Dict[Tuple[str, str], Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+        self._async_redis = None
+
+    # ----- Redis plumbing -----
+
+    def _get_async_redis(self, cache):
+        """redis.asyncio client with the same settings as the shared sync client."""
+        if self._async_redis is None:
+            import redis.asyncio as aioredis
+
+            self._async_redis = aioredis.Redis(
+                host=cache.host,
+                port=cache.port,
+                db=cache.db,
+                password=cache.password,
+                username=cache.username,
+                decode_responses=True,
+                socket_connect_timeout=5,
+            )
+        return self._async_redis
+
+    # ----- Publishing -----
+
+    def update(self, kind: str, key: str, **fields: Any) -> Dict[str, Any]:
+        """Merge `fields` into the job state and publish it as a "progress" event."""
+        with self._lock:
+            state = self.states(kind).setdefault(key, {})
+            state.update(fields)
+            snapshot = dict(state)
+        self._publish(kind, key, {"event": "progress", "data": snapshot}, state=snapshot)
+        return snapshot
+
+    def emit(self, kind: str, key: str, event: str, data: Dict[str, Any]) -> None:
+        """Publish a non-state event (e.g. partial results) without touching the state."""
+        self._publish(kind, key, {"event": event, "data": data})
+
+    def _publish(self, kind: str, key: str, message: Dict[str, Any], state: Optional[Dict[str, Any]] = None) -> None:
+        cache = get_connected_redis_cache()
+        if cache is not None:
+            try:
+                payload = json.dumps(message, default=str)
+                pipe = cache.redis_client.pipeline(transaction=False)
+                if state is not None:
+                    pipe.set(_state_key(kind, key), json.dumps(state, default=str), ex=PROGRESS_STATE_TTL_SECONDS)
+                pipe.publish(_channel(kind, key), payload)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Progress publish to Redis failed, delivering locally: {e}")
+        self._deliver_local(kind, key, message)
+
+    def _deliver_local(self, kind: str, key: str, message: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._local_subscribers.get((kind, key), ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # Subscriber's loop already closed
+                pass
+
+    # ----- Reading -----
+
+    def states(self, kind: str) -> Dict[str, Dict[str, Any]]:
+        """This process's live key -> state dict for one kind (the legacy progress dicts)."""
+        return self._local_state.setdefault(kind, {})
+
+    def get_state(self, kind: str, key: str) -> Dict[str, Any]:
+        """Latest state from this process, else from Redis (set by another worker)."""
+        state = self.states(kind).get(key)
+        if state:
+            return dict(state)
+        cache = get_connected_redis_cache()
+        if cache is not None:
+            try:
+                raw = cache.redis_client.get(_state_key(kind, key))
+                if raw:
+                    return json.loads(raw)
+            except Exception as e:
+                logger.warning(f"⚠️ Progress state read from Redis failed: {e}")
+        return {}
+
+    async def subscribe(self, kind: str, key: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events for one job. The first item is SUBSCRIBED once the subscription
+        is live; after that None is yielded every heartbeat interval with no traffic,
+        so callers can write keep-alives and notice disconnects.
+        """
+        cache = get_connected_redis_cache()
+        if cache is not None:
+            try:
+                async for message in self._subscribe_redis(cache, kind, key):
+                    yield message
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Progress subscribe via Redis failed, using local events: {e}")
+        async for message in self._subscribe_local(kind, key):
+            yield message
+
+    async def _subscribe_redis(self, cache, kind: str, key: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        pubsub = self._get_async_redis(cache).pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(_channel(kind, key))
+        try:
+            yield SUBSCRIBED
+            while True:
+                raw = await pubsub.get_message(timeout=PROGRESS_STREAM_HEARTBEAT_SECONDS)
+                if raw is None:
+                    yield None
+                elif raw.get("type") == "message":
+                    yield json.loads(raw["data"])
+        finally:
+            try:
+                await pubsub.unsubscribe(_channel(kind, key))
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    async def _subscribe_local(self, kind: str, key: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._local_subscribers.setdefault((kind, key), set()).add(entry)
+        try:
+            yield SUBSCRIBED
+            while True:
+                try:
+                    yield await asyncio.wait_for(entry[1].get(), timeout=PROGRESS_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                subscribers = self._local_subscribers.get((kind, key))
+                if subscribers is not None:
+                    subscribers.discard(entry)
+                    if not subscribers:
+                        del self._local_subscribers[(kind, key)]
+
+    async def stream(self, kind: str, key: str) -> AsyncIterator[bytes]:
+        """
+        SSE body: current state first, then every event until the job reaches a
+        terminal status (or PROGRESS_STREAM_MAX_SECONDS passes).
+        """
+        deadline = time.monotonic() + PROGRESS_STREAM_MAX_SECONDS
+        events = self.subscribe(kind, key)
+        try:
+            # Subscribe before reading the snapshot so no update falls in between
+            await events.__anext__()
+            state = self.get_state(kind, key)
+            yield format_sse("progress", state or {"status": "not_found"})
+            if state.get("status") in TERMINAL_STATUSES:
+                return
+
+            async for message in events:
+                if message is SUBSCRIBED:
+                    continue
+                if message is None:
+                    yield b": keep-alive\n\n"
+                else:
+                    data = message.get("data") or {}
+                    yield format_sse(message.get("event", "progress"), data)
+                    if message.get("event") == "progress" and data.get("status") in TERMINAL_STATUSES:
+                        return
+                if time.monotonic() >= deadline:
+                    yield format_sse("timeout", {"detail": "Progress stream closed; reconnect to resume"})
+                    return
+        finally:
+            await events.aclose()
+
+
+def top_k_snapshot(candidates: List[Any], k: int) -> List[Dict[str, Any]]:
+    """Lightweight best-k view of scored CandidateBreakdown objects for partial results."""
+    import heapq
+
+    best = heapq.nlargest(k, candidates, key=lambda c: c.overall_score)
+    return [
+        {
+            "cv_id": c.cv_id,
+            "cv_name": c.cv_name,
+            "cv_job_title": c.cv_job_title,
+            "overall_score": c.overall_score,
+            "skills_score": c.skills_score,
+            "responsibilities_score": c.responsibilities_score,
+            "job_title_score": c.job_title_score,
+            "years_score": c.years_score,
+        }
+        for c in best
+    ]
+
+
+@lazy_singleton
+def get_progress_bus() -> ProgressBus:
+    """Get the global progress bus."""
+    return ProgressBus()
@@ -0,0 +1,180 @@
+"""
+Precomputed public job pages.
+
+GET /api/careers/jobs/{public_token} is anonymous and link-shared, so one post can
+drive thousands of views within the hour. Rather than a token scroll, a JD retrieve
+and a structured_info merge per view, the PublicJobView is built once per token and
+kept as its serialized JSON body plus a strong ETag:
+
+- in process, with a short TTL so rebuilds on other workers show up quickly
+- in Redis (namespace "public_jobs"), shared by all workers
+
+The job posting writers in qdrant_utils (post, UI update, status toggle, token
+change, delete) rebuild the document, so changes are visible on the next view.
+Responses carry ETag and Cache-Control so nginx or a CDN can serve repeat views.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.helpers.careers_helpers import now_iso
+from app.schemas.careers import PublicJobView
+from app.utils.redis_cache import TwoTierCache
+from app.utils.singleton import lazy_singleton
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_JOB_NAMESPACE = "public_jobs"
+PUBLIC_JOB_CACHE_CONTROL = os.getenv("PUBLIC_JOB_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300")
+
+
+@dataclass(frozen=True)
+class PublicJobDocument:
+    """Serialized PublicJobView as served."""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_view(cls, view: PublicJobView) -> "PublicJobDocument":
+        body = json.dumps(view.model_dump(mode="json"), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True when an If-None-Match header names this version."""
+        if not if_none_match:
+            return False
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+
+def _bullet_lines(text: str) -> list:
+    return [line.strip().lstrip("•").strip() for line in text.split("\n") if line.strip()]
+
+
+def build_public_job_view(job_data: Dict[str, Any]) -> PublicJobView:
+    """PublicJobView from the merged posting returned by get_job_posting_by_token."""
+    # Prioritize structured_info from new UI data system, fall back to legacy format
+    structured_info = job_data.get("structured_info", {})
+
+    job_title = (
+        structured_info.get("job_title") or
+        job_data.get("job_title") or
+        "Position Available"
+    )
+
+    job_location = (
+        structured_info.get("job_location") or
+        job_data.get("location") or
+        job_data.get("job_location") or
+        ""
+    )
+
+    job_summary = (
+        structured_info.get("job_summary") or
+        job_data.get("job_summary") or
+        job_data.get("summary") or
+        "Job description not available"
+    )
+
+    experience_required = job_data.get("years_of_experience", "Not specified")
+
+    # Convert experience to string if it's a number
+    if isinstance(experience_required, (int, float)):
+        experience_required = f"{experience_required} years"
+
+    # New UI data stores bullet-point strings; legacy postings store lists
+    if structured_info.get("qualifications"):
+        requirements = _bullet_lines(structured_info.get("qualifications", ""))
+    else:
+        requirements = job_data.get("skills_sentences", []) or job_data.get("skills", [])
+
+    if structured_info.get("key_responsibilities"):
+        responsibilities = _bullet_lines(structured_info.get("key_responsibilities", ""))
+    else:
+        responsibilities = job_data.get("responsibility_sentences", []) or job_data.get("responsibilities", [])
+
+    return PublicJobView(
+        job_id=job_data["id"],
+        job_title=job_title,
+        job_location=job_location,
+        company_name=job_data.get("company_name", "Alpha Data Recruitment"),
+        job_description=job_summary,
+        upload_date=job_data.get("created_date", job_data.get("upload_date", now_iso())),
+        requirements=requirements[:10],  # Limit to top 10 for display
+        responsibilities=responsibilities[:10],  # Limit to top 10 for display
+        experience_required=str(experience_required),
+        is_active=job_data.get("is_active", True),
+    )
+
+
+def _encode_document(document: PublicJobDocument) -> Dict[str, str]:
+    return {"body": document.body.decode("utf-8"), "etag": document.etag}
+
+
+def _decode_document(stored: Dict[str, str]) -> PublicJobDocument:
+    return PublicJobDocument(body=stored["body"].encode("utf-8"), etag=stored["etag"])
+
+
+class PublicJobViewCache(TwoTierCache):
+    """Token -> PublicJobDocument, in process (short TTL, negative entries) and in Redis."""
+
+    def __init__(
+        self,
+        local_ttl_seconds: float = 30.0,
+        negative_ttl_seconds: float = 10.0,
+        redis_ttl_seconds: int = 24 * 3600,
+        max_entries: int = 5000,
+    ):
+        super().__init__(
+            PUBLIC_JOB_NAMESPACE,
+            max_local_entries=max_entries,
+            ttl_seconds=redis_ttl_seconds,
+            local_ttl_seconds=local_ttl_seconds,
+            encode=_encode_document,
+            decode=_decode_document,
+        )
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.stats["builds"] = 0
+
+    def get(self, token: str, qdrant=None) -> Optional[PublicJobDocument]:
+        """The page for `token`, building it on a miss; None when the posting does not exist."""
+        found, document = self.lookup(token)
+        if found:
+            return document
+        return self.rebuild(token, qdrant)
+
+    def rebuild(self, token: str, qdrant=None) -> Optional[PublicJobDocument]:
+        """Build the page from Qdrant and store it (or drop it if the posting is gone)."""
+        if qdrant is None:
+            from app.utils.qdrant_utils import get_qdrant_utils
+
+            qdrant = get_qdrant_utils()
+        self.stats["builds"] += 1
+        job_data = qdrant.get_job_posting_by_token(token, include_inactive=True)
+        if not job_data:
+            self.delete(token)
+            self.remember(token, None, ttl_seconds=self.negative_ttl_seconds)
+            return None
+        document = PublicJobDocument.from_view(build_public_job_view(job_data))
+        self.set(token, document)
+        logger.info(f"📄 Public job view built for token {token[:8]}... ({document.etag})")
+        return document
+
+    def invalidate(self, token: str) -> None:
+        self.delete(token)
+
+    def clear(self) -> None:
+        super().clear(shared=True)
+
+
+@lazy_singleton
+def get_public_job_cache() -> PublicJobViewCache:
+    """Get the global public job page cache."""
+    return PublicJobViewCache(
+        local_ttl_seconds=float(os.getenv("PUBLIC_JOB_LOCAL_TTL_SECONDS", "30")),
+        redis_ttl_seconds=int(os.getenv("PUBLIC_JOB_REDIS_TTL_SECONDS", str(24 * 3600))),
+    )
@@ -5,6 +5,7 @@ Handles all file operations with local filesystem instead of S3.
 import os
 import shutil
 import logging
+import uuid
 from typing import Optional
 from datetime import datetime
 
@@ -137,6 +138,43 @@ class S3StorageService:
             logger.error(f"❌ Failed to get file metadata: {e}")
             raise Exception(f"Failed to get file metadata: {str(e)}")
     
+    # ---------- content-addressed blobs ----------
+
+    def _blob_path(self, key: str) -> str:
+        if not key or not all(c.isalnum() or c in "-_." for c in key):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        return os.path.join(self.base_dir, 'blobs', key[:2], key)
+
+    def put_blob(self, key: str, data: bytes) -> str:
+        """
+        Store `data` under a content-derived key. Blobs are immutable: an existing
+        key is left as is, and the write is atomic (temp file + rename).
+        """
+        path = self._blob_path(key)
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+
+    def get_blob(self, key: str) -> bytes:
+        """Read a blob; raises FileNotFoundError if it does not exist."""
+        with open(self._blob_path(key), 'rb') as f:
+            return f.read()
+
+    def blob_exists(self, key: str) -> bool:
+        return os.path.exists(self._blob_path(key))
+
+    def delete_blob(self, key: str) -> bool:
+        path = self._blob_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+
     def _get_content_type(self, file_ext: str) -> str:
         """Get MIME content type based on file extension."""
         content_types = {
@@ -0,0 +1,224 @@
+"""
+Bulk import engine for the tracker "Selections & Joinings" workbook
+(the export_candidates_xlsx format).
+
+The sheet is streamed with openpyxl read_only mode and fully parsed before any
+database work. Candidate names are then resolved with chunked IN queries, and new
+candidates plus all applications go in as batched bulk inserts inside one
+transaction: either the whole sheet lands or nothing does.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from typing import Any, Iterable, Optional
+
+from sqlmodel import Session, select
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+NAME_LOOKUP_CHUNK = 500
+PREVIEW_ROWS = 20
+
+# Sheet header (lower-case) -> Application field
+_APPLICATION_COLUMNS = {
+    "position": "position",
+    "client": "client",
+    "status": "status",
+    "recruiter": "recruiter",
+    "account manager": "account_manager",
+    "recruitment manager": "recruitment_manager",
+    "comment": "comment",
+}
+
+
+class SelectionsImportError(ValueError):
+    """The workbook cannot be imported at all (unreadable file, missing required column)."""
+
+
+@dataclass
+class ParsedSelections:
+    rows: list[dict[str, Any]] = field(default_factory=list)
+    errors: list[dict[str, Any]] = field(default_factory=list)
+    warnings: list[dict[str, Any]] = field(default_factory=list)
+    skipped: int = 0
+
+
+def _parse_date(v) -> date | None:
+    if v is None or v == "":
+        return None
+    try:
+        # If openpyxl already gave us a python date/datetime, keep it.
+        if hasattr(v, "year") and hasattr(v, "month") and hasattr(v, "day"):
+            return date(int(v.year), int(v.month), int(v.day))
+        s = str(v).strip()
+        if not s:
+            return None
+        return date.fromisoformat(s[:10])
+    except Exception:
+        return None
+
+
+def _text(v) -> str:
+    return str(v).strip() if v is not None else ""
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def parse_selections_workbook(raw: bytes) -> ParsedSelections:
+    """Stream the first sheet into plain row dicts, collecting per-row errors and warnings."""
+    from openpyxl import load_workbook
+
+    try:
+        wb = load_workbook(filename=BytesIO(raw), read_only=True, data_only=True)
+    except Exception:
+        raise SelectionsImportError("Invalid Excel file")
+
+    parsed = ParsedSelections()
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        header_map = {_text(h).lower(): i for i, h in enumerate(header) if _text(h)}
+        if "candidate name" not in header_map:
+            raise SelectionsImportError("Missing required column: candidate name")
+
+        def _cell(values, name: str):
+            idx = header_map.get(name)
+            return values[idx] if idx is not None and idx < len(values) else None
+
+        for row_number, values in enumerate(rows, start=2):
+            name = _text(_cell(values, "candidate name"))
+            if not name:
+                parsed.skipped += 1
+                # Trailing blank rows are normal; only report rows that had content
+                if any(_text(v) for v in values):
+                    parsed.errors.append({"row": row_number, "error": "Missing candidate name"})
+                continue
+
+            raw_date = _cell(values, "date")
+            applied_date = _parse_date(raw_date)
+            if applied_date is None and _text(raw_date):
+                parsed.warnings.append(
+                    {"row": row_number, "warning": f"Unrecognised date {_text(raw_date)!r}; imported without a date"}
+                )
+
+            record: dict[str, Any] = {"row": row_number, "name": name, "applied_date": applied_date}
+            for header_name, field_name in _APPLICATION_COLUMNS.items():
+                record[field_name] = _text(_cell(values, header_name)) or None
+            record["status"] = record["status"] or "MRF Pending"
+            parsed.rows.append(record)
+    finally:
+        wb.close()
+    return parsed
+
+
+def _resolve_candidate_ids(session: Session, Candidate, names: list[str]) -> dict[str, str]:
+    """name -> id of the oldest live candidate with that name, via chunked IN queries."""
+    found: dict[str, str] = {}
+    for chunk in _chunks(names, NAME_LOOKUP_CHUNK):
+        rows = session.exec(
+            select(Candidate.name, Candidate.id)
+            .where(Candidate.name.in_(chunk))
+            .where(Candidate.is_deleted == False)  # noqa: E712
+            .order_by(Candidate.created_at.asc())
+        ).all()
+        for name, candidate_id in rows:
+            found.setdefault(name, candidate_id)
+    return found
+
+
+def import_selections(
+    session: Session,
+    Candidate,
+    Application,
+    parsed: ParsedSelections,
+    *,
+    created_by_username: Optional[str],
+    created_by_role: Optional[str],
+    created_by_team_location: str,
+    dry_run: bool = False,
+) -> dict[str, Any]:
+    """
+    Insert the parsed rows in a single transaction (or only preview them with dry_run).
+    Rows are stamped a microsecond apart so sheet order is kept in created_at ordering.
+    """
+    names = list(dict.fromkeys(r["name"] for r in parsed.rows))
+    candidate_ids = _resolve_candidate_ids(session, Candidate, names) if names else {}
+
+    now = datetime.utcnow()
+    new_candidates: list[dict[str, Any]] = []
+    for name in names:
+        if name in candidate_ids:
+            continue
+        candidate_id = str(uuid.uuid4())
+        candidate_ids[name] = candidate_id
+        stamp = now + timedelta(microseconds=len(new_candidates))
+        new_candidates.append(
+            {"id": candidate_id, "name": name, "is_deleted": False, "created_at": stamp, "updated_at": stamp}
+        )
+    new_names = {c["name"] for c in new_candidates}
+
+    applications: list[dict[str, Any]] = []
+    for i, r in enumerate(parsed.rows):
+        stamp = now + timedelta(microseconds=i)
+        applications.append(
+            {
+                "id": str(uuid.uuid4()),
+                "candidate_id": candidate_ids[r["name"]],
+                "job_opening_id": None,
+                "applied_date": r["applied_date"],
+                **{f: r[f] for f in _APPLICATION_COLUMNS.values()},
+                "created_by_username": created_by_username,
+                "created_by_role": created_by_role,
+                "created_by_team_location": created_by_team_location,
+                "created_at": stamp,
+                "updated_at": stamp,
+            }
+        )
+
+    summary: dict[str, Any] = {
+        "dry_run": dry_run,
+        "inserted_candidates": len(new_candidates),
+        "inserted_applications": len(applications),
+        "skipped_rows": parsed.skipped,
+        "errors": parsed.errors,
+        "warnings": parsed.warnings,
+    }
+    if dry_run:
+        summary["preview"] = [
+            {
+                "row": r["row"],
+                "candidate_name": r["name"],
+                "new_candidate": r["name"] in new_names,
+                "applied_date": r["applied_date"].isoformat() if r["applied_date"] else None,
+                "position": r["position"],
+                "client": r["client"],
+                "status": r["status"],
+            }
+            for r in parsed.rows[:PREVIEW_ROWS]
+        ]
+        return summary
+
+    try:
+        for chunk in _chunks(new_candidates, IMPORT_BATCH_SIZE):
+            session.bulk_insert_mappings(Candidate, chunk)
+        for chunk in _chunks(applications, IMPORT_BATCH_SIZE):
+            session.bulk_insert_mappings(Application, chunk)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    logger.info(
+        f"✅ Tracker import: {len(new_candidates)} candidates, {len(applications)} applications "
+        f"({parsed.skipped} skipped, {len(parsed.errors)} errors)"
+    )
+    return summary
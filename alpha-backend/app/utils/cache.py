@@ -95,6 +95,15 @@ class CacheService:
             self._ttl.pop(k, None)
             self._store.pop(k, None)
 
+    def stats(self) -> Dict[str, Any]:
+        """In-process counters only (no Redis round trip) - cheap enough for every scrape."""
+        return {
+            "size": len(self._store),
+            "hits": self._hits,
+            "misses": self._misses,
+            "redis": dict(self.redis_cache.stats) if self.redis_cache else {},
+        }
+
     def get_stats(self):
         stats = {
             "size": len(self._store),
@@ -2,13 +2,15 @@
 Enhanced Matching with LLM Analysis
 
 This module adds LLM contextual analysis to semantic matching results.
-Uses a single bulk LLM call (all top candidates at once) with GPT-4.1-mini for efficiency.
+Top candidates are analyzed in bulk with GPT-4.1-mini: packed into token-budgeted
+shards that run concurrently, with per-candidate caching (see llm_matching_service).
 """
 
 import asyncio
 import logging
 from typing import Dict, List
 from app.services.llm_matching_service import get_llm_matching_service
+from app.services.document_blobs import MissingBlobError
 from app.utils.qdrant_utils import get_qdrant_utils, get_decompressed_content
 
 logger = logging.getLogger(__name__)
@@ -21,7 +23,7 @@ async def enhance_with_llm_analysis_batched(
 ) -> List[dict]:
     """
     Enhance top candidates with LLM contextual analysis.
-    Uses one bulk API call for all top candidates (up to 50) with GPT-4.1-mini.
+    Top candidates (up to 50) go through LLMMatchingService.analyze_cv_jd_fit_bulk.
     
     Args:
         semantic_results: List of semantic matching results sorted by score
@@ -38,7 +40,7 @@ async def enhance_with_llm_analysis_batched(
         if llm_analyze_count == 0:
             return semantic_results
         
-        logger.info(f"🤖 Starting LLM analysis (single bulk request) for top {llm_analyze_count}/{total_candidates} candidates")
+        logger.info(f"🤖 Starting bulk LLM analysis for top {llm_analyze_count}/{total_candidates} candidates")
         
         qdrant = get_qdrant_utils()
         
@@ -49,7 +51,11 @@ async def enhance_with_llm_analysis_batched(
             for result in semantic_results:
                 result["has_llm_analysis"] = False
             return semantic_results
-        jd_raw_text = get_decompressed_content(jd_docs[0].payload)
+        try:
+            jd_raw_text = get_decompressed_content(jd_docs[0].payload)
+        except MissingBlobError as e:
+            logger.warning(f"⚠️ JD {jd_id}: {e}")
+            jd_raw_text = ""
         if not jd_raw_text or len(jd_raw_text.strip()) < 50:
             logger.warning(f"⚠️ JD {jd_id} has no usable raw text, skipping LLM analysis")
             for result in semantic_results:
@@ -68,18 +74,27 @@ async def enhance_with_llm_analysis_batched(
                 elif i < len(cv_ids):
                     id_to_payload[cv_ids[i]] = point.payload or {}
         
+        # CVs whose stored body is gone are left semantic-only
+        analyzed = []
         candidates_for_bulk = []
         for r in top_candidates:
             cv_id = r["cv_id"]
             payload = id_to_payload.get(str(cv_id)) or id_to_payload.get(cv_id) or {}
-            cv_raw = get_decompressed_content(payload) or ""
+            try:
+                cv_raw = get_decompressed_content(payload) or ""
+            except MissingBlobError as e:
+                logger.warning(f"⚠️ CV {cv_id} skipped for LLM analysis: {e}")
+                r["has_llm_analysis"] = False
+                continue
+            analyzed.append(r)
             candidates_for_bulk.append({
                 "cv_id": cv_id,
                 "cv_raw_text": cv_raw,
                 "semantic_score": float(r.get("overall_score", 0)) * 100,
+                "content_hash": payload.get("content_hash"),
             })
         
-        # Single bulk LLM call (all candidates at once)
+        # Bulk LLM analysis (sharded and concurrent inside the service)
         llm_service = get_llm_matching_service()
         loop = asyncio.get_event_loop()
         from concurrent.futures import ThreadPoolExecutor
@@ -91,7 +106,7 @@ async def enhance_with_llm_analysis_batched(
         )
         
         # Merge analyses back into results (same order)
-        for i, result in enumerate(top_candidates):
+        for i, result in enumerate(analyzed):
             if i < len(analyses):
                 analysis = analyses[i]
                 result["llm_analysis"] = analysis
@@ -106,7 +121,7 @@ async def enhance_with_llm_analysis_batched(
         for result in semantic_results[llm_analyze_count:]:
             result["has_llm_analysis"] = False
         
-        logger.info(f"🎉 LLM analysis completed: {llm_analyze_count} analyzed in one request, {total_candidates - llm_analyze_count} semantic-only")
+        logger.info(f"🎉 LLM analysis completed: {len(analyzed)} analyzed in bulk, {total_candidates - len(analyzed)} semantic-only")
         return semantic_results
         
     except Exception as e:
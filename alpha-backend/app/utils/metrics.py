@@ -0,0 +1,393 @@
+"""
+Application metrics registry (Prometheus text exposition).
+
+Counters, gauges and fixed-bucket histograms that services update at their
+boundaries (matching, embeddings, LLM calls, Qdrant operations), plus a
+background sampler for host/process gauges so the /metrics handler never
+blocks: a scrape only formats numbers that are already in memory.
+"""
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LONG_LATENCY_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 900.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 32, 64, 128, 256, 512)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Point-in-time value per label set."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; observe() is a bisect plus two adds."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[idx] += 1
+            self._sums[key] += value
+
+    def time(self, **labels):
+        """Context manager that observes the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def get_count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def get_sum(self, **labels) -> float:
+        return self._sums.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(c), self._sums[k]) for k, c in self._counts.items()]
+        lines = self._header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += counts[-1]
+            le = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def timed(histogram: Histogram, **labels):
+    """Decorator that records the call duration of a sync function."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+class MetricsRegistry:
+    """
+    Holds metrics and scrape-time collectors.
+
+    Collectors are cheap callables returning extra exposition lines (e.g. queue
+    lengths read from in-memory structures); they must never do network I/O.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, name: str, collector: Callable[[], List[str]]):
+        with self._lock:
+            self._collectors[name] = collector
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, collector in collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {name} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the global metrics registry."""
+    return _registry
+
+
+# ----------------------------
+# Application metrics
+# ----------------------------
+MATCH_DURATION = _registry.histogram(
+    "match_request_duration_seconds", "End-to-end /match job duration", ("source",), LONG_LATENCY_BUCKETS)
+MATCH_PAIR_DURATION = _registry.histogram(
+    "match_pair_duration_seconds", "Single CV-vs-JD scoring duration", ("method",))
+MATCH_CANDIDATES = _registry.counter(
+    "match_candidates_total", "Candidates scored by /match", ("outcome",))
+
+EMBEDDING_BATCH_SIZE = _registry.histogram(
+    "embedding_batch_size", "Texts per model.encode() call", ("kind",), SIZE_BUCKETS)
+EMBEDDING_LATENCY = _registry.histogram(
+    "embedding_encode_duration_seconds", "model.encode() latency", ("kind",))
+
+LLM_LATENCY = _registry.histogram(
+    "llm_request_duration_seconds", "OpenAI call latency including retries", ("model", "outcome"),
+    LONG_LATENCY_BUCKETS)
+LLM_TOKENS = _registry.counter(
+    "llm_tokens_total", "OpenAI tokens consumed", ("model", "type"))
+LLM_RETRIES = _registry.counter(
+    "llm_retries_total", "OpenAI call retries", ("reason",))
+
+QDRANT_LATENCY = _registry.histogram(
+    "qdrant_operation_duration_seconds", "QdrantUtils operation latency", ("operation",))
+QDRANT_POINTS_PER_WRITE = _registry.histogram(
+    "qdrant_points_per_write", "Points sent per Qdrant upsert round trip", ("collection",), SIZE_BUCKETS)
+
+# Host/process gauges keep the series names the old inline /metrics handler exported,
+# so existing dashboards and alerts keep working; only the sampling moved.
+SYSTEM_GAUGES = {
+    name: _registry.gauge(name, f"{documentation} (sampled in the background)")
+    for name, documentation in (
+        ("system_cpu_percent", "CPU usage percentage"),
+        ("system_memory_used_bytes", "Memory used in bytes"),
+        ("system_memory_available_bytes", "Memory available in bytes"),
+        ("system_memory_percent", "Memory usage percentage"),
+        ("system_gpu_memory_percent", "GPU memory usage percentage"),
+        ("system_disk_used_bytes", "Disk used in bytes"),
+        ("process_memory_used_bytes", "Process memory used in bytes"),
+        ("process_cpu_percent", "Process CPU usage percentage"),
+    )
+}
+QDRANT_HEALTH = _registry.gauge(
+    "qdrant_health_status", "Qdrant health status (1=healthy, 0=unhealthy), sampled in the background")
+ENVIRONMENT_INFO = _registry.gauge(
+    "application_environment", "Application environment", ("env",))
+ENVIRONMENT_INFO.set(1, env=os.getenv("ENVIRONMENT", "development"))
+
+
+# ----------------------------
+# Background system sampler
+# ----------------------------
+class SystemMetricsSampler:
+    """
+    Daemon thread that refreshes host/process gauges every `interval` seconds.
+    CPU/memory are read from the resource monitor snapshot instead of sleeping
+    in psutil, and the Qdrant health check runs off the event loop.
+    """
+
+    def __init__(self, interval: float = 15.0, qdrant_interval: float = 60.0):
+        self.interval = interval
+        self.qdrant_interval = qdrant_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_qdrant_check = 0.0
+        # cpu_percent(None) is relative to the previous call on the same Process object,
+        # so one instance is kept and primed here
+        self._process = None
+        try:
+            import psutil
+
+            self._process = psutil.Process()
+            self._process.cpu_percent(interval=None)
+        except Exception as e:
+            logger.warning(f"Process metrics unavailable: {e}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"📊 System metrics sampler started (every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample_once()
+            self._stop.wait(self.interval)
+
+    def sample_once(self):
+        try:
+            import psutil
+
+            from app.utils.resource_monitor import get_resource_monitor
+
+            # CPU/memory come from the shared resource monitor so there is a single
+            # psutil.cpu_percent() caller (its deltas are process-global)
+            snapshot = get_resource_monitor().snapshot
+            memory = psutil.virtual_memory()
+            disk = psutil.disk_usage('/')
+            SYSTEM_GAUGES["system_cpu_percent"].set(snapshot.cpu_percent)
+            SYSTEM_GAUGES["system_memory_used_bytes"].set(memory.used)
+            SYSTEM_GAUGES["system_memory_available_bytes"].set(memory.available)
+            SYSTEM_GAUGES["system_memory_percent"].set(snapshot.memory_percent)
+            SYSTEM_GAUGES["system_gpu_memory_percent"].set(snapshot.gpu_memory_percent)
+            SYSTEM_GAUGES["system_disk_used_bytes"].set(disk.used)
+            if self._process is not None:
+                SYSTEM_GAUGES["process_memory_used_bytes"].set(self._process.memory_info().rss)
+                SYSTEM_GAUGES["process_cpu_percent"].set(self._process.cpu_percent(interval=None))
+        except Exception as e:
+            logger.warning(f"System metrics sample failed: {e}")
+
+        now = time.monotonic()
+        if now - self._last_qdrant_check >= self.qdrant_interval:
+            self._last_qdrant_check = now
+            try:
+                from app.utils.qdrant_utils import get_qdrant_utils
+                healthy = get_qdrant_utils().health_check().get("status") == "healthy"
+                QDRANT_HEALTH.set(1 if healthy else 0)
+            except Exception:
+                QDRANT_HEALTH.set(0)
+
+
+_sampler: Optional[SystemMetricsSampler] = None
+
+
+def get_system_sampler() -> SystemMetricsSampler:
+    """Get the global background sampler (not started until start() is called)."""
+    global _sampler
+    if _sampler is None:
+        _sampler = SystemMetricsSampler(
+            interval=float(os.getenv("METRICS_SAMPLE_INTERVAL", "15")),
+            qdrant_interval=float(os.getenv("METRICS_QDRANT_INTERVAL", "60")),
+        )
+    return _sampler
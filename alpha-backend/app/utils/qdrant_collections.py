@@ -0,0 +1,133 @@
+"""
+Qdrant collection layout.
+
+*_documents, *_structured and job_postings_structured only hold payloads: nothing
+searches them by vector. They are created vectorless (vectors_config={}), so a
+point carries no 768-float placeholder (~3 KB of JSON per write) and Qdrant builds
+no HNSW index for them. *_embeddings keep their 768-d vector config; the legacy
+multi-point layout is still read with vectors.
+
+New deployments create each collection as <name>__v0 behind an alias <name>, so a
+migration (app/utils/qdrant_migrations.py) replaces it with one atomic alias swap.
+Deployments created before this keep their 768-d metadata collections until
+migration v1 runs, which moves each one behind an alias of the same name. Writers go through with_placeholder_vectors(), which adds
+the zero vector only where the live collection still requires one, so both layouts
+work during the rollout.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    PointStruct,
+    VectorParams,
+)
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_VECTOR_SIZE = 768
+METADATA_COLLECTIONS = (
+    "cv_documents",
+    "jd_documents",
+    "cv_structured",
+    "jd_structured",
+    "job_postings_structured",
+)
+EMBEDDING_COLLECTIONS = ("cv_embeddings", "jd_embeddings")
+
+
+def collection_configs() -> Dict[str, Any]:
+    """vectors_config per logical collection for new deployments."""
+    configs: Dict[str, Any] = {name: {} for name in METADATA_COLLECTIONS}
+    for name in EMBEDDING_COLLECTIONS:
+        configs[name] = VectorParams(size=PLACEHOLDER_VECTOR_SIZE, distance=Distance.COSINE)
+    return configs
+
+
+def _aliases(client: QdrantClient) -> Dict[str, str]:
+    return {a.alias_name: a.collection_name for a in client.get_aliases().aliases}
+
+
+def resolve_collection(client: QdrantClient, name: str) -> Optional[str]:
+    """Physical collection behind `name` (itself or its alias target), or None if neither exists."""
+    target = _aliases(client).get(name)
+    if target is not None:
+        return target
+    return name if client.collection_exists(name) else None
+
+
+def ensure_collections_exist(client: QdrantClient) -> None:
+    """
+    Create missing collections as <name>__v0 behind alias <name>; metadata collections
+    are created vectorless.
+    """
+    for name, cfg in collection_configs().items():
+        if resolve_collection(client, name) is None:
+            physical = f"{name}__v0"
+            logger.info(f"📋 Creating collection: {physical} (alias {name})")
+            if not client.collection_exists(physical):
+                client.create_collection(collection_name=physical, vectors_config=cfg)
+            client.update_collection_aliases(change_aliases_operations=[
+                CreateAliasOperation(create_alias=CreateAlias(collection_name=physical, alias_name=name)),
+            ])
+            logger.info(f"✅ Collection created: {name}")
+        else:
+            logger.info(f"✅ Collection exists: {name}")
+
+
+def drop_collection(client: QdrantClient, name: str) -> None:
+    """Drop a logical collection: its alias (if any) and the physical collection."""
+    physical = resolve_collection(client, name)
+    if physical is None:
+        return
+    if physical != name:
+        client.update_collection_aliases(
+            change_aliases_operations=[DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=name))]
+        )
+    client.delete_collection(physical)
+    forget_layouts()
+
+
+# ---------- write-time placeholder vectors ----------
+
+_has_vector: Dict[str, bool] = {}
+_has_vector_lock = threading.Lock()
+
+
+def has_dense_vector(client: QdrantClient, name: str) -> bool:
+    """Whether points in `name` need the unnamed placeholder vector (cached per process)."""
+    cached = _has_vector.get(name)
+    if cached is not None:
+        return cached
+    try:
+        vectors = client.get_collection(name).config.params.vectors
+        needs_vector = not (isinstance(vectors, dict) and not vectors)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read vector config of {name}, assuming placeholder vector: {e}")
+        return True
+    with _has_vector_lock:
+        _has_vector[name] = needs_vector
+    return needs_vector
+
+
+def forget_layouts() -> None:
+    """Drop cached layouts (after a migration or when a write is rejected)."""
+    with _has_vector_lock:
+        _has_vector.clear()
+
+
+def with_placeholder_vectors(client: QdrantClient, name: str, points: List[PointStruct]) -> List[PointStruct]:
+    """Add the zero vector to vectorless points when `name` still has a 768-d vector config."""
+    if not has_dense_vector(client, name):
+        return points
+    return [
+        PointStruct(id=p.id, vector=[0.0] * PLACEHOLDER_VECTOR_SIZE, payload=p.payload) if p.vector in (None, {}) else p
+        for p in points
+    ]
@@ -0,0 +1,700 @@
+"""
+Versioned Qdrant collection migrations.
+
+The stored data spans several generations: 768-d placeholder vectors on metadata
+collections, legacy per-vector embedding points (vector_type / vector_index, one
+point per vector), optimized_v2 single-point embeddings, and documents whose
+raw_content is uncompressed, untagged or inline in the payload. Each migration
+rewrites one generation into the current layout while the API keeps serving:
+
+  1. writers start recording the ids they touch (see migration_write())
+  2. stream the source collection (whatever the alias <name> points at) in batches,
+     transform the points and write them to <name>__v<version>
+  3. freeze writes, wait for in-flight ones, re-copy just the recorded ids
+  4. swap the alias <name> to the new collection, drop the old one, lift the freeze
+
+Writes are held only for steps 3-4 (bounded by the writes made during the copy);
+reads never stop while <name> is an alias. The first migration of a deployment
+created before collections were aliased (<name> is itself a collection) must drop
+<name> before the alias can take that name, so reads of it fail for that moment:
+run it in a maintenance window. Deployments created since start as <name>__v0 behind
+an alias (ensure_collections_exist), so every swap is one atomic alias operation.
+
+Writers in other processes see the migration through Redis; without Redis the state
+is process-local, so a CLI run then needs the API stopped (--offline).
+
+Applied (version, collection) pairs are recorded in the schema_migrations collection,
+so the runner is resumable and re-running it is a no-op. Once the embeddings
+migration is recorded, the legacy read fallbacks in retrieve_embeddings and
+MatchingService stop issuing their second (limit=2000) query on every miss; see
+legacy_reads_enabled().
+
+    python -m app.utils.qdrant_migrations --status
+    python -m app.utils.qdrant_migrations [--to VERSION] [--batch-size N] [--offline]
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    FieldCondition,
+    Filter,
+    HasIdCondition,
+    IsEmptyCondition,
+    MatchAny,
+    MatchValue,
+    PayloadField,
+    PointStruct,
+)
+
+from app.utils.content_codec import GZIP, content_fields, decode_content, get_default_codec
+from app.utils.qdrant_collections import (
+    EMBEDDING_COLLECTIONS,
+    METADATA_COLLECTIONS,
+    collection_configs,
+    forget_layouts,
+    has_dense_vector,
+    resolve_collection,
+    with_placeholder_vectors,
+)
+from app.utils.redis_cache import get_connected_redis_cache
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+LEGACY_VECTOR_TYPES = ["skill", "responsibility", "experience", "job_title"]
+
+
+@dataclass
+class MigrationReport:
+    """Outcome of one migration on one collection."""
+    version: int
+    name: str
+    collection: str
+    read: int = 0
+    written: int = 0
+    seconds: float = 0.0
+    skipped: bool = False
+
+    @property
+    def points_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds > 0 else 0.0
+
+
+class Migration:
+    """
+    Base migration: copies payloads unchanged. Subclasses override transform() and,
+    for migrations that need whole groups of points, finish().
+    """
+    version: int = 0
+    name: str = ""
+    collections: tuple = ()
+
+    def needed(self, client: QdrantClient, source: str) -> bool:
+        """False when `source` holds nothing this migration would change."""
+        return True
+
+    def vectors_config(self, collection: str) -> Any:
+        return collection_configs()[collection]
+
+    def start(self) -> None:
+        """Reset per-pass state."""
+
+    def transform(self, records: List[Any]) -> List[PointStruct]:
+        return [PointStruct(id=r.id, vector={}, payload=r.payload or {}) for r in records]
+
+    def finish(self, client: QdrantClient, source: str) -> List[PointStruct]:
+        """Points that could only be built after the whole source was streamed."""
+        return []
+
+
+class VectorlessMetadata(Migration):
+    """Metadata collections without the 768-d placeholder vector."""
+    version = 1
+    name = "vectorless_metadata"
+    collections = METADATA_COLLECTIONS
+
+    def needed(self, client: QdrantClient, source: str) -> bool:
+        return has_dense_vector(client, source)
+
+
+class OptimizedEmbeddings(Migration):
+    """Legacy per-vector embedding points → one optimized_v2 point per document."""
+    version = 2
+    name = "optimized_embeddings"
+    collections = EMBEDDING_COLLECTIONS
+
+    def needed(self, client: QdrantClient, source: str) -> bool:
+        legacy = Filter(must=[FieldCondition(key="vector_type", match=MatchAny(any=LEGACY_VECTOR_TYPES))])
+        return client.count(collection_name=source, count_filter=legacy, exact=False).count > 0
+
+    def start(self) -> None:
+        self._optimized: Set[Any] = set()
+        self._legacy_docs: Set[str] = set()
+
+    def transform(self, records: List[Any]) -> List[PointStruct]:
+        points = []
+        for r in records:
+            payload = r.payload or {}
+            if "vector_structure" in payload:
+                self._optimized.add(str(r.id))
+                points.append(PointStruct(id=r.id, vector={}, payload=payload))
+            elif payload.get("vector_type"):
+                doc_id = payload.get("document_id") or payload.get("id")
+                if doc_id:
+                    self._legacy_docs.add(str(doc_id))
+        return points
+
+    def finish(self, client: QdrantClient, source: str) -> List[PointStruct]:
+        points = []
+        for doc_id in sorted(self._legacy_docs - self._optimized):
+            legacy, _ = client.scroll(
+                collection_name=source,
+                scroll_filter=Filter(should=[
+                    FieldCondition(key="document_id", match=MatchValue(value=doc_id)),
+                    FieldCondition(key="id", match=MatchValue(value=doc_id)),
+                ]),
+                limit=2000,
+                with_payload=True,
+                with_vectors=True,
+            )
+            vector_structure = legacy_vector_structure(legacy)
+            points.append(PointStruct(id=doc_id, vector={}, payload={
+                "vector_structure": vector_structure,
+                "metadata": {
+                    "experience_years": "",
+                    "job_title": "",
+                    "vector_count": sum(len(v) for v in vector_structure.values()),
+                    "storage_version": "optimized_v2",
+                    "normalized": False,
+                    "dtype": "float32",
+                    "migrated_from": "legacy_points",
+                },
+            }))
+        return points
+
+
+class CompressedRawContent(Migration):
+    """Documents stored before raw_content was compressed."""
+    version = 3
+    name = "compressed_raw_content"
+    collections = ("cv_documents", "jd_documents")
+
+    def needed(self, client: QdrantClient, source: str) -> bool:
+        uncompressed = Filter(should=[
+            IsEmptyCondition(is_empty=PayloadField(key="raw_content_compressed")),
+            FieldCondition(key="raw_content_compressed", match=MatchValue(value=False)),
+        ])
+        return client.count(collection_name=source, count_filter=uncompressed, exact=False).count > 0
+
+    def transform(self, records: List[Any]) -> List[PointStruct]:
+        points = []
+        for r in records:
+            payload = dict(r.payload or {})
+            if not payload.get("raw_content_compressed"):
+                payload.update(content_fields(payload.get("raw_content") or ""))
+            points.append(PointStruct(id=r.id, vector={}, payload=payload))
+        return points
+
+
+class RecodedRawContent(Migration):
+    """gzip raw_content (no codec tag) re-encoded with the default codec (zstd)."""
+    version = 4
+    name = "recoded_raw_content"
+    collections = ("cv_documents", "jd_documents")
+
+    def needed(self, client: QdrantClient, source: str) -> bool:
+        if get_default_codec().name == GZIP:
+            return False
+        untagged = Filter(
+            must=[
+                FieldCondition(key="raw_content_compressed", match=MatchValue(value=True)),
+                IsEmptyCondition(is_empty=PayloadField(key="raw_content_codec")),
+            ]
+        )
+        return client.count(collection_name=source, count_filter=untagged, exact=False).count > 0
+
+    def transform(self, records: List[Any]) -> List[PointStruct]:
+        points = []
+        for r in records:
+            payload = dict(r.payload or {})
+            if payload.get("raw_content_compressed") and not payload.get("raw_content_codec"):
+                payload.update(content_fields(decode_content(payload.get("raw_content") or "", GZIP)))
+            points.append(PointStruct(id=r.id, vector={}, payload=payload))
+        return points
+
+
+class BlobRawContent(Migration):
+    """Inline raw_content moved to content-addressed blobs (app/services/document_blobs.py)."""
+    version = 5
+    name = "blob_raw_content"
+    collections = ("cv_documents", "jd_documents")
+
+    def needed(self, client: QdrantClient, source: str) -> bool:
+        if os.getenv("DOCUMENT_BLOBS", "on").lower() in ("off", "false", "0"):
+            return False
+        inline = Filter(
+            must=[IsEmptyCondition(is_empty=PayloadField(key="raw_content_blob"))],
+            must_not=[IsEmptyCondition(is_empty=PayloadField(key="raw_content"))],
+        )
+        return client.count(collection_name=source, count_filter=inline, exact=False).count > 0
+
+    def transform(self, records: List[Any]) -> List[PointStruct]:
+        from app.services.document_blobs import get_document_blob_store
+        from app.utils.qdrant_utils import get_decompressed_content
+
+        store = get_document_blob_store()
+        points = []
+        for r in records:
+            payload = dict(r.payload or {})
+            if payload.get("raw_content") and not payload.get("raw_content_blob"):
+                fields = store.raw_content_fields(get_decompressed_content(payload), payload.get("content_hash"))
+                if "raw_content_blob" in fields:
+                    payload.pop("raw_content", None)
+                payload.update(fields)
+            points.append(PointStruct(id=r.id, vector={}, payload=payload))
+        return points
+
+
+MIGRATIONS: List[Migration] = [
+    VectorlessMetadata(), OptimizedEmbeddings(), CompressedRawContent(), RecodedRawContent(), BlobRawContent()
+]
+LATEST_VERSION = max(m.version for m in MIGRATIONS)
+
+
+def legacy_vector_structure(points: Iterable[Any]) -> Dict[str, list]:
+    """vector_structure from legacy per-vector points, ordered by vector_index."""
+    skills: Dict[int, list] = {}
+    responsibilities: Dict[int, list] = {}
+    out: Dict[str, list] = {"skill_vectors": [], "responsibility_vectors": [], "experience_vector": [],
+                            "job_title_vector": []}
+    for p in points:
+        payload = p.payload or {}
+        vector_type = payload.get("vector_type")
+        index = int(payload.get("vector_index", 0))
+        if vector_type == "skill":
+            skills[index] = p.vector
+        elif vector_type == "responsibility":
+            responsibilities[index] = p.vector
+        elif vector_type == "experience":
+            out["experience_vector"] = [p.vector]
+        elif vector_type == "job_title":
+            out["job_title_vector"] = [p.vector]
+    out["skill_vectors"] = [skills[i] for i in sorted(skills)][:20]
+    out["responsibility_vectors"] = [responsibilities[i] for i in sorted(responsibilities)][:10]
+    return out
+
+
+# ---------- write gate ----------
+
+TRACKING = "tracking"
+FROZEN = "frozen"
+# How long a write waits for a frozen migration to swap before giving up
+WRITE_FREEZE_WAIT_SECONDS = 30.0
+# Gate state expires unless the runner refreshes it, so a crashed run cannot block writes
+GATE_STATE_TTL_SECONDS = 120
+_GATE_POLL_SECONDS = 0.05
+
+# Process-local gate (no Redis): collection -> state / in-flight writes / recorded ids
+_local_gate = threading.Condition()
+_local_state: Dict[str, str] = {}
+_local_inflight: Dict[str, int] = {}
+_local_dirty: Dict[str, Set[str]] = {}
+
+
+class WritesFrozen(RuntimeError):
+    """A write waited WRITE_FREEZE_WAIT_SECONDS for a migration's final swap."""
+
+
+def _encode_ids(point_ids: Iterable[Any]) -> List[str]:
+    return [json.dumps(i if isinstance(i, int) else str(i)) for i in point_ids]
+
+
+def _gate_keys(cache: Any, collection: str) -> tuple:
+    return tuple(cache.namespaced_key("migrations", f"{part}:{collection}") for part in ("state", "inflight", "dirty"))
+
+
+@contextmanager
+def migration_write(collection: str, point_ids: Iterable[Any]) -> Iterator[None]:
+    """
+    Wrap a write touching `point_ids` of logical collection `collection`. While the
+    collection is being copied the ids are recorded for the runner's final delta;
+    while it is frozen the write waits (raising WritesFrozen after
+    WRITE_FREEZE_WAIT_SECONDS). Idle cost: three Redis round trips, none without Redis.
+    """
+    ids = _encode_ids(point_ids)
+    deadline = time.monotonic() + WRITE_FREEZE_WAIT_SECONDS
+    cache = get_connected_redis_cache()
+    if cache is None:
+        with _local_gate:
+            while _local_state.get(collection) == FROZEN:
+                if not _local_gate.wait(deadline - time.monotonic()):
+                    raise WritesFrozen(f"{collection} is being migrated")
+            state = _local_state.get(collection)
+            _local_inflight[collection] = _local_inflight.get(collection, 0) + 1
+            if state:
+                _local_dirty.setdefault(collection, set()).update(ids)
+        try:
+            yield
+        finally:
+            with _local_gate:
+                if not state and _local_state.get(collection):
+                    _local_dirty.setdefault(collection, set()).update(ids)
+                _local_inflight[collection] -= 1
+                _local_gate.notify_all()
+        return
+
+    client = cache.redis_client
+    state_key, inflight_key, dirty_key = _gate_keys(cache, collection)
+    while True:
+        # Counted as in flight before the state is read, so a freeze cannot miss this write
+        pipe = client.pipeline()
+        pipe.incr(inflight_key)
+        pipe.expire(inflight_key, GATE_STATE_TTL_SECONDS)
+        pipe.get(state_key)
+        state = pipe.execute()[-1]
+        if state != FROZEN:
+            break
+        client.decr(inflight_key)
+        if time.monotonic() > deadline:
+            raise WritesFrozen(f"{collection} is being migrated")
+        time.sleep(_GATE_POLL_SECONDS)
+    try:
+        if state and ids:
+            client.sadd(dirty_key, *ids)
+        yield
+        # A copy that started while this write was in flight may already have passed its points
+        if not state and ids and client.get(state_key):
+            client.sadd(dirty_key, *ids)
+    finally:
+        client.decr(inflight_key)
+
+
+class _RunnerGate:
+    """The runner's side of migration_write() for one logical collection."""
+
+    def __init__(self, collection: str):
+        self.collection = collection
+        self.cache = get_connected_redis_cache()
+        self.state: Optional[str] = None
+
+    def _set(self, state: Optional[str]) -> None:
+        self.state = state
+        if self.cache is None:
+            with _local_gate:
+                if state is None:
+                    _local_state.pop(self.collection, None)
+                    _local_dirty.pop(self.collection, None)
+                else:
+                    _local_state[self.collection] = state
+                _local_gate.notify_all()
+            return
+        state_key, _, dirty_key = _gate_keys(self.cache, self.collection)
+        if state is None:
+            self.cache.redis_client.delete(state_key, dirty_key)
+        else:
+            self.cache.redis_client.set(state_key, state, ex=GATE_STATE_TTL_SECONDS)
+            self.cache.redis_client.expire(dirty_key, GATE_STATE_TTL_SECONDS)
+
+    def track(self) -> None:
+        """Start recording written ids."""
+        self._set(TRACKING)
+
+    def refresh(self) -> None:
+        """Keep the current state from expiring (once per batch)."""
+        self._set(self.state)
+
+    def freeze(self) -> None:
+        """Hold new writes and wait for in-flight ones; raises WritesFrozen if they do not finish."""
+        self._set(FROZEN)
+        deadline = time.monotonic() + WRITE_FREEZE_WAIT_SECONDS
+        if self.cache is None:
+            with _local_gate:
+                if not _local_gate.wait_for(lambda: not _local_inflight.get(self.collection),
+                                            WRITE_FREEZE_WAIT_SECONDS):
+                    raise WritesFrozen(f"writes to {self.collection} did not finish")
+            return
+        _, inflight_key, _ = _gate_keys(self.cache, self.collection)
+        while int(self.cache.redis_client.get(inflight_key) or 0) > 0:
+            if time.monotonic() > deadline:
+                raise WritesFrozen(f"writes to {self.collection} did not finish")
+            time.sleep(_GATE_POLL_SECONDS)
+
+    def written_ids(self) -> List[Any]:
+        """Ids recorded since track()."""
+        if self.cache is None:
+            with _local_gate:
+                encoded = set(_local_dirty.get(self.collection, ()))
+        else:
+            encoded = self.cache.redis_client.smembers(_gate_keys(self.cache, self.collection)[2])
+        return [json.loads(i) for i in sorted(encoded)]
+
+    def release(self) -> None:
+        self._set(None)
+
+
+def _swap_alias(client: QdrantClient, name: str, source: str, target: str) -> None:
+    """
+    Point alias `name` at `target` and drop `source`. When `name` is an alias this is
+    one atomic alias update. When `name` is still a collection (deployments created
+    before aliases) it has to be dropped before the alias can take its name, so reads
+    of `name` fail until the alias exists; callers hold writes frozen across it.
+    """
+    if source == name:
+        logger.warning(f"⚠️ {name} is not an alias yet: it is unavailable until the alias is created")
+        client.delete_collection(source)
+        client.update_collection_aliases(change_aliases_operations=[
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=name)),
+        ])
+    else:
+        client.update_collection_aliases(change_aliases_operations=[
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=name)),
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=name)),
+        ])
+        client.delete_collection(source)
+    forget_layouts()
+
+
+class MigrationRunner:
+    """Applies pending migrations in version order and records them."""
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        migrations: Optional[List[Migration]] = None,
+        batch_size: int = 256,
+        progress: Optional[Callable[[MigrationReport], None]] = None,
+    ):
+        self.client = client
+        self.migrations = sorted(migrations if migrations is not None else MIGRATIONS, key=lambda m: m.version)
+        self.batch_size = batch_size
+        self.progress = progress
+
+    # ---------- bookkeeping ----------
+
+    @staticmethod
+    def _record_id(version: int, collection: str) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"schema_migrations/{version}/{collection}"))
+
+    def _ensure_log(self) -> None:
+        if not self.client.collection_exists(MIGRATIONS_COLLECTION):
+            self.client.create_collection(collection_name=MIGRATIONS_COLLECTION, vectors_config={})
+
+    def applied(self) -> Set[tuple]:
+        """(version, collection) pairs already applied."""
+        if not self.client.collection_exists(MIGRATIONS_COLLECTION):
+            return set()
+        records, _ = self.client.scroll(collection_name=MIGRATIONS_COLLECTION, limit=1000, with_payload=True)
+        return {(r.payload["version"], r.payload["collection"]) for r in records}
+
+    def _record(self, report: MigrationReport) -> None:
+        self._ensure_log()
+        self.client.upsert(collection_name=MIGRATIONS_COLLECTION, wait=True, points=[PointStruct(
+            id=self._record_id(report.version, report.collection),
+            vector={},
+            payload={**asdict(report), "applied_at": datetime.utcnow().isoformat()},
+        )])
+
+    def status(self) -> List[Dict[str, Any]]:
+        applied = self.applied()
+        return [
+            {"version": m.version, "name": m.name, "collection": c, "applied": (m.version, c) in applied}
+            for m in self.migrations for c in m.collections
+        ]
+
+    # ---------- copy ----------
+
+    def _write(self, target: str, points: List[PointStruct]) -> None:
+        if points:
+            self.client.upsert(collection_name=target, points=with_placeholder_vectors(self.client, target, points),
+                               wait=True)
+
+    def _copy_pass(
+        self, migration: Migration, source: str, target: str, report: MigrationReport, gate: "_RunnerGate"
+    ) -> None:
+        """Stream source → transform → target."""
+        migration.start()
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=source, limit=self.batch_size, offset=offset, with_payload=True, with_vectors=False
+            )
+            points = migration.transform(records)
+            self._write(target, points)
+            gate.refresh()
+            report.read += len(records)
+            report.written += len(points)
+            report.seconds = time.monotonic() - self._started
+            if self.progress:
+                self.progress(report)
+            logger.info(
+                f"📦 v{report.version} {report.collection}: {report.read} read / {report.written} written "
+                f"({report.points_per_second:.0f} points/s)"
+            )
+            if offset is None:
+                break
+        extra = migration.finish(self.client, source)
+        for start in range(0, len(extra), self.batch_size):
+            self._write(target, extra[start:start + self.batch_size])
+        report.written += len(extra)
+
+    def _copy_delta(
+        self, migration: Migration, source: str, target: str, ids: List[Any], gate: "_RunnerGate"
+    ) -> None:
+        """Re-copy the points written during the copy pass (writes are frozen); drop the ones deleted."""
+        if not ids:
+            return
+        # wait=False writes are acknowledged before they are applied; updates apply in order,
+        # so a wait=True no-op behind them makes them visible (as QdrantWriteBatch.barrier)
+        self.client.set_payload(collection_name=source, payload={},
+                                points=Filter(must=[HasIdCondition(has_id=ids[:1])]), wait=True)
+        migration.start()
+        for start in range(0, len(ids), self.batch_size):
+            chunk = ids[start:start + self.batch_size]
+            records = self.client.retrieve(collection_name=source, ids=chunk, with_payload=True, with_vectors=False)
+            self._write(target, migration.transform(records))
+            present = {str(r.id) for r in records}
+            deleted = [i for i in chunk if str(i) not in present]
+            if deleted:
+                self.client.delete(collection_name=target, points_selector=deleted, wait=True)
+            gate.refresh()
+        self._write(target, migration.finish(self.client, source))
+
+    def migrate_collection(self, migration: Migration, name: str) -> MigrationReport:
+        """Apply one migration to logical collection `name` (without recording it)."""
+        report = MigrationReport(version=migration.version, name=migration.name, collection=name)
+        source = resolve_collection(self.client, name)
+        if source is None or not migration.needed(self.client, source):
+            report.skipped = True
+            logger.info(f"⏭️ v{migration.version} {migration.name}: nothing to migrate in {name}")
+            return report
+
+        target = f"{name}__v{migration.version}"
+        if target == source:
+            raise RuntimeError(f"{name} already resolves to {target}")
+        if self.client.collection_exists(target):
+            logger.warning(f"⚠️ Removing leftover {target} from an interrupted migration")
+            self.client.delete_collection(target)
+        self.client.create_collection(collection_name=target, vectors_config=migration.vectors_config(name))
+
+        logger.info(f"🚚 v{migration.version} {migration.name}: {name} ({source}) → {target}")
+        self._started = time.monotonic()
+        gate = _RunnerGate(name)
+        gate.track()
+        try:
+            self._copy_pass(migration, source, target, report, gate)
+            frozen_at = time.monotonic()
+            gate.freeze()
+            written = gate.written_ids()
+            self._copy_delta(migration, source, target, written, gate)
+            _swap_alias(self.client, name, source, target)
+        finally:
+            gate.release()
+        report.seconds = time.monotonic() - self._started
+        logger.info(
+            f"✅ v{migration.version} {name} → {target}: {report.read} read, {len(written)} re-copied "
+            f"with writes held for {time.monotonic() - frozen_at:.2f}s, in {report.seconds:.1f}s "
+            f"({report.points_per_second:.0f} points/s)"
+        )
+        return report
+
+    def run(self, target_version: Optional[int] = None) -> List[MigrationReport]:
+        """Apply pending migrations up to `target_version` (default: all)."""
+        applied = self.applied()
+        reports = []
+        for migration in self.migrations:
+            if target_version is not None and migration.version > target_version:
+                break
+            for name in migration.collections:
+                if (migration.version, name) in applied:
+                    continue
+                report = self.migrate_collection(migration, name)
+                self._record(report)
+                reports.append(report)
+        forget_legacy_read_state()
+        return reports
+
+
+# ---------- legacy read fallbacks ----------
+
+_legacy_reads: Dict[str, tuple] = {}
+_legacy_reads_lock = threading.Lock()
+LEGACY_READS_RECHECK_SECONDS = 300.0
+
+
+def forget_legacy_read_state() -> None:
+    with _legacy_reads_lock:
+        _legacy_reads.clear()
+
+
+def legacy_reads_enabled(client: QdrantClient, collection: str) -> bool:
+    """
+    Whether readers of `collection` still need the legacy-format fallback query.
+    QDRANT_LEGACY_READS=on|off forces it; the default (auto) turns it off once the
+    migration for that collection's legacy format is recorded.
+    """
+    mode = os.getenv("QDRANT_LEGACY_READS", "auto").lower()
+    if mode in ("on", "true", "1"):
+        return True
+    if mode in ("off", "false", "0"):
+        return False
+
+    now = time.monotonic()
+    cached = _legacy_reads.get(collection)
+    if cached is not None and (not cached[0] or now - cached[1] < LEGACY_READS_RECHECK_SECONDS):
+        return cached[0]
+    version = OptimizedEmbeddings.version if collection in EMBEDDING_COLLECTIONS else None
+    try:
+        enabled = version is None or not client.retrieve(
+            collection_name=MIGRATIONS_COLLECTION, ids=[MigrationRunner._record_id(version, collection)]
+        )
+    except Exception:
+        # No migration log yet
+        enabled = True
+    with _legacy_reads_lock:
+        _legacy_reads[collection] = (enabled, now)
+    return enabled
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Qdrant collection migrations")
+    parser.add_argument("--status", action="store_true", help="list migrations and whether they are applied")
+    parser.add_argument("--to", type=int, default=None, help="apply migrations up to this version")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--offline", action="store_true",
+                        help="run without Redis; the API must be stopped, its writes would be lost")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    client = QdrantClient(host=os.getenv("QDRANT_HOST", "qdrant"), port=int(os.getenv("QDRANT_PORT", "6333")))
+    runner = MigrationRunner(client, batch_size=args.batch_size)
+    if not args.status and not args.offline and get_connected_redis_cache() is None:
+        parser.error("Redis is not reachable, so API workers cannot see the migration; "
+                     "stop the API and pass --offline")
+    if args.status:
+        for row in runner.status():
+            print(f"v{row['version']} {row['name']:<24} {row['collection']:<26} "
+                  f"{'applied' if row['applied'] else 'pending'}")
+        return
+    for report in runner.run(args.to):
+        state = "skipped" if report.skipped else f"{report.read} read, {report.written} written"
+        print(f"v{report.version} {report.collection}: {state} "
+              f"({report.seconds:.1f}s, {report.points_per_second:.0f} points/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,11 @@ import os
 from typing import Optional, Dict, Any
 from contextlib import asynccontextmanager
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
 import threading
 import time
 
+from app.utils.qdrant_collections import ensure_collections_exist
+
 logger = logging.getLogger(__name__)
 
 class QdrantConnectionPool:
@@ -63,21 +64,8 @@ class QdrantConnectionPool:
         return client
     
     async def _ensure_collections_exist(self, client: QdrantClient):
-        """Ensure all required collections exist"""
-        collections = {
-            "cv_documents": VectorParams(size=768, distance=Distance.COSINE),
-            "jd_documents": VectorParams(size=768, distance=Distance.COSINE),
-            "cv_structured": VectorParams(size=768, distance=Distance.COSINE),
-            "jd_structured": VectorParams(size=768, distance=Distance.COSINE),
-            "cv_embeddings": VectorParams(size=768, distance=Distance.COSINE),
-            "jd_embeddings": VectorParams(size=768, distance=Distance.COSINE),
-            "job_postings_structured": VectorParams(size=768, distance=Distance.COSINE),
-        }
-        
-        for name, cfg in collections.items():
-            if not client.collection_exists(name):
-                logger.info(f"📋 Creating collection: {name}")
-                client.create_collection(collection_name=name, vectors_config=cfg)
+        """Ensure all required collections exist (metadata collections vectorless)"""
+        ensure_collections_exist(client)
     
     def get_client(self) -> QdrantClient:
         """Get a client from the pool (sync version)"""
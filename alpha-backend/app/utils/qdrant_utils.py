@@ -2,29 +2,45 @@
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-import hashlib
+import json
 import uuid
-import gzip
-import base64
 import asyncio
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import (
-    Distance,
-    VectorParams,
     PointStruct,
     Filter,
     FieldCondition,
     MatchValue,
     MatchAny,
     FilterSelector,
+    HasIdCondition,
+    SetPayload,
+    SetPayloadOperation,
 )
 
+from app.utils.qdrant_collections import (
+    METADATA_COLLECTIONS,
+    drop_collection,
+    ensure_collections_exist,
+    forget_layouts,
+    with_placeholder_vectors,
+)
+from app.utils.metrics import QDRANT_LATENCY, QDRANT_POINTS_PER_WRITE, timed
+from app.utils.qdrant_migrations import legacy_reads_enabled, migration_write
+from app.utils.content_codec import GZIP, content_fields, decode_content, encode_content, get_codec
+from app.services.document_blobs import content_hash, get_document_blob_store
+from app.utils.redis_cache import shared_lock
+
 logger = logging.getLogger(__name__)
 
+# Operations per batch_update_points request in patch_payloads
+PAYLOAD_PATCH_BATCH_SIZE = 256
+
 _CAREERS_LIST_CACHE: dict[str, tuple[float, tuple[list[dict[str, Any]], int]]] = {}
 _CAREERS_LIST_CACHE_LOCK = threading.Lock()
 
@@ -55,6 +71,18 @@ def _invalidate_careers_job_list_cache() -> None:
             _CAREERS_LIST_CACHE.pop(k, None)
 
 
+def _refresh_public_job_view(qdrant: "QdrantUtils", public_token: Optional[str]) -> None:
+    """Rebuild the precomputed public page of a posting after a write (app/services/public_job_views.py)."""
+    if not public_token:
+        return
+    try:
+        from app.services.public_job_views import get_public_job_cache
+
+        get_public_job_cache().rebuild(public_token, qdrant)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not refresh public job view for token {public_token[:8]}...: {e}")
+
+
 def _preview_text(value: Any, max_chars: int = 320) -> str:
     if value is None:
         return ""
@@ -70,36 +98,36 @@ def _preview_text(value: Any, max_chars: int = 320) -> str:
     return text[: max_chars - 1].rstrip() + "…"
 
 def compress_content(content: str) -> str:
-    """Compress content using gzip and encode as base64."""
-    if not content:
-        return ""
-    compressed = gzip.compress(content.encode('utf-8'))
-    return base64.b64encode(compressed).decode('ascii')
+    """Compress content using gzip and encode as base64 (untagged; new documents use content_fields)."""
+    return encode_content(content, get_codec(GZIP))[0]
 
-def decompress_content(compressed_content: str) -> str:
-    """Decompress base64-encoded gzip content."""
-    if not compressed_content:
-        return ""
-    try:
-        compressed = base64.b64decode(compressed_content.encode('ascii'))
-        return gzip.decompress(compressed).decode('utf-8')
-    except Exception as e:
-        logger.warning(f"Failed to decompress content: {e}")
-        return compressed_content  # Return as-is if decompression fails
+def decompress_content(compressed_content: str, codec: str = GZIP) -> str:
+    """Decompress base64-encoded content written with `codec` (gzip for documents without a codec tag)."""
+    return decode_content(compressed_content, codec)
+
+def hr_notes_lock(doc_id: str):
+    """Held while a document's structured_info.hr_notes is read and written back."""
+    return shared_lock(f"cv_notes:{doc_id}")
 
 def get_decompressed_content(payload: Dict[str, Any]) -> str:
-    """Get decompressed raw_content from document payload."""
+    """
+    Get decompressed raw_content from document payload (inline or from its blob).
+    Raises MissingBlobError if the payload references a blob that no longer exists.
+    """
+    blob_key = payload.get("raw_content_blob")
+    if blob_key:
+        return get_document_blob_store().get(blob_key, payload.get("raw_content_codec") or GZIP)
     raw_content = payload.get("raw_content", "")
     if payload.get("raw_content_compressed", False):
-        return decompress_content(raw_content)
+        return decompress_content(raw_content, payload.get("raw_content_codec") or GZIP)
     return raw_content
 
 class QdrantUtils:
     """
     Qdrant utilities with a CONSISTENT 6-collection layout:
 
-    - cv_documents / jd_documents       : raw text + file metadata (dummy single vector)
-    - cv_structured / jd_structured     : standardized JSON (dummy single vector)
+    - cv_documents / jd_documents       : raw text + file metadata (payload only)
+    - cv_structured / jd_structured     : standardized JSON (payload only)
     - cv_embeddings / jd_embeddings     : EXACT 32 vectors per doc (20 skills, 10 resp, 1 title, 1 experience)
     """
 
@@ -207,23 +235,7 @@ class QdrantUtils:
     # ---------- collection management ----------
 
     def _ensure_collections_exist(self):
-        collections = {
-            "cv_documents":   VectorParams(size=768, distance=Distance.COSINE),
-            "jd_documents":   VectorParams(size=768, distance=Distance.COSINE),
-            "cv_structured":  VectorParams(size=768, distance=Distance.COSINE),
-            "jd_structured":  VectorParams(size=768, distance=Distance.COSINE),
-            "cv_embeddings":  VectorParams(size=768, distance=Distance.COSINE),
-            "jd_embeddings":  VectorParams(size=768, distance=Distance.COSINE),
-            # Keep only job_postings_structured for job posting management
-            "job_postings_structured":  VectorParams(size=768, distance=Distance.COSINE),
-        }
-        for name, cfg in collections.items():
-            if not self.client.collection_exists(name):
-                logger.info(f"📋 Creating collection: {name}")
-                self.client.create_collection(collection_name=name, vectors_config=cfg)
-                logger.info(f"✅ Collection created: {name}")
-            else:
-                logger.info(f"✅ Collection exists: {name}")
+        ensure_collections_exist(self.client)
 
     # ---------- basic health ----------
 
@@ -242,6 +254,61 @@ class QdrantUtils:
 
     # ---------- document + structured storage ----------
 
+    def _upsert(self, collection_name: str, points: List[PointStruct], wait: bool = True) -> None:
+        """
+        Upsert `points` in one request and record the points-per-round-trip metric.
+        Payload-only points get the placeholder vector while the collection still requires one.
+        """
+        with migration_write(collection_name, [p.id for p in points]):
+            try:
+                self.client.upsert(collection_name=collection_name,
+                                   points=with_placeholder_vectors(self.client, collection_name, points), wait=wait)
+            except Exception:
+                if collection_name not in METADATA_COLLECTIONS:
+                    raise
+                # The collection may have been migrated since its layout was cached
+                forget_layouts()
+                self.client.upsert(collection_name=collection_name,
+                                   points=with_placeholder_vectors(self.client, collection_name, points), wait=wait)
+        QDRANT_POINTS_PER_WRITE.observe(len(points), collection=collection_name)
+
+    @staticmethod
+    def document_point(
+        doc_id: str,
+        doc_type: str,
+        filename: str,
+        file_format: str,
+        raw_content: str,
+        upload_date: str,
+        file_path: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        raw_content_fields: Optional[Dict[str, Any]] = None,
+    ) -> tuple[str, PointStruct]:
+        """
+        (collection, point) written by store_document. `raw_content_fields` are the body
+        fields from store_raw_content(); without them the body is kept inline.
+        """
+        payload = {
+            "id": doc_id,
+            "filename": filename,
+            "file_format": file_format,
+            **(raw_content_fields or content_fields(raw_content)),
+            "upload_date": upload_date,
+            "content_hash": content_hash(raw_content),
+            "document_type": doc_type,
+        }
+        if file_path:
+            payload["file_path"] = file_path      # 👈 persist where the file lives
+        if mime_type:
+            payload["mime_type"] = mime_type      # 👈 optional hint for serving
+        return f"{doc_type}_documents", PointStruct(id=doc_id, vector={}, payload=payload)
+
+    @staticmethod
+    def store_raw_content(raw_content: str) -> Dict[str, Any]:
+        """Write the document body as a blob; returns the payload fields for document_point."""
+        return get_document_blob_store().raw_content_fields(raw_content)
+
+    @timed(QDRANT_LATENCY, operation="store_document")
     def store_document(
         self,
         doc_id: str,
@@ -254,33 +321,34 @@ class QdrantUtils:
         mime_type: Optional[str] = None,   # 👈 NEW
     ) -> bool:
         try:
-            collection_name = f"{doc_type}_documents"
-            dummy_vector = [0.0] * 768
-            payload = {
-                "id": doc_id,
-                "filename": filename,
-                "file_format": file_format,
-                "raw_content": compress_content(raw_content),
-                "raw_content_compressed": True,
-                "upload_date": upload_date,
-                "content_hash": hashlib.md5(raw_content.encode()).hexdigest(),
-                "document_type": doc_type,
-            }
-            if file_path:
-                payload["file_path"] = file_path      # 👈 persist where the file lives
-            if mime_type:
-                payload["mime_type"] = mime_type      # 👈 optional hint for serving
-
-            self.client.upsert(
-                collection_name=collection_name,
-                points=[PointStruct(id=doc_id, vector=dummy_vector, payload=payload)],
+            collection_name, point = self.document_point(
+                doc_id, doc_type, filename, file_format, raw_content, upload_date, file_path, mime_type,
+                raw_content_fields=self.store_raw_content(raw_content),
             )
+            self._upsert(collection_name, [point])
             logger.info(f"✅ Document stored: {doc_id} → {collection_name}")
             return True
         except Exception as e:
             logger.error(f"❌ store_document({doc_id}) failed: {e}")
             return False
 
+    @staticmethod
+    def structured_point(doc_id: str, doc_type: str, structured_data: Dict[str, Any]) -> tuple[str, PointStruct]:
+        """(collection, point) written by store_structured_data."""
+        # CRITICAL: Preserve ALL fields from structured_data
+        # This ensures job application metadata is not lost
+        payload = {
+            **structured_data,  # Keep ALL existing fields
+            "id": doc_id,  # Ensure ID is set
+            "stored_at": datetime.utcnow().isoformat(),  # Update timestamp
+        }
+
+        # Ensure structured_info is properly nested
+        if "structured_info" not in payload:
+            payload["structured_info"] = structured_data
+        return f"{doc_type}_structured", PointStruct(id=doc_id, vector={}, payload=payload)
+
+    @timed(QDRANT_LATENCY, operation="store_structured_data")
     def store_structured_data(self, doc_id: str, doc_type: str, structured_data: Dict[str, Any]) -> bool:
         """
         Store standardized JSON into {doc_type}_structured with a dummy 768 vector.
@@ -292,29 +360,12 @@ class QdrantUtils:
         - Any other metadata fields
         """
         try:
-            collection_name = f"{doc_type}_structured"
-            dummy_vector = [0.0] * 768
-            
-            # CRITICAL: Preserve ALL fields from structured_data
-            # This ensures job application metadata is not lost
-            payload = {
-                **structured_data,  # Keep ALL existing fields
-                "id": doc_id,  # Ensure ID is set
-                "stored_at": datetime.utcnow().isoformat(),  # Update timestamp
-            }
-            
-            # Ensure structured_info is properly nested
-            if "structured_info" not in payload:
-                payload["structured_info"] = structured_data
-            
-            self.client.upsert(
-                collection_name=collection_name,
-                points=[PointStruct(id=doc_id, vector=dummy_vector, payload=payload)],
-            )
+            collection_name, point = self.structured_point(doc_id, doc_type, structured_data)
+            self._upsert(collection_name, [point])
             
             # Log job application preservation
-            if payload.get("is_job_application"):
-                logger.info(f"✅ Structured stored: {doc_id} → {collection_name} (job_posting_id={payload.get('job_posting_id')})")
+            if point.payload.get("is_job_application"):
+                logger.info(f"✅ Structured stored: {doc_id} → {collection_name} (job_posting_id={point.payload.get('job_posting_id')})")
             else:
                 logger.info(f"✅ Structured stored: {doc_id} → {collection_name}")
             
@@ -325,52 +376,121 @@ class QdrantUtils:
 
     # ---------- EXACT 32 vectors storage (per doc) ----------
 
+    @staticmethod
+    def embeddings_point(doc_id: str, doc_type: str, embeddings_data: Dict[str, Any]) -> tuple[str, PointStruct]:
+        """(collection, point) written by store_embeddings_exact."""
+        # Prepare the structured vector data
+        vector_structure = {
+            "skill_vectors": embeddings_data.get("skill_vectors", [])[:20],
+            "responsibility_vectors": embeddings_data.get("responsibility_vectors", [])[:10],
+            "experience_vector": embeddings_data.get("experience_vector", []),
+            "job_title_vector": embeddings_data.get("job_title_vector", [])
+        }
+
+        # Create single point with all vectors in payload; the point vector is a
+        # 768-dimensional zero vector because Qdrant requires a vector field
+        point = PointStruct(
+            id=doc_id,  # Use doc_id as the point ID for direct access
+            vector=[0.0] * 768,
+            payload={
+                "vector_structure": vector_structure,
+                "metadata": {
+                    "experience_years": embeddings_data.get("experience_years", ""),
+                    "job_title": embeddings_data.get("job_title", ""),
+                    "vector_count": 32,
+                    "storage_version": "optimized_v2",
+                    "normalized": bool(embeddings_data.get("normalized", False)),
+                    "dtype": "float32"
+                }
+            }
+        )
+        return f"{doc_type}_embeddings", point
+
+    @timed(QDRANT_LATENCY, operation="store_embeddings_exact")
     def store_embeddings_exact(self, doc_id: str, doc_type: str, embeddings_data: Dict[str, Any]) -> bool:
         """
         OPTIMIZED: Store EXACTLY 32 vectors as SINGLE POINT in {doc_type}_embeddings.
         Expected keys in embeddings_data:
           - skill_vectors (20), responsibility_vectors (10), experience_vector (1), job_title_vector (1)
           - plus 'skills', 'responsibilities', 'experience_years', 'job_title' for payload context
+          - 'normalized': True when the vectors are unit-length float32 (EmbeddingService output);
+            recorded in metadata so readers can use a plain dot product
         """
         try:
-            collection_name = f"{doc_type}_embeddings"
-            
-            # Prepare the structured vector data
-            vector_structure = {
-                "skill_vectors": embeddings_data.get("skill_vectors", [])[:20],
-                "responsibility_vectors": embeddings_data.get("responsibility_vectors", [])[:10],
-                "experience_vector": embeddings_data.get("experience_vector", []),
-                "job_title_vector": embeddings_data.get("job_title_vector", [])
-            }
-            
-            # Create a dummy vector for the point (Qdrant requires a vector field)
-            # We'll store the actual vectors in the payload
-            dummy_vector = [0.0] * 768  # 768-dimensional zero vector
-            
-            # Create single point with all vectors in payload
-            point = PointStruct(
-                id=doc_id,  # Use doc_id as the point ID for direct access
-                vector=dummy_vector,
-                payload={
-                    "vector_structure": vector_structure,
-                    "metadata": {
-                        "experience_years": embeddings_data.get("experience_years", ""),
-                        "job_title": embeddings_data.get("job_title", ""),
-                        "vector_count": 32,
-                        "storage_version": "optimized_v2"
-                    }
-                }
-            )
-
-            self.client.upsert(collection_name=collection_name, points=[point])
+            collection_name, point = self.embeddings_point(doc_id, doc_type, embeddings_data)
+            self._upsert(collection_name, [point])
             logger.info(f"✅ OPTIMIZED: Stored 32 vectors as single point for {doc_id} → {collection_name}")
             return True
         except Exception as e:
             logger.error(f"❌ store_embeddings_exact({doc_id}) failed: {e}")
             return False
 
+    def write_batch(self, wait: bool = True) -> "QdrantWriteBatch":
+        """Unit of work for document writes; see QdrantWriteBatch."""
+        return QdrantWriteBatch(self, wait=wait)
+
+    # ---------- partial payload updates ----------
+
+    @timed(QDRANT_LATENCY, operation="set_payload_fields")
+    def set_payload_fields(
+        self, collection_name: str, point_id: str, fields: Dict[str, Any], key: Optional[str] = None
+    ) -> None:
+        """
+        Merge `fields` into one point's payload by point id (wait=True), without reading
+        the point or resending its vector. `key` targets a nested object, e.g. "structured_info".
+        Raises if the point does not exist.
+        """
+        with migration_write(collection_name, [point_id]):
+            self.client.set_payload(
+                collection_name=collection_name, payload=fields, points=[point_id], key=key, wait=True
+            )
+
+    def delete_points(self, collection_name: str, point_ids: List[Any]) -> None:
+        """Delete points by id (wait=True)."""
+        with migration_write(collection_name, point_ids):
+            self.client.delete(collection_name=collection_name, points_selector=point_ids, wait=True)
+
+    @timed(QDRANT_LATENCY, operation="patch_payloads")
+    def patch_payloads(
+        self, collection_name: str, patches: Dict[str, Dict[str, Any]], key: Optional[str] = None
+    ) -> int:
+        """
+        Batched payload patch: point id -> fields to merge, applied with batch_update_points
+        (wait=True). Points receiving identical fields share one set_payload operation.
+        Returns the number of points patched.
+        """
+        grouped: Dict[str, tuple[Dict[str, Any], List[str]]] = {}
+        for point_id, fields in patches.items():
+            signature = json.dumps(fields, sort_keys=True, default=str)
+            grouped.setdefault(signature, (fields, []))[1].append(point_id)
+
+        operations = [
+            SetPayloadOperation(set_payload=SetPayload(payload=fields, points=point_ids, key=key))
+            for fields, point_ids in grouped.values()
+        ]
+        with migration_write(collection_name, patches):
+            for start in range(0, len(operations), PAYLOAD_PATCH_BATCH_SIZE):
+                self.client.batch_update_points(
+                    collection_name=collection_name,
+                    update_operations=operations[start:start + PAYLOAD_PATCH_BATCH_SIZE],
+                    wait=True,
+                )
+        return len(patches)
+
+    def _point_ids(self, collection_name: str, field: str, value: str, limit: int) -> List[Any]:
+        """Ids of points whose payload `field` equals `value` (no payloads or vectors transferred)."""
+        points, _ = self.client.scroll(
+            collection_name=collection_name,
+            scroll_filter=Filter(must=[FieldCondition(key=field, match=MatchValue(value=value))]),
+            limit=limit,
+            with_payload=False,
+            with_vectors=False,
+        )
+        return [point.id for point in points]
+
     # ---------- retrieval helpers ----------
 
+    @timed(QDRANT_LATENCY, operation="retrieve_document")
     def retrieve_document(self, doc_id: str, doc_type: str) -> Optional[Dict[str, Any]]:
         """
         Merge *_documents and *_structured (if exists) into one payload.
@@ -385,16 +505,20 @@ class QdrantUtils:
             if st:
                 payload = payload or {}
                 payload["structured_info"] = st[0].payload.get("structured_info", {})
+                payload["structured_stored_at"] = st[0].payload.get("stored_at")
 
             return payload or None
         except Exception as e:
             logger.error(f"❌ retrieve_document({doc_id}) failed: {e}")
             return None
 
+    @timed(QDRANT_LATENCY, operation="retrieve_embeddings")
     def retrieve_embeddings(self, doc_id: str, doc_type: str) -> Optional[Dict[str, Any]]:
         """
         OPTIMIZED: Read the EXACT-32 vectors back from {doc_type}_embeddings and return a dict:
-          { "skill_vectors": [...], "responsibility_vectors": [...], "experience_vector": [...], "job_title_vector": [...] }
+          { "skill_vectors": [...], "responsibility_vectors": [...], "experience_vector": [...], "job_title_vector": [...],
+            "normalized": bool }
+        "normalized" comes from the stored metadata; legacy points without the flag report False.
         """
         try:
             # Try optimized single-point retrieval first
@@ -410,11 +534,15 @@ class QdrantUtils:
                     payload = point[0].payload
                     if payload and "vector_structure" in payload:
                         logger.info(f"✅ OPTIMIZED: Retrieved 32 vectors as single point for {doc_id}")
-                        return payload["vector_structure"]
+                        vector_structure = payload["vector_structure"]
+                        vector_structure["normalized"] = bool((payload.get("metadata") or {}).get("normalized", False))
+                        return vector_structure
             except Exception as e:
                 logger.debug(f"Optimized retrieval failed for {doc_id}, trying legacy method: {e}")
             
-            # Fallback to legacy method for backward compatibility
+            # Fallback to legacy method until the embeddings migration has been applied
+            if not legacy_reads_enabled(self.client, f"{doc_type}_embeddings"):
+                return None
             logger.info(f"🔄 FALLBACK: Using legacy retrieval for {doc_id}")
             points, _ = self.client.scroll(
                 collection_name=f"{doc_type}_embeddings",
@@ -458,6 +586,7 @@ class QdrantUtils:
             logger.error(f"❌ retrieve_embeddings({doc_id}) failed: {e}")
             return None
 
+    @timed(QDRANT_LATENCY, operation="list_documents")
     def list_documents(self, doc_type: str) -> List[Dict[str, Any]]:
         """
         List payloads in {doc_type}_documents.
@@ -481,28 +610,30 @@ class QdrantUtils:
             logger.error(f"❌ list_documents({doc_type}) failed: {e}")
             return []
 
+    @timed(QDRANT_LATENCY, operation="delete_document")
     def delete_document(self, doc_id: str, doc_type: str) -> bool:
         """
         Delete from *_documents, *_structured, and *_embeddings.
         OPTIMIZED: Handles both single-point and legacy multi-point storage.
         """
         try:
-            self.client.delete(collection_name=f"{doc_type}_documents", points_selector=[doc_id])
-            self.client.delete(collection_name=f"{doc_type}_structured", points_selector=[doc_id])
+            self.delete_points(f"{doc_type}_documents", [doc_id])
+            self.delete_points(f"{doc_type}_structured", [doc_id])
 
             # Try optimized single-point deletion first
             try:
-                self.client.delete(collection_name=f"{doc_type}_embeddings", points_selector=[doc_id])
+                self.delete_points(f"{doc_type}_embeddings", [doc_id])
                 logger.info(f"✅ OPTIMIZED: Deleted single point {doc_id} from {doc_type}_embeddings")
             except Exception as e:
                 logger.debug(f"Single-point deletion failed, trying legacy method: {e}")
                 # Fallback to legacy multi-point deletion
-                self.client.delete(
-                    collection_name=f"{doc_type}_embeddings",
-                    points_selector=FilterSelector(
-                        filter=Filter(must=[FieldCondition(key="id", match=MatchValue(value=doc_id))])
-                    ),
-                )
+                with migration_write(f"{doc_type}_embeddings", [doc_id]):
+                    self.client.delete(
+                        collection_name=f"{doc_type}_embeddings",
+                        points_selector=FilterSelector(
+                            filter=Filter(must=[FieldCondition(key="id", match=MatchValue(value=doc_id))])
+                        ),
+                    )
                 logger.info(f"✅ LEGACY: Deleted multiple points for {doc_id} from {doc_type}_embeddings")
             
             logger.info(f"✅ Deleted {doc_id} from all {doc_type} collections")
@@ -518,9 +649,8 @@ class QdrantUtils:
         try:
             logger.warning("🧹 Clearing ALL Qdrant data (all 6 collections)")
             for name in ["cv_documents", "jd_documents", "cv_structured", "jd_structured", "cv_embeddings", "jd_embeddings", "job_postings_structured"]:
-                if self.client.collection_exists(name):
-                    self.client.delete_collection(name)
-                    logger.info(f"🗑 Dropped: {name}")
+                drop_collection(self.client, name)
+                logger.info(f"🗑 Dropped: {name}")
             self._ensure_collections_exist()
             logger.warning("⚠ All collections cleared and recreated")
             return True
@@ -530,6 +660,7 @@ class QdrantUtils:
 
     # ---------- convenience helpers used by matching ----------
 
+    @timed(QDRANT_LATENCY, operation="list_all_cvs")
     def list_all_cvs(self) -> List[Dict[str, str]]:
         """
         Minimal list of CV ids + names taken from *_structured when available.
@@ -661,6 +792,7 @@ class QdrantUtils:
             logger.error(f"❌ get_categories_with_counts failed: {e}")
             return {}
 
+    @timed(QDRANT_LATENCY, operation="get_structured_cv")
     def get_structured_cv(self, cv_id: str) -> Optional[Dict[str, Any]]:
         """
         Return a normalized structured CV for matching.
@@ -680,12 +812,14 @@ class QdrantUtils:
                 "skills_sentences": (s.get("skills_sentences", []) or s.get("skills", []) or [])[:20],
                 "responsibility_sentences": (s.get("responsibilities", []) or s.get("responsibility_sentences", []) or [])[:10],
                 "expected_salary": s.get("expected_salary"),
+                "stored_at": doc.get("structured_stored_at"),  # version for the match pair cache
             }
             return result
         except Exception as e:
             logger.error(f"❌ get_structured_cv({cv_id}) failed: {e}")
             return None
 
+    @timed(QDRANT_LATENCY, operation="get_structured_cvs_batch")
     def get_structured_cvs_batch(self, cv_ids: List[str]) -> List[Dict[str, Any]]:
         """
         OPTIMIZED: Batch retrieve multiple CVs at once (reduces 62 calls to 2 calls for 31 CVs).
@@ -702,6 +836,7 @@ class QdrantUtils:
             # Create lookup dictionaries
             docs_dict = {point.id: point.payload for point in docs if point.payload}
             structs_dict = {point.id: point.payload.get("structured_info", {}) for point in structs if point.payload}
+            stored_at = {point.id: point.payload.get("stored_at") for point in structs if point.payload}
             
             # Build results in same order as input IDs
             results = []
@@ -721,6 +856,7 @@ class QdrantUtils:
                     "skills_sentences": (s.get("skills_sentences", []) or s.get("skills", []) or [])[:20],
                     "responsibility_sentences": (s.get("responsibilities", []) or s.get("responsibility_sentences", []) or [])[:10],
                     "expected_salary": s.get("expected_salary"),
+                    "stored_at": stored_at.get(cv_id),
                 }
                 results.append(result)
             
@@ -736,6 +872,7 @@ class QdrantUtils:
                     results.append(cv)
             return results
 
+    @timed(QDRANT_LATENCY, operation="get_structured_jd")
     def get_structured_jd(self, jd_id: str) -> Optional[Dict[str, Any]]:
         """
         Return a normalized structured JD for matching.
@@ -755,6 +892,7 @@ class QdrantUtils:
                     "skills_sentences": (s.get("skills_sentences", []) or s.get("skills", []) or [])[:20],  # Matching system expects this field name
                     "responsibility_sentences": (s.get("responsibilities", []) or s.get("responsibility_sentences", []) or [])[:10],  # Matching system expects this field name
                     "structured_info": s,  # Keep original structure
+                    "stored_at": st[0].payload.get("stored_at"),
                 }
                 return result
             
@@ -771,6 +909,7 @@ class QdrantUtils:
                 "skills_sentences": (s.get("skills_sentences", []) or s.get("skills", []) or [])[:20],  # Matching system expects this field name
                 "responsibility_sentences": (s.get("responsibilities", []) or s.get("responsibility_sentences", []) or [])[:10],  # Matching system expects this field name
                 "structured_info": s,  # Keep original structure
+                "stored_at": doc.get("structured_stored_at"),
             }
         except Exception as e:
             logger.error(f"❌ get_structured_jd({jd_id}) failed: {e}")
@@ -836,7 +975,6 @@ class QdrantUtils:
         """
         try:
             collection_name = "job_postings_structured"
-            dummy_vector = [0.0] * 768
             payload = {
                 "id": job_id,
                 "public_token": public_token,
@@ -853,10 +991,11 @@ class QdrantUtils:
                 "email_subject_template": email_subject_template
             }
             
-            point = PointStruct(id=job_id, vector=dummy_vector, payload=payload)
-            self.client.upsert(collection_name=collection_name, points=[point])
+            point = PointStruct(id=job_id, vector={}, payload=payload)
+            self._upsert(collection_name, [point])
             logger.info(f"✅ Stored job posting metadata: {job_id} with token: {public_token[:8]}...")
             _invalidate_careers_job_list_cache()
+            _refresh_public_job_view(self, public_token)
             return True
             
         except Exception as e:
@@ -880,7 +1019,6 @@ class QdrantUtils:
         """
         try:
             collection_name = "job_postings_structured"
-            dummy_vector = [0.0] * 768  # Not used for matching
             
             payload = {
                 "id": job_id,
@@ -906,23 +1044,21 @@ class QdrantUtils:
             
             point = PointStruct(
                 id=job_id,
-                vector=dummy_vector,
+                vector={},  # payload only; not used for matching
                 payload=payload
             )
-            
-            operation_result = self.client.upsert(
-                collection_name=collection_name,
-                points=[point]
-            )
+            self._upsert(collection_name, [point])
             
             logger.info(f"✅ UI data stored for job {job_id}")
             _invalidate_careers_job_list_cache()
+            _refresh_public_job_view(self, public_token)
             return True
             
         except Exception as e:
             logger.error(f"❌ Failed to store UI data: {e}")
             return False
 
+    @timed(QDRANT_LATENCY, operation="get_job_posting_by_token")
     def get_job_posting_by_token(self, public_token: str, include_inactive: bool = False) -> Optional[Dict]:
         """
         Retrieve job posting metadata using public token for anonymous access
@@ -1099,6 +1235,39 @@ class QdrantUtils:
             logger.error(f"❌ Failed to get job posting {job_id}: {e}")
             return None
 
+    def _job_posting_fields(self, job_id: str, fields: List[str]) -> Optional[Dict[str, Any]]:
+        """Selected payload fields of a job posting by point id, or None if it does not exist."""
+        points = self.client.retrieve(
+            collection_name="job_postings_structured", ids=[job_id], with_payload=fields, with_vectors=False
+        )
+        return (points[0].payload or {}) if points else None
+
+    def refresh_public_job_views_for_jd(self, jd_id: str) -> int:
+        """
+        Rebuild the public pages of every posting built from JD `jd_id` (their job_data
+        merges jd_structured), after that JD is re-standardized. Returns pages rebuilt.
+        """
+        try:
+            points, _ = self.client.scroll(
+                collection_name="job_postings_structured",
+                scroll_filter=Filter(must=[FieldCondition(key="jd_id", match=MatchValue(value=jd_id))]),
+                limit=256,
+                with_payload=["public_token"],
+                with_vectors=False,
+            )
+            tokens = {(p.payload or {}).get("public_token") for p in points}
+            # postings created before jd_id was stored share the JD's id
+            legacy = self._job_posting_fields(jd_id, ["public_token"])
+            if legacy:
+                tokens.add(legacy.get("public_token"))
+            tokens.discard(None)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not find postings of JD {jd_id} to refresh: {e}")
+            return 0
+        for token in tokens:
+            _refresh_public_job_view(self, token)
+        return len(tokens)
+
     def update_job_posting_public_token(self, job_id: str, public_token: str) -> bool:
         """
         Update the public_token for an existing job posting
@@ -1106,41 +1275,19 @@ class QdrantUtils:
         try:
             collection_name = "job_postings_structured"
             logger.info(f"🔧 Updating public_token for job {job_id} to {public_token[:8]}...")
-            
-            # Get current job metadata
-            results = self.client.scroll(
-                collection_name=collection_name,
-                scroll_filter=Filter(
-                    must=[FieldCondition(key="id", match=MatchValue(value=job_id))]
-                ),
-                limit=1,
-                with_payload=True,
-                with_vectors=True  # We need the vector to update the point
-            )
-            
-            logger.info(f"🔍 Search results for job {job_id}: {len(results[0]) if results[0] else 0} found")
-            
-            if not results[0]:
+
+            current = self._job_posting_fields(job_id, ["public_token"])
+            if current is None:
                 logger.error(f"❌ Job {job_id} not found for public_token update")
                 return False
-            
-            # Update the payload with new public_token
-            current_payload = results[0][0].payload
-            logger.info(f"🔍 Current payload keys: {list(current_payload.keys())}")
-            current_payload["public_token"] = public_token
-            
-            # Get the vector, use dummy vector if None
-            vector = results[0][0].vector
-            if vector is None:
-                logger.warning(f"⚠️ Vector is None for job {job_id}, using dummy vector")
-                vector = [0.0] * 768  # Use dummy vector
-            
-            # Update the point
-            point = PointStruct(id=job_id, vector=vector, payload=current_payload)
-            self.client.upsert(collection_name=collection_name, points=[point])
-            
+
+            previous_token = current.get("public_token")
+            self.set_payload_fields(collection_name, job_id, {"public_token": public_token})
+
             logger.info(f"✅ Updated public_token for job {job_id}: {public_token[:8]}...")
             _invalidate_careers_job_list_cache()
+            _refresh_public_job_view(self, previous_token)
+            _refresh_public_job_view(self, public_token)
             return True
             
         except Exception as e:
@@ -1155,33 +1302,20 @@ class QdrantUtils:
         """
         try:
             collection_name = "job_postings_structured"
-            
-            # First get the current point
-            current_point = self.client.scroll(
-                collection_name=collection_name,
-                scroll_filter=Filter(
-                    must=[FieldCondition(key="id", match=MatchValue(value=job_id))]
-                ),
-                limit=1,
-                with_payload=True,
-                with_vectors=True
-            )[0]
-            
-            if not current_point:
+
+            current = self._job_posting_fields(job_id, ["public_token"])
+            if current is None:
                 logger.error(f"❌ Job posting {job_id} not found for status update")
                 return False
-                
-            point = current_point[0]
-            payload = point.payload.copy()
-            payload["is_active"] = is_active
-            payload["status_updated"] = datetime.utcnow().isoformat()
-            
-            # Update the point
-            updated_point = PointStruct(id=job_id, vector=point.vector, payload=payload)
-            self.client.upsert(collection_name=collection_name, points=[updated_point])
-            
+
+            self.set_payload_fields(collection_name, job_id, {
+                "is_active": is_active,
+                "status_updated": datetime.utcnow().isoformat(),
+            })
+
             logger.info(f"✅ Updated job posting {job_id} status to: {is_active}")
             _invalidate_careers_job_list_cache()
+            _refresh_public_job_view(self, current.get("public_token"))
             return True
             
         except Exception as e:
@@ -1195,41 +1329,27 @@ class QdrantUtils:
         """
         try:
             collection_name = "job_postings_structured"
-            
-            # First get the current point
-            current_point = self.client.scroll(
-                collection_name=collection_name,
-                scroll_filter=Filter(
-                    must=[FieldCondition(key="id", match=MatchValue(value=job_id))]
-                ),
-                limit=1,
-                with_payload=True,
-                with_vectors=True
-            )[0]
-            
-            if not current_point:
+
+            current = self._job_posting_fields(job_id, ["public_token"])
+            if current is None:
                 logger.error(f"❌ Job posting {job_id} not found for update")
                 return False
-                
-            point = current_point[0]
-            payload = point.payload.copy()
-            
+
             # Update fields if provided
+            fields: Dict[str, Any] = {}
             if company_name is not None:
-                payload["company_name"] = company_name
+                fields["company_name"] = company_name
             if additional_info is not None:
-                payload["additional_info"] = additional_info
+                fields["additional_info"] = additional_info
             if is_active is not None:
-                payload["is_active"] = is_active
-                
-            payload["updated_date"] = datetime.utcnow().isoformat()
-            
-            # Update the point
-            updated_point = PointStruct(id=job_id, vector=point.vector, payload=payload)
-            self.client.upsert(collection_name=collection_name, points=[updated_point])
-            
+                fields["is_active"] = is_active
+
+            fields["updated_date"] = datetime.utcnow().isoformat()
+            self.set_payload_fields(collection_name, job_id, fields)
+
             logger.info(f"✅ Updated job posting {job_id}")
             _invalidate_careers_job_list_cache()
+            _refresh_public_job_view(self, current.get("public_token"))
             return True
             
         except Exception as e:
@@ -1242,43 +1362,26 @@ class QdrantUtils:
         """
         try:
             collection_name = "job_postings_structured"
-            
-            # First get the current point
-            current_point = self.client.scroll(
-                collection_name=collection_name,
-                scroll_filter=Filter(
-                    must=[FieldCondition(key="id", match=MatchValue(value=job_id))]
-                ),
-                limit=1,
-                with_payload=True,
-                with_vectors=True
-            )[0]
-            
-            if not current_point:
+
+            current = self._job_posting_fields(job_id, ["public_token"])
+            if current is None:
                 logger.error(f"❌ Job posting {job_id} not found for structured data update")
                 return False
-                
-            point = current_point[0]
-            payload = point.payload.copy()
-            
-            # Update structured data fields while preserving metadata
-            for key, value in structured_data.items():
-                payload[key] = value
-                
-            payload["updated_date"] = datetime.utcnow().isoformat()
-            
-            # Update the point
-            updated_point = PointStruct(id=job_id, vector=point.vector, payload=payload)
-            self.client.upsert(collection_name=collection_name, points=[updated_point])
-            
+
+            # Top-level fields are merged, so metadata not in structured_data is untouched
+            fields = {**structured_data, "updated_date": datetime.utcnow().isoformat()}
+            self.set_payload_fields(collection_name, job_id, fields)
+
             logger.info(f"✅ Updated job posting structured data {job_id}")
             _invalidate_careers_job_list_cache()
+            _refresh_public_job_view(self, fields.get("public_token") or current.get("public_token"))
             return True
             
         except Exception as e:
             logger.error(f"❌ Failed to update job posting structured data {job_id}: {e}")
             return False
 
+    @timed(QDRANT_LATENCY, operation="link_application_to_job")
     def link_application_to_job(
         self, 
         application_id: str, 
@@ -1290,88 +1393,57 @@ class QdrantUtils:
         """
         Store application data linking it to a specific job posting
         Uses cv_structured collection with job_id field
-        Includes retry logic to handle Qdrant commit delays
+
+        The CV is addressed by point id and only the application fields are written
+        (set_payload, wait=True). store_structured_data upserts with wait=True, so the
+        point is already visible and no retry loop is needed.
         """
-        import time
-        
         collection_name = "cv_structured"
-        
-        if not application_date:
-            application_date = datetime.utcnow().isoformat()
-        
-        # Retry logic: CV might not be immediately available after storage
-        max_retries = 5
-        retry_delay = 0.5  # Start with 500ms delay
-        
-        for attempt in range(max_retries):
-            try:
-                # Small delay on retries to allow Qdrant to commit
-                if attempt > 0:
-                    time.sleep(retry_delay * attempt)  # Exponential backoff: 0.5s, 1s, 1.5s, 2s, 2.5s
-                    logger.debug(f"🔄 Retry {attempt}/{max_retries-1} linking application {application_id} to job {job_id}")
-                
-                # Get existing CV structured data
-                scroll_result = self.client.scroll(
-                    collection_name=collection_name,
-                    scroll_filter=Filter(
-                        must=[FieldCondition(key="id", match=MatchValue(value=application_id))]
-                    ),
-                    limit=1,
-                    with_payload=True,
-                    with_vectors=True
-                )
-                
-                if not scroll_result or len(scroll_result[0]) == 0:
-                    if attempt < max_retries - 1:
-                        continue  # Retry if CV not found yet
-                    logger.error(f"❌ CV structured data not found for application {application_id} after {max_retries} attempts")
-                    return False
-                
-                point = scroll_result[0][0]
-                payload = point.payload.copy()
-                
-                # Add application linking data
-                payload.update({
-                    "job_id": job_id,  # Link to job posting
-                    "applicant_name": applicant_data.get("applicant_name"),
-                    "applicant_email": applicant_data.get("applicant_email"),
-                    "applicant_phone": applicant_data.get("applicant_phone"),
-                    "cv_filename": cv_filename,
-                    "application_date": application_date,
-                    "application_status": "pending",
-                    "cover_letter": applicant_data.get("cover_letter"),
-                    "expected_salary": applicant_data.get("expected_salary"),
-                    "years_of_experience": applicant_data.get("years_of_experience"),
-                    "experience_warning": applicant_data.get("experience_warning"),
-                    "is_job_application": True
-                })
-                
-                # Update the point
-                updated_point = PointStruct(id=application_id, vector=point.vector, payload=payload)
-                self.client.upsert(collection_name=collection_name, points=[updated_point])
-                
-                logger.info(f"✅ Linked application {application_id} to job {job_id} (attempt {attempt + 1})")
-                _invalidate_careers_job_list_cache()
 
-                # Auto-deactivate job when application count reaches 250
-                try:
-                    count = self.get_application_count_for_job(job_id)
-                    if count >= 250:
-                        self.update_job_posting_status(job_id, False)
-                        logger.info(f"✅ Job {job_id} set to inactive (applications reached {count})")
-                except Exception as cap_err:
-                    logger.warning(f"⚠️ Could not check/update job status after link: {cap_err}")
-
-                return True
-                
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"⚠️ Attempt {attempt + 1} failed to link application {application_id}: {e}, retrying...")
-                    continue
-                logger.error(f"❌ Failed to link application {application_id} to job {job_id} after {max_retries} attempts: {e}")
-                return False
-        
-        return False
+        try:
+            self.set_payload_fields(
+                collection_name, application_id,
+                self.application_fields(job_id, applicant_data, cv_filename, application_date),
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to link application {application_id} to job {job_id}: {e}")
+            return False
+
+        logger.info(f"✅ Linked application {application_id} to job {job_id}")
+        self._after_application_linked(job_id)
+        return True
+
+    @staticmethod
+    def application_fields(
+        job_id: str, applicant_data: Dict, cv_filename: str, application_date: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """cv_structured payload fields that link an application to a job posting."""
+        return {
+            "job_id": job_id,  # Link to job posting
+            "applicant_name": applicant_data.get("applicant_name"),
+            "applicant_email": applicant_data.get("applicant_email"),
+            "applicant_phone": applicant_data.get("applicant_phone"),
+            "cv_filename": cv_filename,
+            "application_date": application_date or datetime.utcnow().isoformat(),
+            "application_status": "pending",
+            "cover_letter": applicant_data.get("cover_letter"),
+            "expected_salary": applicant_data.get("expected_salary"),
+            "years_of_experience": applicant_data.get("years_of_experience"),
+            "experience_warning": applicant_data.get("experience_warning"),
+            "is_job_application": True
+        }
+
+    def _after_application_linked(self, job_id: str) -> None:
+        _invalidate_careers_job_list_cache()
+
+        # Auto-deactivate job when application count reaches 250
+        try:
+            count = self.get_application_count_for_job(job_id)
+            if count >= 250:
+                self.update_job_posting_status(job_id, False)
+                logger.info(f"✅ Job {job_id} set to inactive (applications reached {count})")
+        except Exception as cap_err:
+            logger.warning(f"⚠️ Could not check/update job status after link: {cap_err}")
 
     def get_application_count_for_job(self, job_id: str) -> int:
         """
@@ -1411,6 +1483,7 @@ class QdrantUtils:
             logger.warning(f"⚠️ Failed to count applications for job {job_id}: {e}")
             return 0
 
+    @timed(QDRANT_LATENCY, operation="get_applications_for_job")
     def get_applications_for_job(self, job_id: str) -> List[Dict]:
         """
         Get all applications for a specific job posting with note information
@@ -1479,6 +1552,7 @@ class QdrantUtils:
             logger.error(f"❌ Failed to get applications for job {job_id}: {e}")
             return []
 
+    @timed(QDRANT_LATENCY, operation="get_all_job_postings")
     def get_all_job_postings(self, include_inactive: bool = False, posted_by_user: Optional[str] = None, user_role: Optional[str] = None) -> List[Dict]:
         """
         Get job postings (for HR dashboard)
@@ -1573,6 +1647,7 @@ class QdrantUtils:
             logger.error(f"❌ Failed to get job postings: {e}")
             return []
 
+    @timed(QDRANT_LATENCY, operation="list_job_postings_lightweight_page")
     def list_job_postings_lightweight_page(
         self,
         *,
@@ -1766,10 +1841,7 @@ class QdrantUtils:
                 if job_postings[0]:
                     job_ids = [point.id for point in job_postings[0]]
                     # Delete by point IDs
-                    self.client.delete(
-                        collection_name="job_postings_structured",
-                        points_selector=job_ids
-                    )
+                    self.delete_points("job_postings_structured", job_ids)
                     results["job_postings_deleted"] = len(job_ids)
                     logger.info(f"✅ Deleted {len(job_ids)} job postings from job_postings_structured")
             except Exception as e:
@@ -1786,10 +1858,7 @@ class QdrantUtils:
                 if jd_docs[0]:
                     jd_ids = [point.id for point in jd_docs[0]]
                     # Delete by point IDs
-                    self.client.delete(
-                        collection_name="jd_documents",
-                        points_selector=jd_ids
-                    )
+                    self.delete_points("jd_documents", jd_ids)
                     results["jd_documents_deleted"] = len(jd_ids)
                     logger.info(f"✅ Deleted {len(jd_ids)} JD documents")
             except Exception as e:
@@ -1806,10 +1875,7 @@ class QdrantUtils:
                 if jd_structured[0]:
                     jd_ids = [point.id for point in jd_structured[0]]
                     # Delete by point IDs
-                    self.client.delete(
-                        collection_name="jd_structured",
-                        points_selector=jd_ids
-                    )
+                    self.delete_points("jd_structured", jd_ids)
                     results["jd_structured_deleted"] = len(jd_ids)
                     logger.info(f"✅ Deleted {len(jd_ids)} JD structured data")
             except Exception as e:
@@ -1826,10 +1892,7 @@ class QdrantUtils:
                 if jd_embeddings[0]:
                     jd_ids = [point.id for point in jd_embeddings[0]]
                     # Delete by point IDs
-                    self.client.delete(
-                        collection_name="jd_embeddings",
-                        points_selector=jd_ids
-                    )
+                    self.delete_points("jd_embeddings", jd_ids)
                     results["jd_embeddings_deleted"] = len(jd_ids)
                     logger.info(f"✅ Deleted {len(jd_ids)} JD embeddings")
             except Exception as e:
@@ -1850,6 +1913,12 @@ class QdrantUtils:
                 logger.warning(f"⚠️ Failed to count CVs: {e}")
             
             logger.info(f"✅ Job postings deletion completed: {results}")
+            try:
+                from app.services.public_job_views import get_public_job_cache
+
+                get_public_job_cache().clear()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not clear public job views: {e}")
             return results
             
         except Exception as e:
@@ -1929,216 +1998,62 @@ class QdrantUtils:
             
             # 2. Soft delete job posting (mark as deleted)
             try:
-                # Find the job posting point
-                search_result = self.client.scroll(
-                    collection_name="job_postings_structured",
-                    scroll_filter=Filter(
-                        must=[
-                            FieldCondition(
-                                key="id",
-                                match=MatchValue(value=job_id)
-                            )
-                        ]
-                    ),
-                    limit=1,
-                    with_payload=True,
-                    with_vectors=False
-                )
-                
-                if search_result[0]:
-                    point = search_result[0][0]
-                    updated_payload = point.payload.copy()
-                    updated_payload.update({
-                        "is_deleted": True,
-                        "deleted_by": deleted_by,
-                        "deleted_at": deleted_at
-                    })
-                    
-                    # Update the point with soft deletion metadata
-                    self.client.upsert(
-                        collection_name="job_postings_structured",
-                        points=[PointStruct(
-                            id=point.id,
-                            vector=point.vector or {},
-                            payload=updated_payload
-                        )]
-                    )
-                    results["job_posting_deleted"] = True
-                    logger.info(f"✅ Soft deleted job posting {job_id}")
+                self.set_payload_fields("job_postings_structured", job_id, {
+                    "is_deleted": True,
+                    "deleted_by": deleted_by,
+                    "deleted_at": deleted_at
+                })
+                results["job_posting_deleted"] = True
+                logger.info(f"✅ Soft deleted job posting {job_id}")
                 
             except Exception as e:
                 logger.error(f"❌ Failed to soft delete job posting {job_id}: {e}")
                 return {"success": False, "error": f"Failed to delete job posting: {str(e)}"}
             
-            # 3. Soft delete related JD documents if they exist
+            # 3-5. Soft delete related JD documents, structured data and embeddings
             if jd_id:
-                try:
-                    # JD Documents
-                    jd_docs = self.client.scroll(
-                        collection_name="jd_documents",
-                        scroll_filter=Filter(
-                            must=[
-                                FieldCondition(
-                                    key="id",
-                                    match=MatchValue(value=jd_id)
-                                )
-                            ]
-                        ),
-                        limit=100,
-                        with_payload=True,
-                        with_vectors=False
-                    )
-                    
-                    if jd_docs[0]:
-                        for point in jd_docs[0]:
-                            updated_payload = point.payload.copy()
-                            updated_payload.update({
-                                "is_deleted": True,
-                                "deleted_by": deleted_by,
-                                "deleted_at": deleted_at,
-                                "deleted_reason": f"Related to deleted job posting {job_id}"
-                            })
-                            
-                            self.client.upsert(
-                                collection_name="jd_documents",
-                                points=[PointStruct(
-                                    id=point.id,
-                                    vector=point.vector or {},
-                                    payload=updated_payload
-                                )]
-                            )
-                        results["jd_documents_deleted"] = len(jd_docs[0])
-                        logger.info(f"✅ Soft deleted {len(jd_docs[0])} JD documents")
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to soft delete JD documents: {e}")
-                
-                # 4. Soft delete JD structured data
-                try:
-                    jd_structured = self.client.scroll(
-                        collection_name="jd_structured",
-                        scroll_filter=Filter(
-                            must=[
-                                FieldCondition(
-                                    key="id",
-                                    match=MatchValue(value=jd_id)
-                                )
-                            ]
-                        ),
-                        limit=100,
-                        with_payload=True,
-                        with_vectors=False
-                    )
-                    
-                    if jd_structured[0]:
-                        for point in jd_structured[0]:
-                            updated_payload = point.payload.copy()
-                            updated_payload.update({
-                                "is_deleted": True,
-                                "deleted_by": deleted_by,
-                                "deleted_at": deleted_at,
-                                "deleted_reason": f"Related to deleted job posting {job_id}"
-                            })
-                            
-                            self.client.upsert(
-                                collection_name="jd_structured",
-                                points=[PointStruct(
-                                    id=point.id,
-                                    vector=point.vector or {},
-                                    payload=updated_payload
-                                )]
-                            )
-                        results["jd_structured_deleted"] = len(jd_structured[0])
-                        logger.info(f"✅ Soft deleted {len(jd_structured[0])} JD structured data")
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to soft delete JD structured data: {e}")
-                
-                # 5. Soft delete JD embeddings
-                try:
-                    jd_embeddings = self.client.scroll(
-                        collection_name="jd_embeddings",
-                        scroll_filter=Filter(
-                            must=[
-                                FieldCondition(
-                                    key="jd_id",
-                                    match=MatchValue(value=jd_id)
-                                )
-                            ]
-                        ),
-                        limit=1000,
-                        with_payload=True,
-                        with_vectors=False
-                    )
-                    
-                    if jd_embeddings[0]:
-                        for point in jd_embeddings[0]:
-                            updated_payload = point.payload.copy()
-                            updated_payload.update({
-                                "is_deleted": True,
-                                "deleted_by": deleted_by,
-                                "deleted_at": deleted_at,
-                                "deleted_reason": f"Related to deleted job posting {job_id}"
-                            })
-                            
-                            self.client.upsert(
-                                collection_name="jd_embeddings",
-                                points=[PointStruct(
-                                    id=point.id,
-                                    vector=point.vector,  # Keep the vector for embeddings
-                                    payload=updated_payload
-                                )]
+                related_deletion = {
+                    "is_deleted": True,
+                    "deleted_by": deleted_by,
+                    "deleted_at": deleted_at,
+                    "deleted_reason": f"Related to deleted job posting {job_id}"
+                }
+                for collection_name, id_field, limit, result_key, label in (
+                    ("jd_documents", "id", 100, "jd_documents_deleted", "JD documents"),
+                    ("jd_structured", "id", 100, "jd_structured_deleted", "JD structured data"),
+                    ("jd_embeddings", "jd_id", 1000, "jd_embeddings_deleted", "JD embeddings"),
+                ):
+                    try:
+                        point_ids = self._point_ids(collection_name, id_field, jd_id, limit)
+                        if point_ids:
+                            results[result_key] = self.patch_payloads(
+                                collection_name, {point_id: related_deletion for point_id in point_ids}
                             )
-                        results["jd_embeddings_deleted"] = len(jd_embeddings[0])
-                        logger.info(f"✅ Soft deleted {len(jd_embeddings[0])} JD embeddings")
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to soft delete JD embeddings: {e}")
+                            logger.info(f"✅ Soft deleted {len(point_ids)} {label}")
+                    except Exception as e:
+                        logger.warning(f"⚠️ Failed to soft delete {label}: {e}")
             
             # 6. Archive applications instead of deleting them
             try:
-                # Find applications for this job
-                applications = self.client.scroll(
-                    collection_name="applications_structured",
-                    scroll_filter=Filter(
-                        must=[
-                            FieldCondition(
-                                key="job_id",
-                                match=MatchValue(value=job_id)
-                            )
-                        ]
-                    ),
-                    limit=1000,
-                    with_payload=True,
-                    with_vectors=False
-                )
-                
-                if applications[0]:
-                    for point in applications[0]:
-                        updated_payload = point.payload.copy()
-                        updated_payload.update({
-                            "job_deleted": True,
-                            "job_deleted_by": deleted_by,
-                            "job_deleted_at": deleted_at,
-                            "application_status": "archived_job_deleted"
-                        })
-                        
-                        self.client.upsert(
-                            collection_name="applications_structured",
-                            points=[PointStruct(
-                                id=point.id,
-                                vector=point.vector or {},
-                                payload=updated_payload
-                            )]
-                        )
-                    results["applications_archived"] = len(applications[0])
-                    logger.info(f"✅ Archived {len(applications[0])} applications")
+                point_ids = self._point_ids("applications_structured", "job_id", job_id, 1000)
+                if point_ids:
+                    archived = {
+                        "job_deleted": True,
+                        "job_deleted_by": deleted_by,
+                        "job_deleted_at": deleted_at,
+                        "application_status": "archived_job_deleted"
+                    }
+                    results["applications_archived"] = self.patch_payloads(
+                        "applications_structured", {point_id: archived for point_id in point_ids}
+                    )
+                    logger.info(f"✅ Archived {len(point_ids)} applications")
                     
             except Exception as e:
                 logger.warning(f"⚠️ Failed to archive applications: {e}")
             
             results["success"] = True
             logger.info(f"✅ Successfully soft-deleted job posting {job_id}: {results}")
+            _refresh_public_job_view(self, job_posting.get("public_token"))
             return results
             
         except Exception as e:
@@ -2150,61 +2065,18 @@ class QdrantUtils:
     
     def get_next_email_subject_counter(self, abbreviation: str, year: int) -> int:
         """
-        Get the next counter for email subject ID generation
-        Searches existing job postings to find the highest counter for the given abbreviation and year
-        Returns the next available counter (starting from 1)
+        Get the next counter for email subject ID generation (starting from 1).
+        Allocated atomically per (abbreviation, year); see app/services/email_subject_counter.py
         """
+        from app.services.email_subject_counter import get_email_subject_counter, highest_subject_counter
+
         try:
-            # Search for existing job postings with this abbreviation and year pattern
-            search_results = self.client.scroll(
-                collection_name="job_postings_structured",
-                scroll_filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="data_type",
-                            match=MatchValue(value="ui_display")
-                        ),
-                        FieldCondition(
-                            key="is_active",
-                            match=MatchValue(value=True)
-                        )
-                    ]
-                ),
-                limit=1000,
-                with_payload=True,
-                with_vectors=False
-            )
-            
-            highest_counter = 0
-            pattern = f"{abbreviation}-{year}-"
-            
-            logger.info(f"🔍 Searching for existing email subject IDs with pattern: {pattern}")
-            logger.info(f"📊 Found {len(search_results[0]) if search_results[0] else 0} job postings to check")
-            
-            if search_results[0]:
-                for point in search_results[0]:
-                    email_subject_id = point.payload.get("email_subject_id")
-                    logger.debug(f"🔍 Checking job {point.id}: email_subject_id = {email_subject_id}")
-                    if email_subject_id and email_subject_id.startswith(pattern):
-                        # Extract counter from ID like "SE-2025-001"
-                        try:
-                            counter_str = email_subject_id.split('-')[-1]
-                            counter = int(counter_str)
-                            highest_counter = max(highest_counter, counter)
-                            logger.info(f"✅ Found existing subject ID: {email_subject_id} (counter: {counter})")
-                        except (ValueError, IndexError):
-                            logger.warning(f"⚠️ Could not parse counter from {email_subject_id}")
-                            continue
-            
-            next_counter = highest_counter + 1
-            logger.info(f"📧 Next counter for {abbreviation}-{year}: {next_counter} (highest found: {highest_counter})")
-            return next_counter
-            
+            counter = get_email_subject_counter().next(abbreviation, year)
+            logger.info(f"📧 Next counter for {abbreviation}-{year}: {counter}")
+            return counter
         except Exception as e:
-            logger.error(f"❌ Error getting next email subject counter: {e}")
-            # Fallback to timestamp-based counter
-            import time
-            return int(time.time()) % 1000
+            logger.error(f"❌ Error allocating email subject counter, scanning postings: {e}")
+            return highest_subject_counter(self, abbreviation.upper(), year) + 1
     
     def check_existing_application(self, applicant_email: str, job_posting_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -2259,6 +2131,134 @@ class QdrantUtils:
             return None
 
 
+_write_executor: Optional[ThreadPoolExecutor] = None
+_write_executor_lock = threading.Lock()
+
+
+def _get_write_executor() -> ThreadPoolExecutor:
+    global _write_executor
+    if _write_executor is None:
+        with _write_executor_lock:
+            if _write_executor is None:
+                _write_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="qdrant-write")
+    return _write_executor
+
+
+class QdrantWriteBatch:
+    """
+    Unit of work for document writes.
+
+    Gathers the points store_document / store_structured_data / store_embeddings_exact
+    would write, for one document or many, and flush() sends one upsert per collection
+    (collections in parallel) instead of one request per point. link_application() is
+    folded into the pending cv_structured point, so linking costs no extra round trip.
+
+    With wait=False Qdrant acknowledges before applying; call barrier() (or leave the
+    `with` block) before reading the documents back.
+
+        with qdrant.write_batch() as batch:
+            batch.store_document(cv_id, "cv", ...)
+            batch.store_structured_data(cv_id, "cv", payload)
+            batch.store_embeddings_exact(cv_id, "cv", embeddings)
+            batch.link_application(cv_id, job_id, applicant_data, filename)
+    """
+
+    def __init__(self, qdrant: QdrantUtils, wait: bool = True):
+        self.qdrant = qdrant
+        self.wait = wait
+        self._points: Dict[str, Dict[Any, PointStruct]] = {}
+        self._linked_jobs: List[str] = []
+        # id of the last point written per collection since the last barrier
+        self._unconfirmed: Dict[str, Any] = {}
+
+    def _add(self, collection_name: str, point: PointStruct) -> "QdrantWriteBatch":
+        self._points.setdefault(collection_name, {})[point.id] = point
+        return self
+
+    def store_document(self, doc_id: str, doc_type: str, filename: str, file_format: str, raw_content: str,
+                       upload_date: str, file_path: Optional[str] = None,
+                       mime_type: Optional[str] = None) -> "QdrantWriteBatch":
+        return self._add(*QdrantUtils.document_point(
+            doc_id, doc_type, filename, file_format, raw_content, upload_date, file_path, mime_type,
+            raw_content_fields=QdrantUtils.store_raw_content(raw_content)))
+
+    def store_structured_data(self, doc_id: str, doc_type: str, structured_data: Dict[str, Any]) -> "QdrantWriteBatch":
+        return self._add(*QdrantUtils.structured_point(doc_id, doc_type, structured_data))
+
+    def store_embeddings_exact(self, doc_id: str, doc_type: str, embeddings_data: Dict[str, Any]) -> "QdrantWriteBatch":
+        return self._add(*QdrantUtils.embeddings_point(doc_id, doc_type, embeddings_data))
+
+    def link_application(self, application_id: str, job_id: str, applicant_data: Dict, cv_filename: str,
+                         application_date: Optional[str] = None) -> "QdrantWriteBatch":
+        """Same fields as QdrantUtils.link_application_to_job; the CV must be stored in this batch."""
+        point = self._points.get("cv_structured", {}).get(application_id)
+        if point is None:
+            raise ValueError(f"CV {application_id} is not part of this write batch")
+        point.payload.update(QdrantUtils.application_fields(job_id, applicant_data, cv_filename, application_date))
+        self._linked_jobs.append(job_id)
+        return self
+
+    def _flush_collection(self, collection_name: str, points: List[PointStruct]) -> None:
+        self.qdrant._upsert(collection_name, points, wait=self.wait)
+
+    @timed(QDRANT_LATENCY, operation="write_batch_flush")
+    def flush(self) -> Dict[str, int]:
+        """Write everything gathered so far; returns points written per collection."""
+        pending = {name: list(points.values()) for name, points in self._points.items() if points}
+        self._points = {}
+        if len(pending) == 1:
+            name, points = next(iter(pending.items()))
+            self._flush_collection(name, points)
+        elif pending:
+            futures = [_get_write_executor().submit(self._flush_collection, name, points)
+                       for name, points in pending.items()]
+            for future in futures:
+                future.result()
+        if not self.wait:
+            for name, points in pending.items():
+                self._unconfirmed[name] = points[-1].id
+
+        linked_jobs, self._linked_jobs = self._linked_jobs, []
+        for job_id in dict.fromkeys(linked_jobs):
+            self.qdrant._after_application_linked(job_id)
+        written = {name: len(points) for name, points in pending.items()}
+        logger.info(f"✅ Write batch flushed: {written}")
+        return written
+
+    def try_flush(self) -> bool:
+        """flush() reporting failure as False, like the single-point store_* methods."""
+        try:
+            self.flush()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Write batch flush failed: {e}")
+            return False
+
+    def barrier(self) -> None:
+        """
+        Block until wait=False writes are applied: send each collection an empty
+        set_payload (wait=True) filtered to the last point written. Qdrant applies a
+        collection's updates in order, so when that returns every earlier write is visible.
+        Merging an empty payload changes nothing, so edits made since the flush survive.
+        """
+        unconfirmed, self._unconfirmed = self._unconfirmed, {}
+        for name, point_id in unconfirmed.items():
+            self.qdrant.client.set_payload(
+                collection_name=name,
+                payload={},
+                points=Filter(must=[HasIdCondition(has_id=[point_id])]),
+                wait=True,
+            )
+
+    def __enter__(self) -> "QdrantWriteBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+            self.barrier()
+
+
 # Global singleton
 _qdrant_utils: Optional[QdrantUtils] = None
 
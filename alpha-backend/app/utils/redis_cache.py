@@ -7,8 +7,11 @@ Optimized for the CV matching application.
 import json
 import logging
 import os
+import threading
 import time
-from typing import Any, Dict, Optional, Union
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import redis
 from redis.exceptions import ConnectionError, RedisError, TimeoutError
@@ -111,8 +114,8 @@ class RedisCacheService:
             self.is_connected = False
             self.stats["fallback_used"] = True
     
-    def _get_namespaced_key(self, namespace: str, key: str) -> str:
-        """Create namespaced key for Redis."""
+    def namespaced_key(self, namespace: str, key: str) -> str:
+        """Create namespaced key for Redis (for callers issuing raw commands on redis_client)."""
         return f"cv_app:{namespace}:{key}"
     
     def _serialize_value(self, value: Any) -> str:
@@ -150,7 +153,7 @@ class RedisCacheService:
         Returns:
             True if successful, False otherwise
         """
-        namespaced_key = self._get_namespaced_key(namespace, key)
+        namespaced_key = self.namespaced_key(namespace, key)
         serialized_value = self._serialize_value(value)
         
         if self.is_connected:
@@ -182,7 +185,7 @@ class RedisCacheService:
         Returns:
             Cached value or None if not found
         """
-        namespaced_key = self._get_namespaced_key(namespace, key)
+        namespaced_key = self.namespaced_key(namespace, key)
         
         if self.is_connected:
             try:
@@ -217,9 +220,28 @@ class RedisCacheService:
         self.stats["misses"] += 1
         return None
     
+    def mget(self, keys: List[str], namespace: str = "default") -> List[Optional[Any]]:
+        """Values for `keys` in one round trip (None where missing), in order."""
+        if not keys:
+            return []
+        if self.is_connected:
+            try:
+                raw = self.redis_client.mget([self.namespaced_key(namespace, key) for key in keys])
+                values = [self._deserialize_value(v) if v is not None else None for v in raw]
+                hits = sum(1 for v in values if v is not None)
+                self.stats["hits"] += hits
+                self.stats["redis_hits"] += hits
+                self.stats["misses"] += len(values) - hits
+                return values
+            except (ConnectionError, TimeoutError, RedisError) as e:
+                logger.warning(f"Redis mget failed: {e}")
+                self.stats["errors"] += 1
+                self.is_connected = False
+        return [self.get(key, namespace) for key in keys]
+    
     def delete(self, key: str, namespace: str = "default") -> bool:
         """Delete a key from cache."""
-        namespaced_key = self._get_namespaced_key(namespace, key)
+        namespaced_key = self.namespaced_key(namespace, key)
         
         if self.is_connected:
             try:
@@ -236,7 +258,7 @@ class RedisCacheService:
     
     def clear_namespace(self, namespace: str) -> bool:
         """Clear all keys in a namespace."""
-        pattern = self._get_namespaced_key(namespace, "*")
+        pattern = self.namespaced_key(namespace, "*")
         
         if self.is_connected:
             try:
@@ -318,6 +340,172 @@ def get_redis_cache() -> RedisCacheService:
         _redis_cache = RedisCacheService()
     return _redis_cache
 
+def get_connected_redis_cache() -> Optional[RedisCacheService]:
+    """The shared Redis cache when it is connected, else None (never raises)."""
+    try:
+        cache = get_redis_cache()
+        return cache if cache.is_connected else None
+    except Exception:
+        return None
+
+
+# Without Redis, shared_lock() falls back to one of these, picked by name
+_LOCAL_LOCK_STRIPES = [threading.Lock() for _ in range(64)]
+
+
+@contextmanager
+def shared_lock(name: str, timeout_seconds: float = 10.0) -> Iterator[None]:
+    """
+    Mutual exclusion for `name` across workers: a Redis lock (released after
+    timeout_seconds at the latest; raises if not acquired within that time) when Redis
+    is connected, else a process-local lock.
+    """
+    cache = get_connected_redis_cache()
+    if cache is not None:
+        lock = cache.redis_client.lock(cache.namespaced_key("locks", name), timeout=timeout_seconds,
+                                       blocking_timeout=timeout_seconds)
+        with lock:
+            yield
+        return
+    with _LOCAL_LOCK_STRIPES[hash(name) % len(_LOCAL_LOCK_STRIPES)]:
+        yield
+
+
+class TwoTierCache:
+    """
+    Bounded in-process LRU in front of one Redis namespace.
+
+    Reads try the LRU, then Redis (and remember what they find); writes go to both.
+    Without Redis only the LRU is used. Redis holds `encode(value)` (JSON-safe) and
+    reads are passed through `decode`, so the LRU can keep ready-to-use objects.
+    Local entries may expire (`local_ttl_seconds`, or per entry) to bound staleness
+    across workers; `remember(key, None)` caches a negative result locally.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_local_entries: int = 10000,
+        ttl_seconds: Optional[int] = None,
+        local_ttl_seconds: Optional[float] = None,
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value,
+    ):
+        self.namespace = namespace
+        self.max_local_entries = max_local_entries
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = local_ttl_seconds
+        self._encode = encode
+        self._decode = decode
+        # key -> (expires_at or None, value)
+        self._local: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "local_hits": 0, "redis_hits": 0, "misses": 0, "stores": 0}
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+    def remember(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Put `value` in the local tier only."""
+        ttl = ttl_seconds if ttl_seconds is not None else self.local_ttl_seconds
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl if ttl else None, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def lookup_local(self, key: str) -> Tuple[bool, Any]:
+        """(found, value) from the local tier; a negative entry is (True, None)."""
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] is not None and entry[0] < time.monotonic():
+                del self._local[key]
+                return False, None
+            self._local.move_to_end(key)
+            return True, entry[1]
+
+    def _count(self, local_hits: int = 0, redis_hits: int = 0, misses: int = 0) -> None:
+        self.stats["local_hits"] += local_hits
+        self.stats["redis_hits"] += redis_hits
+        self.stats["hits"] += local_hits + redis_hits
+        self.stats["misses"] += misses
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        """(found, value) from either tier; a local negative entry is (True, None)."""
+        found, value = self.lookup_local(key)
+        if found:
+            self._count(local_hits=1)
+            return True, value
+        cache = get_connected_redis_cache()
+        if cache is not None:
+            try:
+                stored = cache.get(key, self.namespace)
+                if stored is not None:
+                    value = self._decode(stored)
+                    self.remember(key, value)
+                    self._count(redis_hits=1)
+                    return True, value
+            except Exception as e:
+                logger.warning(f"⚠️ {self.namespace} cache read failed: {e}")
+        self._count(misses=1)
+        return False, None
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.lookup(key)[1]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Values found for `keys` (misses are absent); local misses cost one MGET."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, Any] = {}
+        for key in keys:
+            hit, value = self.lookup_local(key)
+            if hit and value is not None:
+                found[key] = value
+        local_hits = len(found)
+        missing = [key for key in keys if key not in found]
+        cache = get_connected_redis_cache() if missing else None
+        if cache is not None:
+            try:
+                for key, stored in zip(missing, cache.mget(missing, self.namespace)):
+                    if stored is not None:
+                        found[key] = self._decode(stored)
+                        self.remember(key, found[key])
+            except Exception as e:
+                logger.warning(f"⚠️ {self.namespace} cache read failed: {e}")
+        self._count(local_hits=local_hits, redis_hits=len(found) - local_hits, misses=len(keys) - len(found))
+        return found
+
+    def set(self, key: str, value: Any) -> None:
+        self.remember(key, value)
+        self.stats["stores"] += 1
+        cache = get_connected_redis_cache()
+        if cache is not None:
+            try:
+                cache.set(key, self._encode(value), self.ttl_seconds, self.namespace)
+            except Exception as e:
+                logger.warning(f"⚠️ {self.namespace} cache write failed: {e}")
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._local.pop(key, None)
+        cache = get_connected_redis_cache()
+        if cache is not None:
+            try:
+                cache.delete(key, self.namespace)
+            except Exception as e:
+                logger.warning(f"⚠️ {self.namespace} cache delete failed: {e}")
+
+    def clear(self, shared: bool = False) -> None:
+        """Drop the local tier, and the Redis namespace too when `shared`."""
+        with self._lock:
+            self._local.clear()
+        cache = get_connected_redis_cache() if shared else None
+        if cache is not None:
+            cache.clear_namespace(self.namespace)
+
+
 # Convenience functions for common operations
 def cache_embedding(text: str, embedding: Any, ttl_seconds: int = 3600) -> bool:
     """Cache an embedding with 1-hour TTL."""
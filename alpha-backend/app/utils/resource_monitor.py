@@ -0,0 +1,133 @@
+"""
+Background resource monitor.
+
+A daemon thread samples CPU, memory and (when present) GPU memory every
+`interval` seconds and publishes an immutable ResourceSnapshot. Readers get the
+latest snapshot with a plain attribute read - no psutil call, no lock, no sleep -
+so hot loops (bulk matching, chunked /match) can check pressure per item.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ResourceSnapshot:
+    cpu_percent: float = 0.0
+    memory_percent: float = 0.0
+    memory_available_bytes: int = 0
+    gpu_memory_percent: float = 0.0
+    timestamp: float = 0.0
+
+    def is_stale(self, max_age: float) -> bool:
+        return time.monotonic() - self.timestamp > max_age
+
+    def under_pressure(self, max_cpu: float, max_memory: float) -> bool:
+        """True when CPU or memory is above the given percentages."""
+        return self.cpu_percent > max_cpu or self.memory_percent > max_memory
+
+
+class ResourceMonitor:
+    """
+    Samples system resources off the hot path.
+    `snapshot` is replaced atomically on each sample, so reads are O(1) and lock-free.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.snapshot = ResourceSnapshot()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.sample()  # prime the baseline so the first reader sees real numbers
+        self._thread = threading.Thread(target=self._run, name="resource-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"🛡️ Resource monitor started (every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> ResourceSnapshot:
+        try:
+            import psutil
+
+            memory = psutil.virtual_memory()
+            snapshot = ResourceSnapshot(
+                # interval=None: CPU time since the previous sample, no sleeping
+                cpu_percent=psutil.cpu_percent(interval=None),
+                memory_percent=memory.percent,
+                memory_available_bytes=memory.available,
+                gpu_memory_percent=self._gpu_memory_percent(),
+                timestamp=time.monotonic(),
+            )
+            self.snapshot = snapshot
+        except Exception as e:
+            logger.warning(f"⚠️ Resource sample failed: {e}")
+        return self.snapshot
+
+    @staticmethod
+    def _gpu_memory_percent() -> float:
+        try:
+            import torch
+            if not torch.cuda.is_available():
+                return 0.0
+            total = torch.cuda.get_device_properties(0).total_memory
+            return torch.cuda.memory_allocated(0) / total * 100.0 if total else 0.0
+        except Exception:
+            return 0.0
+
+    def wait_for_headroom(self, max_cpu: float, max_memory: float,
+                          max_wait: float = 5.0, poll: float = 0.25) -> bool:
+        """
+        Backpressure for worker threads: wait up to max_wait seconds for pressure to clear.
+        Returns True when there is headroom, False if still under pressure.
+        """
+        deadline = time.monotonic() + max_wait
+        while self.snapshot.under_pressure(max_cpu, max_memory):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    async def wait_for_headroom_async(self, max_cpu: float, max_memory: float,
+                                      max_wait: float = 5.0, poll: float = 0.25) -> bool:
+        """Event-loop friendly variant of wait_for_headroom()."""
+        deadline = time.monotonic() + max_wait
+        while self.snapshot.under_pressure(max_cpu, max_memory):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll)
+        return True
+
+
+_resource_monitor: Optional[ResourceMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_resource_monitor() -> ResourceMonitor:
+    """Get the global resource monitor, starting its thread on first use."""
+    global _resource_monitor
+    if _resource_monitor is None:
+        with _monitor_lock:
+            if _resource_monitor is None:
+                monitor = ResourceMonitor(interval=float(os.getenv("RESOURCE_MONITOR_INTERVAL", "1.0")))
+                monitor.start()
+                _resource_monitor = monitor
+    return _resource_monitor
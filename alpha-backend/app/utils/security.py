@@ -48,8 +48,10 @@ def verify_password(pw: str, pw_hash: str) -> bool:
         return False
 
 def create_access_token(sub: str, role: str) -> str:
-    exp = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRES_MIN)
-    payload = {"sub": sub, "role": role, "exp": exp, "alg": ALGO}  # Explicitly set algorithm
+    now = datetime.utcnow()
+    exp = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRES_MIN)
+    # iat identifies the token for the per-token user cache in deps/auth.py
+    payload = {"sub": sub, "role": role, "iat": now, "exp": exp, "alg": ALGO}  # Explicitly set algorithm
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGO)
 
 def decode_token(token: str) -> dict:
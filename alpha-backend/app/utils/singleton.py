@@ -0,0 +1,34 @@
+"""
+Lazily built process-wide instances.
+
+Services expose a get_*() accessor for their shared instance; lazy_singleton
+builds it on first use, exactly once even when several threads ask at the same time.
+"""
+
+import functools
+import threading
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def lazy_singleton(factory: Callable[[], T]) -> Callable[[], T]:
+    """Wrap a zero-argument factory so every call returns the instance built by its first call."""
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def get() -> T:
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    def reset() -> None:
+        """Forget the instance (tests); the next call builds a new one."""
+        with lock:
+            instance.clear()
+
+    get.reset = reset
+    return get
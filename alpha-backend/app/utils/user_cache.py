@@ -0,0 +1,192 @@
+"""
+Authenticated-user cache.
+
+get_current_user resolves the JWT subject against the auth DB on every request;
+progress-polling endpoints make that the bulk of our auth traffic. This keeps a
+short-TTL, size-bounded snapshot of the User row keyed by (username, token iat),
+so a poller hits the DB once per TTL instead of once per poll.
+
+Admin routes call invalidate() after changing a user. With Redis available the
+username is also published on a pub/sub channel, and every worker running the
+listener thread drops its own copy, so deactivation takes effect everywhere at once.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_INVALIDATION_CHANNEL = "auth:user-invalidate"
+
+
+class UserCache:
+    """
+    LRU + TTL map of (username, token key) -> user field snapshot.
+    Stores plain dicts, never ORM instances, so entries are not tied to a session.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 2048):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, username: str, token_key: Hashable) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        key = (username, token_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, username: str, token_key: Hashable, snapshot: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        key = (username, token_key)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, username: str) -> None:
+        """Drop every cached token for `username` in this process only."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == username]:
+                del self._entries[key]
+            self.stats["invalidations"] += 1
+
+    def invalidate(self, username: str) -> None:
+        """Drop `username` here and tell the other workers to do the same."""
+        self.discard(username)
+        _publish_invalidation(username)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _redis_client():
+    """The shared Redis client, or None when Redis is down or invalidation is disabled."""
+    if os.getenv("USER_CACHE_REDIS_INVALIDATION", "true").lower() != "true":
+        return None
+    try:
+        from app.utils.redis_cache import get_redis_cache
+
+        cache = get_redis_cache()
+        return cache.redis_client if cache.is_connected else None
+    except Exception:
+        return None
+
+
+def _publish_invalidation(username: str) -> None:
+    client = _redis_client()
+    if client is None:
+        return
+    try:
+        client.publish(USER_CACHE_INVALIDATION_CHANNEL, username)
+    except Exception as e:
+        logger.warning(f"⚠️ User cache invalidation publish failed: {e}")
+
+
+class UserCacheInvalidationListener:
+    """Daemon thread that applies invalidations published by other workers."""
+
+    def __init__(self, cache: UserCache):
+        self.cache = cache
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        if self._thread and self._thread.is_alive():
+            return True
+        client = _redis_client()
+        if client is None:
+            logger.info("ℹ️ User cache invalidation listener not started (Redis unavailable or disabled)")
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(client,), name="user-cache-invalidation", daemon=True)
+        self._thread.start()
+        logger.info(f"👤 User cache invalidation listener subscribed to {USER_CACHE_INVALIDATION_CHANNEL}")
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _run(self, client) -> None:
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(USER_CACHE_INVALIDATION_CHANNEL)
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self.cache.discard(str(message.get("data") or ""))
+            except Exception as e:
+                # Missed messages are bounded by the TTL; just resubscribe.
+                logger.warning(f"⚠️ User cache invalidation listener error: {e}")
+                self.cache.clear()
+                self._stop.wait(5.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+
+_user_cache: Optional[UserCache] = None
+_user_cache_listener: Optional[UserCacheInvalidationListener] = None
+_user_cache_lock = threading.Lock()
+
+
+def get_user_cache() -> UserCache:
+    """Get the global user cache."""
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                _user_cache = UserCache(
+                    ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "30")),
+                    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "2048")),
+                )
+    return _user_cache
+
+
+def get_user_cache_listener() -> UserCacheInvalidationListener:
+    """Get the global invalidation listener (not started until start() is called)."""
+    global _user_cache_listener
+    if _user_cache_listener is None:
+        cache = get_user_cache()
+        with _user_cache_lock:
+            if _user_cache_listener is None:
+                _user_cache_listener = UserCacheInvalidationListener(cache)
+    return _user_cache_listener
+
+
+def invalidate_cached_user(username: Optional[str]) -> None:
+    """Drop a user's cached auth state on every worker (call after changing the user)."""
+    if username:
+        get_user_cache().invalidate(username)
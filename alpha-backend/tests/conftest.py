@@ -61,6 +61,10 @@ def test_client(db_session, db_engine) -> TestClient:
     
     app.dependency_overrides[get_session] = override_get_session
     
+    # Each test has its own auth DB; don't let cached users leak between them
+    from app.utils.user_cache import get_user_cache
+    get_user_cache().clear()
+    
     client = TestClient(app)
     yield client
     
@@ -152,6 +156,20 @@ def mock_email_service():
     return mock_service
 
 
+@pytest.fixture(autouse=True)
+def document_blob_store(tmp_path, monkeypatch):
+    """Raw document blobs go to a per-test directory."""
+    from app.services import document_blobs
+    from app.services.s3_storage import S3StorageService
+
+    monkeypatch.setenv("LOCAL_STORAGE_DIR", str(tmp_path / "storage"))
+    document_blobs.get_document_blob_store.reset()
+    store = document_blobs.get_document_blob_store()
+    store._storage = S3StorageService()
+    yield store
+    document_blobs.get_document_blob_store.reset()
+
+
 @pytest.fixture(autouse=True)
 def reset_environment(monkeypatch):
     """Reset environment variables before each test."""
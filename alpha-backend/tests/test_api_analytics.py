@@ -0,0 +1,108 @@
+"""
+Tests for the API analytics middleware.
+
+Tests cover:
+- Route-template keying (no per-id cardinality growth)
+- Histogram percentile estimation
+- Endpoint cap
+- Prometheus export
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.api_analytics import (
+    APIAnalyticsMiddleware,
+    EndpointStats,
+    OVERFLOW_ROUTE,
+    UNMATCHED_ROUTE,
+    get_analytics_middleware,
+)
+
+
+def _build_app(**kwargs):
+    app = FastAPI()
+
+    @app.get("/api/cv/{cv_id}")
+    async def get_cv(cv_id: str):
+        return {"id": cv_id}
+
+    app.add_middleware(APIAnalyticsMiddleware, **kwargs)
+    return app
+
+
+class TestEndpointKeying:
+    """Stats are keyed by method and route template"""
+
+    def test_keyed_by_route_template(self):
+        """Different ids for the same route share one entry"""
+        client = TestClient(_build_app())
+        for cv_id in ("a", "b", "c"):
+            assert client.get(f"/api/cv/{cv_id}").status_code == 200
+
+        analytics = get_analytics_middleware()
+        assert list(analytics.endpoint_stats) == ["GET /api/cv/{cv_id}"]
+        assert analytics.endpoint_stats["GET /api/cv/{cv_id}"].call_count == 3
+
+    def test_unmatched_requests_share_one_key(self):
+        """404s do not create one entry per path"""
+        client = TestClient(_build_app())
+        client.get("/nope/1")
+        client.get("/nope/2")
+
+        stats = get_analytics_middleware().endpoint_stats[f"GET {UNMATCHED_ROUTE}"]
+        assert stats.call_count == 2
+        assert stats.error_count == 2
+
+    def test_endpoint_cap(self):
+        """Keys beyond max_endpoints fold into the overflow entry"""
+        analytics = APIAnalyticsMiddleware(None, max_endpoints=2)
+        for i in range(5):
+            analytics._update_stats(f"GET /r{i}", 0.01, 10, 200)
+
+        assert len(analytics.endpoint_stats) == 3
+        assert analytics.endpoint_stats[OVERFLOW_ROUTE].call_count == 3
+        assert analytics.total_requests == 5
+
+
+class TestHistogram:
+    """Fixed-bucket latency histogram"""
+
+    def test_percentiles(self):
+        """Percentiles land in the right buckets"""
+        stats = EndpointStats()
+        for _ in range(90):
+            stats.observe(0.003, 0, 200, 1.0)
+        for _ in range(10):
+            stats.observe(2.0, 0, 200, 1.0)
+
+        assert stats.percentile(0.50) <= 0.005
+        assert 1.0 < stats.percentile(0.95) <= 2.5
+        assert 1.0 < stats.percentile(0.99) <= 2.5
+
+    def test_empty_percentile(self):
+        """No observations yields zero"""
+        assert EndpointStats().percentile(0.99) == 0.0
+
+    def test_prometheus_export(self):
+        """Buckets are cumulative and end with +Inf == count"""
+        analytics = APIAnalyticsMiddleware(None)
+        analytics._update_stats("GET /api/cv/{cv_id}", 0.02, 100, 200)
+        analytics._update_stats("GET /api/cv/{cv_id}", 0.2, 100, 500)
+
+        lines = analytics.render_prometheus()
+        labels = 'method="GET",route="/api/cv/{cv_id}"'
+        assert f'http_request_duration_seconds_bucket{{{labels},le="0.025"}} 1' in lines
+        assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+        assert f"http_request_duration_seconds_count{{{labels}}} 2" in lines
+        assert f"http_request_errors_total{{{labels}}} 1" in lines
+
+    def test_summary_includes_percentiles(self):
+        """Summary exposes p50/p95/p99"""
+        analytics = APIAnalyticsMiddleware(None)
+        analytics._update_stats("GET /x", 0.02, 100, 200)
+
+        entry = analytics.get_analytics_summary()["endpoint_analytics"]["GET /x"]
+        assert entry["call_count"] == 1
+        assert {"p50_response_time_ms", "p95_response_time_ms", "p99_response_time_ms"} <= set(entry)
+        assert entry["last_called"] is not None
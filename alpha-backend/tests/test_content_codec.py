@@ -0,0 +1,106 @@
+"""
+Tests for raw content codecs (app/utils/content_codec.py).
+
+Tests cover:
+- zstd round trip with the codec tag in the payload
+- Documents without a codec tag still decode as gzip
+- Trained dictionaries: tagged by dict id, smaller on short CV text
+- Benchmark rows for gzip vs zstd
+- gzip fallback when zstd is configured off
+"""
+import base64
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import content_codec
+from app.utils.content_codec import (
+    GzipCodec,
+    ZstdCodec,
+    benchmark,
+    content_fields,
+    decode_content,
+    register_codec,
+    train_dictionary,
+)
+from app.utils.qdrant_utils import QdrantUtils, get_decompressed_content
+
+SKILLS = ["Python", "SQL", "Kubernetes", "Terraform", "React", "Airflow", "Spark", "Go", "Kafka", "AWS"]
+
+
+def _cv(i):
+    skills = ", ".join(SKILLS[(i + k) % len(SKILLS)] for k in range(4))
+    return (
+        f"Candidate {i}\nProfessional Summary\nSoftware engineer with {i % 12 + 1} years of experience "
+        f"building data platforms.\nSkills: {skills}\nExperience\nSenior Engineer at Company {i}, "
+        f"Dubai (20{10 + i % 14} - Present)\n- Designed ETL pipelines\n- Led a team of {i % 7 + 2}\n"
+        "Education\nBSc Computer Science\n"
+    )
+
+
+CORPUS = [_cv(i) for i in range(200)]
+
+
+@pytest.fixture(autouse=True)
+def default_codec():
+    with patch.object(content_codec, "_default_codec", None):
+        yield
+
+
+class TestCodecs:
+    """Encoding and decoding"""
+
+    def test_zstd_round_trip_tagged(self):
+        fields = content_fields("Hello CV ✓")
+        assert fields["raw_content_codec"] == "zstd"
+        assert fields["raw_content_compressed"] is True
+        assert get_decompressed_content(fields) == "Hello CV ✓"
+
+    def test_untagged_gzip_still_decodes(self):
+        """Documents written before codecs existed"""
+        payload = {"raw_content": base64.b64encode(gzip.compress(b"old cv")).decode(), "raw_content_compressed": True}
+        assert get_decompressed_content(payload) == "old cv"
+        assert get_decompressed_content({"raw_content": "plain"}) == "plain"
+
+    def test_gzip_configured(self, monkeypatch):
+        monkeypatch.setenv("CONTENT_CODEC", "gzip")
+        fields = content_fields("text")
+        assert fields["raw_content_codec"] == "gzip"
+        assert decode_content(fields["raw_content"], "gzip") == "text"
+
+    def test_unknown_codec_returns_input(self):
+        assert decode_content("abc", "brotli") == "abc"
+
+    def test_store_document_tags_codec(self):
+        _, point = QdrantUtils.document_point("d1", "cv", "a.pdf", "pdf", "raw text", "2026-01-01")
+        assert point.payload["raw_content_codec"] == "zstd"
+        assert get_decompressed_content(point.payload) == "raw text"
+
+
+class TestDictionary:
+    """Trained zstd dictionaries"""
+
+    def test_dictionary_codec(self, tmp_path, monkeypatch):
+        dictionary = train_dictionary(CORPUS[::2], size=8 * 1024)
+        path = tmp_path / "cv.dict"
+        path.write_bytes(dictionary)
+        monkeypatch.setenv("CONTENT_ZSTD_DICT", str(path))
+
+        fields = content_fields(CORPUS[1])
+        assert fields["raw_content_codec"].startswith("zstd:")
+        assert get_decompressed_content(fields) == CORPUS[1]
+        assert len(fields["raw_content"]) < len(content_codec.encode_content(CORPUS[1], ZstdCodec())[0])
+
+
+class TestBenchmark:
+    """gzip+base64 vs zstd"""
+
+    def test_rows(self):
+        dictionary_codec = ZstdCodec(dictionary=train_dictionary(CORPUS[::2], size=8 * 1024))
+        register_codec(dictionary_codec)
+        rows = {row["codec"]: row for row in benchmark(CORPUS, [GzipCodec(), ZstdCodec(), dictionary_codec], rounds=1)}
+        assert rows["gzip"]["documents"] == len(CORPUS)
+        assert rows["zstd"]["stored_bytes"] < rows["gzip"]["stored_bytes"]
+        assert rows[dictionary_codec.name]["stored_bytes"] < rows["zstd"]["stored_bytes"]
+        assert all(row["decode_us_per_doc"] > 0 for row in rows.values())
@@ -0,0 +1,137 @@
+"""
+Tests for raw document bodies stored as blobs (app/services/document_blobs.py).
+
+Tests cover:
+- New documents reference a content-addressed blob instead of carrying the body
+- Identical bodies share one blob; reads go through the LRU
+- Inline fallback when blobs are off or the write fails; inline payloads still read
+- A missing blob raises MissingBlobError
+- Migration v5 moves inline bodies into blobs
+"""
+import os
+from unittest.mock import MagicMock, Mock
+
+import pytest
+
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import PointStruct
+
+from app.services.document_blobs import DocumentBlobStore, MissingBlobError, content_hash
+from app.utils.content_codec import content_fields
+from app.utils.qdrant_migrations import BlobRawContent, MigrationRunner
+from app.utils.qdrant_utils import QdrantUtils, get_decompressed_content
+
+CV_TEXT = "Jane Doe\nData Engineer\nPython, SQL, Airflow\n" * 20
+
+
+class TestDocumentPoint:
+    """store_document payloads"""
+
+    def _store(self, doc_id, filename, text):
+        qdrant = QdrantUtils.__new__(QdrantUtils)
+        qdrant._use_pool, qdrant._client = False, MagicMock()
+        assert qdrant.store_document(doc_id, "cv", filename, "pdf", text, "2026-01-01")
+        return qdrant.client.upsert.call_args.kwargs["points"][0].payload
+
+    def test_payload_holds_reference(self, document_blob_store):
+        payload = self._store("d1", "cv.pdf", CV_TEXT)
+        assert "raw_content" not in payload
+        assert payload["raw_content_blob"].startswith(payload["content_hash"])
+        assert document_blob_store.storage.blob_exists(payload["raw_content_blob"])
+        assert get_decompressed_content(payload) == CV_TEXT
+
+    def test_identical_bodies_share_blob(self, document_blob_store):
+        first = self._store("d1", "a.pdf", CV_TEXT)
+        second = self._store("d2", "b.pdf", CV_TEXT)
+        assert first["raw_content_blob"] == second["raw_content_blob"]
+        blob_dir = os.path.join(document_blob_store.storage.base_dir, "blobs")
+        assert sum(len(files) for _, _, files in os.walk(blob_dir)) == 1
+
+    def test_point_builder_writes_nothing(self, document_blob_store):
+        """document_point only builds the point; without blob fields the body stays inline"""
+        payload = QdrantUtils.document_point("d1", "cv", "cv.pdf", "pdf", CV_TEXT, "2026-01-01")[1].payload
+        assert "raw_content_blob" not in payload
+        assert not os.path.exists(os.path.join(document_blob_store.storage.base_dir, "blobs"))
+        assert get_decompressed_content(payload) == CV_TEXT
+
+    def test_blobs_off(self, monkeypatch):
+        monkeypatch.setenv("DOCUMENT_BLOBS", "off")
+        payload = self._store("d1", "jd.txt", "text")
+        assert "raw_content_blob" not in payload
+        assert get_decompressed_content(payload) == "text"
+
+
+class TestDownload:
+    """GET /cvs/{id}/download for blob-backed CVs"""
+
+    def test_blob_cv_exports_text(self, document_blob_store):
+        import asyncio
+        from types import SimpleNamespace
+        from unittest.mock import patch
+
+        from app.routes import cv_routes
+
+        payload = {"filename": "cv.txt", **document_blob_store.raw_content_fields(CV_TEXT)}
+        client = MagicMock()
+        client.retrieve.side_effect = lambda collection, **kw: (
+            [SimpleNamespace(payload=payload)] if collection == "cv_documents" else [])
+        with patch.object(cv_routes, "get_qdrant_utils", return_value=SimpleNamespace(client=client)):
+            response = asyncio.run(cv_routes.download_cv("d1"))
+
+        assert response.headers["content-disposition"] == 'attachment; filename="cv.txt"'
+        # the stored body is there, so the job-application filename lookup is skipped
+        structured_reads = [c for c in client.retrieve.call_args_list if c.args[0] == "cv_structured"]
+        assert len(structured_reads) == 1
+
+
+class TestDocumentBlobStore:
+    """Reads and failures"""
+
+    def test_lru_reads(self):
+        storage = Mock()
+        store = DocumentBlobStore(storage=storage, max_cache_bytes=2000)
+        fields = store.put(CV_TEXT)
+        store.clear_cache()
+        storage.get_blob.return_value = storage.put_blob.call_args[0][1]
+
+        assert store.get(fields["raw_content_blob"], fields["raw_content_codec"]) == CV_TEXT
+        assert store.get(fields["raw_content_blob"], fields["raw_content_codec"]) == CV_TEXT
+        assert storage.get_blob.call_count == 1
+        assert store.stats["hits"] == 1
+
+    def test_lru_evicts(self):
+        store = DocumentBlobStore(storage=Mock(), max_cache_bytes=len(CV_TEXT) + 10)
+        first = store.put(CV_TEXT)["raw_content_blob"]
+        store.put(CV_TEXT + "x")
+        assert first not in store._cache
+        assert store._cache_bytes <= store.max_cache_bytes
+
+    def test_write_failure_inline(self):
+        storage = Mock()
+        storage.put_blob.side_effect = OSError("disk full")
+        fields = DocumentBlobStore(storage=storage).raw_content_fields(CV_TEXT)
+        assert "raw_content_blob" not in fields
+        assert get_decompressed_content(fields) == CV_TEXT
+
+    def test_missing_blob_raises(self):
+        with pytest.raises(MissingBlobError) as excinfo:
+            get_decompressed_content({"raw_content_blob": "0" * 32 + ".zstd", "raw_content_codec": "zstd"})
+        assert excinfo.value.key == "0" * 32 + ".zstd"
+
+
+class TestBlobMigration:
+    """v5: inline bodies → blobs"""
+
+    def test_moves_inline_bodies(self, document_blob_store):
+        client = QdrantClient(":memory:")
+        client.create_collection("cv_documents", vectors_config={})
+        client.upsert("cv_documents", [
+            PointStruct(id=1, vector={}, payload={"content_hash": content_hash(CV_TEXT), **content_fields(CV_TEXT)}),
+        ])
+        MigrationRunner(client).migrate_collection(BlobRawContent(), "cv_documents")
+
+        payload = client.retrieve("cv_documents", [1])[0].payload
+        assert "raw_content" not in payload
+        document_blob_store.clear_cache()
+        assert get_decompressed_content(payload) == CV_TEXT
+        assert MigrationRunner(client).migrate_collection(BlobRawContent(), "cv_documents").skipped
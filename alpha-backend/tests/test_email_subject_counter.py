@@ -0,0 +1,104 @@
+"""
+Tests for atomic email subject counters (app/services/email_subject_counter.py).
+
+Tests cover:
+- Counter row seeded once from existing postings, then UPDATE ... RETURNING increments
+- Concurrent allocations never collide
+- The seed includes the legacy Redis counter; a Redis failover round trip issues no duplicates
+- Seeding scan pages through postings and parses ABBR-YEAR-NNN ids
+"""
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import create_engine
+
+from app.services.email_subject_counter import EmailSubjectCounter, highest_subject_counter
+
+
+def _redis_cache(values):
+    """Connected Redis cache whose client only knows GET."""
+    client = MagicMock()
+    client.get.side_effect = lambda key: values.get(key)
+    return SimpleNamespace(redis_client=client, namespaced_key=lambda ns, key: f"cv_app:{ns}:{key}")
+
+
+@pytest.fixture
+def engine():
+    return create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+
+@pytest.fixture
+def no_redis():
+    with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=None):
+        yield
+
+
+class TestDatabaseCounter:
+    """Counter row"""
+
+    def test_allocates_from_seed(self, engine, no_redis):
+        seed = MagicMock(return_value=4)
+        counter = EmailSubjectCounter(engine=engine, seed=seed)
+        assert [counter.next("qa", 2026) for _ in range(3)] == [5, 6, 7]
+        assert counter.next("QA", 2027) == 5
+        # once per (abbreviation, year) row
+        assert seed.call_count == 2
+
+    def test_concurrent_unique(self, tmp_path, no_redis):
+        engine = create_engine(f"sqlite:///{tmp_path / 'counter.db'}", connect_args={"timeout": 30})
+        counter = EmailSubjectCounter(engine=engine, seed=lambda a, y: 0)
+        counter.next("DE", 2026)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(counter.next("DE", 2026))) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(results) == list(range(2, 22))
+
+    def test_seed_includes_legacy_redis_counter(self, engine):
+        """Ids the old Redis counter allocated (posted or not) are not reissued"""
+        legacy = {"cv_app:email_subject_counter:SE:2026": "9"}
+        counter = EmailSubjectCounter(engine=engine, seed=lambda a, y: 3)
+        with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=_redis_cache(legacy)):
+            assert counter.next("SE", 2026) == 10
+
+    def test_failover_round_trip_no_duplicates(self, engine):
+        """Redis up -> down -> up across workers never hands out an id twice"""
+        legacy = {"cv_app:email_subject_counter:SE:2026": "5"}
+        workers = [EmailSubjectCounter(engine=engine, seed=lambda a, y: 0) for _ in range(2)]
+        issued = []
+        for redis_up in (True, False, True, False):
+            cache = _redis_cache(legacy) if redis_up else None
+            with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=cache):
+                for worker in workers:
+                    issued.extend(worker.next("SE", 2026) for _ in range(3))
+        assert len(issued) == len(set(issued)) == 24
+        assert min(issued) == 6
+
+    def test_database_error_propagates(self, no_redis):
+        """Callers fall back to scanning postings rather than guessing"""
+        engine = MagicMock()
+        engine.begin.side_effect = RuntimeError("db down")
+        with pytest.raises(RuntimeError):
+            EmailSubjectCounter(engine=engine, seed=lambda a, y: 0).next("SE", 2026)
+
+
+class TestSeedScan:
+    """highest_subject_counter"""
+
+    def test_pages_and_parses(self):
+        pages = [
+            ([SimpleNamespace(payload={"email_subject_id": "SE-2026-004"}),
+              SimpleNamespace(payload={"email_subject_id": "SE-2025-099"})], "next"),
+            ([SimpleNamespace(payload={"email_subject_id": "SE-2026-012"}),
+              SimpleNamespace(payload={"email_subject_id": "SE-2026-bad"}),
+              SimpleNamespace(payload={})], None),
+        ]
+        qdrant = SimpleNamespace(client=MagicMock())
+        qdrant.client.scroll.side_effect = pages
+        assert highest_subject_counter(qdrant, "SE", 2026) == 12
+        assert qdrant.client.scroll.call_args_list[1].kwargs["offset"] == "next"
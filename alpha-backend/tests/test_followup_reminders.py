@@ -0,0 +1,104 @@
+"""
+Tests for the follow-up reminder run (app/services/followup_reminder_scheduler.py).
+
+Tests cover:
+- Option/person lookups preloaded in one query
+- Recipient sets built in memory
+- Bounded concurrent sending
+- One commit for the whole run
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlmodel import Session, create_engine
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.models.tracker.base import tracker_metadata
+from app.models.tracker.models import TrackerFollowUp, TrackerOption
+from app.services import followup_reminder_scheduler as scheduler
+
+
+@pytest.fixture
+def tracker_engine():
+    """In-memory SQLite tracker database with options and due follow-ups."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    tracker_metadata.create_all(engine)
+    old, new = datetime(2024, 1, 1), datetime(2024, 6, 1)
+    with Session(engine) as session:
+        session.add_all([
+            TrackerOption(kind="followup_reminder_send_time", value="00:00"),
+            TrackerOption(kind="followup_email_to", value="old@x.com", updated_at=old),
+            TrackerOption(kind="followup_email_to", value="lead@x.com", updated_at=new),
+            TrackerOption(kind="followup_email_cc", value="cc@x.com; CC@x.com"),
+            TrackerOption(kind="recruiter", value="Rita", email="rita@x.com"),
+            TrackerOption(kind="account_manager", value="Adam", email="adam@x.com"),
+            TrackerOption(kind="account_manager", value="Off", email="off@x.com", email_enabled=False),
+        ])
+        yesterday = date.today() - timedelta(days=1)
+        for i in range(6):
+            session.add(TrackerFollowUp(
+                id=f"f{i}",
+                client_name=f"Client {i}",
+                recruiter_name="Rita",
+                account_manager="Off" if i == 5 else "Adam",
+                current_stage="Feedback Pending" if i != 4 else "Interview",
+                next_follow_up_date=yesterday,
+            ))
+        session.commit()
+    return engine
+
+
+class TestFollowupReminderRun:
+    """Batched reminder run"""
+
+    def test_team_options_latest_wins(self, tracker_engine):
+        """Preloaded options keep the most recently updated value"""
+        with Session(tracker_engine) as session:
+            options = scheduler._load_team_options(session, team="dubai")
+        assert options.value("followup_email_to") == "lead@x.com"
+        assert options.person_email("recruiter", " Rita ") == ("rita@x.com", True)
+        assert options.person_email("recruiter", "Nobody") == (None, True)
+        assert options.person_email("account_manager", "Off") == ("off@x.com", False)
+
+    def test_run_sends_concurrently_and_commits_once(self, tracker_engine):
+        """Four due rows are sent with bounded concurrency, one query per lookup table"""
+        in_flight = 0
+        peak = 0
+        sent_to = []
+
+        async def fake_send(*, to_emails, cc_emails, subject, body_html):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            sent_to.append((to_emails, cc_emails))
+            return True
+
+        statements = []
+        with Session(tracker_engine) as session:
+            event.listen(tracker_engine, "before_cursor_execute",
+                         lambda *args: statements.append(args[2]))
+            with patch.object(scheduler, "send_followup_reminder_email", side_effect=fake_send), \
+                 patch.object(scheduler, "is_followup_email_reminder_enabled", return_value=True), \
+                 patch.object(scheduler, "FOLLOWUP_REMINDER_SEND_CONCURRENCY", 2), \
+                 patch.object(session, "commit", wraps=session.commit) as commit:
+                result = asyncio.run(
+                    scheduler._run_followup_reminders_for_team(session, team="dubai", tz_name="UTC")
+                )
+            run_statements = list(statements)
+
+            assert result == {"enabled": True, "team": "dubai", "sent": 4, "skipped": 2}
+            assert peak == 2
+            assert commit.call_count == 1
+            assert session.get(TrackerFollowUp, "f0").reminder_last_sent_at is not None
+            assert session.get(TrackerFollowUp, "f5").reminder_last_sent_at is None
+
+        selects = [s for s in run_statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 2  # options + due follow-ups
+        assert sent_to[0] == ("lead@x.com", "cc@x.com, rita@x.com, adam@x.com")
@@ -0,0 +1,306 @@
+"""
+Tests for Batch API reprocessing (app/services/llm_batch_service.py).
+
+A local HTTP server stands in for the OpenAI Files and Batches endpoints.
+
+Tests cover:
+- Request lines carry the same body as a live chat completion; cached documents skip the batch
+- Submit, poll, validate and cache results; failed lines are reported, not written
+- Results replace structured_info (keeping HR notes) with a fresh stored_at; embeddings written in batches
+- Existing structured points are patched per document under its notes lock (no deadlock without Redis)
+- Failed batches mark their documents failed; the admin job endpoints
+"""
+import email.parser
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.llm_batch_service import BatchDocument, LLMBatchReprocessor, OpenAIBatchClient
+
+
+class MockBatchServer:
+    """In-memory Files + Batches API; a batch completes after `polls_until_done` polls."""
+
+    def __init__(self, polls_until_done=2, fail_marker="FAIL ME", batch_status="completed"):
+        self.files, self.batches, self.requests = {}, {}, []
+        self.polls_until_done = polls_until_done
+        self.fail_marker = fail_marker
+        self.batch_status = batch_status
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _json(self, obj, status=200):
+                body = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _text(self, text):
+                body = text.encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                server.requests.append(("POST", self.path, self.headers.get("Authorization")))
+                if self.path == "/v1/files":
+                    message = email.parser.BytesParser().parsebytes(
+                        f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body)
+                    parts = {p.get_param("name", header="content-disposition"): p.get_payload(decode=True)
+                             for p in message.get_payload()}
+                    file_id = f"file-{len(server.files) + 1}"
+                    server.files[file_id] = parts["file"].decode()
+                    return self._json({"id": file_id, "purpose": parts["purpose"].decode()})
+                if self.path == "/v1/batches":
+                    request = json.loads(body)
+                    batch_id = f"batch-{len(server.batches) + 1}"
+                    server.batches[batch_id] = {"id": batch_id, "status": "validating", "polls": 0,
+                                                "input_file_id": request["input_file_id"]}
+                    return self._json({"id": batch_id, "status": "validating"})
+                self._json({"error": "not found"}, 404)
+
+            def do_GET(self):
+                server.requests.append(("GET", self.path, self.headers.get("Authorization")))
+                parts = self.path.strip("/").split("/")
+                if parts[1] == "batches":
+                    return self._json(server.poll(parts[2]))
+                if parts[1] == "files" and parts[-1] == "content":
+                    return self._text(server.files[parts[2]])
+                self._json({"error": "not found"}, 404)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def poll(self, batch_id):
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] < self.polls_until_done:
+            batch["status"] = "in_progress"
+        elif "output_file_id" not in batch:
+            batch["status"] = self.batch_status
+            if self.batch_status == "completed":
+                self._complete(batch)
+        return {k: v for k, v in batch.items() if k != "polls"}
+
+    def _complete(self, batch):
+        output, errors = [], []
+        for raw in self.files[batch["input_file_id"]].splitlines():
+            request = json.loads(raw)
+            prompt = request["body"]["messages"][0]["content"]
+            if self.fail_marker in prompt:
+                errors.append({"custom_id": request["custom_id"], "error": None,
+                               "response": {"status_code": 500, "body": {"error": {"message": "boom"}}}})
+                continue
+            name = prompt.rsplit("CONTENT:\n", 1)[-1].split("\n")[0]
+            content = json.dumps({"name": name, "job_title": "Engineer", "years_of_experience": 4,
+                                  "skills_sentences": ["python programming", "python programming", "sql"],
+                                  "responsibility_sentences": ["data pipelines"]})
+            output.append({"custom_id": request["custom_id"], "error": None, "response": {
+                "status_code": 200,
+                "body": {"model": request["body"]["model"], "system_fingerprint": "fp_1",
+                         "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+                         "choices": [{"message": {"content": content}}]}}})
+        batch["output_file_id"] = f"file-out-{batch['id']}"
+        self.files[batch["output_file_id"]] = "\n".join(json.dumps(line) for line in output)
+        if errors:
+            batch["error_file_id"] = f"file-err-{batch['id']}"
+            self.files[batch["error_file_id"]] = "\n".join(json.dumps(line) for line in errors)
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+@pytest.fixture
+def llm(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path / "llm_cache"))
+    from app.services.llm_service import LLMService
+
+    return LLMService()
+
+
+@pytest.fixture
+def server():
+    mock = MockBatchServer()
+    yield mock
+    mock.close()
+
+
+def _reprocessor(llm, server, **kwargs):
+    qdrant = MagicMock()
+    embeddings = MagicMock()
+    embeddings.generate_document_embeddings.side_effect = lambda std: {"skill_vectors": [[1.0]], "for": std["name"]}
+    reprocessor = LLMBatchReprocessor(
+        llm=llm, client=OpenAIBatchClient(api_key="sk-test", base_url=server.url), qdrant=qdrant,
+        embedding_service=embeddings, poll_interval=0.01, **kwargs)
+    # every document already has a structured point carrying an HR note
+    qdrant.client.retrieve.side_effect = lambda collection, ids, **kw: [
+        SimpleNamespace(id=i, payload={"structured_info": {"hr_notes": [{"hr_user": "hr1"}]}}) for i in ids]
+    return reprocessor, qdrant
+
+
+DOCS = [BatchDocument(f"cv-{i}", "cv", f"Candidate {i}\nPython and SQL", f"cv{i}.pdf") for i in range(5)]
+
+
+class TestBuildRequests:
+    """JSONL request lines"""
+
+    def test_same_body_as_live_call(self, llm):
+        lines, prepared, cached = LLMBatchReprocessor(llm=llm, client=MagicMock()).build_requests(DOCS[:1])
+        norm = llm._prepare_text("cv", DOCS[0].raw_text)
+        assert lines[0]["custom_id"] == "cv:cv-0"
+        assert lines[0]["url"] == "/v1/chat/completions"
+        assert lines[0]["body"] == llm._request_body(llm._build_cv_prompt(norm))
+        assert prepared["cv:cv-0"][2] == llm._hash_key("cv", norm)
+        assert cached == {}
+
+    def test_cached_documents_skipped(self, llm):
+        norm = llm._prepare_text("cv", DOCS[0].raw_text)
+        llm._cache_put(llm._hash_key("cv", norm), {"name": "cached"})
+        lines, _, cached = LLMBatchReprocessor(llm=llm, client=MagicMock()).build_requests(DOCS[:2])
+        assert [line["custom_id"] for line in lines] == ["cv:cv-1"]
+        assert cached == {"cv:cv-0": {"name": "cached"}}
+
+
+class TestRun:
+    """End to end against the mock server"""
+
+    def test_standardizes_and_writes(self, llm, server):
+        docs = DOCS + [BatchDocument("cv-bad", "cv", "FAIL ME\nnothing", "bad.pdf")]
+        reprocessor, qdrant = _reprocessor(llm, server, max_requests_per_batch=4, write_batch_size=3)
+        summary = reprocessor.run(docs, job_id="job-1")
+
+        assert summary["submitted"] == 6
+        assert len(summary["batch_ids"]) == 2
+        assert summary["written"] == 5
+        assert list(summary["failed"]) == ["cv:cv-bad"]
+        assert all(auth == "Bearer sk-test" for _, _, auth in server.requests)
+
+        patched = {}
+        for call in qdrant.set_payload_fields.call_args_list:
+            assert call.args[0] == "cv_structured" and call.kwargs.get("key") is None
+            patched[call.args[1]] = call.args[2]
+        assert sorted(patched) == [f"cv-{i}" for i in range(5)]
+        # structured_info is replaced whole (notes carried over) and stored_at moves
+        assert all(set(fields) == {"structured_info", "stored_at"} for fields in patched.values())
+        std = patched["cv-2"]["structured_info"]
+        assert std["hr_notes"] == [{"hr_user": "hr1"}]
+        assert std["name"] == "Candidate 2"
+        # validated: de-duplicated, ordered by source occurrence, padded to 20
+        assert std["skills_sentences"][:2] == ["sql", "python programming"]
+        assert len(std["skills_sentences"]) == 20
+        assert std["processing_metadata"]["batch_id"].startswith("batch-")
+        assert qdrant.write_batch.return_value.store_embeddings_exact.call_count == 5
+        assert qdrant.write_batch.return_value.flush.call_count == 2
+
+        # Results are cached: a re-run submits nothing new except the failed document
+        again = reprocessor.run(docs)
+        assert again["cached"] == 5 and again["submitted"] == 1
+
+    def test_failed_batch(self, llm):
+        server = MockBatchServer(polls_until_done=1, batch_status="expired")
+        try:
+            reprocessor, qdrant = _reprocessor(llm, server)
+            summary = reprocessor.run(DOCS[:2])
+        finally:
+            server.close()
+        assert sorted(summary["failed"]) == ["cv:cv-0", "cv:cv-1"]
+        assert summary["written"] == 0
+        qdrant.set_payload_fields.assert_not_called()
+
+    def test_missing_structured_points_written_whole(self, llm, server):
+        """Points missing from *_structured are written whole"""
+        reprocessor, qdrant = _reprocessor(llm, server)
+        qdrant.client.retrieve.side_effect = lambda collection, ids, **kw: [
+            SimpleNamespace(id=i, payload={"structured_info": {}}) for i in ids if i == "cv-0"]
+        reprocessor.run(DOCS[:2])
+        assert [c.args[0] for c in qdrant.store_structured_data.call_args_list] == ["cv-1"]
+        assert [c.args[1] for c in qdrant.set_payload_fields.call_args_list] == ["cv-0"]
+
+    def test_structured_update_keeps_application_fields(self, llm, server):
+        """Existing points are patched, never rewritten whole"""
+        reprocessor, qdrant = _reprocessor(llm, server)
+        stored = {f"cv-{i}": {"job_id": "job-1", "is_job_application": True, "structured_info": {"name": "old"}}
+                  for i in range(2)}
+        qdrant.set_payload_fields.side_effect = lambda collection, doc_id, fields: stored[doc_id].update(fields)
+        reprocessor.run(DOCS[:2])
+
+        qdrant.store_structured_data.assert_not_called()
+        for i in range(2):
+            payload = stored[f"cv-{i}"]
+            assert payload["job_id"] == "job-1" and payload["is_job_application"] is True
+            assert payload["structured_info"]["name"] == f"Candidate {i}"
+            assert payload["stored_at"]
+
+    def test_jd_results_rebuild_public_pages(self, llm, server):
+        reprocessor, qdrant = _reprocessor(llm, server)
+        reprocessor._write_structured("jd", {"jd-1": {"job_title": "Engineer"}})
+        reprocessor._write_structured("cv", {"cv-1": {"name": "A"}})
+        qdrant.refresh_public_job_views_for_jd.assert_called_once_with("jd-1")
+
+    def test_colliding_note_locks_without_redis(self, llm, server):
+        """Ids sharing a local lock stripe are written one after another, not deadlocked"""
+        from app.utils import redis_cache
+
+        stripe = lambda doc_id: hash(f"cv_notes:{doc_id}") % len(redis_cache._LOCAL_LOCK_STRIPES)
+        ids = [f"doc-{i}" for i in range(200)]
+        ids = [doc_id for doc_id in ids if stripe(doc_id) == stripe(ids[0])][:2] + ids[:64]
+        reprocessor, qdrant = _reprocessor(llm, server)
+        with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=None):
+            worker = threading.Thread(
+                target=reprocessor._write_structured, args=("cv", {doc_id: {"name": doc_id} for doc_id in ids}),
+                daemon=True)
+            worker.start()
+            worker.join(timeout=5)
+        assert not worker.is_alive()
+        assert qdrant.set_payload_fields.call_count == len(set(ids))
+
+    def test_load_documents(self, llm, server):
+        reprocessor, qdrant = _reprocessor(llm, server)
+        qdrant.client.retrieve.side_effect = None
+        qdrant.client.retrieve.return_value = [
+            SimpleNamespace(id="cv-1", payload={"filename": "a.pdf", "raw_content": "text"}),
+            SimpleNamespace(id="cv-2", payload={"filename": "empty.pdf"}),
+            SimpleNamespace(id="cv-3", payload={"filename": "gone.pdf", "raw_content_blob": "0" * 32 + ".zstd",
+                                                "raw_content_codec": "zstd"}),
+        ]
+        docs = reprocessor.load_documents(["cv"], ids=["cv-1", "cv-2", "cv-3"])
+        assert docs == [BatchDocument("cv-1", "cv", "text", "a.pdf")]
+
+
+@pytest.mark.integration
+class TestAdminEndpoints:
+    """POST/GET /api/admin/llm/reprocess"""
+
+    def test_start_and_status(self, test_client):
+        from app.deps.auth import require_admin
+        from app.main import app
+        from app.services.progress_events import get_progress_bus
+
+        reprocessor = MagicMock()
+        reprocessor.start.return_value = "job-9"
+        app.dependency_overrides[require_admin] = lambda: MagicMock()
+        try:
+            with patch("app.services.llm_batch_service.get_llm_batch_reprocessor", return_value=reprocessor):
+                response = test_client.post("/api/admin/llm/reprocess", json={"doc_types": ["jd"]})
+            assert response.status_code == 202
+            assert response.json()["job_id"] == "job-9"
+            reprocessor.start.assert_called_once_with(["jd"], None)
+
+            get_progress_bus().update("llm_batch", "job-9", status="waiting")
+            assert test_client.get("/api/admin/llm/reprocess/job-9").json()["status"] == "waiting"
+            assert test_client.get("/api/admin/llm/reprocess/nope").status_code == 404
+        finally:
+            app.dependency_overrides.pop(require_admin, None)
@@ -0,0 +1,183 @@
+"""
+Tests for sharded bulk candidate analysis (LLMMatchingService.analyze_cv_jd_fit_bulk).
+
+Tests cover:
+- Token estimates and shard planning under the input/candidate budgets
+- Shards run concurrently and results merge back in candidate order
+- Numbered analyses are placed by number; short or failed shards retry per candidate
+- Per-(JD content, CV content) caching: re-runs only analyze new candidates
+"""
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from app.services.llm_analysis_cache import LLMAnalysisCache
+from app.services.llm_matching_service import (
+    BULK_PROMPT_OVERHEAD_TOKENS,
+    LLMMatchingService,
+    estimate_tokens,
+    plan_bulk_shards,
+)
+
+JD = "Senior Data Engineer. Python, SQL, Airflow, AWS. " * 10
+
+
+def _candidates(count, size=200):
+    return [{"cv_id": f"cv-{i}", "cv_raw_text": f"CV-{i} " + "python sql " * size, "semantic_score": 50.0 + i}
+            for i in range(count)]
+
+
+def _cv_numbers(prompt):
+    return [int(line.split("CV-")[1].split()[0]) for line in prompt.splitlines() if line.startswith("CV-")]
+
+
+class FakeLLM:
+    """Answers each shard with one numbered analysis per candidate; llm_score = 10 + CV number."""
+
+    def __init__(self, fail_when=None, delay=0.0):
+        self.fail_when = fail_when or (lambda numbers: None)
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _call_openai_api(self, messages, **kwargs):
+        numbers = _cv_numbers(messages[1]["content"])
+        with self._lock:
+            self.calls.append((numbers, kwargs))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            failure = self.fail_when(numbers)
+            if failure == "error":
+                return SimpleNamespace(success=False, data={}, error_message="API error: 500")
+            analyses = [{"candidate": k + 1, "llm_score": 10 + n, "match_level": "Good", "summary": f"cv {n}"}
+                        for k, n in enumerate(numbers)]
+            if failure == "short":
+                analyses = analyses[:-1]
+            return SimpleNamespace(success=True, data={"analyses": list(reversed(analyses))}, error_message=None)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = LLMAnalysisCache()
+    monkeypatch.setattr("app.services.llm_analysis_cache.get_llm_analysis_cache", lambda: cache)
+    monkeypatch.setattr("app.utils.redis_cache.get_connected_redis_cache", lambda: None)
+    return cache
+
+
+def _service(llm):
+    service = LLMMatchingService.__new__(LLMMatchingService)
+    service.llm_service = llm
+    service.model = "gpt-test"
+    return service
+
+
+class TestPlanner:
+    """estimate_tokens / plan_bulk_shards"""
+
+    def test_estimate_tokens(self):
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("a" * 400) == 100
+
+    def test_packs_in_order_under_budgets(self):
+        shards = plan_bulk_shards(1000, [3000] * 7, max_input_tokens=1000 + BULK_PROMPT_OVERHEAD_TOKENS + 10000,
+                                  max_candidates=10)
+        assert shards == [[0, 1, 2], [3, 4, 5], [6]]
+        assert plan_bulk_shards(0, [10] * 5, max_input_tokens=100000, max_candidates=2) == [[0, 1], [2, 3], [4]]
+
+    def test_oversized_cv_gets_own_shard(self):
+        assert plan_bulk_shards(0, [10, 99999, 10], max_input_tokens=5000, max_candidates=8) == [[0], [1], [2]]
+
+
+class TestBulkAnalysis:
+    """analyze_cv_jd_fit_bulk"""
+
+    def test_shards_run_concurrently_and_merge_in_order(self, cache, monkeypatch):
+        monkeypatch.setenv("LLM_BULK_MAX_CANDIDATES", "3")
+        monkeypatch.setenv("LLM_BULK_CONCURRENCY", "2")
+        llm = FakeLLM(delay=0.05)
+        results = _service(llm).analyze_cv_jd_fit_bulk(JD, _candidates(10))
+
+        assert [r["llm_score"] for r in results] == [10 + i for i in range(10)]
+        assert sorted(len(numbers) for numbers, _ in llm.calls) == [1, 3, 3, 3]
+        assert llm.max_active == 2
+        assert all(kwargs["timeout"] <= 300 for _, kwargs in llm.calls)
+
+    def test_token_budget_splits_shards(self, cache, monkeypatch):
+        monkeypatch.setenv("LLM_BULK_MAX_INPUT_TOKENS", "4000")
+        llm = FakeLLM()
+        _service(llm).analyze_cv_jd_fit_bulk(JD, _candidates(4, size=350))
+        # each CV is ~1000 tokens, JD ~130 + overhead: four of them exceed 4000 → two shards
+        assert len(llm.calls) == 2
+
+    def test_failed_shard_retried_per_candidate(self, cache, monkeypatch):
+        monkeypatch.setenv("LLM_BULK_MAX_CANDIDATES", "4")
+        llm = FakeLLM(fail_when=lambda numbers: "error" if len(numbers) > 1 and 5 in numbers else None)
+        results = _service(llm).analyze_cv_jd_fit_bulk(JD, _candidates(8))
+
+        assert [r["llm_score"] for r in results] == [10 + i for i in range(8)]
+        assert sorted(numbers for numbers, _ in llm.calls if len(numbers) == 1) == [[4], [5], [6], [7]]
+
+    def test_short_shard_and_persistent_failure(self, cache, monkeypatch):
+        monkeypatch.setenv("LLM_BULK_MAX_CANDIDATES", "4")
+        # the shard answers for candidates 0-2 only; candidate 3 then fails alone too
+        llm = FakeLLM(fail_when=lambda numbers: "error" if numbers == [3] else "short" if len(numbers) > 1 else None)
+        candidates = _candidates(4)
+        results = _service(llm).analyze_cv_jd_fit_bulk(JD, candidates)
+
+        assert [r["llm_score"] for r in results] == [10, 11, 12, candidates[3]["semantic_score"]]
+        assert [numbers for numbers, _ in llm.calls] == [[0, 1, 2, 3], [3]]
+        assert results[3]["red_flags"] == ["LLM analysis failed - using semantic score only"]
+        assert cache.stats["stores"] == 3
+
+    def test_unnumbered_response_positional(self, cache):
+        llm = Mock()
+        llm._call_openai_api.return_value = SimpleNamespace(
+            success=True, error_message=None,
+            data={"analyses": [{"llm_score": 70}, {"llm_score": 80}]})
+        results = _service(llm).analyze_cv_jd_fit_bulk(JD, _candidates(2))
+        assert [r["llm_score"] for r in results] == [70.0, 80.0]
+
+    def test_cache_reuses_analyses(self, cache):
+        llm = FakeLLM()
+        service = _service(llm)
+        candidates = _candidates(3)
+        service.analyze_cv_jd_fit_bulk(JD, candidates)
+        assert len(llm.calls) == 1
+
+        llm.calls.clear()
+        results = service.analyze_cv_jd_fit_bulk(JD, candidates + _candidates(5)[3:])
+        assert llm.calls[0][0] == [3, 4]
+        assert [r["llm_score"] for r in results] == [10 + i for i in range(5)]
+
+        # a different JD is a different key
+        llm.calls.clear()
+        service.analyze_cv_jd_fit_bulk(JD + " Kafka", candidates)
+        assert llm.calls[0][0] == [0, 1, 2]
+
+    def test_prompt_independent_of_semantic_score(self, cache):
+        """Cached per content, so the prompt must not carry the weight-dependent score"""
+        service = _service(FakeLLM())
+        low, high = _candidates(2), [dict(c, semantic_score=99.0) for c in _candidates(2)]
+        assert service._build_bulk_analysis_prompt(JD, low) == service._build_bulk_analysis_prompt(JD, high)
+
+    def test_content_hash_from_payload(self, cache):
+        llm = FakeLLM()
+        service = _service(llm)
+        service.analyze_cv_jd_fit_bulk(JD, [dict(_candidates(1)[0], content_hash="abc")])
+        llm.calls.clear()
+        # same stored document, whatever text was passed in
+        cached = service.analyze_cv_jd_fit_bulk(JD, [dict(_candidates(2)[1], content_hash="abc")])
+        assert llm.calls == [] and cached[0]["llm_score"] == 10
+
+    def test_empty(self, cache):
+        assert _service(FakeLLM()).analyze_cv_jd_fit_bulk(JD, []) == []
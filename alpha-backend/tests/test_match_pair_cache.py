@@ -0,0 +1,153 @@
+"""
+Tests for the pair-level match score cache (app/services/match_score_cache.py).
+
+Tests cover:
+- Cache hit skips component scoring; a new JD/CV version recomputes
+- Weight changes re-combine cached components
+- No caching without versions
+- LRU bound, JSON-safe stored components, Redis MGET prefetch
+- Reprocess routes write new embeddings before the new structured version
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock, patch
+
+import numpy as np
+import pytest
+
+from app.services.match_score_cache import MATCH_PAIR_NAMESPACE, MatchScoreCache
+from app.services.matching_service import MatchingService
+from app.utils.redis_cache import RedisCacheService
+
+
+COMPONENTS = {
+    "skills_analysis": {"skill_match_percentage": 80.0, "matched_skills": 4, "total_jd_skills": 5},
+    "responsibilities_analysis": {"responsibility_match_percentage": 60.0, "matched_responsibilities": 3,
+                                  "total_jd_responsibilities": 5},
+    "title_similarity": 0.9,
+    "experience_score": 100.0,
+    "experience_meets": True,
+    "business_rule_modifier": 0.0,
+    "cv_years": 5,
+    "jd_years": 3,
+}
+
+
+@pytest.fixture
+def pair_cache():
+    """Process-local cache with Redis unavailable."""
+    cache = MatchScoreCache()
+    with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=None), \
+         patch("app.services.matching_service.get_match_score_cache", return_value=cache):
+        yield cache
+
+
+@pytest.fixture
+def service():
+    with patch("app.services.matching_service.get_embedding_service", return_value=Mock(device="cpu")), \
+         patch("app.services.matching_service.get_qdrant_utils"):
+        svc = MatchingService()
+    svc._build_explanation = Mock(return_value="explained")
+    svc._component_scores_by_ids = Mock(side_effect=lambda cv_id, jd_id: dict(COMPONENTS))
+    return svc
+
+
+class TestPairCache:
+    """match_by_ids with the pair cache"""
+
+    def test_hit_skips_scoring(self, service, pair_cache):
+        """The second run of an unchanged pair reuses the components"""
+        first = service.match_by_ids("cv1", "jd1", None, "cv-t1", "jd-t1")
+        second = service.match_by_ids("cv1", "jd1", None, "cv-t1", "jd-t1")
+        assert service._component_scores_by_ids.call_count == 1
+        assert second.overall_score == pytest.approx(first.overall_score)
+        assert pair_cache.stats["hits"] == 1
+
+    def test_new_version_recomputes(self, service, pair_cache):
+        """A re-stored CV or JD is a different key"""
+        service.match_by_ids("cv1", "jd1", None, "cv-t1", "jd-t1")
+        service.match_by_ids("cv1", "jd1", None, "cv-t2", "jd-t1")
+        service.match_by_ids("cv1", "jd1", None, "cv-t2", "jd-t2")
+        assert service._component_scores_by_ids.call_count == 3
+
+    def test_weights_change_reuses_components(self, service, pair_cache):
+        """Only the weighted combination changes"""
+        a = service.match_by_ids("cv1", "jd1", {"skills": 1, "responsibilities": 0, "job_title": 0, "experience": 0},
+                                 "cv-t1", "jd-t1")
+        b = service.match_by_ids("cv1", "jd1", {"skills": 0, "responsibilities": 1, "job_title": 0, "experience": 0},
+                                 "cv-t1", "jd-t1")
+        assert service._component_scores_by_ids.call_count == 1
+        assert a.overall_score == pytest.approx(80.0)
+        assert b.overall_score == pytest.approx(60.0)
+        assert b.match_details["weights_used"]["responsibilities"] == 1
+
+    def test_no_versions_no_cache(self, service, pair_cache):
+        """Callers without stored_at always compute"""
+        service.match_by_ids("cv1", "jd1")
+        service.match_by_ids("cv1", "jd1")
+        assert service._component_scores_by_ids.call_count == 2
+        assert len(pair_cache._local) == 0
+
+
+class TestMatchScoreCache:
+    """Cache mechanics"""
+
+    def test_lru_bound(self):
+        """Oldest entries are evicted past the bound"""
+        cache = MatchScoreCache(max_local_entries=2)
+        with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=None):
+            for key in ("a", "b", "c"):
+                cache.set(key, {"k": key})
+            assert cache.get("a") is None
+            assert cache.get("c") == {"k": "c"}
+
+    def test_stored_components_are_json_safe(self):
+        """numpy scalars are stored as plain numbers"""
+        cache = MatchScoreCache()
+        with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=None):
+            stored = cache.set("k", {"score": np.float32(0.5), "pairs": [(np.int64(1), 2)]})
+        assert stored == {"score": 0.5, "pairs": [[1, 2]]}
+        json.dumps(stored)
+
+    def test_prefetch_uses_one_mget(self):
+        """A run warms the local LRU with a single MGET"""
+        client = MagicMock()
+        client.mget.return_value = [json.dumps({"k": 1}), None]
+        redis_cache = RedisCacheService.__new__(RedisCacheService)
+        redis_cache.redis_client, redis_cache.is_connected = client, True
+        redis_cache.stats = {"hits": 0, "misses": 0, "redis_hits": 0, "errors": 0}
+        cache = MatchScoreCache()
+        with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=redis_cache):
+            assert cache.prefetch(["p1", "p2"]) == 1
+            assert cache.get("p1") == {"k": 1}
+        client.mget.assert_called_once_with(
+            [f"cv_app:{MATCH_PAIR_NAMESPACE}:p1", f"cv_app:{MATCH_PAIR_NAMESPACE}:p2"])
+        client.get.assert_not_called()
+
+
+class TestReprocessOrder:
+    """stored_at must not move before the vectors it versions"""
+
+    @pytest.mark.parametrize("module, route, kind", [
+        ("app.routes.cv_routes", "reprocess_cv", "cv"),
+        ("app.routes.jd_routes", "reprocess_jd", "jd"),
+    ])
+    def test_embeddings_before_structured(self, module, route, kind):
+        import importlib
+
+        routes = importlib.import_module(module)
+        qdrant = MagicMock()
+        qdrant.client.retrieve.return_value = [SimpleNamespace(payload={"filename": "doc.txt", "raw_content": "text"})]
+        qdrant.client.scroll.return_value = ([], None)
+        llm = MagicMock()
+        getattr(llm, f"standardize_{kind}").return_value = {"job_title": "Engineer", "skills_sentences": []}
+        with patch.object(routes, "get_qdrant_utils", return_value=qdrant), \
+             patch.object(routes, "get_llm_service", return_value=llm), \
+             patch.object(routes, "get_embedding_service"), \
+             patch.dict(routes.__dict__, {"_invalidate_jd_list_cache": Mock()}):
+            asyncio.run(getattr(routes, route)("doc-1"))
+
+        writes = [name for name, _, _ in qdrant.mock_calls
+                  if name in ("store_embeddings_exact", "store_structured_data")]
+        assert writes == ["store_embeddings_exact", "store_structured_data"]
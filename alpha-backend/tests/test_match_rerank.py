@@ -0,0 +1,137 @@
+"""
+Tests for weight-only re-ranking of finished matches (POST /api/match/jobs/{job_id}/rerank).
+
+Tests cover:
+- weighted_overall_score agrees with match_by_ids scoring
+- Re-ranking re-sorts by the new weights and keeps LLM scores
+- Matches without component scores and unfinished jobs are rejected
+- The endpoint reads the result from the local scheduler or the shared cache
+"""
+import asyncio
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.routes import special_routes
+from app.routes.special_routes import rerank_match_job, rerank_match_result
+from app.schemas.matching import MatchWeights, RerankRequest
+from app.services.match_scheduler import COMPLETED, MatchJob, MatchScheduler
+from app.services.matching_service import MatchingService
+
+
+def _result():
+    """A finished match: A is strong on skills, B on responsibilities, C was LLM-analyzed."""
+    rows = [
+        {"cv_id": "A", "skills": 90.0, "responsibilities": 10.0, "job_title": 50.0, "experience": 50.0,
+         "business_rule_modifier": 0.0},
+        {"cv_id": "B", "skills": 10.0, "responsibilities": 90.0, "job_title": 50.0, "experience": 50.0,
+         "business_rule_modifier": 0.0},
+        {"cv_id": "C", "skills": 50.0, "responsibilities": 50.0, "job_title": 50.0, "experience": 50.0,
+         "business_rule_modifier": 0.1},
+    ]
+    candidates = [
+        {"cv_id": "A", "cv_name": "A", "overall_score": 0.6},
+        {"cv_id": "B", "cv_name": "B", "overall_score": 0.3},
+        {"cv_id": "C", "cv_name": "C", "overall_score": 0.77, "has_llm_analysis": True, "semantic_score": 0.55},
+    ]
+    return {"jd_id": "jd1", "jd_years": 3, "normalized_weights": {"skills": 1, "responsibilities": 0,
+            "job_title": 0, "experience": 0}, "candidates": candidates, "component_scores": rows}
+
+
+class TestWeightedScore:
+    """Shared scoring formula"""
+
+    def test_matches_match_by_ids(self):
+        """The re-rank formula is the one match_by_ids uses"""
+        with patch("app.services.matching_service.get_embedding_service", return_value=Mock(device="cpu")), \
+             patch("app.services.matching_service.get_qdrant_utils"):
+            service = MatchingService()
+        service._build_explanation = Mock(return_value="")
+        service._component_scores_by_ids = Mock(return_value={
+            "skills_analysis": {"skill_match_percentage": 70.0},
+            "responsibilities_analysis": {"responsibility_match_percentage": 40.0},
+            "title_similarity": 0.5, "experience_score": 100.0, "experience_meets": True,
+            "business_rule_modifier": 0.15, "cv_years": 4, "jd_years": 3,
+        })
+        weights = {"skills": 0.5, "responsibilities": 0.2, "job_title": 0.2, "experience": 0.1}
+        result = service.match_by_ids("cv", "jd", weights)
+
+        assert result.match_details["business_rule_modifier"] == 0.15
+        assert MatchingService.weighted_overall_score(70.0, 40.0, 50.0, 100.0, weights, 0.15) == \
+            pytest.approx(result.overall_score)
+
+    def test_clamped(self):
+        assert MatchingService.weighted_overall_score(100, 100, 100, 100, {"skills": 1}, 0.3) == 100.0
+
+
+class TestRerankResult:
+    """rerank_match_result"""
+
+    def test_resorts_by_new_weights(self):
+        """Responsibilities-heavy weights put B ahead of A"""
+        reranked = rerank_match_result(_result(), MatchWeights(skills=0, responsibilities=100, job_title=0,
+                                                                experience=0))
+        scores = {c["cv_id"]: c for c in reranked["candidates"]}
+        assert scores["B"]["overall_score"] == pytest.approx(0.9)
+        assert scores["A"]["overall_score"] == pytest.approx(0.1)
+        assert reranked["normalized_weights"]["responsibilities"] == 1.0
+        assert [c["cv_id"] for c in reranked["candidates"]] == ["B", "C", "A"]
+
+    def test_llm_score_kept(self):
+        """LLM-analyzed candidates keep their overall score; the semantic score moves"""
+        reranked = rerank_match_result(_result(), MatchWeights(skills=1, responsibilities=0, job_title=0,
+                                                                experience=0))
+        c = next(c for c in reranked["candidates"] if c["cv_id"] == "C")
+        assert c["overall_score"] == 0.77
+        assert c["semantic_score"] == pytest.approx(0.55)
+
+    def test_original_result_untouched(self):
+        result = _result()
+        rerank_match_result(result, MatchWeights(skills=0, responsibilities=1, job_title=0, experience=0))
+        assert result["candidates"][0]["overall_score"] == 0.6
+
+    def test_no_component_scores(self):
+        """Results from before component scores existed cannot be re-ranked"""
+        with pytest.raises(HTTPException) as exc:
+            rerank_match_result({"candidates": []}, MatchWeights())
+        assert exc.value.status_code == 409
+
+
+class TestRerankEndpoint:
+    """POST /match/jobs/{job_id}/rerank"""
+
+    def _scheduler_with(self, job):
+        sched = MatchScheduler(capacity=10, worker_threads=1)
+        sched._jobs[job.job_id] = job
+        return sched
+
+    def test_local_job(self):
+        job = MatchJob(job_id="j1", user_key="u", cost=1, run=None, status=COMPLETED, result=_result())
+        body = RerankRequest(weights=MatchWeights(skills=0, responsibilities=1, job_title=0, experience=0))
+        with patch.object(special_routes, "get_match_scheduler", return_value=self._scheduler_with(job)):
+            response = asyncio.run(rerank_match_job("j1", body))
+        assert response["job_id"] == "j1"
+        assert response["candidates"][0]["cv_id"] == "B"
+
+    def test_job_from_shared_cache(self):
+        """A job finished on another worker is read from the cache"""
+        record = {"status": COMPLETED, "result": _result()}
+        with patch.object(special_routes, "get_match_scheduler", return_value=MatchScheduler(worker_threads=1)), \
+             patch.object(special_routes, "get_persisted_match_job", return_value=record):
+            response = asyncio.run(rerank_match_job("remote", RerankRequest(weights=MatchWeights())))
+        assert len(response["candidates"]) == 3
+
+    def test_unfinished_job_rejected(self):
+        job = MatchJob(job_id="j2", user_key="u", cost=1, run=None)
+        with patch.object(special_routes, "get_match_scheduler", return_value=self._scheduler_with(job)):
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(rerank_match_job("j2", RerankRequest(weights=MatchWeights())))
+        assert exc.value.status_code == 409
+
+    def test_unknown_job(self):
+        with patch.object(special_routes, "get_match_scheduler", return_value=MatchScheduler(worker_threads=1)), \
+             patch.object(special_routes, "get_persisted_match_job", return_value=None):
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(rerank_match_job("nope", RerankRequest(weights=MatchWeights())))
+        assert exc.value.status_code == 404
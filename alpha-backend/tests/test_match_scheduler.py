@@ -0,0 +1,220 @@
+"""
+Tests for the /match fair scheduler (app/services/match_scheduler.py).
+
+Tests cover:
+- Cost-budgeted admission (small jobs share capacity, oversized jobs still run alone)
+- Per-user round-robin order of queued jobs
+- Bounded bypass of a large job at the front of the queue
+- Identical re-submits reuse the job
+- Failures keep their HTTP status; ETA from measured seconds per unit
+- /match returns queued responses with a job id and results by job id
+"""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.schemas.matching import MatchRequest
+from app.services.match_scheduler import COMPLETED, FAILED, QUEUED, RUNNING, MatchScheduler
+
+
+@pytest.fixture(autouse=True)
+def no_persist():
+    """Keep the shared cache out of scheduler tests."""
+    with patch.object(MatchScheduler, "_persist"):
+        yield
+
+
+def _gated(gates, log, name, result=None):
+    """Job body that records its start and waits for its gate."""
+    async def run():
+        log.append(name)
+        await gates.setdefault(name, asyncio.Event()).wait()
+        return result if result is not None else {"name": name}
+    return run
+
+
+class TestAdmission:
+    """Cost-based admission and fair ordering"""
+
+    def test_small_jobs_share_capacity(self):
+        """Jobs run together while their cost fits; the rest wait"""
+        async def scenario():
+            sched = MatchScheduler(capacity=100, worker_threads=1)
+            gates, log = {}, []
+            a = sched.submit("u1", 40, _gated(gates, log, "a"))
+            b = sched.submit("u2", 40, _gated(gates, log, "b"))
+            c = sched.submit("u3", 40, _gated(gates, log, "c"))
+            await asyncio.sleep(0)
+            assert (a.status, b.status, c.status) == (RUNNING, RUNNING, QUEUED)
+            gates["a"].set()
+            await a.done.wait()
+            await asyncio.sleep(0)
+            assert c.status == RUNNING
+            for g in ("b", "c"):
+                gates[g].set()
+            await asyncio.gather(b.done.wait(), c.done.wait())
+            return a
+
+        a = asyncio.run(scenario())
+        assert a.status == COMPLETED and a.result == {"name": "a"}
+
+    def test_oversized_job_runs_alone(self):
+        """A job above capacity is admitted when nothing else runs"""
+        async def scenario():
+            sched = MatchScheduler(capacity=10, worker_threads=1)
+            job = sched.submit("u1", 50, _gated({"big": asyncio.Event()}, [], "big"))
+            return job.status
+
+        assert asyncio.run(scenario()) == RUNNING
+
+    def test_round_robin_across_users(self):
+        """One user's burst does not block another user's single request"""
+        async def scenario():
+            sched = MatchScheduler(capacity=10, worker_threads=1)
+            gates, log = {}, []
+            jobs = [sched.submit("alice", 10, _gated(gates, log, f"a{i}")) for i in range(3)]
+            bob = sched.submit("bob", 10, _gated(gates, log, "b0"))
+            assert sched.queue_position(bob) == 2  # behind a1 only, ahead of a2
+            for name in ("a0", "a1", "b0", "a2"):
+                while name not in log:
+                    await asyncio.sleep(0)
+                gates[name].set()
+            await asyncio.gather(*(j.done.wait() for j in jobs + [bob]))
+            return log
+
+        assert asyncio.run(scenario()) == ["a0", "a1", "b0", "a2"]
+
+    def test_large_front_job_bypassed_a_bounded_number_of_times(self):
+        """Small jobs may backfill past a blocked large job, but not forever"""
+        async def scenario():
+            sched = MatchScheduler(capacity=100, worker_threads=1, max_bypass=1)
+            gates, log = {}, []
+            sched.submit("u0", 60, _gated(gates, log, "running"))
+            big = sched.submit("u1", 80, _gated(gates, log, "big"))
+            small1 = sched.submit("u2", 20, _gated(gates, log, "small1"))
+            small2 = sched.submit("u3", 20, _gated(gates, log, "small2"))
+            return big.status, small1.status, small2.status
+
+        assert asyncio.run(scenario()) == (QUEUED, RUNNING, QUEUED)
+
+
+class TestJobs:
+    """Job lifecycle"""
+
+    def test_identical_resubmit_reuses_job(self):
+        """Same fingerprint returns the in-flight job"""
+        async def scenario():
+            sched = MatchScheduler(capacity=10, worker_threads=1)
+            gates = {}
+            first = sched.submit("u", 5, _gated(gates, [], "x"), fingerprint="fp")
+            again = sched.submit("u", 5, _gated(gates, [], "y"), fingerprint="fp")
+            return first is again, sched.stats["reused"]
+
+        assert asyncio.run(scenario()) == (True, 1)
+
+    def test_failure_keeps_http_status(self):
+        """HTTPException details and status survive the scheduler"""
+        async def boom():
+            raise HTTPException(status_code=404, detail="JD not found")
+
+        async def scenario():
+            sched = MatchScheduler(capacity=10, worker_threads=1)
+            job = sched.submit("u", 5, boom)
+            await job.done.wait()
+            return job
+
+        job = asyncio.run(scenario())
+        assert (job.status, job.error_status, job.error) == (FAILED, 404, "JD not found")
+
+    def test_eta_from_measured_throughput(self):
+        """Queued ETA counts the work ahead at the measured rate"""
+        async def scenario():
+            sched = MatchScheduler(capacity=10, worker_threads=1, seconds_per_unit=2.0)
+            gates = {}
+            sched.submit("u1", 10, _gated(gates, [], "a"))
+            queued = sched.submit("u2", 5, _gated(gates, [], "b"))
+            return sched.eta_seconds(queued)
+
+        # ~20s left on the running job + 10s for its own work
+        assert asyncio.run(scenario()) == pytest.approx(30.0, abs=0.5)
+
+
+def _request(token=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "headers": headers, "client": ("10.0.0.1", 1234)})
+
+
+class TestMatchRoute:
+    """/match on top of the scheduler"""
+
+    def test_inline_result_and_queued_job(self):
+        """First request runs inline; a second user is queued with a job id and fetches the result later"""
+        from app.routes import special_routes
+
+        gates = {"first": asyncio.Event()}
+        calls = []
+
+        async def fake_run(req, job_id):
+            calls.append((req.jd_id, job_id))
+            if req.jd_id == "jd1":
+                await gates["first"].wait()
+            return {"jd_id": req.jd_id, "normalized_weights": {"skills": 50, "responsibilities": 20,
+                    "job_title": 20, "experience": 10}, "candidates": []}
+
+        async def scenario():
+            sched = MatchScheduler(capacity=100, worker_threads=1)
+            with patch.object(special_routes, "get_match_scheduler", return_value=sched), \
+                 patch.object(special_routes, "_run_match", side_effect=fake_run), \
+                 patch.object(special_routes, "get_optional_username", side_effect=lambda r: None):
+                first = asyncio.create_task(special_routes.match_candidates(
+                    MatchRequest(jd_id="jd1", cv_ids=["c"] * 80), _request()))
+                await asyncio.sleep(0)
+                queued = await special_routes.match_candidates(
+                    MatchRequest(jd_id="jd2", cv_ids=["c"] * 80), _request())
+                assert queued.is_queued and queued.queue_position == 1 and queued.job_id
+
+                gates["first"].set()
+                inline = await first
+                job = sched.get(queued.job_id)
+                await job.done.wait()
+                fetched = await special_routes.get_match_job(queued.job_id)
+                return inline, fetched
+
+        inline, fetched = asyncio.run(scenario())
+        fetched_job_id = json.loads(fetched.body)["job_id"]
+        assert inline["jd_id"] == "jd1" and inline["job_id"]
+        body = json.loads(fetched.body)
+        assert body["status"] == COMPLETED
+        assert body["result"]["jd_id"] == "jd2"
+        # each run publishes progress under the job id its caller was given
+        assert calls == [("jd1", inline["job_id"]), ("jd2", fetched_job_id)]
+
+    def test_http_errors_publish_failed(self):
+        """A 4xx inside the run still ends the progress stream"""
+        from unittest.mock import MagicMock
+
+        from app.routes import special_routes
+
+        qdrant = MagicMock()
+        qdrant.get_structured_jd.return_value = None
+        with patch.object(special_routes, "get_qdrant_utils", return_value=qdrant), \
+             patch.object(special_routes, "get_matching_service"), \
+             patch.object(special_routes, "update_matching_progress") as progress:
+            with pytest.raises(HTTPException) as excinfo:
+                asyncio.run(special_routes._run_match(MatchRequest(jd_id="missing"), "job-1"))
+        assert excinfo.value.status_code == 404
+        progress.assert_called_once_with("job-1", status="failed", error="JD not found")
+
+    def test_cost_estimate(self):
+        """Text JDs and "all CVs" cost more"""
+        from app.routes.special_routes import MAX_CV_LIMIT, estimate_match_cost
+
+        by_id = estimate_match_cost(MatchRequest(jd_id="j", cv_ids=["a"] * 10))
+        by_text = estimate_match_cost(MatchRequest(jd_text="t", cv_ids=["a"] * 10))
+        everything = estimate_match_cost(MatchRequest(jd_id="j"))
+        assert by_text > by_id
+        assert everything >= MAX_CV_LIMIT
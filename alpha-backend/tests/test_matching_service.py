@@ -488,7 +488,7 @@ class TestMatchingServiceMatchStructuredData:
         
         # Mock GPU similarity calculations - return similarity matrices
         self.mock_embedding_service.calculate_batch_cosine_similarity_gpu = Mock(
-            side_effect=lambda a, b: np.array([[0.8] * len(b) for _ in range(len(a))])
+            side_effect=lambda a, b, **kw: np.array([[0.8] * len(b) for _ in range(len(a))])
         )
         self.mock_embedding_service.calculate_cosine_similarity = Mock(return_value=0.85)
         self.mock_embedding_service.device = "cuda"
@@ -541,7 +541,7 @@ class TestMatchingServiceMatchStructuredData:
         
         self.mock_embedding_service.generate_document_embeddings.side_effect = mock_generate_doc_emb
         self.mock_embedding_service.calculate_batch_cosine_similarity_gpu = Mock(
-            side_effect=lambda a, b: np.array([[0.8] * len(b) for _ in range(len(a))])
+            side_effect=lambda a, b, **kw: np.array([[0.8] * len(b) for _ in range(len(a))])
         )
         self.mock_embedding_service.calculate_cosine_similarity = Mock(return_value=0.85)
         self.mock_embedding_service.device = "cuda"
@@ -587,7 +587,7 @@ class TestMatchingServiceMatchStructuredData:
         
         self.mock_embedding_service.generate_document_embeddings.side_effect = mock_generate_doc_emb
         self.mock_embedding_service.calculate_batch_cosine_similarity_gpu = Mock(
-            side_effect=lambda a, b: np.array([[0.8] * len(b) for _ in range(len(a))])
+            side_effect=lambda a, b, **kw: np.array([[0.8] * len(b) for _ in range(len(a))])
         )
         self.mock_embedding_service.calculate_cosine_similarity = Mock(return_value=0.85)
         self.mock_embedding_service.device = "cuda"
@@ -741,7 +741,7 @@ class TestMatchingServiceMatchExact:
              patch('torch.cuda.is_available', return_value=True):
             # Mock GPU similarity calculations
             self.mock_embedding_service.calculate_batch_cosine_similarity_gpu = Mock(
-                side_effect=lambda a, b: np.array([[0.8] * len(b) for _ in range(len(a))])
+                side_effect=lambda a, b, **kw: np.array([[0.8] * len(b) for _ in range(len(a))])
             )
             self.mock_embedding_service.calculate_cosine_similarity = Mock(return_value=0.85)
             
@@ -844,5 +844,228 @@ class TestMatchingServiceEdgeCases:
         assert modifier2 >= 0.30
 
 
+class TestMatchingServiceResourceBackpressure:
+    """Test snapshot-based resource checks and batch-boundary cleanup"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        from app.utils.resource_monitor import ResourceMonitor, ResourceSnapshot
+        self.ResourceSnapshot = ResourceSnapshot
+        self.monitor = ResourceMonitor()
+        with patch('app.services.matching_service.get_embedding_service'), \
+             patch('app.services.matching_service.get_qdrant_utils'), \
+             patch('app.services.matching_service.get_resource_monitor', return_value=self.monitor):
+            self.service = MatchingService()
+        self.service.backpressure_max_wait = 0.0
+    
+    def test_check_resources_never_calls_psutil(self):
+        """Resource check reads the cached snapshot only"""
+        self.monitor.snapshot = self.ResourceSnapshot(cpu_percent=10.0, memory_percent=10.0)
+        with patch('psutil.cpu_percent') as cpu:
+            assert self.service._check_system_resources() is True
+        cpu.assert_not_called()
+    
+    def test_check_resources_detects_pressure(self):
+        """High CPU or memory in the snapshot throttles"""
+        self.monitor.snapshot = self.ResourceSnapshot(cpu_percent=99.0, memory_percent=10.0)
+        assert self.service._check_system_resources() is False
+        self.monitor.snapshot = self.ResourceSnapshot(cpu_percent=10.0, memory_percent=99.0)
+        assert self.service._check_system_resources() is False
+    
+    def test_bulk_match_stops_under_sustained_pressure(self):
+        """Bulk match returns partial results when pressure does not clear"""
+        self.monitor.snapshot = self.ResourceSnapshot(cpu_percent=99.0, memory_percent=10.0)
+        self.service.match_cv_against_jd = Mock()
+        assert self.service.bulk_match("jd", ["cv1", "cv2"]) == []
+        self.service.match_cv_against_jd.assert_not_called()
+    
+    def test_cleanup_skipped_with_headroom(self):
+        """Non-forced cleanup does nothing while memory is low"""
+        self.monitor.snapshot = self.ResourceSnapshot(memory_percent=10.0)
+        with patch('app.services.matching_service.gc.collect') as collect:
+            self.service._cleanup_memory()
+            collect.assert_not_called()
+            self.service._cleanup_memory(force=True)
+            collect.assert_called_once()
+
+
+class TestMatchingServiceCpuEngine:
+    """Test the CPU similarity engine against the GPU path"""
+    
+    def setup_method(self):
+        """Create CPU and (mocked) GPU services over the same vectors"""
+        from app.services.matching_service import cosine_similarity_matrix
+        from app.services.embedding_service import EmbeddingService
+        self.cosine_similarity_matrix = cosine_similarity_matrix
+        
+        self.mock_embedding_service = Mock()
+        self.mock_embedding_service.device = "cpu"
+        self.mock_embedding_service.SIMILARITY_THRESHOLDS = EmbeddingService.SIMILARITY_THRESHOLDS
+        self.mock_embedding_service.get_match_quality = Mock(return_value="good")
+        with patch('app.services.matching_service.get_embedding_service', return_value=self.mock_embedding_service), \
+             patch('app.services.matching_service.get_qdrant_utils'):
+            self.service = MatchingService()
+        
+        rng = np.random.default_rng(7)
+        base = rng.normal(size=(6, 768))
+        self.jd_skills = [f"jd{i}" for i in range(4)]
+        self.cv_skills = [f"cv{i}" for i in range(6)]
+        self.jd_emb = {s: base[i] + rng.normal(scale=0.3, size=768) for i, s in enumerate(self.jd_skills)}
+        self.cv_emb = {s: base[i] for i, s in enumerate(self.cv_skills)}
+    
+    def test_engine_resolved_once(self):
+        """No CUDA means the CPU engine"""
+        assert self.service.use_gpu is False
+        assert self.service.similarity_engine == "cpu"
+    
+    def test_avg_best_similarity_does_not_raise_on_cpu(self):
+        """CPU nodes get a score instead of a GPU-only RuntimeError"""
+        A = [[1.0, 0.0], [0.0, 1.0]]
+        B = [[1.0, 0.0]]
+        assert self.service._avg_best_similarity(A, B) == pytest.approx(0.5)
+    
+    def test_matrix_matches_reference_cosine(self):
+        """Matrix equals clipped pairwise cosine"""
+        A = np.array([[3.0, 4.0], [0.0, 0.0], [-1.0, 0.0]])
+        B = np.array([[4.0, 3.0], [1.0, 0.0]])
+        result = self.cosine_similarity_matrix(A, B)
+        assert result.dtype == np.float32
+        assert result[0, 0] == pytest.approx(24 / 25, abs=1e-6)
+        assert result[1].tolist() == [0.0, 0.0]  # zero vector
+        assert result[2, 1] == 0.0  # negative clipped
+    
+    def test_cpu_and_gpu_paths_identical(self):
+        """Skills assignment is the same whichever engine computes the matrix"""
+        cpu_result = self.service._skills_similarity(self.jd_emb, self.cv_emb, self.jd_skills, self.cv_skills)
+        
+        def gpu_reference(a, b, normalized=False):
+            a = a / np.linalg.norm(a, axis=1, keepdims=True)
+            b = b / np.linalg.norm(b, axis=1, keepdims=True)
+            return np.clip(a @ b.T, 0.0, 1.0)
+        
+        self.service.use_gpu = True
+        self.mock_embedding_service.calculate_batch_cosine_similarity_gpu = Mock(side_effect=gpu_reference)
+        gpu_result = self.service._skills_similarity(self.jd_emb, self.cv_emb, self.jd_skills, self.cv_skills)
+        
+        assert cpu_result["matched_skills"] == gpu_result["matched_skills"] > 0
+        assert [(m["jd_skill"], m["cv_skill"]) for m in cpu_result["matches"]] == \
+               [(m["jd_skill"], m["cv_skill"]) for m in gpu_result["matches"]]
+        for c, g in zip(cpu_result["matches"], gpu_result["matches"]):
+            assert c["similarity"] == pytest.approx(g["similarity"], abs=1e-5)
+    
+    def test_gpu_failure_falls_back_to_cpu_engine(self):
+        """A GPU error recomputes with the CPU engine, same assignment"""
+        expected = self.service._skills_similarity(self.jd_emb, self.cv_emb, self.jd_skills, self.cv_skills)
+        self.service.use_gpu = True
+        self.mock_embedding_service.calculate_batch_cosine_similarity_gpu = Mock(side_effect=RuntimeError("oom"))
+        result = self.service._skills_similarity(self.jd_emb, self.cv_emb, self.jd_skills, self.cv_skills)
+        assert result["matches"] == expected["matches"]
+
+
+class TestMatchingServiceNormalizedEmbeddings:
+    """Test the unit-length float32 read path used by match_by_ids"""
+    
+    def setup_method(self):
+        """Create a CPU MatchingService with mocked dependencies"""
+        from app.services.embedding_service import EmbeddingService
+        self.mock_embedding_service = Mock()
+        self.mock_embedding_service.device = "cpu"
+        self.mock_embedding_service.SIMILARITY_THRESHOLDS = EmbeddingService.SIMILARITY_THRESHOLDS
+        self.mock_embedding_service.get_match_quality = Mock(return_value="good")
+        with patch('app.services.matching_service.get_embedding_service', return_value=self.mock_embedding_service), \
+             patch('app.services.matching_service.get_qdrant_utils'):
+            self.service = MatchingService()
+        
+        rng = np.random.default_rng(11)
+        self.raw = rng.normal(size=(3, 768)) * 5.0
+        self.structured = {"skills_sentences": ["a", "b", "c"], "responsibility_sentences": ["r"]}
+    
+    def test_l2_normalize(self):
+        """Rows become unit-length float32; zero rows stay zero"""
+        from app.services.embedding_service import l2_normalize
+        out = l2_normalize(np.array([[3.0, 4.0], [0.0, 0.0]]))
+        assert out.dtype == np.float32
+        assert out.flags["C_CONTIGUOUS"]
+        assert out[0].tolist() == pytest.approx([0.6, 0.8])
+        assert out[1].tolist() == [0.0, 0.0]
+    
+    def test_legacy_vectors_normalized_on_read(self):
+        """Vectors stored without the flag come back unit-length float32"""
+        stored = {"skill_vectors": self.raw.tolist(), "responsibility_vectors": [self.raw[0].tolist()],
+                  "job_title_vector": [self.raw[1].tolist()], "experience_vector": []}
+        emb = self.service._convert_stored_embeddings_to_format(stored, self.structured)
+        
+        for vec in emb["skills"].values():
+            assert vec.dtype == np.float32
+            assert vec.flags["C_CONTIGUOUS"]
+            assert np.linalg.norm(vec) == pytest.approx(1.0, abs=1e-5)
+        assert np.linalg.norm(emb["title"]) == pytest.approx(1.0, abs=1e-5)
+        assert emb["experience"] is None
+    
+    def test_flagged_vectors_used_as_stored(self):
+        """Flagged vectors are not renormalized; missing ones become zero rows"""
+        unit = self.raw[0] / np.linalg.norm(self.raw[0])
+        stored = {"skill_vectors": [unit.tolist(), None], "normalized": True}
+        emb = self.service._convert_stored_embeddings_to_format(stored, self.structured)
+        
+        assert emb["skills"]["a"] == pytest.approx(unit.astype(np.float32))
+        assert not emb["skills"]["b"].any()
+        assert not emb["skills"]["c"].any()
+    
+    def test_dot_product_matches_cosine(self):
+        """On unit vectors the normalized path equals full cosine"""
+        from app.services.matching_service import cosine_similarity_matrix
+        from app.services.embedding_service import l2_normalize
+        unit = l2_normalize(self.raw)
+        full = cosine_similarity_matrix(self.raw, self.raw[::-1])
+        fast = cosine_similarity_matrix(unit, unit[::-1], normalized=True)
+        assert fast == pytest.approx(full, abs=1e-6)
+
+
+@pytest.mark.unit
+class TestTitleKeywordIndex:
+    """Compiled title keywords and title-score memoization"""
+    
+    def setup_method(self):
+        with patch('app.services.matching_service.get_embedding_service'), \
+             patch('app.services.matching_service.get_qdrant_utils'):
+            self.service = MatchingService()
+    
+    @staticmethod
+    def _substring_scan(table, title, skip_empty=False):
+        """The plain substring loops the index replaces."""
+        title = title.lower()
+        return [name for name, words in table.items()
+                if any((w or not skip_empty) and w in title for w in words)]
+    
+    def test_keywords_match_substring_scan(self):
+        """Overlapping keywords (e.g. 'data' inside 'data engineer', 'lead' inside 'team lead') are all found"""
+        titles = ["Senior Data Engineer", "Team Lead - Power BI", "SharePoint Online Admin",
+                  "VP Sales", "Jr QA Tester", "Principal Cloud Architect (AWS/GCP)", "Unrelated Title"]
+        for title in titles:
+            assert self.service.extract_domains_from_title(title) == \
+                self._substring_scan(MatchingService.DOMAIN_KEYWORDS, title)
+            roles = self._substring_scan(MatchingService.ROLE_TYPES, title)
+            assert self.service.extract_role_type(title) == (roles[0] if roles else "general")
+            levels = self._substring_scan(MatchingService.SENIORITY_LEVELS, title, skip_empty=True)
+            assert self.service.extract_seniority_level(title) == (levels[0] if levels else "mid")
+    
+    def test_features_cached_per_title(self):
+        """Each distinct title is scanned once"""
+        self.service.title_index.features.cache_clear()
+        for _ in range(5):
+            self.service.extract_role_type("Azure Cloud Engineer")
+            self.service.extract_domains_from_title("Azure Cloud Engineer")
+        assert self.service.title_index.features.cache_info().misses == 1
+    
+    def test_pair_score_memoized_on_normalized_titles(self):
+        """Case and surrounding whitespace share one memo entry"""
+        first = self.service.get_enhanced_title_similarity("Data Analyst", "BI Developer")
+        again = self.service.get_enhanced_title_similarity("  data analyst ", "BI DEVELOPER")
+        assert first == again
+        info = self.service._title_pair_similarity.cache_info()
+        assert (info.misses, info.hits) == (1, 1)
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
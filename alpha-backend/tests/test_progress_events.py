@@ -0,0 +1,149 @@
+"""
+Tests for the shared progress channel (app/services/progress_events.py).
+
+Tests cover:
+- State merge and in-process fallback without Redis
+- SSE stream: snapshot first, pushed events, close on terminal status
+- Partial top-K results events
+- Redis state write + publish, and cross-worker state reads
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.progress_events import ProgressBus, format_sse, top_k_snapshot
+
+
+def _parse(frames):
+    events = []
+    for frame in frames:
+        text = frame.decode("utf-8")
+        if text.startswith(":"):
+            events.append(("keep-alive", None))
+            continue
+        lines = dict(line.split(": ", 1) for line in text.strip().split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def local_bus():
+    """Bus with Redis unavailable."""
+    bus = ProgressBus()
+    with patch("app.services.progress_events.get_connected_redis_cache", return_value=None):
+        yield bus
+
+
+class TestLocalProgress:
+    """In-process behaviour (no Redis)"""
+
+    def test_update_merges_state(self, local_bus):
+        """Updates merge into the live per-kind dict"""
+        local_bus.update("matching", "jd1", status="processing", progress_percent=0)
+        local_bus.update("matching", "jd1", progress_percent=50)
+        assert local_bus.states("matching")["jd1"] == {"status": "processing", "progress_percent": 50}
+        assert local_bus.get_state("matching", "missing") == {}
+
+    def test_stream_pushes_until_completed(self, local_bus):
+        """Subscribers get the snapshot, then each event, and the stream closes on completion"""
+        local_bus.update("matching", "jd1", status="processing", progress_percent=0)
+
+        async def run():
+            frames = []
+
+            async def consume():
+                async for frame in local_bus.stream("matching", "jd1"):
+                    frames.append(frame)
+
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.01)
+            local_bus.update("matching", "jd1", progress_percent=50)
+            local_bus.emit("matching", "jd1", "partial_results", {"top_candidates": [{"cv_id": "a"}]})
+            local_bus.update("matching", "jd1", status="completed", progress_percent=100)
+            local_bus.update("matching", "jd1", status="late")
+            await asyncio.wait_for(task, timeout=2)
+            return frames
+
+        events = _parse(asyncio.run(run()))
+        assert [e[0] for e in events] == ["progress", "progress", "partial_results", "progress"]
+        assert events[0][1]["progress_percent"] == 0
+        assert events[2][1]["top_candidates"] == [{"cv_id": "a"}]
+        assert events[-1][1]["status"] == "completed"
+        assert local_bus._local_subscribers == {}
+
+    def test_stream_of_finished_job_closes_immediately(self, local_bus):
+        """A completed job yields only its final state"""
+        local_bus.update("cv_upload", "cv1", status="completed")
+
+        async def run():
+            return [f async for f in local_bus.stream("cv_upload", "cv1")]
+
+        assert _parse(asyncio.run(run())) == [("progress", {"status": "completed"})]
+
+    def test_keep_alive_when_idle(self, local_bus):
+        """Idle streams send comments so proxies keep the connection"""
+        local_bus.update("cv_upload", "cv1", status="processing")
+
+        async def run():
+            frames = []
+            with patch("app.services.progress_events.PROGRESS_STREAM_HEARTBEAT_SECONDS", 0.01):
+                async for frame in local_bus.stream("cv_upload", "cv1"):
+                    frames.append(frame)
+                    if len(frames) == 2:
+                        break
+            return frames
+
+        assert _parse(asyncio.run(run()))[1] == ("keep-alive", None)
+
+
+class TestRedisProgress:
+    """Shared state across workers"""
+
+    def _cache(self):
+        client = MagicMock()
+        return SimpleNamespace(redis_client=client), client
+
+    def test_update_writes_state_and_publishes(self):
+        """One pipelined round trip sets the state and publishes the event"""
+        cache, client = self._cache()
+        bus = ProgressBus()
+        with patch("app.services.progress_events.get_connected_redis_cache", return_value=cache):
+            bus.update("matching", "jd1", status="processing")
+
+        pipe = client.pipeline.return_value
+        key, value = pipe.set.call_args[0]
+        assert key == "progress:state:matching:jd1"
+        assert json.loads(value) == {"status": "processing"}
+        channel, payload = pipe.publish.call_args[0]
+        assert channel == "progress:events:matching:jd1"
+        assert json.loads(payload) == {"event": "progress", "data": {"status": "processing"}}
+        pipe.execute.assert_called_once()
+
+    def test_state_from_another_worker(self):
+        """A poll on a worker without local state reads Redis"""
+        cache, client = self._cache()
+        client.get.return_value = json.dumps({"status": "processing", "progress_percent": 40})
+        bus = ProgressBus()
+        with patch("app.services.progress_events.get_connected_redis_cache", return_value=cache):
+            assert bus.get_state("cv_upload", "cv9")["progress_percent"] == 40
+        client.get.assert_called_once_with("progress:state:cv_upload:cv9")
+
+
+class TestHelpers:
+    """SSE framing and partial results"""
+
+    def test_format_sse(self):
+        assert format_sse("progress", {"a": 1}) == b'event: progress\ndata: {"a": 1}\n\n'
+
+    def test_top_k_snapshot(self):
+        """Best k by overall score, lightweight fields only"""
+        cands = [
+            SimpleNamespace(cv_id=str(i), cv_name=f"n{i}", cv_job_title=None, overall_score=s,
+                            skills_score=0, responsibilities_score=0, job_title_score=0, years_score=0)
+            for i, s in enumerate([0.2, 0.9, 0.5])
+        ]
+        top = top_k_snapshot(cands, 2)
+        assert [c["cv_id"] for c in top] == ["1", "2"]
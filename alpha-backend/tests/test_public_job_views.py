@@ -0,0 +1,169 @@
+"""
+Tests for precomputed public job pages (app/services/public_job_views.py).
+
+Tests cover:
+- PublicJobView built from UI (bullet string) and legacy (list) postings
+- One build per token, then cache hits; short negative caching of unknown tokens
+- Pages shared through Redis; rebuild on posting writes and JD re-standardization
+- GET /api/careers/jobs/{token}: ETag, Cache-Control and 304 on If-None-Match
+"""
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+
+from app.services.public_job_views import (
+    PUBLIC_JOB_NAMESPACE,
+    PublicJobDocument,
+    PublicJobViewCache,
+    build_public_job_view,
+)
+from app.utils.qdrant_utils import QdrantUtils
+
+UI_POSTING = {
+    "id": "job-1",
+    "public_token": "tok-1",
+    "job_title": "Old title",
+    "created_date": "2026-01-05T10:00:00",
+    "years_of_experience": 5,
+    "is_active": True,
+    "structured_info": {
+        "job_title": "Data Engineer",
+        "job_location": "Dubai",
+        "job_summary": "Build pipelines",
+        "qualifications": "• Python\n• SQL\n\n",
+        "key_responsibilities": "• Own ETL",
+    },
+}
+
+
+def _qdrant(posting=UI_POSTING):
+    qdrant = Mock()
+    qdrant.get_job_posting_by_token.return_value = posting
+    return qdrant
+
+
+@pytest.fixture
+def no_redis():
+    with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=None):
+        yield
+
+
+class TestBuildView:
+    """View model from merged posting data"""
+
+    def test_ui_posting(self):
+        view = build_public_job_view(UI_POSTING)
+        assert view.job_title == "Data Engineer"
+        assert view.job_location == "Dubai"
+        assert view.requirements == ["Python", "SQL"]
+        assert view.responsibilities == ["Own ETL"]
+        assert view.experience_required == "5 years"
+        assert view.upload_date == "2026-01-05T10:00:00"
+
+    def test_legacy_posting(self):
+        view = build_public_job_view({"id": "j", "job_title": "QA", "summary": "Test things",
+                                      "skills_sentences": [f"s{i}" for i in range(15)], "upload_date": "d"})
+        assert view.job_description == "Test things"
+        assert len(view.requirements) == 10
+        assert view.experience_required == "Not specified"
+
+
+class TestPublicJobViewCache:
+    """Build-once cache"""
+
+    def test_built_once(self, no_redis):
+        """Repeat views are served from memory"""
+        cache, qdrant = PublicJobViewCache(), _qdrant()
+        first = cache.get("tok-1", qdrant)
+        second = cache.get("tok-1", qdrant)
+        assert first is second
+        assert qdrant.get_job_posting_by_token.call_count == 1
+        assert json.loads(first.body)["job_title"] == "Data Engineer"
+        assert first.etag.startswith('"') and first.etag.endswith('"')
+
+    def test_unknown_token_negatively_cached(self, no_redis):
+        """Scans for bogus tokens are not repeated on every view"""
+        cache, qdrant = PublicJobViewCache(), _qdrant(posting=None)
+        assert cache.get("nope", qdrant) is None
+        assert cache.get("nope", qdrant) is None
+        assert qdrant.get_job_posting_by_token.call_count == 1
+
+    def test_rebuild_changes_etag(self, no_redis):
+        """A write rebuilds the page with a new version"""
+        cache, qdrant = PublicJobViewCache(), _qdrant()
+        before = cache.get("tok-1", qdrant)
+        qdrant.get_job_posting_by_token.return_value = {**UI_POSTING, "is_active": False}
+        after = cache.rebuild("tok-1", qdrant)
+        assert after.etag != before.etag
+        assert cache.get("tok-1", qdrant) is after
+
+    def test_page_from_redis(self):
+        """A page built by another worker is served without Qdrant"""
+        document = PublicJobDocument.from_view(build_public_job_view(UI_POSTING))
+        redis_cache = Mock(get=Mock(return_value={"body": document.body.decode(), "etag": document.etag}))
+        qdrant = _qdrant()
+        with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=redis_cache):
+            served = PublicJobViewCache().get("tok-1", qdrant)
+        redis_cache.get.assert_called_once_with("tok-1", PUBLIC_JOB_NAMESPACE)
+        assert served == document
+        qdrant.get_job_posting_by_token.assert_not_called()
+
+    def test_if_none_match(self):
+        document = PublicJobDocument(body=b"{}", etag='"abc"')
+        assert document.matches('"abc"')
+        assert document.matches('W/"x", "abc"')
+        assert not document.matches('"other"')
+        assert not document.matches(None)
+
+
+class TestPostingWritesRebuild:
+    """qdrant_utils writers refresh the page"""
+
+    def test_status_toggle_rebuilds(self):
+        qdrant = QdrantUtils.__new__(QdrantUtils)
+        qdrant._use_pool, qdrant._client = False, MagicMock()
+        qdrant.client.retrieve.return_value = [SimpleNamespace(payload={"public_token": "tok-1"})]
+        cache = Mock()
+        with patch("app.services.public_job_views.get_public_job_cache", return_value=cache):
+            assert qdrant.update_job_posting_status("job-1", False) is True
+        cache.rebuild.assert_called_once_with("tok-1", qdrant)
+
+    def test_jd_restandardized_rebuilds_its_postings(self):
+        """Postings linked by jd_id, and a legacy posting sharing the JD id, are rebuilt"""
+        qdrant = QdrantUtils.__new__(QdrantUtils)
+        qdrant._use_pool, qdrant._client = False, MagicMock()
+        qdrant.client.scroll.return_value = ([SimpleNamespace(payload={"public_token": "tok-1"}),
+                                              SimpleNamespace(payload={})], None)
+        qdrant.client.retrieve.return_value = [SimpleNamespace(payload={"public_token": "tok-legacy"})]
+        cache = Mock()
+        with patch("app.services.public_job_views.get_public_job_cache", return_value=cache):
+            assert qdrant.refresh_public_job_views_for_jd("jd-1") == 2
+        assert sorted(c.args[0] for c in cache.rebuild.call_args_list) == ["tok-1", "tok-legacy"]
+        assert qdrant.client.scroll.call_args.kwargs["scroll_filter"].must[0].match.value == "jd-1"
+
+
+@pytest.mark.integration
+class TestPublicJobRoute:
+    """GET /api/careers/jobs/{public_token}"""
+
+    def test_etag_and_304(self, test_client, no_redis):
+        cache = PublicJobViewCache()
+        cache.rebuild("tok-1", _qdrant())  # as done when the job is posted
+        with patch("app.routes.careers_routes.get_public_job_cache", return_value=cache):
+            response = test_client.get("/api/careers/jobs/tok-1")
+            assert response.status_code == 200
+            assert response.json()["job_title"] == "Data Engineer"
+            assert "max-age" in response.headers["cache-control"]
+            etag = response.headers["etag"]
+
+            again = test_client.get("/api/careers/jobs/tok-1", headers={"If-None-Match": etag})
+            assert again.status_code == 304
+            assert again.headers["etag"] == etag
+
+    def test_unknown_token_404(self, test_client, no_redis):
+        cache = PublicJobViewCache()
+        cache.rebuild("missing", _qdrant(posting=None))
+        with patch("app.routes.careers_routes.get_public_job_cache", return_value=cache):
+            assert test_client.get("/api/careers/jobs/missing").status_code == 404
@@ -0,0 +1,110 @@
+"""
+Tests for the Qdrant collection layout (app/utils/qdrant_collections.py).
+
+Tests cover:
+- New deployments: metadata collections vectorless, embeddings 768-d
+- Placeholder vectors only while a collection still requires one
+- Writers keep working before and after the vectorless migration; clear_all_data recreates <name>__v0
+"""
+from unittest.mock import patch
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+from app.utils import qdrant_collections
+from app.utils.qdrant_collections import (
+    METADATA_COLLECTIONS,
+    ensure_collections_exist,
+    has_dense_vector,
+    resolve_collection,
+    with_placeholder_vectors,
+)
+from app.utils.qdrant_migrations import MigrationRunner, VectorlessMetadata
+from app.utils.qdrant_utils import QdrantUtils
+
+LEGACY = VectorParams(size=768, distance=Distance.COSINE)
+
+
+@pytest.fixture
+def client():
+    qdrant_collections.forget_layouts()
+    yield QdrantClient(":memory:")
+    qdrant_collections.forget_layouts()
+
+
+@pytest.fixture
+def legacy_client(client):
+    """A deployment from before: every collection has the 768-d placeholder vector."""
+    for name in (*METADATA_COLLECTIONS, "cv_embeddings", "jd_embeddings"):
+        client.create_collection(name, vectors_config=LEGACY)
+    return client
+
+
+def migrate_to_vectorless(client):
+    MigrationRunner(client, [VectorlessMetadata()]).run()
+
+
+def _qdrant(client):
+    utils = QdrantUtils.__new__(QdrantUtils)
+    utils._use_pool, utils._client = False, client
+    return utils
+
+
+class TestLayout:
+    """New deployments"""
+
+    def test_new_collections(self, client):
+        ensure_collections_exist(client)
+        assert not has_dense_vector(client, "cv_structured")
+        assert not has_dense_vector(client, "job_postings_structured")
+        assert has_dense_vector(client, "cv_embeddings")
+
+    def test_placeholder_only_when_required(self, legacy_client):
+        point = PointStruct(id=1, vector={}, payload={"a": 1})
+        assert len(with_placeholder_vectors(legacy_client, "cv_documents", [point])[0].vector) == 768
+        legacy_client.create_collection("plain", vectors_config={})
+        assert with_placeholder_vectors(legacy_client, "plain", [point])[0].vector == {}
+
+
+class TestWriters:
+    """QdrantUtils writes on both layouts"""
+
+    @pytest.mark.parametrize("migrate", [False, True])
+    def test_store_and_update(self, legacy_client, migrate):
+        if migrate:
+            migrate_to_vectorless(legacy_client)
+        qdrant = _qdrant(legacy_client)
+        doc_id = "6f1c2d9e-0000-4000-8000-000000000001"
+        assert qdrant.store_structured_data(doc_id, "cv", {"structured_info": {"name": "A"}})
+        qdrant.set_payload_fields("cv_structured", doc_id, {"hr_notes": []}, key="structured_info")
+        record = legacy_client.retrieve("cv_structured", [doc_id], with_vectors=True)[0]
+        assert record.payload["structured_info"] == {"name": "A", "hr_notes": []}
+        assert (not record.vector) == migrate
+
+    def test_stale_layout_retried(self, legacy_client):
+        """A writer that cached the old layout recovers after another process migrated"""
+        qdrant = _qdrant(legacy_client)
+        assert has_dense_vector(legacy_client, "jd_documents")
+        MigrationRunner(legacy_client).migrate_collection(VectorlessMetadata(), "jd_documents")
+        qdrant_collections._has_vector["jd_documents"] = True  # as cached before the migration
+
+        original = legacy_client.upsert
+
+        def reject_vectors(collection_name, points, wait=True):
+            if points[0].vector:
+                raise RuntimeError("Wrong input: vector not expected")
+            return original(collection_name=collection_name, points=points, wait=wait)
+
+        with patch.object(legacy_client, "upsert", side_effect=reject_vectors) as upsert:
+            assert qdrant.store_document("6f1c2d9e-0000-4000-8000-000000000002", "jd", "a.txt", "txt",
+                                         "text", "2026-01-01")
+        assert upsert.call_count == 2
+
+    def test_clear_all_data_after_migration(self, legacy_client):
+        migrate_to_vectorless(legacy_client)
+        assert _qdrant(legacy_client).clear_all_data()
+        assert resolve_collection(legacy_client, "cv_structured") == "cv_structured__v0"
+        assert {a.collection_name for a in legacy_client.get_aliases().aliases} == {
+            f"{name}__v0" for name in qdrant_collections.collection_configs()}
+        assert not has_dense_vector(legacy_client, "cv_structured")
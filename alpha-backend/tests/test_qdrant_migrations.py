@@ -0,0 +1,325 @@
+"""
+Tests for versioned Qdrant migrations (app/utils/qdrant_migrations.py).
+
+Tests cover:
+- v1 copies payloads in batches, swaps the alias and reports progress
+- Applied migrations are recorded; re-running and --to are respected
+- Writes made during the copy (upserts, payload patches, deletes) survive the swap
+- Writes are held while frozen and land in the new collection after the swap
+- New deployments start as <name>__v0 behind an alias; the CLI refuses to run without Redis
+- v2 folds legacy per-vector points into one optimized_v2 point per document
+- v3 compresses raw_content written before compression; v4 re-encodes untagged gzip
+- legacy_reads_enabled: env override and auto-off once v2 is recorded
+"""
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+from app.utils import qdrant_collections, qdrant_migrations
+from app.utils.qdrant_collections import (
+    METADATA_COLLECTIONS,
+    ensure_collections_exist,
+    has_dense_vector,
+    resolve_collection,
+)
+from app.utils.qdrant_migrations import (
+    CompressedRawContent,
+    MigrationRunner,
+    OptimizedEmbeddings,
+    RecodedRawContent,
+    VectorlessMetadata,
+    legacy_reads_enabled,
+    main,
+)
+from app.utils.qdrant_utils import QdrantUtils, compress_content, get_decompressed_content
+
+LEGACY = VectorParams(size=768, distance=Distance.COSINE)
+DOC_ID = "6f1c2d9e-0000-4000-8000-000000000001"
+
+
+@pytest.fixture
+def client():
+    qdrant_collections.forget_layouts()
+    qdrant_migrations.forget_legacy_read_state()
+    yield QdrantClient(":memory:")
+    qdrant_collections.forget_layouts()
+    qdrant_migrations.forget_legacy_read_state()
+
+
+@pytest.fixture
+def legacy_client(client):
+    """A deployment from before: every collection has the 768-d placeholder vector."""
+    for name in (*METADATA_COLLECTIONS, "cv_embeddings", "jd_embeddings"):
+        client.create_collection(name, vectors_config=LEGACY)
+    return client
+
+
+class _FakeRedis:
+    """The Redis commands the migration write gate uses."""
+
+    def __init__(self):
+        self.values, self.sets = {}, {}
+        self.lock = threading.Lock()
+
+    def pipeline(self):
+        redis, calls = self, []
+
+        class Pipeline:
+            def __getattr__(self, command):
+                return lambda *args, **kwargs: calls.append((command, args, kwargs))
+
+            def execute(self):
+                with redis.lock:
+                    return [getattr(redis, command)(*args, **kwargs) for command, args, kwargs in calls]
+        return Pipeline()
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    def decr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) - 1
+        return self.values[key]
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def expire(self, key, seconds):
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+
+def _qdrant(client):
+    qdrant = QdrantUtils.__new__(QdrantUtils)
+    qdrant._use_pool, qdrant._client = False, client
+    return qdrant
+
+
+def _one_hot(position):
+    vector = [0.0] * 768
+    vector[position] = 1.0
+    return vector
+
+
+def _legacy_embedding_points(doc_id, count=3):
+    points = [
+        PointStruct(id=str(uuid.uuid4()), vector=_one_hot(10 + i),
+                    payload={"document_id": doc_id, "vector_type": "skill", "vector_index": i, "content": f"s{i}"})
+        for i in reversed(range(count))
+    ]
+    points.append(PointStruct(id=str(uuid.uuid4()), vector=_one_hot(1),
+                              payload={"document_id": doc_id, "vector_type": "job_title", "vector_index": 0}))
+    return points
+
+
+class TestVectorlessMetadata:
+    """v1: metadata collections without placeholder vectors"""
+
+    def test_copies_and_swaps_alias(self, legacy_client):
+        legacy_client.upsert("cv_structured", [
+            PointStruct(id=i, vector=[0.0] * 768, payload={"id": str(i), "name": f"cv{i}"}) for i in range(1, 8)
+        ])
+        progress = []
+        runner = MigrationRunner(legacy_client, [VectorlessMetadata()], batch_size=3,
+                                 progress=lambda r: progress.append(r.read))
+        report = runner.migrate_collection(VectorlessMetadata(), "cv_structured")
+
+        assert report.read == 7 and not report.skipped
+        assert progress == [3, 6, 7]
+        assert resolve_collection(legacy_client, "cv_structured") == "cv_structured__v1"
+        assert not has_dense_vector(legacy_client, "cv_structured")
+        points, _ = legacy_client.scroll("cv_structured", limit=20)
+        assert sorted(p.payload["name"] for p in points) == [f"cv{i}" for i in range(1, 8)]
+
+    def test_recorded_and_idempotent(self, legacy_client):
+        runner = MigrationRunner(legacy_client, [VectorlessMetadata()])
+        assert len(runner.run()) == len(METADATA_COLLECTIONS)
+        assert all(row["applied"] for row in runner.status())
+        assert runner.run() == []
+        names = {c.name for c in legacy_client.get_collections().collections}
+        assert not names & set(METADATA_COLLECTIONS)
+
+    def test_target_version(self, legacy_client):
+        runner = MigrationRunner(legacy_client)
+        runner.run(target_version=1)
+        assert {row["version"] for row in runner.status() if row["applied"]} == {1}
+
+    def test_writes_during_copy_survive(self, legacy_client):
+        """Points written, patched or deleted after the copy passed them are not lost"""
+        legacy_client.upsert("jd_documents", [
+            PointStruct(id=i, vector=[0.0] * 768, payload={"n": i}) for i in range(1, 5)
+        ])
+        qdrant = _qdrant(legacy_client)
+        runner = MigrationRunner(legacy_client, batch_size=2)
+        original = runner._write
+        calls = []
+
+        def write_then_edit(target, points):
+            original(target, points)
+            if not calls:
+                qdrant.set_payload_fields("jd_documents", 1, {"n": 10})
+                qdrant.delete_points("jd_documents", [2])
+                qdrant._upsert("jd_documents", [PointStruct(id=9, vector={}, payload={"n": 9})])
+            calls.append(target)
+
+        with patch.object(runner, "_write", side_effect=write_then_edit):
+            runner.migrate_collection(VectorlessMetadata(), "jd_documents")
+        points, _ = legacy_client.scroll("jd_documents", limit=20)
+        assert {p.id: p.payload["n"] for p in points} == {1: 10, 3: 3, 4: 4, 9: 9}
+
+    def test_writes_during_copy_survive_with_redis(self, legacy_client):
+        """Same, with the gate state shared through Redis"""
+        redis = _FakeRedis()
+        cache = SimpleNamespace(redis_client=redis, namespaced_key=lambda ns, key: f"cv_app:{ns}:{key}")
+        with patch("app.utils.qdrant_migrations.get_connected_redis_cache", return_value=cache):
+            self.test_writes_during_copy_survive(legacy_client)
+        assert not any(key.endswith(":state:jd_documents") for key in redis.values)
+        assert redis.values["cv_app:migrations:inflight:jd_documents"] == 0
+
+    def test_writes_held_while_frozen(self, legacy_client):
+        """A write during the final delta waits for the swap, then lands in the new collection"""
+        legacy_client.upsert("cv_structured", [PointStruct(id=1, vector=[0.0] * 768, payload={"n": 1})])
+        qdrant = _qdrant(legacy_client)
+        runner = MigrationRunner(legacy_client)
+        original = runner._copy_delta
+        writer = threading.Thread(target=qdrant.set_payload_fields, args=("cv_structured", 1, {"n": 2}))
+
+        def delta_with_write(*args):
+            writer.start()
+            time.sleep(0.2)
+            assert writer.is_alive()
+            original(*args)
+
+        with patch.object(runner, "_copy_delta", side_effect=delta_with_write):
+            runner.migrate_collection(VectorlessMetadata(), "cv_structured")
+        writer.join(5)
+        assert legacy_client.retrieve("cv_structured", [1])[0].payload["n"] == 2
+        assert resolve_collection(legacy_client, "cv_structured") == "cv_structured__v1"
+
+
+class TestAliasedDeployments:
+    """New deployments start behind an alias"""
+
+    def test_created_behind_alias(self, client):
+        ensure_collections_exist(client)
+        assert resolve_collection(client, "cv_documents") == "cv_documents__v0"
+        ensure_collections_exist(client)
+        assert resolve_collection(client, "cv_documents") == "cv_documents__v0"
+
+    def test_migration_swaps_alias(self, client):
+        ensure_collections_exist(client)
+        client.upsert("cv_documents", [PointStruct(id=1, vector={}, payload={"raw_content": "plain text"})])
+        with patch.object(client, "delete_collection", wraps=client.delete_collection) as delete:
+            MigrationRunner(client).migrate_collection(CompressedRawContent(), "cv_documents")
+        delete.assert_called_once_with("cv_documents__v0")
+        assert resolve_collection(client, "cv_documents") == "cv_documents__v3"
+        assert get_decompressed_content(client.retrieve("cv_documents", [1])[0].payload) == "plain text"
+
+    def test_cli_requires_redis_or_offline(self):
+        with patch("app.utils.qdrant_migrations.get_connected_redis_cache", return_value=None), \
+                patch("app.utils.qdrant_migrations.QdrantClient"), pytest.raises(SystemExit):
+            main([])
+
+
+class TestOptimizedEmbeddings:
+    """v2: legacy per-vector points → optimized_v2"""
+
+    def test_folds_legacy_points(self, legacy_client):
+        legacy_client.upsert("cv_embeddings", _legacy_embedding_points(DOC_ID))
+        other = "6f1c2d9e-0000-4000-8000-000000000002"
+        legacy_client.upsert("cv_embeddings", [PointStruct(id=other, vector=[0.0] * 768, payload={
+            "vector_structure": {"skill_vectors": [[1.0]]}, "metadata": {"storage_version": "optimized_v2"}})])
+
+        report = MigrationRunner(legacy_client, batch_size=2).migrate_collection(OptimizedEmbeddings(), "cv_embeddings")
+        assert report.read == 5
+
+        points, _ = legacy_client.scroll("cv_embeddings", limit=20)
+        assert sorted(str(p.id) for p in points) == [DOC_ID, other]
+        structure = QdrantUtils.__new__(QdrantUtils)
+        structure._use_pool, structure._client = False, legacy_client
+        vectors = structure.retrieve_embeddings(DOC_ID, "cv")
+        assert [v.index(1.0) for v in vectors["skill_vectors"]] == [10, 11, 12]
+        assert vectors["job_title_vector"][0][1] == 1.0
+        assert vectors["normalized"] is False
+
+    def test_not_needed_without_legacy_points(self, legacy_client):
+        report = MigrationRunner(legacy_client).migrate_collection(OptimizedEmbeddings(), "jd_embeddings")
+        assert report.skipped
+        assert resolve_collection(legacy_client, "jd_embeddings") == "jd_embeddings"
+
+
+class TestCompressedRawContent:
+    """v3: uncompressed raw_content"""
+
+    def test_compresses_old_documents(self, client):
+        client.create_collection("cv_documents", vectors_config={})
+        client.upsert("cv_documents", [
+            PointStruct(id=1, vector={}, payload={"raw_content": "plain text"}),
+            PointStruct(id=2, vector={}, payload={"raw_content": "H4sI", "raw_content_compressed": True}),
+        ])
+        MigrationRunner(client).migrate_collection(CompressedRawContent(), "cv_documents")
+        first, second = client.retrieve("cv_documents", [1, 2])
+        assert first.payload["raw_content_compressed"] is True
+        assert get_decompressed_content(first.payload) == "plain text"
+        assert second.payload["raw_content"] == "H4sI"
+
+
+class TestLegacyReads:
+    """Legacy fallback switch"""
+
+    def test_env_override(self, client, monkeypatch):
+        monkeypatch.setenv("QDRANT_LEGACY_READS", "off")
+        assert not legacy_reads_enabled(client, "cv_embeddings")
+        monkeypatch.setenv("QDRANT_LEGACY_READS", "on")
+        assert legacy_reads_enabled(client, "cv_embeddings")
+
+    def test_auto_off_after_migration(self, legacy_client, monkeypatch):
+        monkeypatch.setenv("QDRANT_LEGACY_READS", "auto")
+        assert legacy_reads_enabled(legacy_client, "cv_embeddings")
+        legacy_client.upsert("cv_embeddings", _legacy_embedding_points(DOC_ID))
+        MigrationRunner(legacy_client).run(target_version=2)
+        assert not legacy_reads_enabled(legacy_client, "cv_embeddings")
+
+    def test_fallback_skipped_when_off(self, legacy_client, monkeypatch):
+        """A miss costs one retrieve, not a limit=50 scroll"""
+        monkeypatch.setenv("QDRANT_LEGACY_READS", "off")
+        qdrant = QdrantUtils.__new__(QdrantUtils)
+        qdrant._use_pool, qdrant._client = False, legacy_client
+        with patch.object(legacy_client, "scroll") as scroll:
+            assert qdrant.retrieve_embeddings(DOC_ID, "cv") is None
+        scroll.assert_not_called()
+
+
+class TestRecodedRawContent:
+    """v4: untagged gzip raw_content re-encoded with the default codec"""
+
+    def test_recodes_gzip_documents(self, client):
+        client.create_collection("jd_documents", vectors_config={})
+        client.upsert("jd_documents", [
+            PointStruct(id=1, vector={}, payload={"raw_content": compress_content("old jd"),
+                                                  "raw_content_compressed": True}),
+        ])
+        MigrationRunner(client).migrate_collection(RecodedRawContent(), "jd_documents")
+        payload = client.retrieve("jd_documents", [1])[0].payload
+        assert payload["raw_content_codec"] == "zstd"
+        assert get_decompressed_content(payload) == "old jd"
+        assert MigrationRunner(client).migrate_collection(RecodedRawContent(), "jd_documents").skipped
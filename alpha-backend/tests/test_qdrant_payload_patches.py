@@ -0,0 +1,171 @@
+"""
+Tests for partial payload updates in QdrantUtils (set_payload instead of read-modify-upsert).
+
+Tests cover:
+- patch_payloads batches set_payload operations and groups identical patches
+- Job posting status/token updates write only the changed fields, by point id
+- link_application_to_job writes once, without vectors or retry sleeps
+- soft_delete_job_posting patches related points without transferring payloads
+- HR note routes write only structured_info.hr_notes, one edit per CV at a time
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils import qdrant_utils as qdrant_module
+from app.utils.qdrant_utils import QdrantUtils
+
+
+@pytest.fixture
+def qdrant():
+    utils = QdrantUtils.__new__(QdrantUtils)
+    utils._use_pool, utils._client = False, MagicMock()
+    with patch.object(qdrant_module, "_refresh_public_job_view"):
+        yield utils
+
+
+def _job_posting(client, token="tok-1"):
+    client.retrieve.return_value = [SimpleNamespace(payload={"public_token": token})]
+
+
+class TestPatchPayloads:
+    """Batched payload patch API"""
+
+    def test_identical_patches_grouped(self, qdrant):
+        """Points receiving the same fields share one operation in one request"""
+        assert qdrant.patch_payloads("c", {"p1": {"a": 1}, "p2": {"a": 1}, "p3": {"a": 2}}) == 3
+        qdrant.client.batch_update_points.assert_called_once()
+        kwargs = qdrant.client.batch_update_points.call_args.kwargs
+        assert kwargs["wait"] is True
+        ops = kwargs["update_operations"]
+        assert sorted(op.set_payload.points for op in ops) == [["p1", "p2"], ["p3"]]
+
+    def test_split_into_batches(self, qdrant):
+        with patch.object(qdrant_module, "PAYLOAD_PATCH_BATCH_SIZE", 2):
+            qdrant.patch_payloads("c", {f"p{i}": {"i": i} for i in range(5)})
+        assert qdrant.client.batch_update_points.call_count == 3
+
+    def test_set_payload_fields_waits(self, qdrant):
+        qdrant.set_payload_fields("c", "p1", {"x": 1}, key="structured_info")
+        qdrant.client.set_payload.assert_called_once_with(
+            collection_name="c", payload={"x": 1}, points=["p1"], key="structured_info", wait=True)
+
+
+class TestJobPostingWrites:
+    """Job posting writers"""
+
+    def test_status_only_changed_fields(self, qdrant):
+        _job_posting(qdrant.client)
+        assert qdrant.update_job_posting_status("job-1", False) is True
+        kwargs = qdrant.client.set_payload.call_args.kwargs
+        assert kwargs["points"] == ["job-1"]
+        assert kwargs["payload"]["is_active"] is False
+        assert set(kwargs["payload"]) == {"is_active", "status_updated"}
+        qdrant.client.upsert.assert_not_called()
+        assert qdrant.client.retrieve.call_args.kwargs["with_vectors"] is False
+
+    def test_missing_posting(self, qdrant):
+        qdrant.client.retrieve.return_value = []
+        assert qdrant.update_job_posting_public_token("job-x", "new-token") is False
+        qdrant.client.set_payload.assert_not_called()
+
+    def test_token_update_refreshes_both_pages(self, qdrant):
+        _job_posting(qdrant.client, token="old-token")
+        assert qdrant.update_job_posting_public_token("job-1", "new-token") is True
+        assert qdrant.client.set_payload.call_args.kwargs["payload"] == {"public_token": "new-token"}
+        refreshed = [c.args[1] for c in qdrant_module._refresh_public_job_view.call_args_list]
+        assert refreshed == ["old-token", "new-token"]
+
+
+class TestLinkApplication:
+    """link_application_to_job"""
+
+    def test_single_write_no_sleep(self, qdrant):
+        qdrant.get_application_count_for_job = MagicMock(return_value=1)
+        with patch("time.sleep") as sleep:
+            assert qdrant.link_application_to_job("cv-1", "job-1", {"applicant_name": "A"}, "a.pdf") is True
+        sleep.assert_not_called()
+        qdrant.client.scroll.assert_not_called()
+        kwargs = qdrant.client.set_payload.call_args.kwargs
+        assert kwargs["points"] == ["cv-1"]
+        assert kwargs["payload"]["job_id"] == "job-1"
+        assert kwargs["payload"]["is_job_application"] is True
+
+    def test_missing_cv_fails_fast(self, qdrant):
+        qdrant.client.set_payload.side_effect = RuntimeError("No point with id cv-1 found")
+        with patch("time.sleep") as sleep:
+            assert qdrant.link_application_to_job("cv-1", "job-1", {}, "a.pdf") is False
+        sleep.assert_not_called()
+        assert qdrant.client.set_payload.call_count == 1
+
+    def test_application_cap_deactivates(self, qdrant):
+        qdrant.get_application_count_for_job = MagicMock(return_value=250)
+        qdrant.update_job_posting_status = MagicMock(return_value=True)
+        qdrant.link_application_to_job("cv-1", "job-1", {}, "a.pdf")
+        qdrant.update_job_posting_status.assert_called_once_with("job-1", False)
+
+
+class TestSoftDelete:
+    """soft_delete_job_posting"""
+
+    def test_related_points_patched_by_id(self, qdrant):
+        qdrant.get_job_posting_by_id = MagicMock(return_value={"id": "job-1", "jd_id": "jd-1"})
+        qdrant.client.scroll.side_effect = lambda collection_name, **kw: (
+            [SimpleNamespace(id=f"{collection_name}-{i}") for i in range(2)], None)
+
+        results = qdrant.soft_delete_job_posting("job-1", "admin", "2026-01-01")
+
+        assert results["success"] is True
+        assert results["jd_embeddings_deleted"] == 2
+        assert results["applications_archived"] == 2
+        assert all(c.kwargs["with_payload"] is False and c.kwargs["with_vectors"] is False
+                   for c in qdrant.client.scroll.call_args_list)
+        # one batched request per related collection, one op each (identical patches)
+        assert qdrant.client.batch_update_points.call_count == 4
+        qdrant.client.upsert.assert_not_called()
+
+
+class TestNoteRoutes:
+    """HR notes write only structured_info.hr_notes"""
+
+    def test_add_note(self, qdrant):
+        from app.routes.cv_routes import NoteRequest, add_or_update_note
+
+        qdrant.client.retrieve.return_value = [SimpleNamespace(payload={
+            "id": "cv-1", "job_posting_id": "job-1", "structured_info": {"hr_notes": []}})]
+        with patch("app.routes.cv_routes.get_qdrant_utils", return_value=qdrant):
+            asyncio.run(add_or_update_note("cv-1", NoteRequest(note="Strong", hr_user="hr1")))
+
+        kwargs = qdrant.client.set_payload.call_args.kwargs
+        assert kwargs["key"] == "structured_info"
+        assert [n["hr_user"] for n in kwargs["payload"]["hr_notes"]] == ["hr1"]
+        qdrant.client.upsert.assert_not_called()
+
+    def test_concurrent_notes_both_kept(self, qdrant):
+        """Two HR users noting the same CV at once: neither write loses the other's note"""
+        import threading
+        import time
+
+        from app.routes.cv_routes import NoteRequest, add_or_update_note
+
+        stored = {"hr_notes": []}
+
+        def retrieve(*args, **kwargs):
+            payload = {"structured_info": {"hr_notes": list(stored["hr_notes"])}}
+            time.sleep(0.02)  # both requests would read the same list without the lock
+            return [SimpleNamespace(payload=payload)]
+
+        qdrant.client.retrieve.side_effect = retrieve
+        qdrant.client.set_payload.side_effect = lambda **kwargs: stored.update(kwargs["payload"])
+        with patch("app.routes.cv_routes.get_qdrant_utils", return_value=qdrant), \
+                patch("app.utils.redis_cache.get_connected_redis_cache", return_value=None):
+            threads = [threading.Thread(target=asyncio.run, args=(
+                add_or_update_note("cv-1", NoteRequest(note="n", hr_user=user)),)) for user in ("hr1", "hr2")]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert sorted(n["hr_user"] for n in stored["hr_notes"]) == ["hr1", "hr2"]
@@ -0,0 +1,126 @@
+"""
+Tests for the Qdrant unit-of-work writer (QdrantWriteBatch in app/utils/qdrant_utils.py).
+
+Tests cover:
+- One upsert per collection for a document or a batch of documents
+- Points are identical to the single-point store_* methods
+- Application linking folds into the pending cv_structured point
+- wait=False with a consistency barrier
+- Points-per-round-trip metric
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils import qdrant_utils as qdrant_module
+from app.utils.metrics import QDRANT_POINTS_PER_WRITE
+from app.utils.qdrant_utils import QdrantUtils, QdrantWriteBatch
+
+EMBEDDINGS = {"skill_vectors": [[0.1] * 4] * 20, "responsibility_vectors": [[0.2] * 4] * 10,
+              "experience_vector": [[0.3] * 4], "job_title_vector": [[0.4] * 4], "normalized": True}
+
+
+@pytest.fixture
+def qdrant():
+    utils = QdrantUtils.__new__(QdrantUtils)
+    utils._use_pool, utils._client = False, MagicMock()
+    utils.get_application_count_for_job = MagicMock(return_value=1)
+    with patch.object(qdrant_module, "_invalidate_careers_job_list_cache"):
+        yield utils
+
+
+def _add_cv(batch, cv_id):
+    batch.store_document(cv_id, "cv", "cv.pdf", "pdf", "raw text", "2026-01-01")
+    batch.store_structured_data(cv_id, "cv", {"structured_info": {"name": "A"}})
+    batch.store_embeddings_exact(cv_id, "cv", EMBEDDINGS)
+
+
+def _upserts(client):
+    return {c.kwargs["collection_name"]: c.kwargs for c in client.upsert.call_args_list}
+
+
+class TestFlush:
+    """One round trip per collection"""
+
+    def test_many_documents_three_requests(self, qdrant):
+        batch = qdrant.write_batch()
+        for i in range(5):
+            _add_cv(batch, f"cv-{i}")
+        assert batch.flush() == {"cv_documents": 5, "cv_structured": 5, "cv_embeddings": 5}
+        assert qdrant.client.upsert.call_count == 3
+        assert all(kw["wait"] is True for kw in _upserts(qdrant.client).values())
+
+    def test_same_points_as_store_methods(self, qdrant):
+        """The batch writes what the single-point methods write"""
+        with qdrant.write_batch() as batch:
+            batch.store_embeddings_exact("cv-1", "cv", EMBEDDINGS)
+        batched = qdrant.client.upsert.call_args.kwargs["points"][0]
+
+        qdrant.client.reset_mock()
+        qdrant.store_embeddings_exact("cv-1", "cv", EMBEDDINGS)
+        single = qdrant.client.upsert.call_args.kwargs["points"][0]
+        assert batched == single
+
+    def test_empty_flush(self, qdrant):
+        assert qdrant.write_batch().flush() == {}
+        qdrant.client.upsert.assert_not_called()
+
+    def test_failure_raises_and_try_flush(self, qdrant):
+        qdrant.client.upsert.side_effect = RuntimeError("qdrant down")
+        batch = qdrant.write_batch()
+        _add_cv(batch, "cv-1")
+        assert batch.try_flush() is False
+
+
+class TestLinkApplication:
+    """Linking inside the batch"""
+
+    def test_link_merged_into_structured_point(self, qdrant):
+        with qdrant.write_batch() as batch:
+            _add_cv(batch, "cv-1")
+            batch.link_application("cv-1", "job-1", {"applicant_name": "A"}, "cv.pdf")
+        structured = _upserts(qdrant.client)["cv_structured"]["points"][0].payload
+        assert structured["job_id"] == "job-1"
+        assert structured["is_job_application"] is True
+        assert structured["structured_info"] == {"name": "A"}
+        qdrant.client.set_payload.assert_not_called()
+        qdrant.get_application_count_for_job.assert_called_once_with("job-1")
+
+    def test_link_requires_cv_in_batch(self, qdrant):
+        with pytest.raises(ValueError):
+            qdrant.write_batch().link_application("cv-x", "job-1", {}, "cv.pdf")
+
+
+class TestNoWait:
+    """wait=False and the barrier"""
+
+    def test_barrier(self, qdrant):
+        batch = qdrant.write_batch(wait=False)
+        _add_cv(batch, "cv-1")
+        _add_cv(batch, "cv-2")
+        batch.flush()
+        assert all(kw["wait"] is False for kw in _upserts(qdrant.client).values())
+
+        qdrant.client.reset_mock()
+        batch.barrier()
+        # no point is rewritten: an empty wait=True set_payload on the last id per collection
+        qdrant.client.upsert.assert_not_called()
+        calls = {c.kwargs["collection_name"]: c.kwargs for c in qdrant.client.set_payload.call_args_list}
+        assert set(calls) == {"cv_documents", "cv_structured", "cv_embeddings"}
+        for kw in calls.values():
+            assert kw["wait"] is True and kw["payload"] == {}
+            assert kw["points"].must[0].has_id == ["cv-2"]
+
+        qdrant.client.reset_mock()
+        batch.barrier()
+        qdrant.client.set_payload.assert_not_called()
+
+
+class TestMetric:
+    def test_points_per_write_recorded(self, qdrant):
+        with patch.object(QDRANT_POINTS_PER_WRITE, "observe") as observe:
+            batch = QdrantWriteBatch(qdrant)
+            for i in range(4):
+                batch.store_document(f"d{i}", "jd", "jd.txt", "txt", "text", "2026-01-01")
+            batch.flush()
+        observe.assert_called_once_with(4, collection="jd_documents")
@@ -0,0 +1,109 @@
+"""
+Tests for the tracker candidate-rows endpoint (app/routes/tracker_routes.py).
+
+Tests cover:
+- Latest application per candidate picked in SQL
+- Team-location visibility for restricted roles
+- Keyset pagination via X-Next-Cursor
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import Response
+from sqlmodel import Session, create_engine
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.models.tracker.base import tracker_metadata
+from app.models.tracker.models import TrackerApplication, TrackerCandidate
+from app.models.user import User
+from app.routes.tracker_routes import list_candidate_rows
+
+
+@pytest.fixture
+def tracker_session():
+    """In-memory SQLite tracker database."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    tracker_metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _seed(session: Session):
+    base = datetime(2024, 1, 1)
+    for i in range(5):
+        cand = TrackerCandidate(id=f"c{i}", name=f"Candidate {i}", created_at=base + timedelta(days=i))
+        session.add(cand)
+        for j in range(3):
+            session.add(
+                TrackerApplication(
+                    id=f"a{i}{j}",
+                    candidate_id=cand.id,
+                    status=f"S{j}",
+                    # Legacy mixed rows: c0 is Abu Dhabi only, the others' newest application is too
+                    created_by_team_location="Abu Dhabi" if i == 0 or j == 2 else "Dubai",
+                    created_at=base + timedelta(days=i, hours=j),
+                )
+            )
+    session.add(TrackerCandidate(id="deleted", name="Gone", is_deleted=True, created_at=base))
+    session.commit()
+
+
+def _call(session, user, **kwargs):
+    response = Response()
+    with patch("app.routes.tracker_routes._tracker_cache_get", return_value=None), \
+         patch("app.routes.tracker_routes._tracker_cache_set"):
+        rows = list_candidate_rows(
+            response=response,
+            team=kwargs.get("team"),
+            limit=kwargs.get("limit"),
+            cursor=kwargs.get("cursor"),
+            session=session,
+            user=user,
+        )
+    return rows, response
+
+
+class TestCandidateRows:
+    """Candidate + latest application rows"""
+
+    def test_admin_sees_latest_application(self, tracker_session):
+        """Every live candidate, newest first, with its most recent application"""
+        _seed(tracker_session)
+        rows, _ = _call(tracker_session, User(username="a", role="admin"))
+
+        assert [r.candidate.id for r in rows] == ["c4", "c3", "c2", "c1", "c0"]
+        assert all(r.application.status == "S2" for r in rows)
+
+    def test_restricted_user_filtered_by_team(self, tracker_session):
+        """Recruiters only see applications created by their team"""
+        _seed(tracker_session)
+        user = User(username="r", role="recruiter", team_location=" dubai ")
+        rows, _ = _call(tracker_session, user)
+
+        # c0 has no Dubai application at all
+        assert [r.candidate.id for r in rows] == ["c4", "c3", "c2", "c1"]
+        # Latest *visible* application: the newer Abu Dhabi one is hidden
+        assert [r.application.id for r in rows] == ["a41", "a31", "a21", "a11"]
+
+    def test_restricted_user_without_location_sees_nothing(self, tracker_session):
+        """No team location means no visible rows"""
+        _seed(tracker_session)
+        rows, _ = _call(tracker_session, User(username="r", role="recruiter"))
+        assert rows == []
+
+    def test_keyset_pagination(self, tracker_session):
+        """Pages follow the cursor without gaps or repeats"""
+        _seed(tracker_session)
+        admin = User(username="a", role="admin")
+
+        first, response = _call(tracker_session, admin, limit=2)
+        cursor = response.headers["X-Next-Cursor"]
+        second, response = _call(tracker_session, admin, limit=2, cursor=cursor)
+        third, response = _call(tracker_session, admin, limit=2, cursor=response.headers["X-Next-Cursor"])
+
+        ids = [r.candidate.id for r in first + second + third]
+        assert ids == ["c4", "c3", "c2", "c1", "c0"]
+        assert "X-Next-Cursor" not in response.headers
@@ -0,0 +1,138 @@
+"""
+Tests for the tracker bulk XLSX import (app/services/tracker_import_service.py).
+
+Tests cover:
+- Streaming parse with per-row errors and warnings
+- Name resolution against existing candidates
+- Dry-run preview writes nothing
+- Single transaction: a failure leaves no partial import
+"""
+from datetime import date, datetime
+from io import BytesIO
+
+import pytest
+from openpyxl import Workbook
+from sqlmodel import Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.models.tracker.base import tracker_metadata
+from app.models.tracker.models import TrackerApplication, TrackerCandidate
+from app.services.tracker_import_service import (
+    SelectionsImportError,
+    import_selections,
+    parse_selections_workbook,
+)
+
+HEADER = ["Date", "Candidate Name", "Position", "Client", "Status", "Recruiter",
+          "Account Manager", "Recruitment Manager", "Comment"]
+
+
+def _workbook(rows, header=HEADER) -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(header)
+    for r in rows:
+        ws.append(r)
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def tracker_session():
+    """In-memory SQLite tracker database."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    tracker_metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _import(session, parsed, dry_run=False):
+    return import_selections(
+        session, TrackerCandidate, TrackerApplication, parsed,
+        created_by_username="admin", created_by_role="admin",
+        created_by_team_location="Dubai", dry_run=dry_run,
+    )
+
+
+class TestParseSelections:
+    """Workbook parsing"""
+
+    def test_rows_errors_and_warnings(self):
+        """Rows without a name are reported; bad dates import without a date"""
+        raw = _workbook([
+            [datetime(2024, 5, 1), "Alice", "Dev", "Acme", "", "Bob", None, None, None],
+            ["not-a-date", "Carol", "QA", None, "Joined", None, None, None, "ok"],
+            ["2024-05-03", None, "Orphan", None, None, None, None, None, None],
+            [None] * 9,
+        ])
+        parsed = parse_selections_workbook(raw)
+
+        assert [r["name"] for r in parsed.rows] == ["Alice", "Carol"]
+        assert parsed.rows[0]["applied_date"] == date(2024, 5, 1)
+        assert parsed.rows[0]["status"] == "MRF Pending"
+        assert parsed.rows[1]["applied_date"] is None
+        assert parsed.warnings[0]["row"] == 3
+        assert parsed.errors == [{"row": 4, "error": "Missing candidate name"}]
+        assert parsed.skipped == 2
+
+    def test_missing_required_column(self):
+        """A sheet without the name column is rejected outright"""
+        with pytest.raises(SelectionsImportError):
+            parse_selections_workbook(_workbook([["x"]], header=["Position"]))
+
+    def test_invalid_file(self):
+        """Non-XLSX bytes are rejected"""
+        with pytest.raises(SelectionsImportError):
+            parse_selections_workbook(b"not a workbook")
+
+
+class TestImportSelections:
+    """Bulk import into the tracker tables"""
+
+    def test_reuses_existing_candidates(self, tracker_session):
+        """Known names map to the existing candidate; new names are created once"""
+        tracker_session.add(TrackerCandidate(id="existing", name="Alice"))
+        tracker_session.commit()
+        parsed = parse_selections_workbook(_workbook([
+            [None, "Alice", "Dev"], [None, "Dan", "Ops"], [None, "Dan", "SRE"],
+        ]))
+
+        result = _import(tracker_session, parsed)
+
+        assert result["inserted_candidates"] == 1
+        assert result["inserted_applications"] == 3
+        apps = tracker_session.exec(select(TrackerApplication)).all()
+        by_position = {a.position: a for a in apps}
+        assert by_position["Dev"].candidate_id == "existing"
+        assert by_position["Ops"].candidate_id == by_position["SRE"].candidate_id
+        assert by_position["Ops"].created_by_team_location == "Dubai"
+
+    def test_dry_run_writes_nothing(self, tracker_session):
+        """Dry run previews the import without touching the tables"""
+        parsed = parse_selections_workbook(_workbook([[None, "Eve", "PM"]]))
+
+        result = _import(tracker_session, parsed, dry_run=True)
+
+        assert result["dry_run"] is True
+        assert result["preview"][0]["new_candidate"] is True
+        assert tracker_session.exec(select(TrackerCandidate)).all() == []
+
+    def test_failure_rolls_back(self, tracker_session):
+        """An error while inserting applications leaves no new candidates behind"""
+        parsed = parse_selections_workbook(_workbook([[None, "Frank", "Dev"]]))
+        real_bulk = tracker_session.bulk_insert_mappings
+
+        def failing_bulk(mapper, mappings):
+            if mapper is TrackerApplication:
+                raise RuntimeError("boom")
+            return real_bulk(mapper, mappings)
+
+        with patch.object(tracker_session, "bulk_insert_mappings", side_effect=failing_bulk):
+            with pytest.raises(RuntimeError):
+                _import(tracker_session, parsed)
+
+        assert tracker_session.exec(select(TrackerCandidate)).all() == []
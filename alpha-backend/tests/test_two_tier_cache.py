@@ -0,0 +1,114 @@
+"""
+Tests for the shared cache helpers (app/utils/redis_cache.py, app/utils/singleton.py).
+
+Tests cover:
+- TwoTierCache: LRU bound, local TTL and negative entries, Redis read-through
+- get_many: local hits first, one MGET for the rest, encode/decode between tiers
+- lazy_singleton builds its instance once under concurrent first calls
+- shared_lock uses a Redis lock when connected
+"""
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils.redis_cache import RedisCacheService, TwoTierCache, shared_lock
+from app.utils.singleton import lazy_singleton
+
+
+def _redis(client):
+    cache = RedisCacheService.__new__(RedisCacheService)
+    cache.redis_client, cache.is_connected = client, True
+    cache.stats = {"hits": 0, "misses": 0, "redis_hits": 0, "fallback_hits": 0, "errors": 0}
+    cache.fallback_cache, cache.fallback_ttl = {}, {}
+    return cache
+
+
+@pytest.fixture
+def no_redis():
+    with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=None):
+        yield
+
+
+class TestTwoTierCache:
+    """Local tier and Redis read-through"""
+
+    def test_lru_bound(self, no_redis):
+        cache = TwoTierCache("t", max_local_entries=2)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        assert cache.get("a") is None
+        assert cache.get("c") == "c"
+        assert len(cache) == 2
+        assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+    def test_local_ttl_and_negative_entries(self, no_redis):
+        cache = TwoTierCache("t", local_ttl_seconds=60)
+        cache.remember("gone", None, ttl_seconds=0.01)
+        assert cache.lookup_local("gone") == (True, None)
+        time.sleep(0.02)
+        assert cache.lookup_local("gone") == (False, None)
+
+    def test_redis_read_through(self):
+        client = MagicMock()
+        client.get.return_value = json.dumps({"v": 1})
+        cache = TwoTierCache("t", decode=lambda stored: stored["v"])
+        with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=_redis(client)):
+            assert cache.get("k") == 1
+            assert cache.get("k") == 1
+        client.get.assert_called_once_with("cv_app:t:k")
+        assert cache.stats["redis_hits"] == 1 and cache.stats["local_hits"] == 1
+
+    def test_get_many_one_mget(self):
+        client = MagicMock()
+        client.mget.return_value = [json.dumps("from-redis"), None]
+        cache = TwoTierCache("t")
+        with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=_redis(client)):
+            cache.remember("local", "here")
+            assert cache.get_many(["local", "r1", "r2"]) == {"local": "here", "r1": "from-redis"}
+        client.mget.assert_called_once_with(["cv_app:t:r1", "cv_app:t:r2"])
+        assert cache.stats == {"hits": 2, "local_hits": 1, "redis_hits": 1, "misses": 1, "stores": 0}
+
+    def test_set_encodes_for_redis(self):
+        client = MagicMock()
+        cache = TwoTierCache("t", ttl_seconds=30, encode=lambda value: {"wrapped": value})
+        with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=_redis(client)):
+            cache.set("k", 5)
+        assert cache.lookup_local("k") == (True, 5)
+        client.setex.assert_called_once_with("cv_app:t:k", 30, json.dumps({"wrapped": 5}))
+
+
+class TestLazySingleton:
+    """get_*() accessors"""
+
+    def test_built_once(self):
+        built = []
+
+        @lazy_singleton
+        def get_thing():
+            time.sleep(0.01)
+            built.append(object())
+            return built[-1]
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_thing())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(built) == 1 and all(r is built[0] for r in results)
+
+        get_thing.reset()
+        assert get_thing() is not built[0]
+
+
+class TestSharedLock:
+    def test_redis_lock(self):
+        client = MagicMock()
+        with patch("app.utils.redis_cache.get_connected_redis_cache", return_value=_redis(client)):
+            with shared_lock("cv_notes:cv-1", timeout_seconds=5):
+                client.lock.return_value.__enter__.assert_called_once()
+        client.lock.assert_called_once_with("cv_app:locks:cv_notes:cv-1", timeout=5, blocking_timeout=5)
+        client.lock.return_value.__exit__.assert_called_once()
@@ -0,0 +1,144 @@
+"""
+Tests for the authenticated-user cache (app/utils/user_cache.py, app/deps/auth.py).
+
+Tests cover:
+- TTL expiry and LRU size bound
+- Per-token keys and per-user invalidation
+- get_current_user serving repeat requests without the auth DB
+- Admin deactivation taking effect immediately
+- Redis pub/sub invalidation published and applied by the listener
+"""
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from app.models.user import User
+from app.utils import user_cache as user_cache_module
+from app.utils.security import create_access_token, hash_password
+from app.utils.user_cache import (
+    USER_CACHE_INVALIDATION_CHANNEL,
+    UserCache,
+    UserCacheInvalidationListener,
+    get_user_cache,
+)
+
+
+class TestUserCache:
+    """In-process cache behaviour"""
+
+    def test_ttl_expiry(self):
+        """Entries expire after the TTL"""
+        cache = UserCache(ttl_seconds=10)
+        with patch.object(user_cache_module.time, "monotonic", return_value=100.0):
+            cache.set("alice", 1, {"username": "alice"})
+            assert cache.get("alice", 1) == {"username": "alice"}
+        with patch.object(user_cache_module.time, "monotonic", return_value=111.0):
+            assert cache.get("alice", 1) is None
+        assert len(cache) == 0
+
+    def test_size_bound_evicts_least_recent(self):
+        """The least recently used entry goes first"""
+        cache = UserCache(ttl_seconds=60, max_entries=2)
+        cache.set("a", 1, {})
+        cache.set("b", 1, {})
+        cache.get("a", 1)
+        cache.set("c", 1, {})
+        assert cache.get("b", 1) is None
+        assert cache.get("a", 1) == {}
+
+    def test_discard_drops_every_token(self):
+        """Invalidation removes all tokens for the user only"""
+        cache = UserCache(ttl_seconds=60)
+        cache.set("a", 1, {})
+        cache.set("a", 2, {})
+        cache.set("b", 1, {})
+        cache.discard("a")
+        assert cache.get("a", 1) is None and cache.get("a", 2) is None
+        assert cache.get("b", 1) == {}
+
+    def test_disabled_with_zero_ttl(self):
+        """TTL 0 turns caching off"""
+        cache = UserCache(ttl_seconds=0)
+        cache.set("a", 1, {})
+        assert cache.get("a", 1) is None
+
+
+@pytest.mark.integration
+@pytest.mark.auth
+class TestCurrentUserCaching:
+    """get_current_user with the cache"""
+
+    def _user_selects(self, db_engine, statements):
+        event.listen(db_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def test_repeat_requests_skip_db(self, test_client, db_session, db_engine):
+        """Polling with one token queries the user table once"""
+        db_session.add(User(username="poller", password_hash=hash_password("x"), role="user"))
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token('poller', 'user')}"}
+
+        statements = []
+        self._user_selects(db_engine, statements)
+        for _ in range(3):
+            assert test_client.get("/api/auth/me", headers=headers).status_code == status.HTTP_200_OK
+
+        user_queries = [s for s in statements if "FROM user" in s and "user.username" in s]
+        assert len(user_queries) == 1
+
+    def test_admin_deactivation_invalidates(self, test_client, db_session):
+        """A deactivated user is rejected on the very next request"""
+        admin = User(username="boss", password_hash=hash_password("x"), role="admin")
+        target = User(username="victim", password_hash=hash_password("x"), role="user")
+        db_session.add_all([admin, target])
+        db_session.commit()
+        admin_headers = {"Authorization": f"Bearer {create_access_token('boss', 'admin')}"}
+        user_headers = {"Authorization": f"Bearer {create_access_token('victim', 'user')}"}
+
+        assert test_client.get("/api/auth/me", headers=user_headers).status_code == status.HTTP_200_OK
+        response = test_client.patch(
+            f"/api/admin/users/{target.id}", json={"is_active": False}, headers=admin_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        assert test_client.get("/api/auth/me", headers=user_headers).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestRedisInvalidation:
+    """Cross-worker invalidation over Redis pub/sub"""
+
+    def test_invalidate_publishes(self):
+        """invalidate() publishes the username when Redis is connected"""
+        client = Mock()
+        cache = UserCache(ttl_seconds=60)
+        with patch.object(user_cache_module, "_redis_client", return_value=client):
+            cache.invalidate("alice")
+        client.publish.assert_called_once_with(USER_CACHE_INVALIDATION_CHANNEL, "alice")
+
+    def test_listener_applies_messages(self):
+        """Messages from other workers drop the local entry"""
+        cache = UserCache(ttl_seconds=60)
+        cache.set("alice", 1, {})
+        listener = UserCacheInvalidationListener(cache)
+
+        pubsub = Mock()
+
+        def get_message(timeout):
+            listener._stop.set()
+            return {"type": "message", "data": "alice"}
+
+        pubsub.get_message.side_effect = get_message
+        client = Mock()
+        client.pubsub.return_value = pubsub
+
+        listener._run(client)
+
+        pubsub.subscribe.assert_called_once_with(USER_CACHE_INVALIDATION_CHANNEL)
+        assert cache.get("alice", 1) is None
+
+    def test_listener_not_started_without_redis(self):
+        """No Redis means no thread; the TTL bounds staleness"""
+        listener = UserCacheInvalidationListener(get_user_cache())
+        with patch.object(user_cache_module, "_redis_client", return_value=None):
+            assert listener.start() is False
@@ -1,6 +1,6 @@
 // components/results/WeightsPanel.tsx
 'use client';
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { RotateCcw, Info, Sliders } from 'lucide-react';
 import { useAppStore } from '@/stores/appStore';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
@@ -9,7 +9,7 @@ import { Badge } from '@/components/ui/badge';
 import { Alert, AlertDescription } from '@/components/ui/alert';
 
 export default function WeightsPanel() {
-  const { matchWeights, setMatchWeights } = useAppStore();
+  const { matchWeights, setMatchWeights, matchResult, rerankMatch } = useAppStore();
   
   // Default weights
   const defaultWeights = {
@@ -55,15 +55,28 @@ export default function WeightsPanel() {
     setNormalizedWeights(normalized);
   }, [localWeights]);
   
+  // Re-rank the current results server-side (component scores are reused, no new /match run)
+  const rerankTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const scheduleRerank = (weights: typeof defaultWeights) => {
+    if (!matchResult?.job_id) return;
+    if (rerankTimer.current) clearTimeout(rerankTimer.current);
+    rerankTimer.current = setTimeout(() => rerankMatch(weights), 300);
+  };
+  useEffect(() => () => {
+    if (rerankTimer.current) clearTimeout(rerankTimer.current);
+  }, []);
+  
   const handleWeightChange = (dimension: keyof typeof localWeights, value: number) => {
     const newWeights = { ...localWeights, [dimension]: value };
     setLocalWeights(newWeights);
     setMatchWeights(newWeights);
+    scheduleRerank(newWeights);
   };
   
   const resetToDefaults = () => {
     setLocalWeights(defaultWeights);
     setMatchWeights(defaultWeights);
+    scheduleRerank(defaultWeights);
   };
   
   const total = Object.values(localWeights).reduce((sum, val) => sum + val, 0);
@@ -6,6 +6,8 @@ import { ApiErrorHandler, RequestRetryHandler } from './error-handler';
 import {
   MatchRequest,
   MatchResponse,
+  MatchJobStatus,
+  MatchWeights,
   CVListResponse,
   JDListResponse,
   HealthResponse,
@@ -308,6 +310,26 @@ class ApiClient {
     return response.data;
   }
 
+  async getMatchJob(jobId: string): Promise<MatchJobStatus> {
+    const token = localStorage.getItem('auth_token');
+    const response = await this.client.get<MatchJobStatus>(`/api/match/jobs/${jobId}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+    });
+    return response.data;
+  }
+
+  async rerankMatchJob(jobId: string, weights: MatchWeights): Promise<MatchResponse> {
+    const token = localStorage.getItem('auth_token');
+    const response = await this.client.post<MatchResponse>(`/api/match/jobs/${jobId}/rerank`, { weights }, {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+    });
+    return response.data;
+  }
+
   async matchText(jdText: string, cvText: string): Promise<any> {
     const response = await this.client.post('/api/match-text', {
       jd_text: jdText,
@@ -933,6 +955,8 @@ export const api = {
 
   // Matching
   matchCandidates: (request: MatchRequest) => RequestRetryHandler.withRetry(() => apiClient.matchCandidates(request)),
+  getMatchJob: (jobId: string) => RequestRetryHandler.withRetry(() => apiClient.getMatchJob(jobId)),
+  rerankMatchJob: (jobId: string, weights: MatchWeights) => RequestRetryHandler.withRetry(() => apiClient.rerankMatchJob(jobId, weights)),
   matchText: (jdText: string, cvText: string) => RequestRetryHandler.withRetry(() => apiClient.matchText(jdText, cvText)),
 
   // System
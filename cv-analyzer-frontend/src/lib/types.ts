@@ -201,17 +201,39 @@ export interface CandidateBreakdown {
   responsibilities_alternatives: AlternativesItem[];
 }
 
+export interface MatchJobStatus {
+  job_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  queue_position?: number | null;
+  eta_seconds?: number | null;
+  error?: string | null;
+  result?: MatchResponse;
+}
+
 export interface MatchResponse {
   // Queue status fields
   is_queued?: boolean;
   queue_position?: number | null;
   estimated_wait_time?: number | null; // seconds
   message?: string | null;
+  // Match scheduler job; poll GET /api/match/jobs/{job_id} instead of resubmitting
+  job_id?: string | null;
   jd_id: string;
   jd_job_title: string;
   jd_years: number;
   normalized_weights: MatchWeights;
   candidates: CandidateBreakdown[];
+  // Weight-independent scores per candidate (percent); used by POST /api/match/jobs/{job_id}/rerank
+  component_scores?: ComponentScores[];
+}
+
+export interface ComponentScores {
+  cv_id: string;
+  skills: number;
+  responsibilities: number;
+  job_title: number;
+  experience: number;
+  business_rule_modifier: number;
 }
 
 // System types
@@ -3,6 +3,7 @@ import { devtools } from 'zustand/middleware';
 import {
   MatchWeights,
   MatchResponse,
+  MatchJobStatus,
   CVListItem,
   JDListItem,
   HealthResponse,
@@ -110,6 +111,7 @@ interface AppState {
   // Matching actions
   setMatchWeights: (weights: Partial<MatchWeights>) => void;
   runMatch: (request?: Partial<MatchRequest>) => Promise<void>;
+  rerankMatch: (weights: MatchWeights) => Promise<void>;
   clearMatchResult: () => void;
   setMatchingProgress: (progress: Partial<MatchingProgress>) => void;
   hideMatchingProgress: () => void;
@@ -591,12 +593,16 @@ export const useAppStore = create<AppState>()(
               }
             });
             
-            // Poll for results every 10 seconds
+            // Poll the queued job every 10 seconds (it keeps its place; no resubmit)
+            const jobId = result.job_id;
             const pollInterval = setInterval(async () => {
               try {
-                const pollResult = await api.matchCandidates(matchRequest);
+                const pollResult: MatchJobStatus = jobId
+                  ? await api.getMatchJob(jobId)
+                  : { job_id: '', status: 'queued' as const, result: await api.matchCandidates(matchRequest) };
+                const finished = pollResult.result && !pollResult.result.is_queued ? pollResult.result : null;
                 
-                if (!pollResult.is_queued && pollResult.candidates.length > 0) {
+                if (finished) {
                   // Match completed!
                   clearInterval(pollInterval);
                   if (progressInterval) clearInterval(progressInterval);
@@ -604,19 +610,29 @@ export const useAppStore = create<AppState>()(
                   hideMatchingProgress();
                   
                   set({
-                    matchResult: pollResult,
+                    matchResult: finished,
                     matchingQueue: null,
                   });
                   setLoading('matching', false);
-                  logger.info(`Matching completed: ${pollResult.candidates.length} candidates processed`);
-                } else if (pollResult.is_queued) {
-                  // Still queued, update position
+                  logger.info(`Matching completed: ${finished.candidates.length} candidates processed`);
+                } else if (pollResult.status === 'failed') {
+                  clearInterval(pollInterval);
+                  if (progressInterval) clearInterval(progressInterval);
+                  progressInterval = null;
+                  hideMatchingProgress();
+                  set({ matchingQueue: null });
+                  logger.error('Queued matching failed', pollResult.error);
+                  setLoading('matching', false, pollResult.error || 'Failed to run matching');
+                } else {
+                  // Still queued or running, update position / ETA
                   set({
                     matchingQueue: {
                       isQueued: true,
-                      queuePosition: pollResult.queue_position || null,
-                      estimatedWaitTime: pollResult.estimated_wait_time || null,
-                      message: pollResult.message || null,
+                      queuePosition: pollResult.queue_position ?? pollResult.result?.queue_position ?? null,
+                      estimatedWaitTime: pollResult.eta_seconds ?? pollResult.result?.estimated_wait_time ?? null,
+                      message: pollResult.status === 'running'
+                        ? 'Your match is running now.'
+                        : (pollResult.result?.message || result.message || null),
                     }
                   });
                 }
@@ -667,6 +683,20 @@ export const useAppStore = create<AppState>()(
         }
       },
       
+      rerankMatch: async (weights: MatchWeights) => {
+        // Re-apply weights to the finished match server-side instead of re-running /match
+        const jobId = get().matchResult?.job_id;
+        if (!jobId) return;
+        try {
+          const reranked = await api.rerankMatchJob(jobId, weights);
+          if (get().matchResult?.job_id === jobId) {
+            set({ matchResult: reranked });
+          }
+        } catch (error: any) {
+          logger.warn('Failed to re-rank match with new weights', error);
+        }
+      },
+      
       clearMatchResult: () => {
         set({ matchResult: null });
       },